@@ -7,12 +7,24 @@ import livy.cli.config
 import livy.cli.read_log
 import livy.cli.submit
 import livy.cli.kill
+import livy.cli.ls
+import livy.cli.top
+import livy.cli.search
+import livy.cli.run_dag
+import livy.cli.history
+import livy.cli.analyze
 
 _ENTRYPOINT = {
     "config": livy.cli.config.main,
     "read-log": livy.cli.read_log.main,
     "submit": livy.cli.submit.main,
     "kill": livy.cli.kill.main,
+    "ls": livy.cli.ls.main,
+    "top": livy.cli.top.main,
+    "search": livy.cli.search.main,
+    "run-dag": livy.cli.run_dag.main,
+    "history": livy.cli.history.main,
+    "analyze": livy.cli.analyze.main,
 }
 
 
@@ -23,6 +35,12 @@ def main():
     subparsers.add_parser("submit", help=livy.cli.submit.__doc__)
     subparsers.add_parser("read-log", help=livy.cli.read_log.__doc__)
     subparsers.add_parser("kill", help=livy.cli.kill.__doc__)
+    subparsers.add_parser("ls", help=livy.cli.ls.__doc__)
+    subparsers.add_parser("top", help=livy.cli.top.__doc__)
+    subparsers.add_parser("search", help=livy.cli.search.__doc__)
+    subparsers.add_parser("run-dag", help=livy.cli.run_dag.__doc__)
+    subparsers.add_parser("history", help=livy.cli.history.__doc__)
+    subparsers.add_parser("analyze", help=livy.cli.analyze.__doc__)
     subparsers.add_parser("config", help=livy.cli.config.__doc__)
 
     parser.add_argument(
@@ -0,0 +1,353 @@
+"""Admission control for batch submission. Submissions are held in a local
+priority queue until the number of active batches in the target YARN queue drops
+below the limit, so a large set of jobs would not flood a queue.
+"""
+import collections
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+import typing
+
+import livy.client
+import livy.exception
+
+__all__ = ["LivyAdmissionController", "LivyAdmissionStats"]
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("not_started", "starting", "running", "recovering")
+
+DEFAULT_QUEUE = "default"
+
+_PATTERN_QUEUE = re.compile(r"^\s+queue: (\S+)", re.MULTILINE)
+
+
+class LivyAdmissionStats(typing.NamedTuple):
+    """Metrics of :py:class:`LivyAdmissionController`."""
+
+    admitted: int
+    """Number of submissions admitted.
+    """
+
+    waiting: int
+    """Number of submissions currently held in queue.
+    """
+
+    total_wait: float
+    """Total seconds that admitted submissions have waited.
+    """
+
+    max_wait: float
+    """Longest wait in seconds among the admitted submissions.
+    """
+
+    wait_by_queue: typing.Dict[str, float]
+    """Total wait in seconds of each YARN queue.
+    """
+
+    active: typing.Dict[str, int]
+    """Number of active batches counted in each YARN queue.
+    """
+
+    unknown: int
+    """Number of active batches that their queue is not known yet. They are
+    counted against every queue.
+    """
+
+    @property
+    def mean_wait(self) -> float:
+        """Average wait in seconds of the admitted submissions."""
+        return self.total_wait / self.admitted if self.admitted else 0.0
+
+
+class LivyAdmissionController:
+    """Gate in front of :py:meth:`~livy.client.LivyClient.create_batch`.
+
+    The controller counts the active batches in each YARN queue; a submission
+    waits until the count of its queue is below the limit. Among the waiting
+    submissions to the same queue, the one with higher priority goes first, and
+    the earlier one goes first when the priorities are equal.
+
+    Batches created through this controller are always counted. Other batches
+    are counted when they are submitted by `user`; their queue is read from the
+    head of the log. A batch is counted against every queue until its queue is
+    known, e.g. it is still ``starting``. Counts are updated by listing requests
+    no more than once per `interval` seconds, and updated locally between the
+    listings.
+
+    The controller is thread-safe; it is designed to be shared by the worker
+    threads in :py:func:`livy.bulk.submit_many`.
+    """
+
+    def __init__(
+        self,
+        client: livy.client.LivyClient,
+        queue_limits: typing.Dict[str, int] = None,
+        default_limit: int = None,
+        user: str = None,
+        interval: float = 5.0,
+        page_size: int = 1000,
+        max_lookups: int = 10,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            client : livy.client.LivyClient
+                Livy client
+            queue_limits : typing.Dict[str, int]
+                Max number of active batches in each YARN queue
+            default_limit : int
+                Limit for the queues not in `queue_limits`; ``None`` for no
+                limit.
+            user : str
+                Also count the batches that its owner or proxy user is this
+                user, e.g. the ones submitted by other processes.
+            interval : float
+                Min seconds between two listing requests
+            page_size : int
+                Number of batches in each listing request
+            max_lookups : int
+                Max number of logs to be read for the queue names in each
+                listing. The batches beyond that are counted as unknown queue
+                until a later listing.
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        """
+        if not isinstance(client, livy.client.LivyClient):
+            raise livy.exception.TypeError("client", livy.client.LivyClient, client)
+        for queue, limit in (queue_limits or {}).items():
+            if not isinstance(limit, int) or limit < 1:
+                raise livy.exception.TypeError(
+                    f"limit of {queue}", "positive int", limit
+                )
+        if default_limit is not None and (
+            not isinstance(default_limit, int) or default_limit < 1
+        ):
+            raise livy.exception.TypeError(
+                "default_limit", "positive int", default_limit
+            )
+
+        self.client = client
+        self.queue_limits = dict(queue_limits or {})
+        self.default_limit = default_limit
+        self.user = user
+        self.interval = interval
+        self.page_size = page_size
+        self.max_lookups = max_lookups
+
+        self._cond = threading.Condition()
+        self._waiting: typing.List[list] = []  # heap of [-priority, seq, queue]
+        self._seq = itertools.count()
+
+        self._active: typing.Counter[str] = collections.Counter()
+        self._unknown = 0
+        self._reserved: typing.Counter[str] = collections.Counter()
+        self._created: typing.Dict[int, typing.Tuple[str, float]] = {}
+        self._queue_cache: typing.Dict[int, str] = {}
+        self._refreshing = False
+        self._refreshed: typing.Optional[float] = None
+
+        self._admitted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._wait_by_queue: typing.Dict[str, float] = collections.defaultdict(float)
+
+    def limit(self, queue: str) -> typing.Optional[int]:
+        """Limit of the queue. ``None`` for no limit."""
+        return self.queue_limits.get(queue, self.default_limit)
+
+    def stats(self) -> LivyAdmissionStats:
+        """Get the metrics."""
+        with self._cond:
+            return LivyAdmissionStats(
+                admitted=self._admitted,
+                waiting=len(self._waiting),
+                total_wait=self._total_wait,
+                max_wait=self._max_wait,
+                wait_by_queue=dict(self._wait_by_queue),
+                active={q: n for q, n in self._active.items() if n},
+                unknown=self._unknown,
+            )
+
+    def create_batch(self, priority: int = 0, **kwargs) -> livy.client.Batch:
+        """Wait for admission, then create the batch. Accepts the same keyword
+        arguments to :py:meth:`~livy.client.LivyClient.create_batch`.
+
+        Parameters
+        ----------
+            priority : int
+                Submissions with higher value are admitted first
+
+        Raises
+        ------
+        RequestError
+            On connection error
+        """
+        queue = kwargs.get("queue") or DEFAULT_QUEUE
+        self._acquire(queue, priority)
+
+        try:
+            batch = self.client.create_batch(**kwargs)
+        except BaseException:
+            with self._cond:
+                self._reserved[queue] -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._reserved[queue] -= 1
+            if isinstance(batch.get("id"), int):
+                self._active[queue] += 1
+                self._created[batch["id"]] = queue, time.monotonic()
+            self._cond.notify_all()
+
+        return batch
+
+    def _acquire(self, queue: str, priority: int = 0) -> float:
+        """Block until a batch could be submitted to the queue. The slot is
+        reserved for the caller, who should create the batch then. Returns the
+        seconds waited."""
+        tick = time.monotonic()
+
+        if self.limit(queue) is None:
+            with self._cond:
+                self._reserved[queue] += 1
+                self._record_wait(queue, 0.0)
+            return 0.0
+
+        ticket = [-priority, next(self._seq), queue]
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+
+        try:
+            while True:
+                with self._cond:
+                    if self._refreshed is not None and self._admissible(ticket):
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._reserved[queue] += 1
+                        elapsed = time.monotonic() - tick
+                        self._record_wait(queue, elapsed)
+                        self._cond.notify_all()
+                        break
+
+                    now = time.monotonic()
+                    due = (
+                        self._refreshed is None
+                        or now - self._refreshed >= self.interval
+                    )
+                    if self._refreshing or not due:
+                        timeout = self.interval
+                        if self._refreshed is not None:
+                            timeout = self._refreshed + self.interval - now
+                        self._cond.wait(max(0.05, timeout))
+                        continue
+                    self._refreshing = True
+
+                try:
+                    self.refresh()
+                finally:
+                    with self._cond:
+                        self._refreshing = False
+                        self._cond.notify_all()
+
+        except BaseException:
+            with self._cond:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            raise
+
+        if elapsed >= 1.0:
+            logger.info("Admitted to queue %s after %.1f seconds", queue, elapsed)
+        return elapsed
+
+    def _admissible(self, ticket: list) -> bool:
+        queue = ticket[2]
+        count = self._active[queue] + self._unknown + self._reserved[queue]
+        if count >= self.limit(queue):
+            return False
+        # first one in waiting list of the same queue
+        return ticket == min(t for t in self._waiting if t[2] == queue)
+
+    def _record_wait(self, queue: str, elapsed: float) -> None:
+        self._admitted += 1
+        self._total_wait += elapsed
+        self._max_wait = max(self._max_wait, elapsed)
+        self._wait_by_queue[queue] += elapsed
+
+    def refresh(self) -> None:
+        """Count the active batches in each queue by listing request."""
+        tick = time.monotonic()
+        with self._cond:
+            created = dict(self._created)
+
+        active = collections.Counter()
+        unknown = 0
+        lookups = 0
+        seen = set()
+        for batch in self.client.iter_batches(self.page_size):
+            if batch.get("state") not in ACTIVE_STATES:
+                continue
+
+            batch_id = batch["id"]
+            seen.add(batch_id)
+            if batch_id in created:
+                active[created[batch_id][0]] += 1
+            elif self.user and self.user in (
+                batch.get("owner"),
+                batch.get("proxyUser"),
+            ):
+                queue = self._queue_cache.get(batch_id)
+                if queue is None and lookups < self.max_lookups:
+                    lookups += 1
+                    queue = self._get_queue(batch_id)
+                if queue:
+                    active[queue] += 1
+                else:
+                    unknown += 1
+
+        for batch_id in set(self._queue_cache) - seen:
+            del self._queue_cache[batch_id]
+
+        with self._cond:
+            for batch_id, (queue, created_at) in list(self._created.items()):
+                if batch_id in seen:
+                    continue
+                if created_at >= tick:
+                    # created after the listing started
+                    active[queue] += 1
+                else:
+                    del self._created[batch_id]
+
+            self._active = active
+            self._unknown = unknown
+            self._refreshed = time.monotonic()
+
+        logger.debug("Active batches: %s; unknown queue: %d", dict(active), unknown)
+
+    def _get_queue(self, batch_id: int) -> typing.Optional[str]:
+        """Read queue name from the head of log. It is only written after the
+        application is accepted by YARN; ``None`` before that."""
+        try:
+            lines = self.client.get_batch_log(batch_id, from_=0, size=200)
+        except livy.exception.RequestError:
+            return None
+
+        m = _PATTERN_QUEUE.search("\n".join(lines))
+        if not m:
+            return None
+
+        queue = m.group(1)
+        if queue.startswith("root."):  # fair scheduler reports full path
+            queue = queue[5:]
+
+        self._queue_cache[batch_id] = queue
+        return queue
@@ -0,0 +1,539 @@
+"""Performance triage for Spark batches. The ``Finished task`` logs from
+``TaskSetManager`` carry the duration, host and executor of every task; they are
+aggregated into the distribution of task durations in each stage, the load of
+each executor and host, the stragglers and skewed stages, and a timeline of the
+stages.
+
+The logs are processed in a single pass. Task durations are kept in histograms
+with a fixed set of log-scale buckets, and only the slowest few tasks of each
+stage are kept, so the memory usage does not grow with the number of tasks.
+
+:py:class:`LivyTaskAnalyzer` is a sink that could be attached to
+:py:meth:`livy.logreader.LivyBatchLogReader.add_sink`; or use
+:py:func:`analyze_batch` to fetch and analyze the logs of a batch page by page,
+with :py:meth:`livy.logreader.LivyBatchLogReader.export_pages`.
+"""
+import datetime
+import heapq
+import logging
+import math
+import re
+import statistics
+import threading
+import typing
+
+import livy.client
+import livy.exception
+import livy.export
+import livy.logreader
+
+__all__ = [
+    "analyze_batch",
+    "LivyTaskAnalyzer",
+    "LivyAnalysisReport",
+    "LivyStageStats",
+    "LivyExecutorStats",
+    "LivyHostStats",
+    "LivyTaskSample",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LivyTaskSample(typing.NamedTuple):
+    """A finished task."""
+
+    stage: str
+    """Task set ID, in ``<stage>.<attempt>`` format.
+    """
+
+    task: str
+    """Task index in stage, in ``<index>.<attempt>`` format.
+    """
+
+    duration_ms: int
+    """Milliseconds the task took.
+    """
+
+    host: str
+    """Host the task ran on.
+    """
+
+    executor: str
+    """Executor ID the task ran on.
+    """
+
+
+class LivyStageStats(typing.NamedTuple):
+    """Task durations of a stage. Percentiles are estimated from a log-scale
+    histogram, the relative error is within 5%."""
+
+    stage: str
+    """Task set ID, in ``<stage>.<attempt>`` format.
+    """
+
+    tasks: int
+    """Number of finished tasks.
+    """
+
+    total_ms: int
+    """Sum of task durations.
+    """
+
+    min_ms: int
+    """Duration of the fastest task.
+    """
+
+    p50_ms: float
+    """Median of task durations.
+    """
+
+    p90_ms: float
+    """90th percentile of task durations.
+    """
+
+    p99_ms: float
+    """99th percentile of task durations.
+    """
+
+    max_ms: int
+    """Duration of the slowest task.
+    """
+
+    start: typing.Optional[datetime.datetime]
+    """Time the task set is added, or estimated from the first task. ``None``
+    if the logs have no timestamp.
+    """
+
+    end: typing.Optional[datetime.datetime]
+    """Time the task set is removed, or the last task is finished.
+    """
+
+    stragglers: int
+    """Number of tasks slower than the straggler threshold. Approximate.
+    """
+
+    slowest: typing.List[LivyTaskSample]
+    """Slowest tasks, the slowest first.
+    """
+
+    @property
+    def mean_ms(self) -> float:
+        """Average of task durations."""
+        return self.total_ms / self.tasks if self.tasks else 0.0
+
+    @property
+    def skew(self) -> float:
+        """Ratio of the slowest task to the median."""
+        return self.max_ms / self.p50_ms if self.p50_ms else 0.0
+
+    @property
+    def duration(self) -> typing.Optional[float]:
+        """Seconds from start to end. ``None`` if it is unknown."""
+        if self.start is None or self.end is None:
+            return None
+        return (self.end - self.start).total_seconds()
+
+
+class LivyExecutorStats(typing.NamedTuple):
+    """Load of an executor."""
+
+    executor: str
+    """Executor ID.
+    """
+
+    host: str
+    """Host of the executor.
+    """
+
+    tasks: int
+    """Number of finished tasks.
+    """
+
+    total_ms: int
+    """Sum of task durations.
+    """
+
+    @property
+    def mean_ms(self) -> float:
+        """Average of task durations."""
+        return self.total_ms / self.tasks if self.tasks else 0.0
+
+
+class LivyHostStats(typing.NamedTuple):
+    """Load of a host."""
+
+    host: str
+    """Host name.
+    """
+
+    executors: int
+    """Number of executors ran tasks on this host.
+    """
+
+    tasks: int
+    """Number of finished tasks.
+    """
+
+    total_ms: int
+    """Sum of task durations.
+    """
+
+    @property
+    def mean_ms(self) -> float:
+        """Average of task durations."""
+        return self.total_ms / self.tasks if self.tasks else 0.0
+
+
+class LivyAnalysisReport(typing.NamedTuple):
+    """Result of :py:class:`LivyTaskAnalyzer`."""
+
+    stages: typing.List[LivyStageStats]
+    """Stages, ordered by start time.
+    """
+
+    executors: typing.List[LivyExecutorStats]
+    """Executors, the busiest first.
+    """
+
+    hosts: typing.List[LivyHostStats]
+    """Hosts, the busiest first.
+    """
+
+    skewed_stages: typing.List[str]
+    """Stages that the slowest task takes far longer than the median.
+    """
+
+    slow_hosts: typing.List[str]
+    """Hosts that the tasks on it are far slower than those on other hosts.
+    """
+
+    @property
+    def tasks(self) -> int:
+        """Number of finished tasks."""
+        return sum(s.tasks for s in self.stages)
+
+
+_BUCKET_BASE = 1.1
+_LOG_BASE = math.log(_BUCKET_BASE)
+
+
+class _Histogram:
+    """Log-scale histogram of durations in milliseconds. Bucket ``i`` holds the
+    values in ``[1.1^i - 1, 1.1^(i+1) - 1)``, thus a day is covered in about 250
+    buckets."""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.buckets: typing.Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value: int) -> None:
+        index = int(math.log(value + 1) / _LOG_BASE)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at the quantile; the geometric center of the bucket,
+        clamped by the exact min and max."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = _BUCKET_BASE ** (index + 0.5) - 1
+                return min(max(value, self.min), self.max)
+        return float(self.max)  # pragma: no cover
+
+    def count_above(self, value: float) -> int:
+        """Number of values above the threshold. Counted by buckets, so the
+        error is within the bucket that the threshold falls in."""
+        if not self.count or value >= self.max:
+            return 0
+        start = int(math.log(value + 1) / _LOG_BASE) + 1
+        return sum(n for i, n in self.buckets.items() if i >= start)
+
+
+class _Stage:
+    __slots__ = ("histogram", "slowest", "added", "removed", "first", "last")
+
+    def __init__(self) -> None:
+        self.histogram = _Histogram()
+        self.slowest: typing.List[tuple] = []  # min heap of (duration, seq, sample)
+        self.added: typing.Optional[datetime.datetime] = None
+        self.removed: typing.Optional[datetime.datetime] = None
+        self.first: typing.Optional[datetime.datetime] = None  # estimated start
+        self.last: typing.Optional[datetime.datetime] = None  # last task finished
+
+
+class LivyTaskAnalyzer:
+    """Aggregate the task logs of a batch. It is a sink that implements the
+    ``write`` / ``flush`` protocol; logs could also be fed by :py:meth:`feed`.
+
+    Memory usage is bounded by the number of stages, executors and hosts, not
+    the number of tasks.
+    """
+
+    _PATTERN_FINISH_TASK = re.compile(
+        r"Finished task (\S+) in stage (\S+) \(TID \d+\) in (\d+) ms on (\S+) "
+        r"\(executor (\S+)\)"
+    )
+    _PATTERN_ADD_TASKSET = re.compile(r"Adding task set (\S+) with \d+ tasks")
+    _PATTERN_REMOVE_TASKSET = re.compile(r"Removed TaskSet ([^\s,]+)")
+
+    def __init__(
+        self,
+        straggler_factor: float = 2.0,
+        skew_factor: float = 4.0,
+        min_straggler_ms: int = 1000,
+        top: int = 5,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            straggler_factor : float
+                A task is a straggler if it takes longer than this multiple of
+                the median of its stage
+            skew_factor : float
+                A stage is skewed if its slowest task takes longer than this
+                multiple of the median; also applied to the mean task
+                duration of hosts for finding the slow hosts
+            min_straggler_ms : int
+                Tasks faster than this are never stragglers, and stages that
+                the slowest task is faster than this are never skewed
+            top : int
+                Number of the slowest tasks to be kept for each stage
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        """
+        for name, value in (
+            ("straggler_factor", straggler_factor),
+            ("skew_factor", skew_factor),
+        ):
+            if not isinstance(value, (int, float)) or value <= 1:
+                raise livy.exception.TypeError(name, "number greater than 1", value)
+        if not isinstance(top, int) or top < 0:
+            raise livy.exception.TypeError("top", "non-negative int", top)
+
+        self.straggler_factor = straggler_factor
+        self.skew_factor = skew_factor
+        self.min_straggler_ms = min_straggler_ms
+        self.top = top
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._stages: typing.Dict[str, _Stage] = {}
+        self._executors: typing.Dict[str, list] = {}  # id -> [host, tasks, ms]
+        self._hosts: typing.Dict[str, list] = {}  # host -> [executors, tasks, ms]
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Check a record."""
+        self.feed(record.name, record.message, record.created)
+
+    def flush(self) -> None:
+        """Nothing to flush. For the sink protocol."""
+
+    def feed(self, name: str, message: str, created: datetime.datetime = None) -> None:
+        """Check a log.
+
+        Parameters
+        ----------
+            name : str
+                Logger name
+            message : str
+                Log message
+            created : datetime.datetime
+                Time the log is created
+        """
+        name = name.rsplit(".", 1)[-1]
+        if name == "TaskSetManager":
+            m = self._PATTERN_FINISH_TASK.match(message)
+            if m:
+                task, stage, duration, host, executor = m.groups()
+                self._add_task(stage, task, int(duration), host, executor, created)
+
+        elif name.endswith("Scheduler") or name == "TaskSchedulerImpl":
+            m = self._PATTERN_ADD_TASKSET.match(message)
+            if m:
+                with self._lock:
+                    self._get_stage(m.group(1)).added = created
+                return
+
+            m = self._PATTERN_REMOVE_TASKSET.match(message)
+            if m:
+                with self._lock:
+                    self._get_stage(m.group(1)).removed = created
+
+    def _add_task(
+        self,
+        stage_id: str,
+        task: str,
+        duration: int,
+        host: str,
+        executor: str,
+        created: typing.Optional[datetime.datetime],
+    ) -> None:
+        with self._lock:
+            stage = self._get_stage(stage_id)
+            stage.histogram.add(duration)
+
+            if self.top:
+                self._seq += 1
+                item = (duration, self._seq, (task, duration, host, executor))
+                if len(stage.slowest) < self.top:
+                    heapq.heappush(stage.slowest, item)
+                elif duration > stage.slowest[0][0]:
+                    heapq.heapreplace(stage.slowest, item)
+
+            if created:
+                started = created - datetime.timedelta(milliseconds=duration)
+                if stage.first is None or started < stage.first:
+                    stage.first = started
+                if stage.last is None or created > stage.last:
+                    stage.last = created
+
+            entry = self._executors.get(executor)
+            if entry is None:
+                entry = self._executors[executor] = [host, 0, 0]
+                self._hosts.setdefault(host, [0, 0, 0])[0] += 1
+            entry[1] += 1
+            entry[2] += duration
+
+            entry = self._hosts.setdefault(host, [0, 0, 0])
+            entry[1] += 1
+            entry[2] += duration
+
+    def _get_stage(self, stage_id: str) -> _Stage:
+        stage = self._stages.get(stage_id)
+        if stage is None:
+            stage = self._stages[stage_id] = _Stage()
+        return stage
+
+    def report(self) -> LivyAnalysisReport:
+        """Summarize the logs checked so far."""
+        with self._lock:
+            stages = [
+                self._stage_stats(stage_id, stage)
+                for stage_id, stage in self._stages.items()
+                if stage.histogram.count
+            ]
+            executors = [
+                LivyExecutorStats(executor, host, tasks, total)
+                for executor, (host, tasks, total) in self._executors.items()
+            ]
+            hosts = [
+                LivyHostStats(host, n, tasks, total)
+                for host, (n, tasks, total) in self._hosts.items()
+            ]
+
+        far_past = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+        stages.sort(key=lambda s: (s.start or far_past, _stage_order(s.stage)))
+        executors.sort(key=lambda e: e.total_ms, reverse=True)
+        hosts.sort(key=lambda h: h.total_ms, reverse=True)
+
+        skewed_stages = [
+            s.stage
+            for s in stages
+            if s.max_ms >= self.min_straggler_ms and s.skew >= self.skew_factor
+        ]
+
+        slow_hosts = []
+        if len(hosts) >= 3:
+            median = statistics.median(h.mean_ms for h in hosts)
+            slow_hosts = [
+                h.host
+                for h in hosts
+                if h.mean_ms >= self.min_straggler_ms
+                and h.mean_ms >= self.skew_factor * median
+            ]
+
+        return LivyAnalysisReport(
+            stages=stages,
+            executors=executors,
+            hosts=hosts,
+            skewed_stages=skewed_stages,
+            slow_hosts=slow_hosts,
+        )
+
+    def _stage_stats(self, stage_id: str, stage: _Stage) -> LivyStageStats:
+        histogram = stage.histogram
+        p50 = histogram.quantile(0.5)
+        threshold = max(self.straggler_factor * p50, self.min_straggler_ms)
+        return LivyStageStats(
+            stage=stage_id,
+            tasks=histogram.count,
+            total_ms=histogram.total,
+            min_ms=histogram.min,
+            p50_ms=p50,
+            p90_ms=histogram.quantile(0.9),
+            p99_ms=histogram.quantile(0.99),
+            max_ms=histogram.max,
+            start=stage.added or stage.first,
+            end=stage.removed or stage.last,
+            stragglers=histogram.count_above(threshold),
+            slowest=[
+                LivyTaskSample(stage_id, *sample)
+                for _, _, sample in sorted(stage.slowest, reverse=True)
+            ],
+        )
+
+
+def analyze_batch(
+    client: livy.client.LivyClient,
+    batch_id: int,
+    analyzer: LivyTaskAnalyzer = None,
+    page_size: int = 10000,
+    timezone: datetime.tzinfo = datetime.timezone.utc,
+) -> LivyAnalysisReport:
+    """Fetch the logs of a batch page by page and analyze them. The logs are
+    parsed by :py:class:`livy.logreader.LivyBatchLogReader`, only one page is
+    held in memory at a time.
+
+    Parameters
+    ----------
+        client : livy.client.LivyClient
+            Livy client
+        batch_id : int
+            Batch ID
+        analyzer : LivyTaskAnalyzer
+            Analyzer with custom thresholds; use the default one if not given
+        page_size : int
+            Number of lines in each request
+        timezone : datetime.tzinfo
+            Server time zone
+
+    Return
+    ------
+    report : LivyAnalysisReport
+        Analysis result
+
+    Raises
+    ------
+    TypeError
+        On a invalid argument is given
+    RequestError
+        On connection error
+    """
+    analyzer = analyzer or LivyTaskAnalyzer()
+    reader = livy.logreader.LivyBatchLogReader(client, batch_id, timezone)
+    reader.export_pages(analyzer, page_size)
+    return analyzer.report()
+
+
+def _stage_order(stage: str) -> typing.Tuple[int, ...]:
+    try:
+        return tuple(int(p) for p in stage.split("."))
+    except ValueError:
+        return (-1,)
@@ -0,0 +1,137 @@
+"""Submit many batches in one process. Requests are sent through the connection
+pool of a shared :py:class:`~livy.client.LivyClient`, with a limited number of
+submissions in flight.
+"""
+import concurrent.futures
+import logging
+import time
+import typing
+
+import livy.client
+import livy.exception
+
+if typing.TYPE_CHECKING:
+    import livy.admission
+
+__all__ = ["submit_many", "LivySubmitResult"]
+
+logger = logging.getLogger(__name__)
+
+Job = typing.TypeVar("Job")
+
+
+class LivySubmitResult(typing.NamedTuple):
+    """Result of a submission in :py:func:`submit_many`."""
+
+    index: int
+    """Zero-based position of the job in the input.
+    """
+
+    job: typing.Any
+    """The job object as given.
+    """
+
+    batch: typing.Optional[dict]
+    """Batch object responded by server. ``None`` if submission is failed.
+    """
+
+    error: typing.Optional[Exception]
+    """Exception raised during preparing or submitting this job. ``None`` on
+    success.
+    """
+
+    elapsed: float
+    """Seconds spent on this job, including the time in ``prepare``.
+    """
+
+    @property
+    def batch_id(self) -> typing.Optional[int]:
+        """Batch ID. ``None`` if submission is failed."""
+        return self.batch["id"] if self.batch else None
+
+
+def submit_many(
+    client: livy.client.LivyClient,
+    jobs: typing.Iterable[Job],
+    max_workers: int = 8,
+    prepare: typing.Callable[[Job], typing.Dict[str, typing.Any]] = None,
+    callback: typing.Callable[[LivySubmitResult], None] = None,
+    admission: "livy.admission.LivyAdmissionController" = None,
+) -> typing.List[LivySubmitResult]:
+    """Create batches concurrently.
+
+    Parameters
+    ----------
+        client : livy.client.LivyClient
+            Client to send the requests. Its ``pool_size`` should be no less
+            than `max_workers`, or the submissions would wait for connections.
+        jobs : typing.Iterable[Job]
+            Jobs to be submitted. Each job is a dict of keyword arguments to
+            :py:meth:`~livy.client.LivyClient.create_batch` if `prepare` is not
+            set.
+        max_workers : int
+            Max number of jobs to be prepared or submitted at the same time.
+        prepare : typing.Callable[[Job], typing.Dict[str, typing.Any]]
+            Function to convert a job into the keyword arguments of
+            :py:meth:`~livy.client.LivyClient.create_batch`. It runs in worker
+            threads, thus per-job actions (e.g. uploading files) are also
+            executed concurrently. Exceptions raised in it fail only that job.
+        callback : typing.Callable[[LivySubmitResult], None]
+            Function to be called in the calling thread once a job is done, in
+            completion order.
+        admission : livy.admission.LivyAdmissionController
+            Submit through this admission controller. The keyword arguments
+            could contain an extra ``priority`` key in this case. Jobs are
+            still dispatched to workers in input order, thus sort them by
+            priority beforehand for a global ordering.
+
+    Return
+    ------
+    results : typing.List[LivySubmitResult]
+        Results in the same order as `jobs`. Failures are reported in the
+        results rather than raised.
+
+    Raises
+    ------
+    TypeError
+        On a invalid argument is given
+    """
+    if not isinstance(client, livy.client.LivyClient):
+        raise livy.exception.TypeError("client", livy.client.LivyClient, client)
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise livy.exception.TypeError("max_workers", "positive int", max_workers)
+
+    jobs = list(jobs)
+    results: typing.List[LivySubmitResult] = [None] * len(jobs)
+
+    def submit(index: int, job) -> LivySubmitResult:
+        tick = time.monotonic()
+        try:
+            params = prepare(job) if prepare else job
+            if admission:
+                batch = admission.create_batch(**params)
+            else:
+                batch = client.create_batch(**params)
+            if not isinstance(batch.get("id"), int):
+                raise livy.exception.OperationError(f"Invalid response: {batch}")
+        except Exception as e:
+            logger.debug("Failed to submit job #%d: %s", index, e)
+            return LivySubmitResult(index, job, None, e, time.monotonic() - tick)
+
+        logger.debug("Job #%d is submitted as batch %d", index, batch["id"])
+        return LivySubmitResult(index, job, batch, None, time.monotonic() - tick)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(submit, i, job) for i, job in enumerate(jobs)]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results[result.index] = result
+                if callback:
+                    callback(result)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results
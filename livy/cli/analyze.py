@@ -0,0 +1,290 @@
+"""Analyze task durations, executor load and skew of a batch from its logs
+"""
+import argparse
+import datetime
+import json
+import typing
+
+import livy
+import livy.analyze
+import livy.cli.config
+import livy.cli.logging
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy analyze",
+        description=__doc__,
+    )
+
+    parser.add_argument(
+        "batch_id",
+        metavar="N",
+        type=int,
+        help="ID of the batch to be analyzed",
+    )
+
+    group = parser.add_argument_group("detection")
+    group.add_argument(
+        "--straggler-factor",
+        metavar="X",
+        type=float,
+        default=2.0,
+        help="A task is a straggler if it takes longer than X times the median of "
+        "its stage. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--skew-factor",
+        metavar="X",
+        type=float,
+        default=4.0,
+        help="A stage is skewed if its slowest task takes longer than X times the "
+        "median; a host is slow if its mean task duration is X times the median "
+        "of all hosts. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--min-straggler-ms",
+        metavar="MS",
+        type=int,
+        default=1000,
+        help="Ignore the tasks faster than this in straggler and skew detection. "
+        "Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("output")
+    group.add_argument(
+        "--top",
+        metavar="N",
+        type=int,
+        default=5,
+        help="Number of the slowest tasks, executors and hosts to be shown. "
+        "Default: %(default)s.",
+    )
+    group.add_argument(
+        "--width",
+        metavar="N",
+        type=int,
+        default=60,
+        help="Width of the stage timeline chart. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="Output format. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("livy server configuration")
+    group.add_argument(
+        "--api-url",
+        required=cfg.root.api_url is None,
+        default=cfg.root.api_url,
+        help="Base-URL for Livy API server",
+    )
+    group.add_argument(
+        "--page-size",
+        metavar="N",
+        type=int,
+        default=10000,
+        help="Number of log lines to be fetched in one request. "
+        "Default: %(default)s.",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-analyze.main")
+
+    try:
+        analyzer = livy.analyze.LivyTaskAnalyzer(
+            straggler_factor=args.straggler_factor,
+            skew_factor=args.skew_factor,
+            min_straggler_ms=args.min_straggler_ms,
+            top=args.top,
+        )
+    except livy.Error as e:
+        console.error("%s", e)
+        return 1
+
+    client = livy.LivyClient(url=args.api_url)
+    try:
+        report = livy.analyze.analyze_batch(
+            client, args.batch_id, analyzer, page_size=args.page_size
+        )
+    except livy.RequestError as e:
+        console.error("Failed to read log. HTTP code=%d, Reason=%s", e.code, e.reason)
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+    finally:
+        client.close()
+
+    if not report.stages:
+        console.warning("No task log is found in batch %d", args.batch_id)
+        return 1
+
+    if args.format == "json":
+        print(json.dumps(to_json(report, args.top), ensure_ascii=False, indent=2))
+    else:
+        print_report(report, args.top, args.width)
+
+    return 0
+
+
+def print_report(
+    report: livy.analyze.LivyAnalysisReport, top: int = 5, width: int = 60
+) -> None:
+    """Print the report in tables."""
+    print(f"Stages ({len(report.stages)} stages, {report.tasks} tasks)")
+    print(
+        f"{'STAGE':>8}  {'TASKS':>7}  {'P50':>8}  {'P90':>8}  {'P99':>8}  "
+        f"{'MAX':>8}  {'SKEW':>6}  {'STRAGGLERS':>10}  {'DURATION':>9}"
+    )
+    for s in report.stages:
+        print(
+            f"{s.stage:>8}  {s.tasks:>7}  {format_ms(s.p50_ms):>8}  "
+            f"{format_ms(s.p90_ms):>8}  {format_ms(s.p99_ms):>8}  "
+            f"{format_ms(s.max_ms):>8}  {s.skew:>6.1f}  {s.stragglers:>10}  "
+            f"{format_ms(s.duration and s.duration * 1000):>9}"
+        )
+
+    lines = gantt(report.stages, width)
+    if lines:
+        print()
+        print("Timeline")
+        for line in lines:
+            print(line)
+
+    if top:
+        print()
+        print("Busiest executors")
+        print(f"{'EXECUTOR':>8}  {'TASKS':>7}  {'TOTAL':>8}  {'MEAN':>8}  HOST")
+        for e in report.executors[:top]:
+            print(
+                f"{e.executor:>8}  {e.tasks:>7}  {format_ms(e.total_ms):>8}  "
+                f"{format_ms(e.mean_ms):>8}  {e.host}"
+            )
+
+        print()
+        print("Busiest hosts")
+        print(f"{'EXECUTORS':>9}  {'TASKS':>7}  {'TOTAL':>8}  {'MEAN':>8}  HOST")
+        for h in report.hosts[:top]:
+            print(
+                f"{h.executors:>9}  {h.tasks:>7}  {format_ms(h.total_ms):>8}  "
+                f"{format_ms(h.mean_ms):>8}  {h.host}"
+            )
+
+    print()
+    print("Findings")
+    findings = list(iter_findings(report, top))
+    for summary, details in findings:
+        print(f"  * {summary}")
+        for detail in details:
+            print(f"    - {detail}")
+    if not findings:
+        print("  No skewed stage or slow host is found")
+
+
+def iter_findings(
+    report: livy.analyze.LivyAnalysisReport, top: int = 5
+) -> typing.Iterator[typing.Tuple[str, typing.List[str]]]:
+    """Describe the skewed stages and slow hosts. Yields the summary and the
+    details of each finding."""
+    stages = {s.stage: s for s in report.stages}
+    for stage_id in report.skewed_stages:
+        s = stages[stage_id]
+        summary = (
+            f"Stage {s.stage} is skewed: the slowest task took {format_ms(s.max_ms)}, "
+            f"{s.skew:.1f} times the median {format_ms(s.p50_ms)}; "
+            f"{s.stragglers} stragglers"
+        )
+        details = [
+            f"task {t.task} took {format_ms(t.duration_ms)} on {t.host} "
+            f"(executor {t.executor})"
+            for t in s.slowest[:top]
+        ]
+        yield summary, details
+
+    hosts = {h.host: h for h in report.hosts}
+    for host in report.slow_hosts:
+        h = hosts[host]
+        summary = (
+            f"Host {h.host} is slow: tasks on it took {format_ms(h.mean_ms)} on "
+            f"average, over {h.tasks} tasks"
+        )
+        yield summary, []
+
+
+def gantt(stages: typing.List[livy.analyze.LivyStageStats], width: int = 60):
+    """Draw the stages on a time axis. Stages without time are skipped."""
+    stages = [s for s in stages if s.start and s.end]
+    if not stages or width < 1:
+        return []
+
+    begin = min(s.start for s in stages)
+    end = max(s.end for s in stages)
+    span = max((end - begin).total_seconds(), 1.0)
+
+    lines = []
+    for s in stages:
+        left = int((s.start - begin).total_seconds() / span * width)
+        right = int((s.end - begin).total_seconds() / span * width)
+        left = min(left, width - 1)
+        bar = " " * left + "#" * max(1, right - left)
+        lines.append(f"{s.stage:>8}  |{bar:<{width}}|  {format_ms(s.duration * 1000)}")
+
+    first = begin.astimezone().strftime("%H:%M:%S")
+    last = end.astimezone().strftime("%H:%M:%S")
+    lines.append(f"{'':>8}  {first}{last:>{max(width + 2 - len(first), 0)}}")
+    return lines
+
+
+def format_ms(ms: typing.Optional[float]) -> str:
+    """Format milliseconds for display."""
+    if ms is None:
+        return "-"
+    if ms < 1000:
+        return f"{ms:.0f}ms"
+    seconds = ms / 1000
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+def to_json(report: livy.analyze.LivyAnalysisReport, top: int = 5) -> dict:
+    """Convert the report into JSON-serializable format."""
+
+    def convert(value):
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return value
+
+    def stage(s: livy.analyze.LivyStageStats) -> dict:
+        data = {k: convert(v) for k, v in s._asdict().items()}
+        data["slowest"] = [t._asdict() for t in s.slowest[:top]]
+        data["skew"] = s.skew
+        data["duration"] = s.duration
+        return data
+
+    return {
+        "stages": [stage(s) for s in report.stages],
+        "executors": [e._asdict() for e in report.executors],
+        "hosts": [h._asdict() for h in report.hosts],
+        "skewed_stages": report.skewed_stages,
+        "slow_hosts": report.slow_hosts,
+    }
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -75,6 +75,13 @@ class SubmitSection(livy.utils.ConfigBase):
     pre_submit: typing.List[str] = []
     """Enabled Pre-submit plugin list."""
 
+    hook_workers: int = 4
+    """Max number of plugins to be run at the same time. Only the plugins that
+    declare their dependencies are run concurrently."""
+
+    hook_timeout: int = 0
+    """Seconds to wait for each plugin. No timeout if it is 0."""
+
     driver_memory: str = None
     """Amount of memory to use for the driver process. Need to specific unit,
     e.g. ``12gb`` or ``34mb``."""
@@ -100,6 +107,31 @@ class SubmitSection(livy.utils.ConfigBase):
     same behavior to :py:attr:`~ReadLogSection.keep_watch`, only different is the
     scope it take effects."""
 
+    timeline: str = None
+    """Write the timeline of submission to this path in JSON format."""
+
+    idempotent: bool = False
+    """Do not submit again if a batch with the same parameters is still
+    running; watch that batch instead."""
+
+    fingerprint_cache: str = "~/.cache/python-livy/fingerprints.json"
+    """Path to the record of submitted batches for idempotent submission."""
+
+    max_attempts: int = 1
+    """Max number of submissions for a batch, including the first one."""
+
+    retry_on: typing.List[str] = []
+    """Resubmit only if the logs of failed batch match one of these
+    signatures; on any failure if it is empty."""
+
+    retry_backoff: int = 30
+    """Seconds to wait before the first retry. It is doubled for each
+    following retry."""
+
+    recommend: str = None
+    """Recommend resources from the past runs in history: ``suggest`` to log
+    the recommendation, ``apply`` to use it. Disabled if it is not set."""
+
     task_success: typing.List[str] = []
     """Plugins to be trigger when task is finished and success."""
 
@@ -110,6 +142,49 @@ class SubmitSection(livy.utils.ConfigBase):
     """Plugins to be trigger when task is ended, regardless to its state."""
 
 
+class IndexSection(livy.utils.ConfigBase):
+    """Prefix ``index``. Local searchable log index for :ref:`cli-search` tool."""
+
+    path: str = "~/.cache/python-livy/index.sqlite3"
+    """Path to the index database file."""
+
+    auto_index: bool = False
+    """Save the logs into index while reading them by :ref:`cli-read-log` and
+    :ref:`cli-submit` tools."""
+
+
+class HistorySection(livy.utils.ConfigBase):
+    """Prefix ``history``. Local history of batch runs for :ref:`cli-history`
+    tool."""
+
+    path: str = "~/.cache/python-livy/history.sqlite3"
+    """Path to the history database file."""
+
+    enabled: bool = True
+    """Record the runs watched by :ref:`cli-submit` tool, and show the
+    estimated time of arrival from the past runs."""
+
+    slow_threshold: int = 150
+    """Flag a run as slow when it takes more than this percentage of the median
+    duration of its job."""
+
+
+class DetectSection(livy.utils.ConfigBase):
+    """Prefix ``detect``. Early warning of failures while watching the logs of
+    a batch."""
+
+    enabled: bool = True
+    """Watch the logs for lost executors, fetch failures, containers killed by
+    YARN and GC overhead, in :ref:`cli-submit` and :ref:`cli-read-log` tools."""
+
+    window: int = 300
+    """Size of the rolling window in seconds."""
+
+    thresholds: typing.List[str] = []
+    """Number of events in window to raise a warning, in ``NAME=COUNT`` format.
+    Overrides the default of the signature."""
+
+
 class Configuration(livy.utils.ConfigBase):
     """Collection to all configurations"""
 
@@ -117,6 +192,9 @@ class Configuration(livy.utils.ConfigBase):
     logs: LocalLoggingSection
     read_log: ReadLogSection
     submit: SubmitSection
+    index: IndexSection
+    history: HistorySection
+    detect: DetectSection
 
 
 _configuration = None
@@ -0,0 +1,291 @@
+"""Show the past runs in local history, and flag the slow ones"""
+import argparse
+import json
+import logging
+import typing
+
+import livy.cli.config
+import livy.cli.logging
+import livy.cli.search
+import livy.exception
+import livy.history
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy history",
+        description=__doc__,
+    )
+
+    parser.add_argument(
+        "run",
+        metavar="ID",
+        nargs="?",
+        type=int,
+        help="Show the stages of this run, compared with the median of its job",
+    )
+
+    group = parser.add_argument_group("filters")
+    group.add_argument(
+        "--script",
+        metavar="PATH",
+        help="Only list the runs of this script. Use the same path or URL given "
+        "to `livy submit`.",
+    )
+    group.add_argument(
+        "--class-name",
+        metavar="COM.EXAMPLE.FOO",
+        help="Application Java/Spark main class of the script",
+    )
+    group.add_argument(
+        "--state",
+        choices=["success", "dead", "killed"],
+        help="Only list the runs ended in this state",
+    )
+    group.add_argument(
+        "--since",
+        metavar="TIME",
+        type=livy.cli.search.parse_time,
+        help="Only list the runs submitted after this time. Accepts a duration "
+        "before now (e.g. `7d`) or an ISO format datetime.",
+    )
+    group.add_argument(
+        "--limit",
+        metavar="N",
+        type=int,
+        default=20,
+        help="List at most N runs. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("slow runs")
+    group.add_argument(
+        "--threshold",
+        metavar="RATIO",
+        type=float,
+        default=cfg.history.slow_threshold / 100,
+        help="Flag a run as slow when it takes more than RATIO times the median "
+        "duration of the successful runs of the same job. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--min-runs",
+        metavar="N",
+        type=int,
+        default=3,
+        help="Only flag the runs of the jobs that have at least N successful runs. "
+        "Default: %(default)s.",
+    )
+    group.add_argument(
+        "--slow-only",
+        action="store_true",
+        help="Only list the slow runs",
+    )
+
+    group = parser.add_argument_group("output")
+    group.add_argument(
+        "--format",
+        choices=["table", "jsonl"],
+        default="table",
+        help="Output format. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("history")
+    group.add_argument(
+        "--history-path",
+        metavar="PATH",
+        default=cfg.history.path,
+        help="Path to the history database. Runs are recorded by `livy submit` "
+        "when the logs are watched. Default: %(default)s.",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-history.main")
+
+    try:
+        history = livy.history.LivyRunHistory(args.history_path)
+    except livy.exception.OperationError as e:
+        console.error("%s", e)
+        return 1
+
+    with history:
+        if args.run is not None:
+            return show_run(console, history, args)
+
+        key = None
+        if args.script:
+            key = livy.history.job_key(args.script, args.class_name)
+
+        # slow-only filter is applied after query
+        runs = history.runs(
+            key=key,
+            state=args.state,
+            since=args.since,
+            limit=None if args.slow_only else args.limit,
+        )
+
+        estimates = {}
+        count = 0
+        print_row = TablePrinter() if args.format == "table" else print_json
+        for run in runs:
+            if run.key not in estimates:
+                estimates[run.key] = history.estimate(run.key, min_runs=args.min_runs)
+
+            estimate = estimates[run.key]
+            ratio = estimate and run.duration / estimate.duration
+            slow = bool(ratio and ratio > args.threshold)
+            if args.slow_only and not slow:
+                continue
+
+            print_row(run, estimate, slow)
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+
+    console.info("%d runs listed", count)
+    return 0
+
+
+def show_run(
+    console: logging.Logger, history: livy.history.LivyRunHistory, args
+) -> int:
+    """Print a run and its stages, compared with the median of its job."""
+    run = history.get(args.run)
+    if not run:
+        console.error("Run %d is not found in history", args.run)
+        return 1
+
+    estimate = history.estimate(run.key, min_runs=args.min_runs)
+
+    if args.format == "jsonl":
+        print_json(run, estimate, False)
+        return 0
+
+    print(f"Run:        {run.id}")
+    print(f"Script:     {run.script}")
+    print(f"Batch:      {run.batch_id} ({run.session_name or '-'})")
+    print(f"State:      {run.state}")
+    print(f"Submitted:  {run.submitted.astimezone():%Y-%m-%d %H:%M:%S}")
+    print(f"Duration:   {format_duration(run.duration)}")
+    if run.queue_wait is not None:
+        print(f"Queue wait: {format_duration(run.queue_wait)}")
+    if estimate:
+        print(
+            f"Median:     {format_duration(estimate.duration)} "
+            f"of {estimate.runs} successful runs"
+        )
+    print()
+
+    print(f"{'STAGE':>6}  {'DURATION':>10}  {'MEDIAN':>10}  {'RATIO':>6}")
+    median = estimate.stages if estimate else {}
+    for stage in sorted(set(run.stages) | set(median), key=_stage_order):
+        seconds = run.stages.get(stage)
+        usual = median.get(stage)
+        ratio = "-"
+        flag = ""
+        if seconds is not None and usual:
+            ratio = f"{seconds / usual:.2f}"
+            if seconds / usual > args.threshold:
+                flag = "  SLOW"
+        print(
+            f"{stage:>6}  {format_duration(seconds):>10}  "
+            f"{format_duration(usual):>10}  {ratio:>6}{flag}"
+        )
+
+    return 0
+
+
+def format_duration(seconds: typing.Optional[float]) -> str:
+    """Format seconds for display."""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+def _stage_order(stage: str) -> typing.Tuple[int, str]:
+    return (int(stage), "") if stage.isdigit() else (-1, stage)
+
+
+def print_json(
+    run: livy.history.LivyRunRecord,
+    estimate: typing.Optional[livy.history.LivyRunEstimate],
+    slow: bool,
+) -> None:
+    """Print a run in JSON lines format, with the median of its job."""
+    data = run._asdict()
+    data["submitted"] = run.submitted.isoformat()
+    data["median"] = estimate and estimate.duration
+    data["slow"] = slow
+    print(json.dumps(data, ensure_ascii=False))
+
+
+class TablePrinter:
+    """Print runs as table rows. Header is printed before the first row."""
+
+    def __init__(self) -> None:
+        self._header_printed = False
+
+    def __call__(
+        self,
+        run: livy.history.LivyRunRecord,
+        estimate: typing.Optional[livy.history.LivyRunEstimate],
+        slow: bool,
+    ) -> None:
+        if not self._header_printed:
+            self._print(
+                "ID", "BATCH", "STATE", "SUBMITTED", "DURATION", "MEDIAN", "", "SCRIPT"
+            )
+            self._header_printed = True
+
+        batch_id = "-" if run.batch_id is None else str(run.batch_id)
+        submitted = run.submitted.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+        self._print(
+            str(run.id),
+            batch_id,
+            run.state,
+            submitted,
+            format_duration(run.duration),
+            format_duration(estimate and estimate.duration),
+            "SLOW" if slow else "",
+            run.script,
+        )
+
+    def _print(self, id_, batch_id, state, submitted, duration, median, flag, script):
+        print(
+            f"{id_:>6}  {batch_id:>8}  {state:<9}  {submitted:<19}  "
+            f"{duration:>9}  {median:>9}  {flag:<4}  {script}"
+        )
+
+
+def open_history(
+    console: logging.Logger, path: str = None
+) -> typing.Optional[livy.history.LivyRunHistory]:
+    """Open the history for recording runs. Returns ``None`` on failed, the
+    reason is logged and the submission should not be interrupted."""
+    if path is None:
+        path = livy.cli.config.load().history.path
+
+    try:
+        history = livy.history.LivyRunHistory(path)
+    except livy.exception.OperationError as e:
+        console.warning("Failed to open history. Runs are not recorded: %s", e)
+        return None
+
+    console.debug("Record runs into history %s", history.path)
+    return history
+
+
+if __name__ == "__main__":
+    exit(main())
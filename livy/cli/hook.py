@@ -0,0 +1,279 @@
+"""Run hook actions. Actions run in the order given, unless they declare their
+dependencies with :py:func:`plugin`; the declared actions run concurrently once
+their dependencies are done.
+
+An action that is not declared works as a barrier: it runs after all the
+actions before it are done, and the actions after it wait for it. So the
+existing plugins keep running in sequence.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import threading
+import time
+import typing
+
+__all__ = ["plugin", "HookOptions", "HookError", "run_actions"]
+
+logger = logging.getLogger(__name__)
+
+_ATTR = "livy_hook_options"
+
+
+class HookOptions(typing.NamedTuple):
+    """Declaration of a hook action."""
+
+    depends_on: typing.Tuple[str, ...]
+    """Names of the actions, in ``module:func`` format, to be run before this
+    one. It only takes effect when the action is in the same hook.
+    """
+
+    timeout: typing.Optional[float]
+    """Seconds to wait for this action. Use the default from configuration if
+    not set.
+    """
+
+
+class HookError(Exception):
+    """An action is failed, timed out or returns invalid value."""
+
+
+def plugin(
+    depends_on: typing.Iterable[str] = (), timeout: float = None
+) -> typing.Callable:
+    """Decorator that declares a plugin function could be run concurrently with
+    other declared actions.
+
+    .. code-block:: python
+
+       @livy.cli.hook.plugin(depends_on=["livy.cli.plugin:zip_py_files"])
+       def upload(source, args):
+           ...
+
+    The action gets a copy of the arguments, the lists, dicts and sets in it are
+    also copied. Attributes it changed, including the containers changed in
+    place, are applied back after it is done, in the order the actions finish.
+    Items added to the same list or dict by concurrent actions are all kept; for
+    other attributes, concurrent actions should not change the same one.
+
+    Coroutine functions are also accepted; each one runs in its own event loop.
+
+    Parameters
+    ----------
+        depends_on : typing.Iterable[str]
+            Names of the actions to be run before this one
+        timeout : float
+            Seconds to wait for this action
+    """
+
+    def decorator(func):
+        setattr(func, _ATTR, HookOptions(tuple(depends_on), timeout))
+        return func
+
+    return decorator
+
+
+def get_options(func: typing.Callable) -> typing.Optional[HookOptions]:
+    """Get declaration of the function. ``None`` if it is not declared."""
+    options = getattr(func, _ATTR, None)
+    return options if isinstance(options, HookOptions) else None
+
+
+def run_actions(
+    identifier: str,
+    args: argparse.Namespace,
+    actions: typing.List[typing.Tuple[str, typing.Callable]],
+    max_workers: int = 4,
+    timeout: float = None,
+    log: logging.Logger = logger,
+    on_finished: typing.Callable[[str, float], None] = None,
+) -> typing.Tuple[argparse.Namespace, typing.Dict[str, float]]:
+    """Run the actions.
+
+    Parameters
+    ----------
+        identifier : str
+            Hook name, passed to the actions as ``source``
+        args : argparse.Namespace
+            Arguments to pass to the actions
+        actions : typing.List[typing.Tuple[str, typing.Callable]]
+            Pairs of action name, in ``module:func`` format, and the function
+        max_workers : int
+            Max number of actions to be run at the same time
+        timeout : float
+            Default timeout in seconds for each action; no timeout if not set
+        log : logging.Logger
+            Logger for the progress
+        on_finished : typing.Callable[[str, float], None]
+            Function to be called with the action name and the seconds it took,
+            as soon as each action is finished
+
+    Return
+    ------
+    args : argparse.Namespace
+        Arguments after all actions
+    durations : typing.Dict[str, float]
+        Seconds taken by each action
+
+    Raises
+    ------
+    HookError
+        On any action is failed, timed out, or the dependencies are circular
+    """
+    options = [get_options(func) for _, func in actions]
+    depends_on = _resolve_dependencies([name for name, _ in actions], options)
+    max_workers = max(1, max_workers)
+
+    pending = list(range(len(actions)))
+    finished = set()
+    running: typing.Dict[concurrent.futures.Future, tuple] = {}
+    durations = {}
+
+    while pending or running:
+        # start the ready ones
+        for i in list(pending):
+            if len(running) >= max_workers:
+                break
+            if not depends_on[i] <= finished:
+                continue
+
+            pending.remove(i)
+            name, func = actions[i]
+            log.info("Run %s action %s", identifier.lower(), name)
+
+            given = _copy_args(args) if options[i] else args
+            before = vars(_copy_args(given))
+            limit = options[i] and options[i].timeout or timeout
+            started = time.monotonic()
+            future = _start(func, identifier, given)
+            running[future] = i, before, started, limit
+
+        if not running:
+            raise HookError("Circular dependencies in actions")
+
+        # wait for the first finished, or the first timeout
+        deadlines = [t[2] + t[3] for t in running.values() if t[3]]
+        wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        done, _ = concurrent.futures.wait(
+            running, wait, concurrent.futures.FIRST_COMPLETED
+        )
+
+        now = time.monotonic()
+        for future, (i, before, started, limit) in list(running.items()):
+            name = actions[i][0]
+            if future not in done:
+                if limit and now - started >= limit:
+                    raise HookError(
+                        f"{identifier.lower()} action {name} is not finished in "
+                        f"{limit} seconds"
+                    )
+                continue
+
+            del running[future]
+            finished.add(i)
+            durations[name] = now - started
+            log.info("Action %s finished in %.2f seconds", name, durations[name])
+            if on_finished:
+                on_finished(name, durations[name])
+
+            try:
+                result = future.result()
+            except Exception as e:
+                log.exception("Error occurs during %s action", identifier.lower())
+                raise HookError(f"{identifier.lower()} action {name} failed: {e}")
+
+            if not isinstance(result, argparse.Namespace):
+                raise HookError(
+                    f"Expect namespace object from {name}'s return value. "
+                    f"Got {type(result).__name__}"
+                )
+
+            if options[i]:
+                _merge(args, before, result)
+            else:
+                args = result
+
+    return args, durations
+
+
+def _resolve_dependencies(
+    names: typing.List[str], options: typing.List[typing.Optional[HookOptions]]
+) -> typing.List[typing.Set[int]]:
+    """Indexes of the actions that each action depends on."""
+    index = {}
+    for i, name in enumerate(names):
+        index.setdefault(name, []).append(i)
+
+    depends_on = []
+    for i, opt in enumerate(options):
+        deps = set()
+        for j in range(i):
+            # an undeclared action is a barrier
+            if not opt or not options[j]:
+                deps.add(j)
+        for name in opt.depends_on if opt else ():
+            deps.update(j for j in index.get(name, ()) if j != i)
+        depends_on.append(deps)
+
+    return depends_on
+
+
+def _start(
+    func: typing.Callable, identifier: str, args: argparse.Namespace
+) -> concurrent.futures.Future:
+    """Run the action in a daemon thread, so a timed out action would not block
+    the process from exiting."""
+    future = concurrent.futures.Future()
+
+    def _run():
+        if not future.set_running_or_notify_cancel():
+            return  # pragma: no cover
+        try:
+            if asyncio.iscoroutinefunction(func):
+                loop = asyncio.new_event_loop()
+                try:
+                    result = loop.run_until_complete(func(identifier, args))
+                finally:
+                    loop.close()
+            else:
+                result = func(identifier, args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    name = getattr(func, "__name__", "action")
+    threading.Thread(target=_run, name=f"hook-{name}", daemon=True).start()
+    return future
+
+
+def _copy_args(args: argparse.Namespace) -> argparse.Namespace:
+    """Copy the arguments, and the containers in it, e.g. ``py_files`` and
+    ``spark_conf``, so they could be changed in place by an action."""
+    copied = copy.copy(args)
+    for key, value in vars(args).items():
+        if isinstance(value, (list, dict, set)):
+            setattr(copied, key, copy.deepcopy(value))
+    return copied
+
+
+def _merge(args: argparse.Namespace, before: dict, result: argparse.Namespace) -> None:
+    """Apply the attributes changed by an action. `before` is a copy of the
+    arguments given to the action."""
+    for key, value in vars(result).items():
+        if key in before and (before[key] is value or before[key] == value):
+            continue
+
+        # keep the items added by the other actions as well
+        current = getattr(args, key, None)
+        original = before.get(key)
+        if type(value) is type(current) is type(original) and current != original:
+            if isinstance(value, list):
+                value = current + [v for v in value if v not in original]
+            elif isinstance(value, dict):
+                changed = {k: v for k, v in value.items() if original.get(k) != v}
+                value = {**current, **changed}
+
+        setattr(args, key, value)
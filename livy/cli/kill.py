@@ -1,16 +1,27 @@
-"""Kill a existing batch.
+"""Kill existing batches.
 """
 import argparse
+import concurrent.futures
+import datetime
 import importlib
 import json
+import logging
 import sys
 import time
+import typing
 
+import livy
 import livy.cli.config
 import livy.cli.logging
+import livy.cli.ls
+import livy.utils
 
 logger = livy.cli.logging.get(__name__)
 
+ACTIVE_STATES = ("starting", "running")
+
+_LIST_PAGE_SIZE = 1000
+
 
 def main(argv=None):
     """CLI entrypoint"""
@@ -25,7 +36,8 @@ def main(argv=None):
         "batch_id",
         metavar="N",
         type=int,
-        help="Livy batch ID for fetching logs",
+        nargs="*",
+        help="Livy batch ID to be killed",
     )
     parser.add_argument(
         "--yes",
@@ -33,6 +45,41 @@ def main(argv=None):
         help="Proceed the command without showing the prompt",
     )
 
+    group = parser.add_argument_group(
+        "filters",
+        "Select the batches to be killed. When batch IDs are also given, only "
+        "the batches in the list are killed.",
+    )
+    group.add_argument(
+        "--state",
+        metavar="STATE",
+        nargs="+",
+        choices=ACTIVE_STATES,
+        help="Only kill batches in these states: `starting` or `running`",
+    )
+    group.add_argument(
+        "--name-regex",
+        metavar="REGEX",
+        type=livy.cli.ls.regex,
+        help="Only kill batches that the name matches this regular expression",
+    )
+    group.add_argument(
+        "--older-than",
+        metavar="DURATION",
+        type=livy.utils.parse_duration,
+        help="Only kill batches started before this duration, e.g. `2h`. The "
+        "start time is read from the first timestamp in batch log.",
+    )
+    group.add_argument(
+        "--max-workers",
+        metavar="N",
+        type=int,
+        default=8,
+        help="Max number of kill requests, or log requests for `--older-than`, to "
+        "be sent concurrently. "
+        "Default: %(default)s.",
+    )
+
     group = parser.add_argument_group("livy server configuration")
     group.add_argument(
         "--api-url",
@@ -45,6 +92,10 @@ def main(argv=None):
 
     args = parser.parse_args(argv)
 
+    use_filter = args.state or args.name_regex or args.older_than is not None
+    if not args.batch_id and not use_filter:
+        parser.error("batch ID or filter is required")
+
     # setup logger
     livy.cli.logging.init(args)
     console = livy.cli.logging.get("livy-kill.main")
@@ -52,10 +103,26 @@ def main(argv=None):
     # get batch info
     console.info("Connecting to server: %s", args.api_url)
 
-    client = livy.LivyClient(url=args.api_url)
+    client = livy.LivyClient(url=args.api_url, pool_size=max(1, args.max_workers))
 
     try:
-        batch = client.get_batch_information(args.batch_id)
+        if use_filter or len(args.batch_id) > 1:
+            batches = select_batches(
+                client,
+                args.batch_id,
+                args.state,
+                args.name_regex,
+                args.older_than,
+                args.max_workers,
+            )
+        else:
+            batch = client.get_batch_information(args.batch_id[0])
+            console.info(
+                "Batch #%d information: %s",
+                args.batch_id[0],
+                json.dumps(batch, indent=2),
+            )
+            batches = [batch]
     except livy.RequestError as e:
         console.error(
             "Failed to check batch status. HTTP code=%d, Reason=%s", e.code, e.reason
@@ -65,17 +132,25 @@ def main(argv=None):
         console.warning("Keyboard interrupt")
         return 1
 
-    console.info(
-        "Batch #%d information: %s", args.batch_id, json.dumps(batch, indent=2)
-    )
-
-    if batch["state"] not in ("starting", "running"):
+    batch_ids = [b["id"] for b in batches if b["state"] in ACTIVE_STATES]
+    if not batch_ids:
         console.warning("Task is already ended.")
         return 1
 
+    if len(batches) > 1:
+        for batch in batches:
+            console.info(
+                "Batch #%d: state= %s, name= %s",
+                batch["id"],
+                batch["state"],
+                batch.get("name"),
+            )
+
     # double confirm
     time.sleep(0.1)  # wait for previous logs
-    if not args.yes and not check_user_confirm(args.batch_id):
+    if not args.yes and not check_user_confirm(
+        batch_ids[0] if len(batch_ids) == 1 else batch_ids
+    ):
         console.warning("User cancellation")
         return 1
 
@@ -83,56 +158,135 @@ def main(argv=None):
     console.info("Send kill request")
 
     try:
-        client.delete_batch(args.batch_id)
-    except livy.RequestError as e:
-        console.error("Failed to kill task. HTTP code=%d, Reason=%s", e.code, e.reason)
-        return 1
+        errors = kill_batches(client, batch_ids, args.max_workers)
     except KeyboardInterrupt:
         console.warning("Keyboard interrupt")
         return 1
 
+    for batch_id, e in errors.items():
+        console.error(
+            "Failed to kill batch #%d. HTTP code=%d, Reason=%s",
+            batch_id,
+            e.code,
+            e.reason,
+        )
+
+    batch_ids = [id_ for id_ in batch_ids if id_ not in errors]
+    if not batch_ids:
+        return 1
+
     # keep monitor status
     console.info("Monitor task status")
 
+    try:
+        if len(batch_ids) == 1:
+            wait_batch_ended(client, batch_ids[0], console)
+        else:
+            wait_batches_ended(client, batch_ids, console)
+    except livy.RequestError as e:
+        console.error(
+            "Failed to get batch status. HTTP code=%d, Reason=%s", e.code, e.reason
+        )
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+
+    return 1 if errors else 0
+
+
+def select_batches(
+    client: livy.LivyClient,
+    batch_ids: typing.List[int],
+    states: typing.List[str] = None,
+    name: typing.Pattern = None,
+    older_than: datetime.timedelta = None,
+    max_workers: int = 8,
+) -> typing.List[dict]:
+    """List the active batches that matches the filters, and limited to
+    `batch_ids` if it is not empty. The logs for `older_than` are read by at
+    most `max_workers` requests at a time."""
+    wanted = set(batch_ids)
+    selected = []
+    for batch, _ in livy.cli.ls.iter_filtered_batches(
+        client,
+        page_size=_LIST_PAGE_SIZE,
+        states=states or ACTIVE_STATES,
+        name=name,
+        older_than=older_than,
+        max_workers=max_workers,
+    ):
+        if not wanted or batch["id"] in wanted:
+            selected.append(batch)
+    return selected
+
+
+def kill_batches(
+    client: livy.LivyClient, batch_ids: typing.List[int], max_workers: int = 8
+) -> typing.Dict[int, livy.RequestError]:
+    """Send kill requests concurrently. Returns the errors of each batch. Batch
+    that is not found is not treated as error."""
+    errors = {}
+    with concurrent.futures.ThreadPoolExecutor(max(1, max_workers)) as executor:
+        futures = {executor.submit(client.delete_batch, id_): id_ for id_ in batch_ids}
+        for future in concurrent.futures.as_completed(futures):
+            e = future.exception()
+            if e is None or isinstance(e, livy.RequestError) and e.code == 404:
+                continue
+            if not isinstance(e, livy.RequestError):
+                raise e
+            errors[futures[future]] = e
+    return errors
+
+
+def wait_batch_ended(
+    client: livy.LivyClient, batch_id: int, console: logging.Logger
+) -> None:
+    """Query the state of a batch until it is ended."""
     while True:
         # query status
-        err = None
         try:
-            is_finished = client.is_batch_ended(args.batch_id)
-        except KeyboardInterrupt:
-            console.warning("Keyboard interrupt")
-            return 1
+            is_finished = client.is_batch_ended(batch_id)
         except livy.RequestError as e:
-            err = e
-            is_finished = False
+            if e.code != 404:
+                raise
+            is_finished = True
 
         # determin state
-        if is_finished or (err and err.code == 404):
+        if is_finished:
             console.info("Task terminated")
-            break
-
-        if err:
-            console.error(
-                "Failed to get batch status. HTTP code=%d, Reason=%s",
-                err.code,
-                err.reason,
-            )
-            return 1
+            return
 
         # wait until next query
         console.info("Task is still running")
         time.sleep(2.0)
 
-    return 0
 
+def wait_batches_ended(
+    client: livy.LivyClient, batch_ids: typing.List[int], console: logging.Logger
+) -> None:
+    """Monitor the batches until all of them are ended. It takes one listing
+    request per cycle, batches that are not in the list are treated as ended."""
+    pending = set(batch_ids)
+    while True:
+        states = {b["id"]: b.get("state") for b in client.iter_batches(_LIST_PAGE_SIZE)}
+        pending = {id_ for id_ in pending if states.get(id_) in ACTIVE_STATES}
+
+        if not pending:
+            console.info("All %d tasks terminated", len(batch_ids))
+            return
 
-def check_user_confirm(id_: int) -> True:
+        console.info("%d tasks are still running", len(pending))
+        time.sleep(2.0)
+
+
+def check_user_confirm(id_: typing.Union[int, typing.List[int]]) -> True:
     """Show prompt to ask if user really want to kill the task.
 
     Parameters
     ----------
-        id_ : int
-            Batch id
+        id_ : Union[int, List[int]]
+            Batch id, or list of batch ids
 
     Return
     ------
@@ -150,8 +304,13 @@ def check_user_confirm(id_: int) -> True:
         GREEN = BRIGHT = DIM = RESET = ""
 
     # show prompt
+    if isinstance(id_, int):
+        target = f"batch {GREEN}#{id_}"
+    else:
+        target = f"{GREEN}{len(id_)}{RESET}{BRIGHT} batches"
+
     print(
-        f"{BRIGHT}=> Kill batch {GREEN}#{id_}{RESET}{BRIGHT}? "
+        f"{BRIGHT}=> Kill {target}{RESET}{BRIGHT}? "
         f"{DIM}[ No / yes ] {RESET}",
         file=sys.stdout,
         end="",
@@ -1,4 +1,5 @@
 import argparse
+import datetime
 import logging
 import os
 import sys
@@ -177,4 +178,14 @@ def _get_general_formatter():
     return logging.Formatter(fmt=fmt, datefmt=cfg.logs.date_format)
 
 
+def set_estimate(
+    eta: datetime.datetime = None, stages: typing.Dict[str, float] = None
+) -> None:
+    """Show the estimation on progress bars. It takes no effect when progress
+    bar is disabled or not available."""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, livy.utils.EnhancedConsoleHandler):
+            handler.set_estimate(eta, stages)
+
+
 get = logging.getLogger
@@ -0,0 +1,258 @@
+"""List batches on server
+"""
+import argparse
+import concurrent.futures
+import datetime
+import itertools
+import json
+import re
+import typing
+
+import livy
+import livy.cli.config
+import livy.cli.logging
+import livy.utils
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy ls",
+        description=__doc__,
+    )
+
+    group = parser.add_argument_group("filters")
+    group.add_argument(
+        "--state",
+        metavar="STATE",
+        nargs="+",
+        choices=["starting", "running", "dead", "killed", "success"],
+        help="Only list batches in these states: `starting`, `running`, `dead`, "
+        "`killed` or `success`",
+    )
+    group.add_argument(
+        "--name",
+        metavar="REGEX",
+        type=regex,
+        help="Only list batches that the name matches this regular expression",
+    )
+    group.add_argument(
+        "--older-than",
+        metavar="DURATION",
+        type=livy.utils.parse_duration,
+        help="Only list batches started before this duration, e.g. `2h`. Livy "
+        "does not provide the start time, it is read from the first timestamp "
+        "in batch log. Batches without timestamp in log are excluded.",
+    )
+    group.add_argument(
+        "--newer-than",
+        metavar="DURATION",
+        type=livy.utils.parse_duration,
+        help="Only list batches started within this duration. Same rule to "
+        "`--older-than`.",
+    )
+    group.add_argument(
+        "--limit",
+        metavar="N",
+        type=int,
+        help="List at most N batches",
+    )
+
+    group = parser.add_argument_group("output")
+    group.add_argument(
+        "--format",
+        choices=["table", "jsonl"],
+        default="table",
+        help="Output format. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("livy server configuration")
+    group.add_argument(
+        "--api-url",
+        required=cfg.root.api_url is None,
+        default=cfg.root.api_url,
+        help="Base-URL for Livy API server",
+    )
+    group.add_argument(
+        "--page-size",
+        metavar="N",
+        type=int,
+        default=100,
+        help="Number of batches to be fetched in one request. "
+        "Default: %(default)s.",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-ls.main")
+
+    console.info("Connecting to server: %s", args.api_url)
+    client = livy.LivyClient(url=args.api_url)
+
+    with_age = args.older_than is not None or args.newer_than is not None
+    if args.format == "table":
+        print_row = TablePrinter(with_age)
+    else:
+        print_row = print_json
+
+    # list
+    count = 0
+    try:
+        for batch, start_time in iter_filtered_batches(
+            client,
+            page_size=args.page_size,
+            states=args.state,
+            name=args.name,
+            older_than=args.older_than,
+            newer_than=args.newer_than,
+        ):
+            print_row(batch, start_time)
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+    except livy.RequestError as e:
+        console.error(
+            "Failed to list batches. HTTP code=%d, Reason=%s", e.code, e.reason
+        )
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+    finally:
+        client.close()
+
+    console.info("%d batches listed", count)
+    return 0
+
+
+def iter_filtered_batches(
+    client: livy.LivyClient,
+    page_size: int = 100,
+    states: typing.List[str] = None,
+    name: typing.Pattern = None,
+    older_than: datetime.timedelta = None,
+    newer_than: datetime.timedelta = None,
+    max_workers: int = 8,
+) -> typing.Iterator[typing.Tuple[dict, typing.Optional[datetime.datetime]]]:
+    """Iterate over batches on the server that matches all the given filters.
+    Yields the batch and its start time. Start time is only queried when age
+    filter is set, otherwise it is ``None``. The start times are queried by at
+    most `max_workers` requests at a time, and the batches are yielded in the
+    listing order."""
+    candidates = (
+        batch
+        for batch in client.iter_batches(page_size)
+        if (not states or batch.get("state") in states)
+        and (not name or name.search(batch.get("name") or ""))
+    )
+
+    if older_than is None and newer_than is None:
+        for batch in candidates:
+            yield batch, None
+        return
+
+    def start_time_of(batch: dict) -> typing.Optional[datetime.datetime]:
+        return get_batch_start_time(client, batch["id"])
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    max_workers = max(1, max_workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        # a few batches at a time, so the results are streamed
+        while True:
+            window = list(itertools.islice(candidates, max_workers * 4))
+            if not window:
+                return
+
+            for batch, start_time in zip(window, executor.map(start_time_of, window)):
+                if not start_time:
+                    continue
+                if older_than is not None and now - start_time < older_than:
+                    continue
+                if newer_than is not None and now - start_time > newer_than:
+                    continue
+                yield batch, start_time
+
+
+def regex(text: str) -> typing.Pattern:
+    """Compile regular expression for argument parsing."""
+    try:
+        return re.compile(text)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"invalid regular expression: {e}")
+
+
+_SPARK_TIME = re.compile(r"^\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}", re.MULTILINE)
+
+
+def get_batch_start_time(
+    client: livy.LivyClient,
+    batch_id: int,
+    timezone: datetime.tzinfo = datetime.timezone.utc,
+) -> typing.Optional[datetime.datetime]:
+    """Estimate the start time of a batch by the first timestamp in its log.
+    Returns ``None`` if no timestamp is found. Timestamps in log has no
+    timezone info, it is assumed in `timezone`, which is the same assumption
+    to :py:class:`~livy.logreader.LivyBatchLogReader`."""
+    lines = client.get_batch_log(batch_id, from_=0, size=100)
+    return parse_start_time(lines, timezone)
+
+
+def parse_start_time(
+    lines: typing.List[str], timezone: datetime.tzinfo = datetime.timezone.utc
+) -> typing.Optional[datetime.datetime]:
+    """Get the first timestamp in log lines. Returns ``None`` if not found."""
+    m = _SPARK_TIME.search("\n".join(lines))
+    if not m:
+        return None
+    created = datetime.datetime.strptime(m.group(), "%y/%m/%d %H:%M:%S")
+    return created.replace(tzinfo=timezone)
+
+
+def print_json(batch: dict, start_time: datetime.datetime = None) -> None:
+    """Print batch information in JSON lines format. Start time is attached as
+    ``startTime`` key if it is available."""
+    if start_time:
+        batch = dict(batch, startTime=start_time.isoformat())
+    print(json.dumps(batch, ensure_ascii=False))
+
+
+class TablePrinter:
+    """Print batches as table rows. Header is printed before the first row.
+    Columns are in fixed width, so rows could be printed without buffering."""
+
+    def __init__(self, with_age: bool = False) -> None:
+        self.with_age = with_age
+        self._header_printed = False
+
+    def __call__(self, batch: dict, start_time: datetime.datetime = None) -> None:
+        if not self._header_printed:
+            self._print("ID", "STATE", "APP ID", "STARTED", "NAME")
+            self._header_printed = True
+
+        started = "-"
+        if start_time:
+            started = start_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+
+        self._print(
+            str(batch["id"]),
+            batch.get("state") or "-",
+            batch.get("appId") or "-",
+            started,
+            batch.get("name") or "-",
+        )
+
+    def _print(self, id_, state, app_id, started, name):
+        if self.with_age:
+            print(f"{id_:>8}  {state:<9}  {app_id:<32}  {started:<19}  {name}")
+        else:
+            print(f"{id_:>8}  {state:<9}  {app_id:<32}  {name}")
+
+
+if __name__ == "__main__":
+    exit(main())
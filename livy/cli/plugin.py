@@ -8,14 +8,29 @@ do what ever it want, including overwrite the arguments to impact the behavior,
 except logging which is already configured before the hook, and return back the
 namespace back to pass to next plugins or used in the main function.
 """
+import concurrent.futures
 import datetime
+import fnmatch
+import functools
+import hashlib
+import http.client
+import json
 import logging
 import os
 import pathlib
+import posixpath
 import re
+import shutil
+import threading
+import time
 import typing
+import urllib.parse
 import uuid
+import zipfile
 
+import livy.cli.hook
+import livy.client
+import livy.exception
 import livy.utils
 
 if typing.TYPE_CHECKING:
@@ -25,12 +40,207 @@ if typing.TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+MB = 1024 * 1024
+
+
 class _ConfigUploadS3(livy.utils.ConfigBase):
     bucket: str
     folder_format: str
     expire_days: int
+    max_concurrency: int = 8
+    multipart_threshold: int = 64
+    part_size: int = 16
+    content_addressed: bool = False
+    content_prefix: str = "artifacts"
+    hash_cache: str = "~/.cache/python-livy/hashes.json"
+
+
+class _S3Uploader:
+    """Upload files to S3. Files larger than `multipart_threshold` bytes are
+    uploaded in parts, and the parts are uploaded in parallel.
+
+    The client only needs to provide ``put_object``, ``create_multipart_upload``,
+    ``upload_part``, ``complete_multipart_upload``, ``abort_multipart_upload``
+    and ``head_object`` in the same signature as boto3.
+    """
+
+    MIN_PART_SIZE = 5 * MB
+
+    def __init__(
+        self,
+        client: typing.Any,
+        bucket: str,
+        extra_args: typing.Dict[str, typing.Any] = None,
+        max_concurrency: int = 8,
+        multipart_threshold: int = 64 * MB,
+        part_size: int = 16 * MB,
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.extra_args = extra_args or {}
+        self.max_concurrency = max(1, max_concurrency)
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(self.MIN_PART_SIZE, part_size)
+
+        self._lock = threading.Lock()
+        self._part_pool = None
+
+    def upload_all(
+        self, tasks: typing.Sequence[typing.Tuple[str, str]]
+    ) -> typing.List[str]:
+        """Upload files concurrently.
+
+        Parameters
+        ----------
+            tasks : typing.Sequence[typing.Tuple[str, str]]
+                Pairs of local file path and the object key
+
+        Return
+        ------
+        urls : typing.List[str]
+            S3 URLs of the objects, in the same order as `tasks`
+        """
+        if not tasks:
+            return []
+
+        tick = time.monotonic()
+        workers = min(self.max_concurrency, len(tasks))
+        with concurrent.futures.ThreadPoolExecutor(
+            self.max_concurrency, thread_name_prefix="s3-part"
+        ) as part_pool, concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="s3-upload"
+        ) as pool:
+            self._part_pool = part_pool
+            try:
+                futures = [pool.submit(self.upload, *task) for task in tasks]
+                urls = [f.result() for f in futures]
+            finally:
+                self._part_pool = None
+
+        elapsed = time.monotonic() - tick
+        logger.info("Uploaded %d files in %.1f seconds", len(tasks), elapsed)
+        return urls
+
+    def upload(
+        self,
+        filepath: str,
+        key: str,
+        skip_existing: bool = False,
+        extra_args: typing.Dict[str, typing.Any] = None,
+    ) -> str:
+        """Upload a file. Returns the S3 URL.
+
+        Parameters
+        ----------
+            filepath : str
+                Path to local file
+            key : str
+                Object key
+            skip_existing : bool
+                Do not upload if an object in the same size already exists in
+                the key. For the content-addressed keys.
+            extra_args : typing.Dict[str, typing.Any]
+                Extra parameters to the upload requests; use the ones given in
+                constructor if not set.
+        """
+        size = os.path.getsize(filepath)
+        if skip_existing and self.exists(key, size):
+            logger.info("Skip %s, already uploaded", os.path.basename(filepath))
+            return f"s3://{self.bucket}/{key}"
+
+        if extra_args is None:
+            extra_args = self.extra_args
 
+        logger.debug(
+            "Upload %s -> s3://%s/%s",
+            pathlib.Path(filepath).resolve(),
+            self.bucket,
+            key,
+        )
+
+        tick = time.monotonic()
+        if size > self.multipart_threshold:
+            self._upload_multipart(filepath, key, size, extra_args)
+        else:
+            with open(filepath, "rb") as fp:
+                self.client.put_object(
+                    Bucket=self.bucket, Key=key, Body=fp, **extra_args
+                )
+        elapsed = time.monotonic() - tick
+
+        logger.info(
+            "Uploaded %s (%.1f MB) in %.1f seconds, %.1f MB/s",
+            os.path.basename(filepath),
+            size / MB,
+            elapsed,
+            size / MB / max(elapsed, 1e-3),
+        )
+        return f"s3://{self.bucket}/{key}"
+
+    def exists(self, key: str, size: int = None) -> bool:
+        """Check if the object exists, and in the given size if it is set."""
+        try:
+            resp = self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return size is None or resp.get("ContentLength") == size
+
+    def _upload_multipart(
+        self,
+        filepath: str,
+        key: str,
+        size: int,
+        extra_args: typing.Dict[str, typing.Any],
+    ) -> None:
+        resp = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, **extra_args
+        )
+        upload_id = resp["UploadId"]
+
+        def _upload_part(number: int, offset: int) -> dict:
+            with open(filepath, "rb") as fp:
+                fp.seek(offset)
+                body = fp.read(self.part_size)
+            resp = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+            return {"PartNumber": number, "ETag": resp["ETag"]}
+
+        offsets = range(0, size, self.part_size)
+        pool = self._part_pool
+        try:
+            if pool:
+                futures = [
+                    pool.submit(_upload_part, i, offset)
+                    for i, offset in enumerate(offsets, 1)
+                ]
+                parts = [f.result() for f in futures]
+            else:
+                parts = [_upload_part(i, offset) for i, offset in enumerate(offsets, 1)]
 
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+
+        except BaseException:
+            logger.warning("Failed to upload %s. Abort multipart upload.", filepath)
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            raise
+
+
+@livy.cli.hook.plugin(depends_on=["livy.cli.plugin:zip_py_files"])
 def upload_s3(
     source: str, args: "livy.cli.submit.PreSubmitArguments"
 ) -> "livy.cli.submit.PreSubmitArguments":
@@ -47,6 +257,19 @@ def upload_s3(
       ``uuid`` (random genersted uuid) or ``script_name`` (base name part of main
       application script).
     * ``expire_days``: Optional key. Would set object expire date if given.
+    * ``max_concurrency``: Optional key. Number of files, or parts of a large
+      file, to be uploaded at the same time. Default 8.
+    * ``multipart_threshold``: Optional key. Files larger than this size in MB
+      are uploaded in parts. Default 64.
+    * ``part_size``: Optional key. Size in MB of each part in multipart upload,
+      5 at least. Default 16.
+    * ``content_addressed``: Optional key. Store the files other than the main
+      script under ``content_prefix``, in the key derived from their SHA-256
+      digest, and skip uploading if the object already exists. Default false.
+    * ``content_prefix``: Optional key. S3 prefix for the content-addressed
+      files. Default ``artifacts``.
+    * ``hash_cache``: Optional key. Path to the local cache of file digests.
+      Default ``~/.cache/python-livy/hashes.json``.
 
     Example configs:
 
@@ -73,9 +296,7 @@ def upload_s3(
     ), "Missing required key `folder_format` in upload-s3 plugin config"
 
     # shared parameters
-    basic_param = {
-        "Bucket": meta.bucket,
-    }
+    basic_param = {}
 
     if meta.expire_days is None:
         ...  # do nothing
@@ -101,35 +322,483 @@ def upload_s3(
     logger.debug("Uploading files to s3://%s/%s", meta.bucket, folder)
 
     # upload to s3
+    uploader = _S3Uploader(
+        _create_s3_client(),
+        meta.bucket,
+        basic_param,
+        max_concurrency=meta.max_concurrency,
+        multipart_threshold=meta.multipart_threshold * MB,
+        part_size=meta.part_size * MB,
+    )
+
+    # collect local files; lists are copied for not to change the defaults
+    # shared between submissions
+    paths = {"": [args.script]}
+    for name in ("jars", "py_files", "files", "archives"):
+        if getattr(args, name):
+            paths[name] = list(getattr(args, name))
+
+    tasks = []
+    for prefix, filepaths in paths.items():
+        for i, filepath in enumerate(filepaths):
+            # skip if file is already on s3
+            if re.match(r"s3://", filepath, re.RegexFlag.IGNORECASE):
+                continue
+            key = os.path.join(folder, prefix, os.path.basename(filepath))
+            tasks.append([prefix, i, filepath, key])
+
+    # content-addressed keys; the main script is always in the per-run folder
+    if meta.content_addressed:
+        hash_cache = livy.utils.FileHashCache(meta.hash_cache)
+        dedup = [t for t in tasks if t[0]]
+        with concurrent.futures.ThreadPoolExecutor(
+            max(1, meta.max_concurrency)
+        ) as pool:
+            digests = list(pool.map(hash_cache.get, [t[2] for t in dedup]))
+        hash_cache.save()
+
+        for task, digest in zip(dedup, digests):
+            task[3] = "/".join(
+                (
+                    meta.content_prefix.strip("/"),
+                    digest,
+                    os.path.basename(task[2]),
+                )
+            )
+
+    # shared objects are not expired with this run
+    uploads = []
+    for prefix, _, filepath, key in tasks:
+        if meta.content_addressed and prefix:
+            uploads.append((filepath, key, True, {}))
+        else:
+            uploads.append((filepath, key))
+
+    urls = uploader.upload_all(uploads)
+    for (prefix, i, _, _), url in zip(tasks, urls):
+        paths[prefix][i] = url
+
+    args.script = paths.pop("")[0]
+    for name, filepaths in paths.items():
+        setattr(args, name, filepaths)
+
+    return args
+
+
+def _create_s3_client():
     import boto3
 
-    client = boto3.client("s3")
+    return boto3.client("s3")
+
+
+class _ConfigZipPyFiles(livy.utils.ConfigBase):
+    cache_dir: str = "~/.cache/python-livy/py_files"
+    max_workers: int = 4
+    exclude: typing.List[str] = ["__pycache__", "*.pyc", ".*"]
+
+
+@livy.cli.hook.plugin()
+def zip_py_files(
+    source: str, args: "livy.cli.submit.PreSubmitArguments"
+) -> "livy.cli.submit.PreSubmitArguments":
+    """Pre-submit action to pack the local directories in ``py_files`` into zip
+    archives, so a package could be given as is. Put it before the upload plugin
+    to upload the archives.
+
+    Each directory is packed with itself as the top level entry, i.e.
+    ``./src/mypkg`` is packed as ``mypkg/__init__.py``, ``mypkg/...``. The
+    archives are deterministic: entries are sorted and the timestamps are fixed,
+    so the same content always get the same bytes. They are cached by the digest
+    of the tree and only rebuilt when any file is changed. Several directories
+    are packed in parallel.
+
+    This plugin reads the optional configurations section
+    ``pre-submit:zip_py_files``:
+
+    * ``cache_dir``: Directory to store the archives. Default
+      ``~/.cache/python-livy/py_files``.
+    * ``max_workers``: Number of archives to be built at the same time.
+      Default 4.
+    * ``exclude``: Patterns of file or directory names to be excluded. Default
+      ``["__pycache__", "*.pyc", ".*"]``.
+    """
+    if source != "PRE-SUBMIT":
+        raise ValueError("this plugin is for pre-submit hook only")
+
+    meta = _ConfigZipPyFiles.load("pre-submit:zip_py_files")
+    directories = [p for p in args.py_files or () if os.path.isdir(p)]
+    if not directories:
+        return args
+
+    cache_dir = os.path.expanduser(meta.cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    hash_cache = livy.utils.FileHashCache(os.path.join(cache_dir, "hashes.json"))
+
+    def _pack(directory: str) -> str:
+        files = _list_tree(directory, meta.exclude)
+        digest = _tree_digest(files, hash_cache)
+
+        name = os.path.basename(os.path.abspath(directory))
+        output = os.path.join(cache_dir, f"{name}-{digest[:16]}.zip")
+        if os.path.exists(output):
+            logger.info("Use cached archive %s for %s", output, directory)
+            return output
+
+        tick = time.monotonic()
+        _build_zip(files, name, output)
+        logger.info(
+            "Packed %s into %s (%d files) in %.1f seconds",
+            directory,
+            output,
+            len(files),
+            time.monotonic() - tick,
+        )
+        return output
+
+    with concurrent.futures.ThreadPoolExecutor(max(1, meta.max_workers)) as pool:
+        archives = dict(zip(directories, pool.map(_pack, directories)))
+    hash_cache.save()
+
+    args.py_files = [archives.get(p, p) for p in args.py_files]
+    return args
+
+
+def _list_tree(
+    directory: str, exclude: typing.List[str]
+) -> typing.List[typing.Tuple[str, str]]:
+    """List files in directory. Returns sorted pairs of the relative path, in
+    posix style, and the local path."""
+    files = []
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if not _match_any(d, exclude)]
+        for filename in filenames:
+            if _match_any(filename, exclude):
+                continue
+            path = os.path.join(root, filename)
+            relpath = pathlib.PurePath(os.path.relpath(path, directory)).as_posix()
+            files.append((relpath, path))
+    return sorted(files)
+
+
+def _match_any(name: str, patterns: typing.List[str]) -> bool:
+    return any(fnmatch.fnmatch(name, p) for p in patterns)
+
 
-    def _upload(prefix: str, filepath: str):
-        # skip if file is already on s3
-        if re.match(r"s3://", filepath, re.RegexFlag.IGNORECASE):
-            return filepath
+def _tree_digest(
+    files: typing.List[typing.Tuple[str, str]], hash_cache: "livy.utils.FileHashCache"
+) -> str:
+    """Digest of the tree, over the relative paths and the file digests."""
+    h = hashlib.sha256()
+    for relpath, path in files:
+        h.update(f"{relpath}\0{hash_cache.get(path)}\n".encode())
+    return h.hexdigest()
 
-        # build key
-        filename = pathlib.Path(filepath).resolve()
-        key = os.path.join(folder, prefix, os.path.basename(filepath))
-        logger.debug("Upload %s -> s3://%s/%s", filename, meta.bucket, key)
 
-        # upload
+def _build_zip(files: typing.List[typing.Tuple[str, str]], name: str, output: str):
+    """Build a deterministic zip archive."""
+    tmp_path = f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for relpath, path in files:
+            info = zipfile.ZipInfo(f"{name}/{relpath}", (1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with open(path, "rb") as src, zf.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst, MB)
+    os.replace(tmp_path, output)
+
+
+_XATTR_DIGEST = "user.livy.sha256"
+
+
+class _ConfigUploadWebHDFS(livy.utils.ConfigBase):
+    url: str
+    folder_format: str
+    user: str
+    max_concurrency: int = 8
+    hash_cache: str = "~/.cache/python-livy/hashes.json"
+
+
+class _WebHDFSClient:
+    """Minimal `WebHDFS <https://hadoop.apache.org/docs/stable/hadoop-project-dist/hadoop-hdfs/WebHDFS.html>`_
+    client for uploading files. Connections are pooled by host, for the data is
+    redirected to the datanodes."""
+
+    PREFIX = "/webhdfs/v1"
+
+    def __init__(
+        self, url: str, user: str = None, timeout: float = 60.0, pool_size: int = 8
+    ) -> None:
+        purl = urllib.parse.urlsplit(url)
+        if purl.scheme not in ("http", "https"):
+            raise livy.exception.OperationError(f"Unsupported scheme: {purl.scheme}")
+
+        self.base = f"{purl.scheme}://{purl.netloc}"
+        self.user = user
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self._lock = threading.Lock()
+        self._pools: typing.Dict[
+            typing.Tuple[str, str], livy.client._ConnectionPool
+        ] = {}
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+
+    def _pool(self, scheme: str, netloc: str) -> "livy.client._ConnectionPool":
+        with self._lock:
+            if (scheme, netloc) not in self._pools:
+                factory = http.client.HTTPConnection
+                if scheme == "https":
+                    factory = http.client.HTTPSConnection
+                self._pools[scheme, netloc] = livy.client._ConnectionPool(
+                    functools.partial(factory, netloc, timeout=self.timeout),
+                    self.pool_size,
+                )
+            return self._pools[scheme, netloc]
+
+    def url(self, path: str, op: str, **params) -> str:
+        """URL to the operation on the path."""
+        query = {"op": op}
+        if self.user:
+            query["user.name"] = self.user
+        query.update(params)
+        return "".join(
+            (
+                self.base,
+                self.PREFIX,
+                urllib.parse.quote(path),
+                "?",
+                urllib.parse.urlencode(query),
+            )
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: typing.BinaryIO = None,
+        size: int = 0,
+    ) -> typing.Tuple[int, http.client.HTTPMessage, bytes]:
+        """Send request and get the status code, headers and the content.
+
+        Raises
+        ------
+        RequestError
+            On connection error
+        """
+        purl = urllib.parse.urlsplit(url)
+        target = purl.path + ("?" + purl.query if purl.query else "")
+
+        with self._pool(purl.scheme, purl.netloc).connection() as (conn, reused):
+            while True:
+                try:
+                    conn.putrequest(method, target)
+                    if body is not None:
+                        conn.putheader("Content-Type", "application/octet-stream")
+                    conn.putheader("Content-Length", str(size))
+                    conn.endheaders()
+                    if body is not None:
+                        body.seek(0)
+                        conn.send(body)
+                    response = conn.getresponse()
+                    content = response.read()
+                    break
+                except (http.client.RemoteDisconnected, BrokenPipeError) as e:
+                    # idle connection closed by server; retry on a new one
+                    conn.close()
+                    if not reused:
+                        raise livy.exception.RequestError(0, "Connection error", e)
+                    reused = False
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    raise livy.exception.RequestError(0, "Connection error", e)
+
+        return response.status, response.headers, content
+
+    def _call(self, method: str, path: str, op: str, **params) -> dict:
+        status, _, content = self.request(method, self.url(path, op, **params))
+        if status >= 400:
+            raise livy.exception.RequestError(status, content.decode(errors="replace"))
+        return json.loads(content) if content else {}
+
+    def status(self, path: str) -> typing.Optional[dict]:
+        """Get the file status. ``None`` if the file does not exist."""
+        try:
+            return self._call("GET", path, "GETFILESTATUS")["FileStatus"]
+        except livy.exception.RequestError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def get_xattr(self, path: str, name: str) -> typing.Optional[str]:
+        """Get the extended attribute in text. ``None`` if not set."""
+        try:
+            resp = self._call(
+                "GET", path, "GETXATTRS", **{"xattr.name": name, "encoding": "text"}
+            )
+        except livy.exception.RequestError as e:
+            if e.code in (403, 404):  # attribute not exists
+                return None
+            raise
+        for attr in resp.get("XAttrs", ()):
+            if attr.get("name") == name and attr.get("value"):
+                return attr["value"].strip('"')
+        return None
+
+    def set_xattr(self, path: str, name: str, value: str) -> None:
+        """Set the extended attribute."""
+        self._call(
+            "PUT",
+            path,
+            "SETXATTR",
+            **{"xattr.name": name, "xattr.value": value, "flag": "CREATE"},
+        )
+
+    def create(self, path: str, filepath: str) -> None:
+        """Upload local file to the path. The existing file is overwritten."""
+        status, headers, content = self.request(
+            "PUT", self.url(path, "CREATE", overwrite="true")
+        )
+        if status != 307 or not headers.get("Location"):
+            raise livy.exception.RequestError(status, content.decode(errors="replace"))
+
         with open(filepath, "rb") as fp:
-            client.put_object(Key=key, Body=fp, **basic_param)
+            status, _, content = self.request(
+                "PUT", headers["Location"], fp, os.path.getsize(filepath)
+            )
+        if status >= 400:
+            raise livy.exception.RequestError(status, content.decode(errors="replace"))
+
+
+@livy.cli.hook.plugin(depends_on=["livy.cli.plugin:zip_py_files"])
+def upload_webhdfs(
+    source: str, args: "livy.cli.submit.PreSubmitArguments"
+) -> "livy.cli.submit.PreSubmitArguments":
+    """Pre-submit action to upload local files to HDFS through `WebHDFS REST API
+    <https://hadoop.apache.org/docs/stable/hadoop-project-dist/hadoop-hdfs/WebHDFS.html>`_.
+
+    Files are uploaded in parallel. The SHA-256 digest of each uploaded file is
+    saved in the extended attribute ``user.livy.sha256``; a file is skipped if
+    the remote one is in the same size and has the same digest. It takes effect
+    when ``folder_format`` does not change between runs, e.g. it does not use
+    ``uuid``.
+
+    This plugin **requires** configurations section ``pre-submit:upload_webhdfs``
+    set in user config file. Following key are read:
 
-        return f"s3://{meta.bucket}/{key}"
+    * ``url``: Required key. URL to the WebHDFS endpoint of namenode, e.g.
+      ``http://namenode:9870``.
+    * ``folder_format``: Required key. HDFS directory to store the files; it
+      would be expanded with the same variables to ``folder_format`` in
+      :py:func:`upload_s3`.
+    * ``user``: Optional key. User name for the simple authentication.
+    * ``max_concurrency``: Optional key. Number of files to be uploaded at the
+      same time. Default 8.
+    * ``hash_cache``: Optional key. Path to the local cache of file digests.
+      Default ``~/.cache/python-livy/hashes.json``.
+
+    Example configs:
+
+    .. code-block:: json
+
+       {
+           "pre-submit:upload_webhdfs": {
+               "url": "http://namenode:9870",
+               "folder_format": "/user/me/livy/{script_name}",
+               "user": "me"
+           }
+       }
+    """
+    if source != "PRE-SUBMIT":
+        raise ValueError("this plugin is for pre-submit hook only")
+
+    # get configs
+    meta = _ConfigUploadWebHDFS.load("pre-submit:upload_webhdfs")
+    assert isinstance(
+        meta.url, str
+    ), "Missing required key `url` in upload-webhdfs plugin config"
+    assert isinstance(
+        meta.folder_format, str
+    ), "Missing required key `folder_format` in upload-webhdfs plugin config"
+
+    # folder
+    script_name, _ = os.path.splitext(os.path.basename(args.script))
+    folder = "/" + meta.folder_format.strip("/").format(
+        time=datetime.datetime.now(),
+        uuid=uuid.uuid4(),
+        script_name=script_name,
+    )
+
+    # collect local files
+    paths = {"": [args.script]}
+    for name in ("jars", "py_files", "files", "archives"):
+        if getattr(args, name):
+            paths[name] = list(getattr(args, name))
+
+    tasks = []
+    for prefix, filepaths in paths.items():
+        for i, filepath in enumerate(filepaths):
+            if re.match(r"[a-z][a-z0-9+.-]*://", filepath, re.RegexFlag.IGNORECASE):
+                continue  # remote file
+            remote = posixpath.join(folder, prefix, os.path.basename(filepath))
+            tasks.append((prefix, i, filepath, remote))
+
+    logger.debug("Uploading files to %s", folder)
+
+    # upload
+    client = _WebHDFSClient(meta.url, meta.user, pool_size=max(1, meta.max_concurrency))
+    hash_cache = livy.utils.FileHashCache(meta.hash_cache)
+
+    def _upload(filepath: str, remote: str):
+        size = os.path.getsize(filepath)
+        digest = hash_cache.get(filepath)
+
+        status = client.status(remote)
+        if (
+            status
+            and status.get("length") == size
+            and client.get_xattr(remote, _XATTR_DIGEST) == digest
+        ):
+            logger.info("Skip %s, already uploaded", os.path.basename(filepath))
+            return f"hdfs://{remote}"
+
+        logger.debug("Upload %s -> %s", pathlib.Path(filepath).resolve(), remote)
+        tick = time.monotonic()
+        client.create(remote, filepath)
+        client.set_xattr(remote, _XATTR_DIGEST, digest)
+        elapsed = time.monotonic() - tick
+
+        logger.info(
+            "Uploaded %s (%.1f MB) in %.1f seconds, %.1f MB/s",
+            os.path.basename(filepath),
+            size / MB,
+            elapsed,
+            size / MB / max(elapsed, 1e-3),
+        )
+        return f"hdfs://{remote}"
+
+    tick = time.monotonic()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max(1, meta.max_concurrency), thread_name_prefix="webhdfs-upload"
+        ) as pool:
+            urls = list(pool.map(lambda t: _upload(t[2], t[3]), tasks))
+    finally:
+        client.close()
+        hash_cache.save()
+    logger.info(
+        "Uploaded %d files in %.1f seconds", len(tasks), time.monotonic() - tick
+    )
 
-    args.script = _upload("", args.script)
+    for (prefix, i, _, _), url in zip(tasks, urls):
+        paths[prefix][i] = url
 
-    if args.jars:
-        args.jars = [_upload("jars", fn) for fn in args.jars]
-    if args.py_files:
-        args.py_files = [_upload("py_files", fn) for fn in args.py_files]
-    if args.files:
-        args.files = [_upload("files", fn) for fn in args.files]
-    if args.archives:
-        args.archives = [_upload("archives", fn) for fn in args.archives]
+    args.script = paths.pop("")[0]
+    for name, filepaths in paths.items():
+        setattr(args, name, filepaths)
 
     return args
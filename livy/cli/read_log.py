@@ -1,11 +1,15 @@
 """Read livy batch execution log from server
 """
 import argparse
+import functools
 import logging
+import sys
 
 import livy
 import livy.cli.config
 import livy.cli.logging
+import livy.cli.search
+import livy.detect
 
 
 def main(argv=None):
@@ -48,6 +52,59 @@ def main(argv=None):
         help="Only read log once",
     )
 
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(detect=cfg.detect.enabled)
+    g.add_argument(
+        "--detect",
+        dest="detect",
+        action="store_true",
+        help="Warn when the failures that slow down the batch are found "
+        "frequently in the logs",
+    )
+    g.add_argument(
+        "--no-detect",
+        dest="detect",
+        action="store_false",
+        help="Do not watch the logs for failures",
+    )
+
+    group.add_argument(
+        "--parallel",
+        metavar="N",
+        type=int,
+        help="Parse logs with N processes. For reading huge logs from a "
+        "finished batch; it does not take effect when keep-watch is enabled.",
+    )
+
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(index=cfg.index.auto_index)
+    g.add_argument(
+        "--index",
+        dest="index",
+        action="store_true",
+        help="Save logs into local index for `livy search`",
+    )
+    g.add_argument(
+        "--no-index",
+        dest="index",
+        action="store_false",
+        help="Do not save logs into local index",
+    )
+
+    group = parser.add_argument_group("export")
+    group.add_argument(
+        "--export",
+        choices=["jsonl", "csv"],
+        help="Export parsed logs as structured data instead of printing them. "
+        "Logs are read once.",
+    )
+    group.add_argument(
+        "--output",
+        metavar="PATH",
+        default="-",
+        help="Output file path for export. Default: stdout.",
+    )
+
     livy.cli.logging.setup_argparse(parser)
 
     args = parser.parse_args(argv)
@@ -72,6 +129,10 @@ def main(argv=None):
         console.warning("Keyboard interrupt")
         return 1
 
+    # export
+    if args.export:
+        return export(client, args.batch_id, args.export, args.output)
+
     # fetch log
     console.info("Reading logs from batch %d", args.batch_id)
     if is_finished:
@@ -82,8 +143,26 @@ def main(argv=None):
 
     reader = livy.LivyBatchLogReader(client, args.batch_id)
 
+    index = args.index and livy.cli.search.open_index(console)
+    if index:
+        reader.add_sink(index)
+
+    detector = None
+    if args.detect:
+        try:
+            detector = livy.detect.LivyFailureDetector(
+                cfg.detect.window,
+                livy.detect.parse_thresholds(cfg.detect.thresholds),
+            )
+        except livy.Error as e:
+            console.warning("Failure detection is disabled: %s", e)
+        else:
+            reader.add_sink(detector)
+
     if args.keep_watch:
         read_func = reader.read_until_finish
+    elif args.parallel:
+        read_func = functools.partial(reader.read_parallel, args.parallel)
     else:
         read_func = reader.read
 
@@ -97,8 +176,17 @@ def main(argv=None):
     except KeyboardInterrupt:
         console.warning("Keyboard interrupt")
         return 1
+    finally:
+        if index:
+            index.close()
 
     # finish
+    if detector and detector.counts:
+        console.warning(
+            "Failures found in logs: %s",
+            ", ".join(f"{k}={v}" for k, v in sorted(detector.counts.items())),
+        )
+
     if args.keep_watch:
         state = client.get_batch_state(args.batch_id)
         level = logging.INFO if state == "success" else logging.WARNING
@@ -107,5 +195,34 @@ def main(argv=None):
     return 0
 
 
+def export(client: livy.LivyClient, batch_id: int, format: str, output: str) -> int:
+    """Export parsed logs to file"""
+    console = livy.cli.logging.get("livy-read-log.export")
+    console.info("Exporting logs from batch %d to %s", batch_id, output)
+
+    reader = livy.LivyBatchLogReader(client, batch_id)
+
+    try:
+        if output == "-":
+            count = reader.export(sys.stdout, format)
+        else:
+            with open(output, "w", newline="", encoding="utf-8") as fp:
+                count = reader.export(fp, format)
+    except livy.RequestError as e:
+        console.error(
+            "Error occurs during read log. HTTP code=%d, Reason=%s", e.code, e.reason
+        )
+        return 1
+    except OSError as e:
+        console.error("Failed to write file %s: %s", output, e)
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+
+    console.info("%d records exported", count)
+    return 0
+
+
 if __name__ == "__main__":
     exit(main())
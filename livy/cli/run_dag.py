@@ -0,0 +1,268 @@
+"""Submit batches in dependency order and watch them until all are ended
+"""
+import argparse
+import datetime
+import json
+import logging
+import typing
+
+import livy
+import livy.cli.config
+import livy.cli.logging
+import livy.cli.submit
+import livy.dag
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy run-dag",
+        description=__doc__,
+    )
+
+    parser.add_argument(
+        "dag",
+        help="Path to the DAG definition file, in JSON format",
+    )
+    parser.add_argument(
+        "--state-file",
+        metavar="PATH",
+        help="Path to save the progress. Default: `<dag>.state.json`.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the saved progress and run all nodes from beginning",
+    )
+
+    group = parser.add_argument_group("scheduling")
+    group.add_argument(
+        "--max-running",
+        metavar="N",
+        type=int,
+        help="Max number of batches in running at the same time",
+    )
+    group.add_argument(
+        "--queue-limit",
+        metavar="QUEUE=N",
+        nargs="+",
+        default=[],
+        type=livy.cli.submit.argqueuelimit,
+        help="Max number of running batches in the given YARN queue",
+    )
+    group.add_argument(
+        "--retries",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Times to resubmit a failed node, for the nodes that do not set "
+        "`retries`. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--interval",
+        metavar="SEC",
+        type=float,
+        default=10.0,
+        help="Interval in seconds to poll batch states. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--max-workers",
+        metavar="N",
+        type=int,
+        default=8,
+        help="Max number of concurrent submissions. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("livy server configuration")
+    group.add_argument(
+        "--api-url",
+        required=cfg.root.api_url is None,
+        default=cfg.root.api_url,
+        help="Base-URL for Livy API server",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-run-dag.main")
+
+    # load dag
+    defaults = default_arguments(cfg, args.api_url)
+    try:
+        nodes = load_dag(args.dag, defaults, args.retries)
+    except (OSError, ValueError) as e:
+        console.error("Failed to read DAG %s: %s", args.dag, e)
+        return 1
+
+    def prepare(job: livy.cli.submit.PreSubmitArguments) -> dict:
+        try:
+            job = livy.cli.submit.run_hook(
+                console, "PRE-SUBMIT", job, job.on_pre_submit
+            )
+        except SystemExit:
+            raise livy.OperationError("Pre-submit action failed")
+        return livy.cli.submit.build_submit_parameter(job)
+
+    client = livy.LivyClient(url=args.api_url, pool_size=max(1, args.max_workers))
+
+    try:
+        runner = livy.dag.LivyDagRunner(
+            client,
+            nodes,
+            max_running=args.max_running,
+            queue_limits=dict(args.queue_limit),
+            prepare=prepare,
+            state_path=args.state_file or args.dag + ".state.json",
+            max_workers=args.max_workers,
+        )
+        if not args.restart and runner.load_state():
+            console.info("Resume from %s", runner.state_path)
+    except livy.Error as e:
+        console.error("%s", e)
+        return 1
+
+    console.info("Running %d nodes", len(runner.nodes))
+
+    try:
+        runner.run(args.interval)
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt. Submitted batches are still running.")
+        console.warning("Run the same command again to resume.")
+        return 1
+    finally:
+        client.close()
+
+    print_summary(console, runner)
+    return 0 if runner.succeeded else 1
+
+
+def default_arguments(
+    cfg: livy.cli.config.Configuration, api_url: str
+) -> livy.cli.submit.PreSubmitArguments:
+    """Submission arguments from configurations, as the defaults of the nodes."""
+    return argparse.Namespace(
+        script=None,
+        args=[],
+        class_name=None,
+        jars=None,
+        py_files=None,
+        files=None,
+        archives=None,
+        queue_name=None,
+        session_name=None,
+        api_url=api_url,
+        driver_memory=cfg.submit.driver_memory,
+        driver_cores=cfg.submit.driver_cores,
+        executor_memory=cfg.submit.executor_memory,
+        executor_cores=cfg.submit.executor_cores,
+        num_executors=cfg.submit.num_executors,
+        spark_conf=cfg.submit.spark_conf,
+        on_pre_submit=cfg.submit.pre_submit,
+        priority=0,
+        watch_log=False,
+        index=False,
+        time_prog_start=datetime.datetime.now().astimezone(),
+    )
+
+
+def load_dag(
+    path: str,
+    defaults: livy.cli.submit.PreSubmitArguments,
+    retries: int = 0,
+) -> typing.List[livy.dag.LivyDagNode]:
+    """Read DAG definition file. It is a JSON object with the keys:
+
+    * ``nodes``: list of nodes. Each node is an object with ``name``, optional
+      ``depends_on`` and ``retries``, and the submission arguments in the same
+      format as the entries in manifest of ``livy submit``.
+    * ``defaults``: optional. Submission arguments shared by all nodes.
+
+    Raises
+    ------
+    ValueError
+        On the definition is malformed
+    """
+    with open(path, "r", encoding="utf-8") as fp:
+        try:
+            dag = json.load(fp)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+
+    if not isinstance(dag, dict) or not isinstance(dag.get("nodes"), list):
+        raise ValueError("expect a JSON object with `nodes` list")
+
+    shared = dag.get("defaults") or {}
+    if not isinstance(shared, dict):
+        raise ValueError("expect `defaults` to be a JSON object")
+
+    nodes = []
+    for i, entry in enumerate(dag["nodes"]):
+        if not isinstance(entry, dict):
+            raise ValueError(f"node #{i}: expect JSON object")
+
+        entry = dict(entry)
+        name = entry.pop("name", None)
+        depends_on = entry.pop("depends_on", [])
+        node_retries = entry.pop("retries", retries)
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"node #{i}: name is required")
+        if not isinstance(depends_on, list):
+            raise ValueError(f"node {name}: expect list for depends_on")
+        if not isinstance(node_retries, int) or node_retries < 0:
+            raise ValueError(f"node {name}: expect non-negative int for retries")
+
+        try:
+            job = livy.cli.submit.merge_arguments(defaults, _merge_entry(shared, entry))
+        except ValueError as e:
+            raise ValueError(f"node {name}: {e}")
+
+        nodes.append(
+            livy.dag.LivyDagNode(
+                name,
+                job,
+                depends_on=depends_on,
+                queue=job.queue_name,
+                retries=node_retries,
+            )
+        )
+
+    return nodes
+
+
+def _merge_entry(shared: dict, entry: dict) -> dict:
+    merged = dict(shared, **entry)
+    if "spark_conf" in shared and "spark_conf" in entry:
+        merged["spark_conf"] = _conf_pairs(shared["spark_conf"]) + _conf_pairs(
+            entry["spark_conf"]
+        )
+    return merged
+
+
+def _conf_pairs(conf) -> list:
+    if isinstance(conf, dict):
+        return list(conf.items())
+    return list(conf)
+
+
+def print_summary(logger: logging.Logger, runner: livy.dag.LivyDagRunner) -> None:
+    """Log the final state of each node."""
+    for node in runner.nodes:
+        level = logging.INFO if node.state == livy.dag.SUCCESS else logging.WARNING
+        logger.log(
+            level,
+            "%-24s %-16s batch=%-8s attempts=%d%s",
+            node.name,
+            node.state,
+            node.batch_id if node.batch_id is not None else "-",
+            node.attempts,
+            f" ({node.error})" if node.error else "",
+        )
+
+
+if __name__ == "__main__":
+    exit(main())
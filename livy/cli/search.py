@@ -0,0 +1,459 @@
+"""Search logs in local index, or grep logs of batches on server
+"""
+import argparse
+import concurrent.futures
+import datetime
+import logging
+import re
+import threading
+import typing
+
+import livy
+import livy.cli.config
+import livy.cli.logging
+import livy.exception
+import livy.index
+import livy.utils
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy search",
+        description=__doc__,
+    )
+
+    parser.add_argument(
+        "text",
+        nargs="?",
+        help="Text to be found in log message. It is a regular expression in "
+        "live search.",
+    )
+
+    group = parser.add_argument_group("batch selection")
+    group.add_argument(
+        "--batch",
+        metavar="N",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Only search logs from these batches",
+    )
+    group.add_argument(
+        "--batch-range",
+        metavar=("FROM", "TO"),
+        type=int,
+        nargs=2,
+        help="Only search logs from batches in this ID range (inclusive)",
+    )
+
+    group = parser.add_argument_group("filters for index")
+    group.add_argument(
+        "--level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        type=str.upper,
+        help="Minimal log level",
+    )
+    group.add_argument(
+        "--logger",
+        metavar="NAME",
+        help="Logger name. Matches the full name, its child loggers or the last "
+        "component of the name, e.g. `TaskSetManager`.",
+    )
+    group.add_argument(
+        "--since",
+        metavar="TIME",
+        type=parse_time,
+        help="Only search logs created after this time. Accepts a duration "
+        "before now (e.g. `24h`, `30m`) or an ISO format datetime.",
+    )
+    group.add_argument(
+        "--until",
+        metavar="TIME",
+        type=parse_time,
+        help="Only search logs created before this time. Same format as `--since`.",
+    )
+    group.add_argument(
+        "--limit",
+        metavar="N",
+        type=int,
+        default=100,
+        help="Maximum number of results. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("live search")
+    group.add_argument(
+        "--live",
+        action="store_true",
+        help="Fetch and grep the logs from server concurrently, instead of "
+        "searching in local index. Batches should be selected by `--batch`, "
+        "`--batch-range` or `--state`.",
+    )
+    group.add_argument(
+        "--state",
+        metavar="STATE",
+        nargs="+",
+        choices=["starting", "running", "dead", "killed", "success"],
+        help="Only search batches in these states: `starting`, `running`, "
+        "`dead`, `killed` or `success`",
+    )
+    group.add_argument(
+        "-F",
+        "--fixed-strings",
+        action="store_true",
+        help="Interpret the text as a literal string",
+    )
+    group.add_argument(
+        "-i",
+        "--ignore-case",
+        action="store_true",
+        help="Case insensitive matching",
+    )
+    group.add_argument(
+        "--max-workers",
+        metavar="N",
+        type=int,
+        default=8,
+        help="Max number of batches to be fetched concurrently. "
+        "Default: %(default)s.",
+    )
+    g = group.add_mutually_exclusive_group()
+    g.add_argument(
+        "--tail",
+        metavar="N",
+        type=int,
+        help="Only search the last N lines of each batch",
+    )
+    g.add_argument(
+        "--from-line",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Search from the N-th line (zero-based) of each batch",
+    )
+    group.add_argument(
+        "--max-lines",
+        metavar="N",
+        type=int,
+        help="Search at most N lines of each batch",
+    )
+
+    group = parser.add_argument_group("livy server configuration")
+    group.add_argument(
+        "--api-url",
+        default=cfg.root.api_url,
+        help="Base-URL for Livy API server. Required in live search.",
+    )
+
+    group = parser.add_argument_group("index")
+    group.add_argument(
+        "--index-path",
+        metavar="PATH",
+        default=cfg.index.path,
+        help="Path to the index database. Logs are saved into index by "
+        "`--index` option in read-log and submit tool. Default: %(default)s.",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    batch_ids = list(args.batch)
+    if args.batch_range:
+        batch_ids += range(args.batch_range[0], args.batch_range[1] + 1)
+
+    if args.live:
+        if not args.text:
+            parser.error("text is required for live search")
+        if not args.api_url:
+            parser.error("--api-url is required for live search")
+        if not batch_ids and not args.state:
+            parser.error("batches should be selected for live search")
+        if args.tail and args.max_lines:
+            parser.error("--tail could not be used with --max-lines")
+        if args.level or args.logger or args.since or args.until:
+            parser.error("filters for index could not be used in live search")
+    elif args.state:
+        parser.error("--state is only available in live search")
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-search.main")
+
+    if args.live:
+        return live_search(args, batch_ids, console)
+
+    # search
+    try:
+        with livy.index.LivyLogIndex(args.index_path) as index:
+            results = index.search(
+                text=args.text,
+                batch_ids=batch_ids or None,
+                since=args.since,
+                until=args.until,
+                level=logging.getLevelName(args.level) if args.level else None,
+                name=args.logger,
+                limit=args.limit,
+            )
+    except livy.exception.OperationError as e:
+        console.error("Failed to search index: %s", e)
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+
+    for result in results:
+        print(format_result(result))
+
+    console.info("%d logs found", len(results))
+    return 0
+
+
+def live_search(
+    args: argparse.Namespace, batch_ids: typing.List[int], console: logging.Logger
+) -> int:
+    """Grep the logs on server and print hits as they arrive."""
+    try:
+        matcher = build_matcher(args.text, args.fixed_strings, args.ignore_case)
+    except re.error as e:
+        console.error("Invalid pattern: %s", e)
+        return 1
+
+    console.info("Connecting to server: %s", args.api_url)
+    client = livy.LivyClient(url=args.api_url, pool_size=args.max_workers)
+
+    try:
+        batch_ids = select_batches(client, batch_ids, args.state)
+    except livy.RequestError as e:
+        console.error(
+            "Failed to list batches. HTTP code=%d, Reason=%s", e.code, e.reason
+        )
+        return 1
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+
+    console.info("Searching in %d batches", len(batch_ids))
+
+    lock = threading.Lock()
+    num_hits = 0
+
+    def on_match(batch_id: int, line: typing.Optional[int], text: str):
+        nonlocal num_hits
+        with lock:
+            num_hits += 1
+            if line is None:
+                print(f"#{batch_id}: {text}", flush=True)
+            else:
+                print(f"#{batch_id}:{line}: {text}", flush=True)
+
+    try:
+        errors = grep_batches(
+            client,
+            batch_ids,
+            matcher,
+            on_match,
+            max_workers=args.max_workers,
+            from_line=args.from_line,
+            max_lines=args.max_lines,
+            tail=args.tail,
+        )
+    except KeyboardInterrupt:
+        console.warning("Keyboard interrupt")
+        return 1
+    finally:
+        client.close()
+
+    for batch_id, e in errors.items():
+        console.error("Failed to read log of batch %d: %s", batch_id, e)
+
+    console.info("%d lines matched in %d batches", num_hits, len(batch_ids))
+    return 1 if errors else 0
+
+
+def build_matcher(
+    pattern: str, fixed_strings: bool = False, ignore_case: bool = False
+) -> typing.Callable[[str], bool]:
+    """Build a function that returns truthy value if the line matches."""
+    if fixed_strings and not ignore_case:
+        return lambda line: pattern in line
+    if fixed_strings:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0).search
+
+
+def select_batches(
+    client: livy.LivyClient,
+    batch_ids: typing.List[int],
+    states: typing.Optional[typing.List[str]],
+) -> typing.List[int]:
+    """Select batches to be searched. Returns the given `batch_ids` if no state
+    filter is set. Otherwise, it returns batches listed on server that are in
+    these states, and limited to `batch_ids` if it is not empty."""
+    if not states:
+        return sorted(set(batch_ids))
+
+    selected = [
+        batch["id"] for batch in client.iter_batches() if batch.get("state") in states
+    ]
+
+    if batch_ids:
+        wanted = set(batch_ids)
+        selected = [id_ for id_ in selected if id_ in wanted]
+
+    return sorted(set(selected))
+
+
+def grep_batches(
+    client: livy.LivyClient,
+    batch_ids: typing.List[int],
+    matcher: typing.Callable[[str], bool],
+    on_match: typing.Callable[[int, typing.Optional[int], str], None],
+    max_workers: int = 8,
+    from_line: int = 0,
+    max_lines: int = None,
+    tail: int = None,
+) -> typing.Dict[int, Exception]:
+    """Fetch logs of batches concurrently and calls `on_match` with batch ID,
+    zero-based line number and the line text once a line is matched. Line
+    number is ``None`` when `tail` is set. Returns the errors of each batch.
+
+    Note `on_match` is called from worker threads.
+    """
+    stop_event = threading.Event()
+
+    def worker(batch_id: int):
+        for line, text in grep_batch(
+            client, batch_id, matcher, from_line, max_lines, tail, stop_event
+        ):
+            on_match(batch_id, line, text)
+
+    errors = {}
+    futures = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+    try:
+        futures = {executor.submit(worker, id_): id_ for id_ in batch_ids}
+        for future in concurrent.futures.as_completed(futures):
+            e = future.exception()
+            if e:
+                errors[futures[future]] = e
+    except BaseException:
+        stop_event.set()
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False)
+
+    return errors
+
+
+def grep_batch(
+    client: livy.LivyClient,
+    batch_id: int,
+    matcher: typing.Callable[[str], bool],
+    from_line: int = 0,
+    max_lines: int = None,
+    tail: int = None,
+    stop_event: threading.Event = None,
+) -> typing.Iterator[typing.Tuple[typing.Optional[int], str]]:
+    """Fetch log of a batch page by page and yields the line number and text
+    of matched lines."""
+    if tail:
+        for text in client.get_batch_log(batch_id, size=tail):
+            if matcher(text):
+                yield None, text
+        return
+
+    pos = from_line
+    remaining = max_lines
+    while remaining is None or remaining > 0:
+        if stop_event and stop_event.is_set():
+            return
+
+        size = _LOG_PAGE_SIZE if remaining is None else min(_LOG_PAGE_SIZE, remaining)
+        lines = client.get_batch_log(batch_id, from_=pos, size=size)
+
+        for i, text in enumerate(lines):
+            if matcher(text):
+                yield pos + i, text
+
+        pos += len(lines)
+        if remaining is not None:
+            remaining -= len(lines)
+        if len(lines) < size:
+            return
+
+
+_LOG_PAGE_SIZE = 1000
+
+
+def parse_time(text: str) -> datetime.datetime:
+    """Parse a duration before now or an ISO format datetime. Naive datetime is
+    treated as local time."""
+    try:
+        delta = livy.utils.parse_duration(text)
+    except ValueError:
+        pass
+    else:
+        return datetime.datetime.now().astimezone() - delta
+
+    # datetime.fromisoformat is not available in python 3.6
+    text = re.sub(r"([+-]\d{2}):(\d{2})$", r"\1\2", text.strip())
+    for format in (
+        "%Y-%m-%dT%H:%M:%S%z",
+        "%Y-%m-%d %H:%M:%S%z",
+        "%Y-%m-%dT%H:%M:%S",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%dT%H:%M",
+        "%Y-%m-%d %H:%M",
+        "%Y-%m-%d",
+    ):
+        try:
+            value = datetime.datetime.strptime(text, format)
+        except ValueError:
+            continue
+        if not value.tzinfo:
+            value = value.astimezone()
+        return value
+
+    raise ValueError(f"Invalid time: {text}")
+
+
+def format_result(result: livy.index.LivyLogSearchResult) -> str:
+    """Format search result into single line."""
+    if result.created:
+        created = result.created.astimezone().strftime("%Y-%m-%d %H:%M:%S %z")
+    else:
+        created = "-"
+    return "%s [%s] #%d %s: %s" % (
+        created,
+        logging.getLevelName(result.level),
+        result.batch_id,
+        result.name,
+        result.message,
+    )
+
+
+def open_index(
+    console: logging.Logger, path: str = None
+) -> typing.Optional[livy.index.LivyLogIndex]:
+    """Open the index for ingesting logs. Returns ``None`` on failed, the
+    reason is logged and the logs reading should not be interrupted."""
+    if path is None:
+        path = livy.cli.config.load().index.path
+
+    try:
+        index = livy.index.LivyLogIndex(path)
+    except livy.exception.OperationError as e:
+        console.warning("Failed to open index. Logs are not indexed: %s", e)
+        return None
+
+    console.debug("Save logs into index %s", index.path)
+    return index
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,15 +1,32 @@
 """Submit a batch task to livy server."""
 import argparse
+import copy
 import datetime
+import getpass
 import importlib
 import json
 import logging
+import os
 import re
+import sqlite3
+import time
 import typing
 
 import livy
+import livy.admission
+import livy.analyze
+import livy.bulk
 import livy.cli.config
+import livy.cli.history
+import livy.cli.hook
 import livy.cli.logging
+import livy.cli.search
+import livy.cli.timeline
+import livy.detect
+import livy.fingerprint
+import livy.history
+import livy.recommend
+import livy.retry
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +51,25 @@ class PreSubmitArguments(argparse.Namespace):
     executor_cores: int
     num_executors: int
     spark_conf: typing.List[typing.Tuple[str, str]]
+    priority: int
 
     # log
     watch_log: bool
+    index: bool
+    timeline: str
+    history: bool
+    idempotent: bool
+    fingerprint_cache: str
+    hook_workers: int
+    hook_timeout: float
+    hook_durations: typing.Dict[str, float]
+    max_attempts: int
+    retry_on: typing.List[str]
+    retry_backoff: float
+    recommend: str
+    detect: bool
+    detect_window: float
+    detect_thresholds: typing.List[str]
 
     # time
     time_prog_start: datetime.datetime
@@ -63,6 +96,8 @@ class TaskEndedArguments(PreSubmitArguments):
 
 def main(argv=None):
     """CLI entrypoint"""
+    timeline = livy.cli.timeline.SubmitTimeline()
+
     # parse argument
     cfg = livy.cli.config.load()
     parser = argparse.ArgumentParser(
@@ -72,7 +107,9 @@ def main(argv=None):
 
     parser.add_argument(
         "script",
-        help="Path to the script that contains the application to be executed",
+        nargs="?",
+        help="Path to the script that contains the application to be executed. "
+        "Omit it when `--manifest` is used.",
     )
     parser.add_argument(
         "args",
@@ -128,6 +165,14 @@ def main(argv=None):
         default=cfg.submit.pre_submit,
         help="Run plugin(s) before submit",
     )
+    group.add_argument(
+        "--hook-timeout",
+        metavar="SEC",
+        type=float,
+        default=cfg.submit.hook_timeout or None,
+        help="Stop the process if a plugin is not finished in this time",
+    )
+    group.set_defaults(hook_workers=cfg.submit.hook_workers)
 
     group = parser.add_argument_group("livy server configuration")
     group.add_argument(
@@ -196,6 +241,158 @@ def main(argv=None):
         help="Not to watch for logs. Only submit the task and quit.",
     )
 
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(index=cfg.index.auto_index)
+    g.add_argument(
+        "--index",
+        dest="index",
+        action="store_true",
+        help="Save logs into local index for `livy search`",
+    )
+    g.add_argument(
+        "--no-index",
+        dest="index",
+        action="store_false",
+        help="Do not save logs into local index",
+    )
+
+    group.add_argument(
+        "--timeline",
+        metavar="PATH",
+        default=cfg.submit.timeline,
+        help="Write the timeline of submission, e.g. time waited in queue and "
+        "time to the first log, to PATH in JSON format",
+    )
+
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(history=cfg.history.enabled)
+    g.add_argument(
+        "--history",
+        dest="history",
+        action="store_true",
+        help="Record the run into local history for `livy history`, and show the "
+        "estimated time of arrival from the past runs of the same script. It "
+        "only takes effect when the logs are watched.",
+    )
+    g.add_argument(
+        "--no-history",
+        dest="history",
+        action="store_false",
+        help="Do not record the run into local history",
+    )
+
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(recommend=cfg.submit.recommend)
+    g.add_argument(
+        "--recommend",
+        dest="recommend",
+        action="store_const",
+        const="suggest",
+        help="Recommend driver and executor resources from the past runs of the "
+        "same script in local history",
+    )
+    g.add_argument(
+        "--apply-recommendation",
+        dest="recommend",
+        action="store_const",
+        const="apply",
+        help="Recommend resources as `--recommend`, and use the recommended values "
+        "for this run",
+    )
+    g.add_argument(
+        "--no-recommend",
+        dest="recommend",
+        action="store_const",
+        const=None,
+        help="Do not recommend resources",
+    )
+
+    group = parser.add_argument_group("deduplication")
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(
+        idempotent=cfg.submit.idempotent,
+        fingerprint_cache=cfg.submit.fingerprint_cache,
+    )
+    g.add_argument(
+        "--idempotent",
+        dest="idempotent",
+        action="store_true",
+        help="Do not submit again if a batch with the same parameters is still "
+        "running; watch that batch instead. A batch name derived from the "
+        "parameters is used if `--session-name` is not set.",
+    )
+    g.add_argument(
+        "--no-idempotent",
+        dest="idempotent",
+        action="store_false",
+        help="Always create a new batch",
+    )
+
+    group = parser.add_argument_group("retry")
+    group.add_argument(
+        "--max-attempts",
+        metavar="N",
+        type=int,
+        default=cfg.submit.max_attempts,
+        help="Resubmit the batch if it is ended in `dead`, up to N submissions in "
+        "total. Pre-submit actions are not run again and the uploaded files are "
+        "reused. "
+        "It only takes effect when the logs are watched. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--retry-on",
+        metavar="SIGNATURE",
+        nargs="+",
+        default=cfg.submit.retry_on,
+        help="Retry only if the logs match one of these regular expressions or "
+        "builtin signatures: "
+        + ", ".join(f"`{k}`" for k in livy.retry.SIGNATURES)
+        + ". Retry on any failure if not set.",
+    )
+    group.add_argument(
+        "--retry-backoff",
+        metavar="SEC",
+        type=float,
+        default=cfg.submit.retry_backoff,
+        help="Seconds to wait before the first retry. It is doubled for each "
+        "following retry. Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("failure detection")
+    g = group.add_mutually_exclusive_group()
+    g.set_defaults(detect=cfg.detect.enabled)
+    g.add_argument(
+        "--detect",
+        dest="detect",
+        action="store_true",
+        help="Warn as soon as the failures that slow down the batch are found "
+        "frequently in the logs: "
+        + ", ".join(f"`{k}`" for k in livy.detect.THRESHOLDS)
+        + ". It only takes effect when the logs are watched.",
+    )
+    g.add_argument(
+        "--no-detect",
+        dest="detect",
+        action="store_false",
+        help="Do not watch the logs for failures",
+    )
+    group.add_argument(
+        "--detect-window",
+        metavar="SEC",
+        type=float,
+        default=cfg.detect.window,
+        help="Count the failures in this many seconds. Default: %(default)s.",
+    )
+    group.add_argument(
+        "--detect-thresholds",
+        metavar="NAME=COUNT",
+        nargs="+",
+        default=cfg.detect.thresholds,
+        help="Warn when a failure is found COUNT times in window. Defaults: "
+        + ", ".join(f"`{k}={v}`" for k, v in livy.detect.THRESHOLDS.items())
+        + ".",
+    )
+
     group = parser.add_argument_group("after-task-finish actions")
     group.add_argument(
         "--on-task-success",
@@ -219,10 +416,80 @@ def main(argv=None):
         help="Run plugin(s) on task is ended and ended and regardless to its state",
     )
 
+    group = parser.add_argument_group("bulk submission")
+    group.add_argument(
+        "--manifest",
+        metavar="JOBS.JSONL",
+        help="Submit the jobs listed in this file instead of `script`. Each line "
+        "is a JSON object with the keys in the same name as the arguments here, "
+        "e.g. `script`, `args`, `py_files`, `queue_name`, `spark_conf` or "
+        "`on_pre_submit`. Arguments from command line are used as the defaults. "
+        "Logs are not watched in this mode.",
+    )
+    group.add_argument(
+        "--results",
+        metavar="RESULTS.JSONL",
+        help="Write the batch id or the error of each manifest entry to this file. "
+        "Print to stdout when not set.",
+    )
+    group.add_argument(
+        "--max-workers",
+        metavar="N",
+        type=int,
+        default=8,
+        help="Max number of jobs to be submitted at the same time in bulk "
+        "submission. Pre-submit actions are run in the same concurrency. "
+        "Default: %(default)s.",
+    )
+
+    group = parser.add_argument_group("admission control")
+    group.add_argument(
+        "--queue-limit",
+        metavar="QUEUE=N",
+        nargs="+",
+        default=[],
+        type=argqueuelimit,
+        help="Wait until there are less than N active batches in the YARN queue "
+        "before submitting",
+    )
+    group.add_argument(
+        "--default-queue-limit",
+        metavar="N",
+        type=int,
+        help="Limit for the queues not set in `--queue-limit`",
+    )
+    group.add_argument(
+        "--count-user",
+        metavar="USER",
+        help="Also count the active batches that their owner or proxy user is "
+        "USER, e.g. the ones submitted by other processes. Default: the login user.",
+    )
+    group.add_argument(
+        "--admission-interval",
+        metavar="SEC",
+        type=float,
+        default=5.0,
+        help="Min interval in seconds to list batches for counting. "
+        "Default: %(default)s.",
+    )
+    group.add_argument(
+        "--priority",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Submissions with higher priority go first when waiting for the "
+        "same queue. Default: %(default)s.",
+    )
+
     livy.cli.logging.setup_argparse(parser)
 
     args: PreSubmitArguments = parser.parse_args(argv)
 
+    if args.manifest and args.script:
+        parser.error("argument script: not allowed with argument --manifest")
+    if not args.manifest and not args.script:
+        parser.error("the following arguments are required: script")
+
     # time stamping
     tzlocal = datetime.datetime.now(datetime.timezone.utc).astimezone().tzinfo
 
@@ -236,19 +503,278 @@ def main(argv=None):
     console = livy.cli.logging.get("livy-read-log.main")
     console.info("Submission task started")
 
-    # run pre-submit actions
-    args: TaskEndedArguments = run_hook(console, "PRE-SUBMIT", args, args.on_pre_submit)
+    if args.manifest:
+        return submit_manifest(console, args)
+
+    timeline.add("config", 0.0, timeline.now())
+
+    def finish(exit_code: int) -> int:
+        if history:
+            history.close()
+        timeline.log_summary(console)
+        if args.timeline:
+            try:
+                timeline.dump(os.path.expanduser(args.timeline))
+            except OSError as e:
+                console.warning("Failed to write timeline: %s", e)
+        return exit_code
+
+    try:
+        retry = livy.retry.LivyRetryPolicy(
+            max_attempts=args.max_attempts,
+            backoff=args.retry_backoff,
+            signatures=args.retry_on,
+        )
+    except livy.Error as e:
+        console.error("%s", e)
+        return 1
+
+    # validate failure detection arguments before submission
+    thresholds = {}
+    if args.detect:
+        try:
+            thresholds = livy.detect.parse_thresholds(args.detect_thresholds)
+            livy.detect.LivyFailureDetector(args.detect_window, thresholds)
+        except livy.Error as e:
+            console.error("%s", e)
+            return 1
+
+    # past runs of the same script
+    job_key = livy.history.job_key(args.script, args.class_name)
+    script = args.script
+    history = None
+    estimate = None
+    if args.history and args.watch_log:
+        history = livy.cli.history.open_history(console, cfg.history.path)
+    if history:
+        estimate = history.estimate(job_key)
+
+    # resource recommendation
+    if args.recommend:
+        if history:
+            recommend_resources(console, history, args, job_key)
+        else:
+            console.warning("Resource recommendation requires the run history")
+
+    # find the same submission that is still running
+    attached = None
+    if args.idempotent:
+        cache = livy.fingerprint.LivyFingerprintCache(args.fingerprint_cache)
+        fingerprint, expected = fingerprint_arguments(args, cache)
+        client = livy.LivyClient(url=args.api_url)
+        try:
+            with timeline.phase("lookup"):
+                attached = find_submitted(
+                    client, {fingerprint: expected}, {fingerprint: args.script}
+                )
+        except livy.RequestError as e:
+            console.error("Failed to list batches: %s", e)
+            return finish(1)
+        finally:
+            client.close()
+        attached = attached.get(fingerprint)
+        if attached:
+            cache.put(fingerprint, attached["id"], args.session_name)
+            save_cache(console, cache)
+
+    # run pre-submit actions; for an attached batch they are deferred until it
+    # has to be resubmitted
+    pre_submitted = not attached
+    if pre_submitted:
+        with timeline.phase("pre_submit_hooks"):
+            args = run_hook(
+                console,
+                "PRE-SUBMIT",
+                args,
+                args.on_pre_submit,
+                timeline.recorder("pre_submit_hooks"),
+            )
 
     # check server state
     client = livy.LivyClient(url=args.api_url)
 
     try:
-        client.check(False)
+        with timeline.phase("server_check"):
+            client.check(False)
     except livy.RequestError as e:
         console.error("Failed to connect to server: %s", e)
-        return 1
+        return finish(1)
+
+    attempt = 1
+    while True:
+        if attached:
+            args.batch_id = attached["id"]
+            args.time_task_submit = now()
+            console.info(
+                "Batch %d (%s) is %s for the same submission. Attach to it.",
+                args.batch_id,
+                attached.get("name"),
+                attached.get("state"),
+            )
 
-    # build request payload
+        else:
+            if not pre_submitted:
+                console.info("Run pre-submit actions before resubmitting the batch")
+                with timeline.phase("pre_submit_hooks", attempt):
+                    args = run_hook(
+                        console,
+                        "PRE-SUBMIT",
+                        args,
+                        args.on_pre_submit,
+                        timeline.recorder("pre_submit_hooks", attempt),
+                    )
+                pre_submitted = True
+
+            args.time_task_submit = now()
+            with timeline.phase("submit", attempt):
+                ok = create_batch(console, client, args)
+            if not ok:
+                return finish(1)
+            if args.idempotent:
+                cache.put(fingerprint, args.batch_id, args.session_name)
+                save_cache(console, cache)
+
+        # watch log
+        if not args.watch_log:
+            console.info("Batch %d created.", args.batch_id)
+            return finish(0)
+
+        # the start of an attached batch is unknown, it is not timed against
+        # the past runs
+        if attached and history:
+            console.info("Batch is attached. Run history and ETA are not updated.")
+        elif estimate:
+            report_eta(console, args, estimate)
+
+        matcher = retry.matcher()
+        tracker = timeline.tracker(attempt)
+        stage_timer = livy.history.LivyStageTimer()
+        sinks = [tracker, stage_timer]
+        detector = None
+        if args.detect:
+            detector = livy.detect.LivyFailureDetector(args.detect_window, thresholds)
+            sinks.append(detector)
+        analyzer = None
+        if history:
+            analyzer = livy.analyze.LivyTaskAnalyzer(top=0)
+            sinks.append(analyzer)
+        if retry.max_attempts > 1:
+            ok = watch_batch(
+                console, client, args, f"attempt-{attempt}.", [matcher] + sinks
+            )
+        else:
+            ok = watch_batch(console, client, args, sinks=sinks)
+        tracker.close()
+        if not ok:
+            return finish(1)
+
+        failures = detector.counts if detector else {}
+        if failures:
+            console.warning(
+                "Failures found in logs: %s",
+                ", ".join(f"{k}={v}" for k, v in sorted(failures.items())),
+            )
+
+        # timing
+        args.time_task_ended = now()
+        console.debug("Batch finishing time= %s", args.time_task_ended)
+
+        # get ending state
+        try:
+            args.state = client.get_batch_state(args.batch_id)
+        except livy.RequestError:
+            console.error("Error during query batch ending state.")
+            return finish(1)
+
+        if history and not attached:
+            metrics = task_metrics(analyzer.report())
+            if detector:
+                metrics["failures"] = failures
+            record_run(
+                console,
+                history,
+                args,
+                job_key,
+                script,
+                tracker,
+                stage_timer.stages,
+                metrics,
+            )
+
+        if args.state == "success" or not retry.should_retry(
+            attempt, matcher, args.state
+        ):
+            break
+
+        # retry with the same arguments; pre-submit actions are not run again,
+        # except for the attached batch that they are never run
+        delay = retry.delay(attempt)
+        console.warning(
+            "Batch %d is %s. Retry in %.1f seconds (attempt %d/%d)",
+            args.batch_id,
+            args.state,
+            delay,
+            attempt + 1,
+            retry.max_attempts,
+        )
+        if matcher.matched:
+            console.info("Matched signatures: %s", ", ".join(sorted(matcher.matched)))
+
+        try:
+            with timeline.phase("retry_wait", attempt):
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            console.warning("Keyboard interrupt. Batch is not retried.")
+            return finish(1)
+
+        attempt += 1
+        attached = None
+
+    if args.state == "success":
+        exit_code = 0
+        state_level = logging.INFO
+    else:
+        exit_code = 1
+        state_level = logging.WARNING
+
+    console.log(state_level, "Batch#%d ended with state= %s", args.batch_id, args.state)
+    elapsed_time = args.time_task_ended - args.time_task_submit
+    console.info(
+        "Batch execution time: %dsec (%s)",
+        elapsed_time.total_seconds(),
+        human_readable_timeperiod(elapsed_time),
+    )
+    if estimate and args.state == "success" and not attached:
+        ratio = elapsed_time.total_seconds() / max(estimate.duration, 1.0)
+        slow = ratio > cfg.history.slow_threshold / 100
+        console.log(
+            logging.WARNING if slow else logging.INFO,
+            "It took %.0f%% of the median of past %d runs (%s)",
+            ratio * 100,
+            estimate.runs,
+            livy.cli.history.format_duration(estimate.duration),
+        )
+
+    # run task-end actions
+    record_hook = timeline.recorder("post_hooks")
+    with timeline.phase("post_hooks"):
+        if args.state == "success":
+            args = run_hook(
+                console, "TASK-SUCCESS", args, args.on_task_success, record_hook
+            )
+        else:
+            args = run_hook(
+                console, "TASK-FAILED", args, args.on_task_failed, record_hook
+            )
+
+        args = run_hook(console, "TASK", args, args.on_task_ended, record_hook)
+
+    return finish(exit_code)
+
+
+def build_submit_parameter(args: PreSubmitArguments) -> typing.Dict[str, typing.Any]:
+    """Convert arguments into the keyword arguments of
+    :py:meth:`~livy.client.LivyClient.create_batch`."""
     submit_parameter = {}
 
     for key, value in [
@@ -266,95 +792,530 @@ def main(argv=None):
         ("archives", args.archives),
         ("queue", args.queue_name),
         ("name", args.session_name),
-        ("conf", {k: v for k, v in args.spark_conf}),
+        ("conf", {k: v for k, v in args.spark_conf or ()}),
     ]:
         if value:
             submit_parameter[key] = value
 
-    console.info(
+    return submit_parameter
+
+
+MANIFEST_KEYS = (
+    "script",
+    "args",
+    "class_name",
+    "jars",
+    "py_files",
+    "files",
+    "archives",
+    "queue_name",
+    "session_name",
+    "driver_memory",
+    "driver_cores",
+    "executor_memory",
+    "executor_cores",
+    "num_executors",
+    "spark_conf",
+    "on_pre_submit",
+    "priority",
+)
+
+
+def merge_arguments(
+    defaults: PreSubmitArguments, entry: typing.Dict[str, typing.Any]
+) -> PreSubmitArguments:
+    """Override the `defaults` with a job entry, which keys are in
+    :py:data:`MANIFEST_KEYS`. ``spark_conf`` could be a dict and it is merged
+    with the default one.
+
+    Raises
+    ------
+    ValueError
+        On the entry is malformed or ``script`` is missing
+    """
+    unknown = sorted(set(entry) - set(MANIFEST_KEYS))
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(unknown)}")
+
+    args = copy.copy(defaults)
+    for key, value in entry.items():
+        if key == "spark_conf":
+            if isinstance(value, dict):
+                value = list(value.items())
+            value = list(defaults.spark_conf or ()) + [tuple(v) for v in value]
+        setattr(args, key, value)
+
+    if not isinstance(args.script, str) or not args.script:
+        raise ValueError("script is required")
+    if not isinstance(getattr(args, "priority", 0), int):
+        raise ValueError("priority must be an integer")
+
+    return args
+
+
+def load_manifest(
+    path: str, defaults: PreSubmitArguments
+) -> typing.List[typing.Tuple[int, dict, PreSubmitArguments]]:
+    """Read manifest file. Each non-empty line is a JSON object that overrides
+    the `defaults`, see :py:func:`merge_arguments`.
+
+    Return
+    ------
+    jobs : typing.List[typing.Tuple[int, dict, PreSubmitArguments]]
+        Line number, the entry and the arguments for each job
+
+    Raises
+    ------
+    ValueError
+        On a malformed entry is found. Nothing should be submitted then.
+    """
+    jobs = []
+    with open(path, "r", encoding="utf-8") as fp:
+        for lineno, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {lineno}: invalid JSON: {e}")
+            if not isinstance(entry, dict):
+                raise ValueError(f"line {lineno}: expect JSON object")
+
+            try:
+                args = merge_arguments(defaults, entry)
+            except ValueError as e:
+                raise ValueError(f"line {lineno}: {e}")
+
+            jobs.append((lineno, entry, args))
+
+    return jobs
+
+
+def submit_manifest(logger: logging.Logger, args: PreSubmitArguments) -> int:
+    """Submit all jobs in the manifest file. Pre-submit actions run for each
+    job in the worker threads; a failed action fails only that job."""
+    try:
+        jobs = load_manifest(args.manifest, args)
+    except (OSError, ValueError) as e:
+        logger.error("Failed to read manifest %s: %s", args.manifest, e)
+        return 1
+
+    logger.info("%d jobs loaded from %s", len(jobs), args.manifest)
+
+    client = livy.LivyClient(url=args.api_url, pool_size=max(1, args.max_workers))
+
+    try:
+        client.check(False)
+    except livy.RequestError as e:
+        logger.error("Failed to connect to server: %s", e)
+        return 1
+
+    # skip the jobs that are still running
+    attached = {}
+    if args.idempotent:
+        cache = livy.fingerprint.LivyFingerprintCache(args.fingerprint_cache)
+        fingerprints = {}
+        expected = {}
+        scripts = {}
+        for lineno, _, job_args in jobs:
+            fp, expected[fp] = fingerprint_arguments(job_args, cache)
+            fingerprints[lineno] = fp
+            scripts[fp] = job_args.script
+
+        try:
+            found = find_submitted(client, expected, scripts)
+        except livy.RequestError as e:
+            logger.error("Failed to list batches: %s", e)
+            return 1
+
+        for lineno, entry, job_args in jobs:
+            fp = fingerprints[lineno]
+            if fp in found:
+                attached[lineno] = entry, found[fp]
+                cache.put(fp, found[fp]["id"], job_args.session_name)
+        jobs = [job for job in jobs if job[0] not in attached]
+
+    admission = create_admission(client, args)
+    if admission:
+        # workers take jobs in order; let the important ones wait first
+        jobs.sort(key=lambda job: -job[2].priority)
+
+    def prepare(job: typing.Tuple[int, dict, PreSubmitArguments]) -> dict:
+        lineno, _, job_args = job
+        try:
+            job_args = run_hook(logger, "PRE-SUBMIT", job_args, job_args.on_pre_submit)
+        except SystemExit:
+            raise livy.OperationError(f"Pre-submit action failed for line {lineno}")
+
+        params = build_submit_parameter(job_args)
+        if admission:
+            params["priority"] = job_args.priority
+        return params
+
+    output = None
+    if args.results:
+        try:
+            output = open(args.results, "w", encoding="utf-8")
+        except OSError as e:
+            logger.error("Failed to open results file %s: %s", args.results, e)
+            return 1
+
+    def write_record(lineno, entry, batch_id, error, attached=False) -> None:
+        record = json.dumps(
+            {
+                "line": lineno,
+                "entry": entry,
+                "batch_id": batch_id,
+                "error": str(error) if error else None,
+                "attached": attached,
+            },
+            ensure_ascii=False,
+        )
+        if output:
+            output.write(record + "\n")
+            output.flush()
+        else:
+            print(record)
+
+    def on_done(result: livy.bulk.LivySubmitResult) -> None:
+        lineno, entry, job_args = result.job
+        if result.error:
+            logger.error("Failed to submit line %d: %s", lineno, result.error)
+        else:
+            logger.info("Line %d is submitted as batch %d", lineno, result.batch_id)
+            if args.idempotent:
+                cache.put(fingerprints[lineno], result.batch_id, job_args.session_name)
+
+        write_record(lineno, entry, result.batch_id, result.error)
+
+    for lineno, (entry, batch) in sorted(attached.items()):
+        logger.info("Line %d is running as batch %d. Skipped.", lineno, batch["id"])
+        write_record(lineno, entry, batch["id"], None, attached=True)
+
+    tick = datetime.datetime.now()
+    try:
+        results = livy.bulk.submit_many(
+            client,
+            jobs,
+            args.max_workers,
+            prepare=prepare,
+            callback=on_done,
+            admission=admission,
+        )
+    except KeyboardInterrupt:
+        logger.warning("Keyboard interrupt. Submitted batches are still running.")
+        return 1
+    finally:
+        if output:
+            output.close()
+        if args.idempotent:
+            save_cache(logger, cache)
+        client.close()
+
+    num_success = sum(1 for r in results if not r.error)
+    logger.info(
+        "%d of %d batches created in %s",
+        num_success,
+        len(results),
+        human_readable_timeperiod(datetime.datetime.now() - tick) or "0s",
+    )
+
+    if admission:
+        stats = admission.stats()
+        logger.info(
+            "Admission wait: mean %.1fs, max %.1fs",
+            stats.mean_wait,
+            stats.max_wait,
+        )
+
+    return 0 if num_success == len(results) else 1
+
+
+def create_batch(
+    logger: logging.Logger, client: livy.LivyClient, args: PreSubmitArguments
+) -> bool:
+    """Create batch and set ``batch_id`` to the arguments. Returns ``False`` on
+    failure."""
+    # build request payload
+    submit_parameter = build_submit_parameter(args)
+
+    logger.info(
         "Creating batch with parameters: %s",
         json.dumps(submit_parameter, indent=2),
     )
+    logger.debug("Batch submission time= %s", args.time_task_submit)
 
-    # timing
-    args.time_task_submit = now()
-    console.debug("Batch submission time= %s", args.time_task_submit)
-
-    # submit
+    # submit; other batches in the queue are counted since this run has not
+    # created any
+    admission = create_admission(client, args)
     try:
-        submit_resp = client.create_batch(**submit_parameter)
+        if admission:
+            submit_resp = admission.create_batch(args.priority, **submit_parameter)
+            args.time_task_submit = datetime.datetime.now().astimezone()
+        else:
+            submit_resp = client.create_batch(**submit_parameter)
     except livy.RequestError as e:
-        console.error("Failed to connect to server: %s", e)
-        return 1
+        logger.error("Failed to connect to server: %s", e)
+        return False
+    except KeyboardInterrupt:
+        logger.warning("Keyboard interrupt. Batch is not submitted.")
+        return False
 
-    console.info("Server response: %s", json.dumps(submit_resp, indent=2))
+    logger.info("Server response: %s", json.dumps(submit_resp, indent=2))
 
     args.batch_id = submit_resp.get("id", None)
     if not isinstance(args.batch_id, int) or args.batch_id < 0:
-        console.error("Failed to get batch id. Something goes wrong.")
-        return 1
+        logger.error("Failed to get batch id. Something goes wrong.")
+        return False
 
-    # watch log
-    if not args.watch_log:
-        console.info("Batch %d created.", args.batch_id)
-        return 0
+    return True
 
-    console.info("Start reading logs of batch %d", args.batch_id)
 
-    reader = livy.LivyBatchLogReader(client, args.batch_id)
+def watch_batch(
+    logger: logging.Logger,
+    client: livy.LivyClient,
+    args: PreSubmitArguments,
+    prefix: str = None,
+    sinks: typing.Iterable[typing.Any] = (),
+) -> bool:
+    """Read logs until the batch is ended. Returns ``False`` on error or
+    interrupted. Sinks that are callable also listen to the batch state."""
+    logger.info("Start reading logs of batch %d", args.batch_id)
+
+    reader = livy.LivyBatchLogReader(client, args.batch_id, prefix=prefix)
+    for sink in sinks:
+        reader.add_sink(sink)
+        if callable(sink):
+            reader.add_state_listener(sink)
+
+    index = args.index and livy.cli.search.open_index(logger)
+    if index:
+        reader.add_sink(index)
 
     try:
         reader.read_until_finish()
     except livy.RequestError as e:
-        console.error(
+        logger.error(
             "Error occurs during read log. HTTP code=%d, Reason=%s", e.code, e.reason
         )
-        return 1
+        return False
     except KeyboardInterrupt:
         msg_args = args.batch_id, args.api_url  # just for shorten
-        console.warning("Keyboard interrupt. Local livy-submit process terminating.")
-        console.warning("Your task might be still running on the server.")
-        console.warning("For reading the logs, call:")
-        console.warning("    livy read-log %d --api-url %s", *msg_args)
-        console.warning("For stopping the task, call:")
-        console.warning("    livy kill %d --api-url %s", *msg_args)
-        return 1
+        logger.warning("Keyboard interrupt. Local livy-submit process terminating.")
+        logger.warning("Your task might be still running on the server.")
+        logger.warning("For reading the logs, call:")
+        logger.warning("    livy read-log %d --api-url %s", *msg_args)
+        logger.warning("For stopping the task, call:")
+        logger.warning("    livy kill %d --api-url %s", *msg_args)
+        return False
+    finally:
+        if index:
+            index.close()
+
+    return True
+
+
+def report_eta(
+    logger: logging.Logger,
+    args: PreSubmitArguments,
+    estimate: livy.history.LivyRunEstimate,
+) -> None:
+    """Log the estimated time of arrival, and show it on progress bars."""
+    eta = args.time_task_submit + datetime.timedelta(seconds=estimate.duration)
+    logger.info(
+        "Expected to end at %s, by the median of past %d runs (%s)",
+        eta.strftime("%Y-%m-%d %H:%M:%S"),
+        estimate.runs,
+        livy.cli.history.format_duration(estimate.duration),
+    )
+    livy.cli.logging.set_estimate(eta, estimate.stages)
 
-    # timing
-    args.time_task_ended = now()
-    console.debug("Batch finishing time= %s", args.time_task_ended)
 
-    # get ending state
+def record_run(
+    logger: logging.Logger,
+    history: livy.history.LivyRunHistory,
+    args: PreSubmitArguments,
+    key: str,
+    script: str,
+    tracker: livy.cli.timeline.BatchTracker,
+    stages: typing.Dict[str, float],
+    metrics: typing.Dict[str, typing.Any] = None,
+) -> None:
+    """Record an attempt into history. Errors are logged and ignored."""
+    queue_wait = None
+    if tracker.running is not None:
+        queue_wait = tracker.running - tracker.submitted
+
     try:
-        args.state = client.get_batch_state(args.batch_id)
-    except livy.RequestError:
-        console.error("Error during query batch ending state.")
-        return 1
+        history.add(
+            key=key,
+            script=script,
+            batch_id=args.batch_id,
+            state=args.state,
+            submitted=args.time_task_submit,
+            duration=(args.time_task_ended - args.time_task_submit).total_seconds(),
+            session_name=args.session_name,
+            queue_wait=queue_wait,
+            conf=dict(args.spark_conf or ()),
+            resources=get_resources(args),
+            stages=stages,
+            metrics=metrics,
+        )
+    except sqlite3.Error as e:
+        logger.warning("Failed to record the run into history: %s", e)
 
-    if args.state == "success":
-        exit_code = 0
-        state_level = logging.INFO
-    else:
-        exit_code = 1
-        state_level = logging.WARNING
 
-    console.log(state_level, "Batch#%d ended with state= %s", args.batch_id, args.state)
-    elapsed_time = args.time_task_ended - args.time_task_submit
-    console.info(
-        "Batch execution time: %dsec (%s)",
-        elapsed_time.total_seconds(),
-        human_readable_timeperiod(elapsed_time),
-    )
+def get_resources(args: PreSubmitArguments) -> typing.Dict[str, typing.Any]:
+    """Get the resources requested by the arguments."""
+    return {field: getattr(args, field) for field in livy.recommend.RESOURCE_FIELDS}
 
-    # run task-end actions
-    if args.state == "success":
-        args = run_hook(console, "TASK-SUCCESS", args, args.on_task_success)
-    else:
-        args = run_hook(console, "TASK-FAILED", args, args.on_task_failed)
 
-    args = run_hook(console, "TASK", args, args.on_task_ended)
+def task_metrics(report: livy.analyze.LivyAnalysisReport) -> dict:
+    """Get the number of tasks in each stage and the number of executors that
+    ran tasks, for resource recommendation. Empty if no task log is found."""
+    if not report.stages:
+        return {}
 
-    return exit_code
+    tasks = {}
+    for s in report.stages:
+        stage = s.stage.split(".", 1)[0]
+        tasks[stage] = tasks.get(stage, 0) + s.tasks
+
+    executors = sum(1 for e in report.executors if e.executor != "driver")
+    return {"tasks": tasks, "executors": executors}
+
+
+def recommend_resources(
+    logger: logging.Logger,
+    history: livy.history.LivyRunHistory,
+    args: PreSubmitArguments,
+    key: str,
+) -> None:
+    """Log the recommended resources from the past runs in history, and apply
+    them to the arguments in ``apply`` mode."""
+    try:
+        advices = livy.recommend.recommend(history.runs(key=key), get_resources(args))
+    except (livy.Error, sqlite3.Error) as e:
+        logger.warning("Failed to recommend resources: %s", e)
+        return
+
+    if not advices:
+        logger.info("No change to the resources is recommended")
+        return
+
+    for advice in advices:
+        logger.info(
+            "Recommend %s=%s (current: %s), since %s",
+            advice.field,
+            advice.suggested,
+            advice.current,
+            advice.reason,
+        )
+        if args.recommend == "apply":
+            setattr(args, advice.field, advice.suggested)
+
+    if args.recommend == "apply":
+        logger.info("Recommended resources are applied")
+
+
+def fingerprint_arguments(
+    args: PreSubmitArguments, cache: livy.fingerprint.LivyFingerprintCache
+) -> typing.Tuple[str, typing.Optional[typing.Tuple[str, typing.Optional[int]]]]:
+    """Get the fingerprint of the arguments, before any pre-submit action, and
+    the batch name and id to look for on server. A batch name that carries the
+    fingerprint is set if the name is not given; for a given name, the batch
+    id is taken from the cache, or any id if it is not cached and the batch
+    should be confirmed by :py:func:`find_submitted`."""
+    fp = livy.fingerprint.fingerprint(build_submit_parameter(args), args.api_url)
+
+    if not args.session_name:
+        args.session_name = livy.fingerprint.batch_name(fp)
+        return fp, (args.session_name, None)
+
+    cached = cache.get(fp)
+    if cached and cached[1] == args.session_name:
+        return fp, cached[::-1]
+    return fp, (args.session_name, None)
+
+
+def find_submitted(
+    client: livy.LivyClient,
+    expected: typing.Dict[
+        str, typing.Optional[typing.Tuple[str, typing.Optional[int]]]
+    ],
+    scripts: typing.Dict[str, str] = None,
+) -> typing.Dict[str, livy.client.Batch]:
+    """Find live batches for the fingerprints. Entries without batch name to
+    look for are ignored. A batch that is only matched by a given name, e.g.
+    submitted from other machine, is confirmed with the script in `scripts`."""
+    expected = {fp: e for fp, e in expected.items() if e}
+    if not expected:
+        return {}
+
+    found = livy.fingerprint.find_live_batches(client, expected)
+    for fp, batch in list(found.items()):
+        name, batch_id = expected[fp]
+        if batch_id is not None or name == livy.fingerprint.batch_name(fp):
+            continue
+        script = (scripts or {}).get(fp)
+        if script and not confirm_submitted(client, batch, script):
+            logger.warning(
+                "Batch %d has the same name %s but not the same script. "
+                "Not attached to it.",
+                batch["id"],
+                name,
+            )
+            del found[fp]
+
+    return found
+
+
+def confirm_submitted(
+    client: livy.LivyClient, batch: livy.client.Batch, script: str
+) -> bool:
+    """Check the script is mentioned in the head of the batch log, which has the
+    resources uploaded by ``spark-submit``. A batch without any log yet is
+    confirmed, as Livy rejects the duplicated names."""
+    lines = client.get_batch_log(batch["id"], from_=0, size=200)
+    if not any(line.strip() for line in lines):
+        return True
+    basename = script.rstrip("/").rsplit("/", 1)[-1]
+    return any(basename in line for line in lines)
+
+
+def save_cache(
+    logger: logging.Logger, cache: livy.fingerprint.LivyFingerprintCache
+) -> None:
+    """Save fingerprint cache. Failure is logged and ignored."""
+    try:
+        cache.save()
+    except OSError as e:
+        logger.warning("Failed to save fingerprint cache %s: %s", cache.path, e)
+
+
+def create_admission(
+    client: livy.LivyClient, args: PreSubmitArguments
+) -> typing.Optional[livy.admission.LivyAdmissionController]:
+    """Create admission controller if any queue limit is set. The batches of
+    the login user are counted if `--count-user` is not given."""
+    if not args.queue_limit and not args.default_queue_limit:
+        return None
+
+    user = args.count_user
+    if not user:
+        try:
+            user = getpass.getuser()
+        except Exception:  # no login name in environment nor password database
+            user = None
+
+    return livy.admission.LivyAdmissionController(
+        client,
+        queue_limits=dict(args.queue_limit),
+        default_limit=args.default_queue_limit,
+        user=user,
+        interval=args.admission_interval,
+    )
 
 
 def argmem(s: str):
@@ -372,36 +1333,58 @@ def argkvpair(val):
     return k, v
 
 
+def argqueuelimit(val: str) -> typing.Tuple[str, int]:
+    """Split queue limit pair"""
+    queue, _, limit = val.rpartition("=")
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if not queue or limit < 1:
+        raise argparse.ArgumentTypeError("please specific limit in format 'QUEUE=N'")
+    return queue, limit
+
+
 def run_hook(
     logger: logging.Logger,
     identifier: str,
     args: argparse.Namespace,
     actions: typing.List[str],
+    on_finished: typing.Callable[[str, float], None] = None,
 ) -> argparse.Namespace:
-    """Run hook actions"""
+    """Run hook actions. Actions declared with :py:func:`livy.cli.hook.plugin`
+    run concurrently; see :py:mod:`livy.cli.hook`. Seconds taken by each action
+    are added to ``hook_durations`` of the arguments, and passed to
+    ``on_finished`` as soon as the action is finished."""
+    funcs = []
     for action_name in actions:
-        logger.info("Run %s action %s", identifier.lower(), action_name)
-
         func = get_function(action_name)
         if not func:
             logger.warning("Failed to get action function instance. Stop process.")
             exit(1)
+        funcs.append((action_name, func))
 
-        try:
-            args = func(identifier, args)
-        except:
-            logger.exception(
-                "Error occurs during %s action. Stop process.", identifier.lower()
-            )
-            exit(1)
+    if not funcs:
+        return args
 
-        if not isinstance(args, argparse.Namespace):
-            logger.error(
-                "Expect namespace object from %s's return value. Got %s",
-                action_name,
-                type(args).__name__,
-            )
-            exit(1)
+    try:
+        args, durations = livy.cli.hook.run_actions(
+            identifier,
+            args,
+            funcs,
+            max_workers=getattr(args, "hook_workers", 4),
+            timeout=getattr(args, "hook_timeout", None) or None,
+            log=logger,
+            on_finished=on_finished,
+        )
+    except livy.cli.hook.HookError as e:
+        logger.error("%s. Stop process.", e)
+        exit(1)
+
+    hook_durations = getattr(args, "hook_durations", None) or {}
+    for name, seconds in durations.items():
+        hook_durations[f"{identifier.lower()}:{name}"] = seconds
+    args.hook_durations = hook_durations
 
     return args
 
@@ -0,0 +1,170 @@
+"""Timeline of a submission. Phases are measured with the monotonic clock, and
+reported as offsets from the time the program started.
+"""
+import contextlib
+import datetime
+import json
+import logging
+import threading
+import time
+import typing
+
+import livy.export
+
+__all__ = ["SubmitTimeline", "BatchTracker"]
+
+
+class SubmitTimeline:
+    """Phases of a ``livy submit`` run.
+
+    Each phase has a name, the attempt number for the phases that are repeated
+    on retry, and the start and end offsets in seconds.
+    """
+
+    def __init__(self, clock: typing.Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.origin = clock()
+        self.started = datetime.datetime.now().astimezone()
+        self.phases: typing.List[dict] = []
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        """Seconds since the timeline is created."""
+        return self.clock() - self.origin
+
+    def add(self, name: str, start: float, end: float, attempt: int = None) -> None:
+        """Add a phase with the offsets."""
+        with self._lock:
+            self.phases.append(
+                {
+                    "phase": name,
+                    "attempt": attempt,
+                    "start": round(start, 6),
+                    "end": round(end, 6),
+                    "duration": round(end - start, 6),
+                }
+            )
+
+    @contextlib.contextmanager
+    def phase(self, name: str, attempt: int = None) -> typing.Iterator[None]:
+        """Context manager that measures the block as a phase. The phase is
+        recorded even if the block raises."""
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(name, start, self.now(), attempt)
+
+    def recorder(
+        self, name: str, attempt: int = None
+    ) -> typing.Callable[[str, float], None]:
+        """Create a callback that adds ``<name>:<step>`` as a phase, for a step
+        that has just finished in the given seconds. E.g., each action of a hook
+        in :py:func:`livy.cli.hook.run_actions`."""
+
+        def record(step: str, seconds: float) -> None:
+            end = self.now()
+            self.add(f"{name}:{step}", max(0.0, end - seconds), end, attempt)
+
+        return record
+
+    def tracker(self, attempt: int = None) -> "BatchTracker":
+        """Create a tracker for the phases of a batch after it is submitted."""
+        return BatchTracker(self, attempt)
+
+    def to_dict(self) -> dict:
+        """Timeline in JSON-serializable format."""
+        with self._lock:
+            return {
+                "started": self.started.isoformat(),
+                "phases": list(self.phases),
+            }
+
+    def dump(self, path: str) -> None:
+        """Write the timeline to file in JSON format."""
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def summary(self) -> typing.List[str]:
+        """Lines of the summary table."""
+        rows = [("Phase", "Attempt", "Start", "Duration")]
+        with self._lock:
+            for p in self.phases:
+                rows.append(
+                    (
+                        p["phase"],
+                        str(p["attempt"] or "-"),
+                        f"{p['start']:.2f}s",
+                        f"{p['duration']:.2f}s",
+                    )
+                )
+
+        widths = [max(len(r[i]) for r in rows) for i in range(4)]
+        return [
+            "  ".join(
+                (
+                    r[0].ljust(widths[0]),
+                    r[1].rjust(widths[1]),
+                    r[2].rjust(widths[2]),
+                    r[3].rjust(widths[3]),
+                )
+            ).rstrip()
+            for r in rows
+        ]
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        """Write the summary table to logger."""
+        for line in self.summary():
+            logger.info("%s", line)
+
+
+class BatchTracker:
+    """Watch a batch through :py:class:`~livy.logreader.LivyBatchLogReader`,
+    and derive the phases after submission:
+
+    * ``queue_wait``: from submitted to the batch is ``running``
+    * ``first_log``: from submitted to the first log is received
+    * ``running``: from the batch is ``running`` to it is ended
+    * ``log_drain``: from the batch is ended to all the logs are read
+
+    Attach it with :py:meth:`~livy.logreader.LivyBatchLogReader.add_sink` and
+    :py:meth:`~livy.logreader.LivyBatchLogReader.add_state_listener`.
+    """
+
+    def __init__(self, timeline: SubmitTimeline, attempt: int = None) -> None:
+        self.timeline = timeline
+        self.attempt = attempt
+        self.submitted = timeline.now()
+        self.first_log: typing.Optional[float] = None
+        self.running: typing.Optional[float] = None
+        self.ended: typing.Optional[float] = None
+
+    def __call__(self, state: str) -> None:
+        """State listener"""
+        now = self.timeline.now()
+        state = state.lower()
+        if state == "running" and self.running is None:
+            self.running = now
+        elif state not in ("not_started", "starting", "running") and not self.ended:
+            self.ended = now
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Sink for log records"""
+        if self.first_log is None:
+            self.first_log = self.timeline.now()
+
+    def flush(self) -> None:
+        """Nothing to flush. For the sink protocol."""
+
+    def close(self) -> None:
+        """Add the phases to timeline. Call it after logs are read."""
+        now = self.timeline.now()
+        ended = self.ended if self.ended is not None else now
+        running = self.running if self.running is not None else ended
+
+        timeline = self.timeline
+        timeline.add("queue_wait", self.submitted, running, self.attempt)
+        if self.first_log is not None:
+            timeline.add("first_log", self.submitted, self.first_log, self.attempt)
+        timeline.add("running", running, ended, self.attempt)
+        timeline.add("log_drain", ended, now, self.attempt)
@@ -0,0 +1,350 @@
+"""Live dashboard of running batches
+"""
+import argparse
+import concurrent.futures
+import datetime
+import re
+import shutil
+import sys
+import time
+import typing
+
+import livy
+import livy.cli.config
+import livy.cli.logging
+import livy.cli.ls
+
+ACTIVE_STATES = ("starting", "running")
+
+
+def main(argv=None):
+    """CLI entrypoint"""
+    # parse argument
+    cfg = livy.cli.config.load()
+    parser = argparse.ArgumentParser(
+        prog="livy top",
+        description=__doc__,
+    )
+
+    parser.add_argument(
+        "--interval",
+        metavar="SEC",
+        type=float,
+        default=3.0,
+        help="Refresh interval in seconds. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--budget",
+        metavar="N",
+        type=int,
+        default=10,
+        help="Max number of log requests in each refresh. Logs are only fetched "
+        "for the batches on screen. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Print the dashboard once and exit. It is enabled automatically "
+        "when the output is not a terminal, and all the batches are printed in "
+        "full width then.",
+    )
+
+    group = parser.add_argument_group("livy server configuration")
+    group.add_argument(
+        "--api-url",
+        required=cfg.root.api_url is None,
+        default=cfg.root.api_url,
+        help="Base-URL for Livy API server",
+    )
+    group.add_argument(
+        "--page-size",
+        metavar="N",
+        type=int,
+        default=2000,
+        help="Number of batches to be fetched in one listing request. Each "
+        "refresh takes one listing request if the server has no more than "
+        "this number of batches. Default: %(default)s.",
+    )
+
+    livy.cli.logging.setup_argparse(parser)
+
+    args = parser.parse_args(argv)
+
+    # setup logger
+    livy.cli.logging.init(args)
+    console = livy.cli.logging.get("livy-top.main")
+
+    client = livy.LivyClient(url=args.api_url, pool_size=max(1, min(args.budget, 8)))
+    dashboard = Dashboard(client, args.budget, args.page_size)
+
+    is_tty = sys.stdout.isatty()
+
+    try:
+        if args.once or not is_tty:
+            # fit the screen only on terminal; e.g. all rows are piped to grep
+            width, height = shutil.get_terminal_size() if is_tty else (None, None)
+            dashboard.refresh(height and height - 2)
+            for line in dashboard.render(width, height):
+                print(line)
+            return 1 if dashboard.error else 0
+
+        with AnsiScreen(sys.stdout) as screen:
+            while True:
+                tick = time.monotonic()
+                dashboard.refresh(screen.height - 2)
+                screen.draw(dashboard.render(screen.width, screen.height))
+                time.sleep(max(0.0, args.interval - (time.monotonic() - tick)))
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dashboard.close()
+
+    console.info("Dashboard closed")
+    return 0
+
+
+class BatchRow:
+    """States of a batch on dashboard."""
+
+    __slots__ = (
+        "id",
+        "state",
+        "app_id",
+        "name",
+        "start_time",
+        "queue",
+        "latest_log",
+        "head_loaded",
+        "log_updated",
+    )
+
+    def __init__(self, batch_id: int) -> None:
+        self.id = batch_id
+        self.state: str = None
+        self.app_id: str = None
+        self.name: str = None
+        self.start_time: datetime.datetime = None
+        self.queue: str = None
+        self.latest_log: str = None
+        self.head_loaded = False
+        self.log_updated = 0.0
+
+
+class Dashboard:
+    """Model of the dashboard. Each refresh takes one listing request for
+    updating batch states, and at most `budget` log requests for the batches on
+    screen."""
+
+    _PATTERN_QUEUE = re.compile(r"^\s+queue: (\S+)", re.MULTILINE)
+    _SECTION_HEADERS = ("stdout:", "stderr:", "YARN Diagnostics:")
+
+    def __init__(self, client: livy.LivyClient, budget: int, page_size: int) -> None:
+        self.client = client
+        self.budget = budget
+        self.page_size = page_size
+
+        self.rows: typing.Dict[int, BatchRow] = {}
+        self.error: str = None
+        self.updated: datetime.datetime = None
+        self.num_requests = 0
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max(1, min(budget, 8)))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+    def refresh(self, num_visible: int = None) -> None:
+        """Update the batch list and the logs of the first `num_visible`
+        batches; all of them if it is ``None``."""
+        self.num_requests = 0
+        try:
+            self._update_states()
+        except livy.RequestError as e:
+            self.error = f"Failed to list batches: {e}"
+            return
+
+        self.error = None
+        self.updated = datetime.datetime.now()
+        self._update_logs(self.visible_rows(num_visible))
+
+    def _update_states(self) -> None:
+        """Update states by listing request. Batches not active are dropped."""
+        alive = set()
+        num_batches = 0
+        for batch in self.client.iter_batches(self.page_size):
+            num_batches += 1
+            if batch.get("state") not in ACTIVE_STATES:
+                continue
+
+            alive.add(batch["id"])
+            row = self.rows.get(batch["id"])
+            if not row:
+                row = self.rows[batch["id"]] = BatchRow(batch["id"])
+
+            row.state = batch.get("state")
+            row.app_id = batch.get("appId")
+            row.name = batch.get("name")
+
+            # livy attaches the last lines of log in listing
+            latest_log = self._latest_line(batch.get("log") or [])
+            if latest_log:
+                row.latest_log = latest_log
+                row.log_updated = time.monotonic()
+
+        self.num_requests += num_batches // self.page_size + 1
+
+        for batch_id in list(self.rows):
+            if batch_id not in alive:
+                del self.rows[batch_id]
+
+    def visible_rows(self, num_visible: int = None) -> typing.List[BatchRow]:
+        """Rows on screen, newest batch first. All rows if `num_visible` is
+        ``None``."""
+        ids = sorted(self.rows, reverse=True)
+        if num_visible is not None:
+            ids = ids[: max(0, num_visible)]
+        return [self.rows[id_] for id_ in ids]
+
+    def _update_logs(self, rows: typing.List[BatchRow]) -> None:
+        """Fetch logs for the rows, in limited requests. Rows that have never
+        read the head of log come first, then the rows that are least recently
+        updated."""
+        now = time.monotonic()
+        candidates = [r for r in rows if not r.head_loaded]
+        candidates += sorted(
+            (r for r in rows if r.head_loaded and now - r.log_updated > 1.0),
+            key=lambda r: r.log_updated,
+        )
+        candidates = candidates[: self.budget]
+        if not candidates:
+            return
+
+        # errors are ignored; the row would be updated in next refresh
+        futures = [self._executor.submit(self._update_log, r) for r in candidates]
+        concurrent.futures.wait(futures)
+        self.num_requests += len(futures)
+
+    def _update_log(self, row: BatchRow) -> None:
+        if not row.head_loaded:
+            # head of log contains start time and queue (in spark-submit report)
+            # it is read again in next refresh if the log is still too short
+            lines = self.client.get_batch_log(row.id, from_=0, size=200)
+            row.start_time = livy.cli.ls.parse_start_time(lines)
+
+            m = self._PATTERN_QUEUE.search("\n".join(lines))
+            if m:
+                row.queue = m.group(1)
+
+            row.head_loaded = row.queue is not None or len(lines) >= 200
+
+        else:
+            lines = self.client.get_batch_log(row.id, size=5)
+
+        latest_log = self._latest_line(lines)
+        if latest_log:
+            row.latest_log = latest_log
+        row.log_updated = time.monotonic()
+
+    @classmethod
+    def _latest_line(cls, lines: typing.List[str]) -> typing.Optional[str]:
+        for line in reversed(lines):
+            line = line.strip()
+            if line and line not in cls._SECTION_HEADERS:
+                return line
+        return None
+
+    def render(self, width: int = None, height: int = None) -> typing.List[str]:
+        """Render the dashboard into lines of text. No limit on the size if
+        `width` or `height` is ``None``."""
+        num_starting = sum(1 for r in self.rows.values() if r.state == "starting")
+        num_running = sum(1 for r in self.rows.values() if r.state == "running")
+
+        status = f"livy top - {self.client.host} - {num_running} running, "
+        status += f"{num_starting} starting"
+        if self.updated:
+            status += f" - updated {self.updated:%H:%M:%S}"
+        status += f" - {self.num_requests} requests"
+        if self.error:
+            status += f" - {self.error}"
+
+        lines = [
+            status,
+            _format_row("ID", "STATE", "AGE", "APP ID", "QUEUE", "LATEST LOG"),
+        ]
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for row in self.visible_rows(height and height - 2):
+            lines.append(
+                _format_row(
+                    str(row.id),
+                    row.state or "-",
+                    _format_age(now - row.start_time) if row.start_time else "-",
+                    row.app_id or "-",
+                    row.queue or "-",
+                    row.latest_log or "",
+                )
+            )
+
+        if width is None:
+            return lines
+        return [line[:width] for line in lines]
+
+
+def _format_row(id_, state, age, app_id, queue, latest_log) -> str:
+    return f"{id_:>7} {state:<8} {age:>7} {app_id:<30} {queue:<12} {latest_log}"
+
+
+def _format_age(delta: datetime.timedelta) -> str:
+    seconds = max(0, int(delta.total_seconds()))
+    if seconds < 3600:
+        return "%dm%02ds" % divmod(seconds, 60)
+    if seconds < 86400:
+        return "%dh%02dm" % (seconds // 3600, seconds % 3600 // 60)
+    return "%dd%02dh" % (seconds // 86400, seconds % 86400 // 3600)
+
+
+class AnsiScreen:
+    """Full screen renderer with ANSI escape sequences. Only the lines changed
+    since last frame are redrawn."""
+
+    def __init__(self, stream: typing.TextIO) -> None:
+        self.stream = stream
+        self._frame: typing.List[str] = []
+
+    def __enter__(self) -> "AnsiScreen":
+        # alternate screen buffer; hide cursor
+        self.stream.write("\x1b[?1049h\x1b[?25l\x1b[2J")
+        self.stream.flush()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stream.write("\x1b[?25h\x1b[?1049l")
+        self.stream.flush()
+
+    @property
+    def width(self) -> int:
+        return shutil.get_terminal_size().columns
+
+    @property
+    def height(self) -> int:
+        return shutil.get_terminal_size().lines
+
+    def draw(self, lines: typing.List[str]) -> None:
+        """Draw a frame."""
+        buf = []
+        for i in range(max(len(lines), len(self._frame))):
+            line = lines[i] if i < len(lines) else ""
+            prev = self._frame[i] if i < len(self._frame) else None
+            if line != prev:
+                buf.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+
+        self._frame = list(lines)
+        if buf:
+            self.stream.write("".join(buf))
+            self.stream.flush()
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,3 +1,6 @@
+import concurrent.futures
+import contextlib
+import functools
 import http
 import http.client
 import json
@@ -5,6 +8,7 @@ import logging
 import socket
 import ssl
 import sys
+import threading
 import typing
 import urllib.parse
 from typing import Union, Optional, List, Dict
@@ -53,6 +57,7 @@ class LivyClient:
         url: str,
         verify: Union[bool, ssl.SSLContext] = True,
         timeout: float = 30.0,
+        pool_size: int = 10,
     ) -> None:
         """
         Parameters
@@ -63,6 +68,10 @@ class LivyClient:
             Verifies SSL certificates or not; or use customized SSL context
         timeout : float
             Timeout seconds for the connection.
+        pool_size : int
+            Max number of connections to the server. The client is thread-safe,
+            requests from different threads share the connections and wait
+            for a free one when all the connections are in use.
 
         Raises
         ------
@@ -101,19 +110,35 @@ class LivyClient:
         # client
         scheme = purl.scheme.upper()
         if scheme == "HTTP":
-            self._client = http.client.HTTPConnection(
-                host=purl.hostname, port=purl.port, timeout=timeout
+            factory = functools.partial(
+                http.client.HTTPConnection,
+                host=purl.hostname,
+                port=purl.port,
+                timeout=timeout,
             )
         elif scheme == "HTTPS":
-            self._client = http.client.HTTPSConnection(
-                host=purl.hostname, port=purl.port, timeout=timeout, context=ssl_context
+            factory = functools.partial(
+                http.client.HTTPSConnection,
+                host=purl.hostname,
+                port=purl.port,
+                timeout=timeout,
+                context=ssl_context,
             )
         else:
             raise OperationError(f"Unsupported scheme: {scheme}")
 
+        if not isinstance(pool_size, int) or pool_size < 1:
+            raise _TypeError("pool_size", "positive int", pool_size)
+
+        self._pool = _ConnectionPool(factory, pool_size)
+
     def __repr__(self) -> str:
         return f"<LivyClient for '{self.host}'>"
 
+    def close(self) -> None:
+        """Close all idle connections."""
+        self._pool.close()
+
     def _request(self, method: str, path: str, data: dict = None) -> dict:
         """Firing request and decode response
 
@@ -143,68 +168,99 @@ class LivyClient:
 
         logger.debug("%s %s", method, path)
 
-        # start request
+        if data:
+            data = json.dumps(data, ensure_ascii=True).encode()
+
+        with self._pool.connection() as (conn, reused):
+            while True:
+                try:
+                    response = self._send(conn, method, path, data)
+                    break
+                except (http.client.RemoteDisconnected, BrokenPipeError) as e:
+                    # server might close the idle connection; retry on a new
+                    # connection, except POST, which is not safe to be repeated
+                    conn.close()
+                    if not reused or method == "POST":
+                        raise RequestError(0, "Connection error", e)
+                    logger.debug("Connection is closed by server. Retry.")
+                    reused = False
+
+            try:
+                with response as buf:
+                    response_bytes = buf.read()
+            except socket.timeout as e:
+                raise RequestError(0, "Connection timeout", e)
+            except (http.client.HTTPException, ConnectionError) as e:
+                raise RequestError(0, "Connection error", e)
+
+        if response.status < 200 or response.status >= 400:
+            if response_bytes:
+                logger.error(
+                    "Server response: %s", response_bytes.decode("utf8", "replace")
+                )
+            raise RequestError(response.status, response.reason)
+
+        if not response_bytes:
+            return {}
+
         try:
-            self._client.connect()
+            response_data = json.loads(response_bytes)
+        except json.JSONDecodeError as e:
+            raise RequestError(response.status, "JSON decode error", e)
+
+        return response_data
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        data: Optional[bytes],
+    ) -> http.client.HTTPResponse:
+        """Send request via the connection and get the response."""
+        try:
+            if conn.sock is None:
+                conn.connect()
         except socket.timeout as e:
             raise RequestError(0, "Connection timeout", e)
         except ConnectionRefusedError as e:
             raise RequestError(0, "Connection refused", e)
 
-        self._client.putrequest(
+        conn.putrequest(
             method=method,
             url=self._prefix + path,
         )
 
-        self._client.putheader("Connection", "Keep-Alive")
-        self._client.putheader("Accept", "application/json")
-        self._client.putheader("User-Agent", f"python-livyclient/{livy.__version__}")
-        self._client.putheader("Keep-Alive", "timeout=3600, max=10000")
+        conn.putheader("Connection", "Keep-Alive")
+        conn.putheader("Accept", "application/json")
+        conn.putheader("User-Agent", f"python-livyclient/{livy.__version__}")
+        conn.putheader("Keep-Alive", "timeout=3600, max=10000")
 
         if data:
-            data = json.dumps(data, ensure_ascii=True).encode()
-
-            self._client.putheader("Content-Type", "application/json")
-            self._client.putheader("Content-Length", str(len(data)))
+            conn.putheader("Content-Type", "application/json")
+            conn.putheader("Content-Length", str(len(data)))
 
-            self._client.endheaders()
-            self._client.send(data)
+            conn.endheaders()
+            conn.send(data)
 
         else:
-            self._client.endheaders()
+            conn.endheaders()
 
         try:
-            response = self._client.getresponse()
+            return conn.getresponse()
         except KeyboardInterrupt:
             # keyboard interruption causes connection failed on next request
-            self._client.close()
+            conn.close()
             raise
         except socket.timeout as e:
+            conn.close()
             raise RequestError(0, "Connection timeout", e)
+        except http.client.RemoteDisconnected:
+            raise
         except ConnectionError as e:
-            self._client.close()
+            conn.close()
             raise RequestError(0, "Connection error", e)
 
-        with response as buf:
-            response_bytes = buf.read()
-
-        if response.status < 200 or response.status >= 400:
-            if response_bytes:
-                logger.error(
-                    "Server response: %s", response_bytes.decode("utf8", "replace")
-                )
-            raise RequestError(response.status, response.reason)
-
-        if not response_bytes:
-            return {}
-
-        try:
-            response_data = json.loads(response_bytes)
-        except json.JSONDecodeError as e:
-            raise RequestError(response.status, "JSON decode error", e)
-
-        return response_data
-
     def check(self, capture: bool = True) -> bool:
         """Check if server is up.
 
@@ -364,6 +420,98 @@ class LivyClient:
             raise _TypeError("batch_id", int, batch_id)
         self._request("DELETE", f"/batches/{batch_id}")
 
+    def list_batches(
+        self, from_: Optional[int] = None, size: Optional[int] = None
+    ) -> List[Batch]:
+        """List batches on the server.
+
+        Parameters
+        ----------
+        from_ : int
+            Offset
+        size : int
+            Max number of batches to return. Server returns 100 batches at most
+            by default.
+
+        Return
+        ------
+        batches : List[dict]
+            Batch information form livy server
+
+        Raises
+        ------
+        TypeError
+            On input parameters not matches expected data type
+        RequestError
+            On connection error
+        """
+        if from_ is not None and not isinstance(from_, int):
+            raise _TypeError("from_", int, from_)
+        if size is not None and not isinstance(size, int):
+            raise _TypeError("size", int, size)
+
+        query = {}
+        if from_ is not None:
+            query["from"] = from_
+        if size is not None:
+            query["size"] = size
+        query_string = urllib.parse.urlencode(query)
+
+        path = "/batches"
+        if query_string:
+            path += "?" + query_string
+
+        resp = self._request("GET", path)
+        return resp.get("sessions", [])
+
+    def iter_batches(self, page_size: int = 100) -> typing.Iterator[Batch]:
+        """Iterate over all batches on the server, in ascending order of batch
+        ID. Batches are fetched page by page, and the next page is fetched in
+        background while current page is consumed.
+
+        Parameters
+        ----------
+        page_size : int
+            Number of batches to be fetched in one request
+
+        Return
+        ------
+        batches : Iterator[dict]
+            Batch information form livy server
+
+        Raises
+        ------
+        TypeError
+            On input parameters not matches expected data type
+        RequestError
+            On connection error
+        """
+        if not isinstance(page_size, int) or page_size < 1:
+            raise _TypeError("page_size", "positive int", page_size)
+
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        try:
+            offset = 0
+            last_id = -1
+            future = executor.submit(self.list_batches, offset, page_size)
+            while future:
+                batches = future.result()
+
+                # prefetch
+                offset += len(batches)
+                if len(batches) < page_size:
+                    future = None
+                else:
+                    future = executor.submit(self.list_batches, offset, page_size)
+
+                for batch in batches:
+                    # the list might be changed between requests
+                    if batch["id"] > last_id:
+                        last_id = batch["id"]
+                        yield batch
+        finally:
+            executor.shutdown(wait=False)
+
     def get_batch_information(self, batch_id: int) -> Batch:
         """Get summary information to specific batch.
 
@@ -495,3 +643,45 @@ class LivyClient:
 
         resp = self._request("GET", path)
         return resp.get("log", [])
+
+
+class _ConnectionPool:
+    """Thread-safe pool of HTTP connections. Connections are created on demand
+    and kept for reuse, at most `maxsize` connections are in use at a time."""
+
+    def __init__(
+        self, factory: typing.Callable[[], http.client.HTTPConnection], maxsize: int
+    ) -> None:
+        self._factory = factory
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(maxsize)
+        self.maxsize = maxsize
+
+    @contextlib.contextmanager
+    def connection(
+        self,
+    ) -> typing.Iterator[typing.Tuple[http.client.HTTPConnection, bool]]:
+        """Borrow a connection. Yields the connection and whether it is reused
+        from previous request. It blocks when all the connections are in use.
+        The connection is closed and dropped if the request raises, since it
+        might be left with a half-read response."""
+        with self._semaphore:
+            with self._lock:
+                if self._idle:
+                    conn, reused = self._idle.pop(), True
+                else:
+                    conn, reused = self._factory(), False
+            try:
+                yield conn, reused and conn.sock is not None
+            except BaseException:
+                conn.close()
+                raise
+            with self._lock:
+                self._idle.append(conn)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
@@ -0,0 +1,396 @@
+"""Run batches in dependency order. A node is submitted once all its
+dependencies are succeeded, under a global and per-queue limit of running
+batches. States of all the submitted batches are watched in one polling loop,
+and the progress could be persisted to a file to resume the run later.
+"""
+import json
+import logging
+import os
+import time
+import typing
+
+import livy.bulk
+import livy.client
+import livy.exception
+
+__all__ = ["LivyDagNode", "LivyDagRunner"]
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+SUCCESS = "success"
+FAILED = "failed"
+UPSTREAM_FAILED = "upstream_failed"
+
+_BATCH_FAILED_STATES = ("dead", "killed", "error")
+
+
+class LivyDagNode:
+    """A batch to be submitted in :py:class:`LivyDagRunner`."""
+
+    __slots__ = (
+        "name",
+        "job",
+        "depends_on",
+        "queue",
+        "retries",
+        "state",
+        "batch_id",
+        "attempts",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        job: typing.Any,
+        depends_on: typing.Iterable[str] = (),
+        queue: str = None,
+        retries: int = 0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            name : str
+                Unique name of this node
+            job : typing.Any
+                Job to be submitted. It is passed to ``prepare`` of the runner,
+                or it should be the keyword arguments to
+                :py:meth:`~livy.client.LivyClient.create_batch`.
+            depends_on : typing.Iterable[str]
+                Names of the nodes that must be succeeded before this one
+            queue : str
+                YARN queue name, for applying the per-queue limit
+            retries : int
+                Times to resubmit after the batch is failed
+        """
+        if not isinstance(name, str):
+            raise livy.exception.TypeError("name", str, name)
+        if not isinstance(retries, int) or retries < 0:
+            raise livy.exception.TypeError("retries", "non-negative int", retries)
+
+        self.name = name
+        self.job = job
+        self.depends_on = tuple(depends_on)
+        self.queue = queue
+        self.retries = retries
+
+        self.state = PENDING
+        self.batch_id: typing.Optional[int] = None
+        self.attempts = 0
+        self.error: typing.Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"<LivyDagNode '{self.name}' {self.state}>"
+
+    @property
+    def ended(self) -> bool:
+        """Node would not be changed anymore."""
+        return self.state in (SUCCESS, FAILED, UPSTREAM_FAILED)
+
+
+class LivyDagRunner:
+    """Submit and watch the batches in a DAG."""
+
+    def __init__(
+        self,
+        client: livy.client.LivyClient,
+        nodes: typing.Iterable[LivyDagNode],
+        max_running: int = None,
+        queue_limits: typing.Dict[str, int] = None,
+        prepare: typing.Callable[[typing.Any], typing.Dict[str, typing.Any]] = None,
+        state_path: str = None,
+        max_workers: int = 8,
+        page_size: int = 1000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            client : livy.client.LivyClient
+                Livy client
+            nodes : typing.Iterable[LivyDagNode]
+                Nodes in the DAG
+            max_running : int
+                Max number of batches in running at the same time; ``None``
+                for no limit.
+            queue_limits : typing.Dict[str, int]
+                Max number of running batches in each YARN queue
+            prepare : typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]
+                Function to convert the node's job into the keyword arguments
+                of :py:meth:`~livy.client.LivyClient.create_batch`. See
+                :py:func:`livy.bulk.submit_many`.
+            state_path : str
+                Path to save the states of nodes. Saved states are loaded on
+                start, thus the run could be resumed.
+            max_workers : int
+                Max number of concurrent submissions
+            page_size : int
+                Number of batches in each listing request when polling states
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        OperationError
+            On the dependency is not found or it has cycle
+        """
+        if not isinstance(client, livy.client.LivyClient):
+            raise livy.exception.TypeError("client", livy.client.LivyClient, client)
+        if max_running is not None and (
+            not isinstance(max_running, int) or max_running < 1
+        ):
+            raise livy.exception.TypeError("max_running", "positive int", max_running)
+
+        self.client = client
+        self.max_running = max_running
+        self.queue_limits = dict(queue_limits or {})
+        self.prepare = prepare
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.page_size = page_size
+
+        self.nodes = self._sort(list(nodes))
+
+    @staticmethod
+    def _sort(nodes: typing.List[LivyDagNode]) -> typing.List[LivyDagNode]:
+        """Sort nodes in topological order. The input order is kept among the
+        nodes that are ready at the same time."""
+        by_name = {}
+        for node in nodes:
+            if not isinstance(node, LivyDagNode):
+                raise livy.exception.TypeError("nodes", LivyDagNode, node)
+            if node.name in by_name:
+                raise livy.exception.OperationError(f"Duplicated node: {node.name}")
+            by_name[node.name] = node
+
+        for node in nodes:
+            for dep in node.depends_on:
+                if dep not in by_name:
+                    raise livy.exception.OperationError(
+                        f"Dependency {dep} of node {node.name} is not found"
+                    )
+
+        ordered = []
+        visited = set()
+        while len(ordered) < len(nodes):
+            ready = [
+                node
+                for node in nodes
+                if node.name not in visited
+                and all(dep in visited for dep in node.depends_on)
+            ]
+            if not ready:
+                names = sorted(n.name for n in nodes if n.name not in visited)
+                raise livy.exception.OperationError(
+                    f"Cycle detected in nodes: {', '.join(names)}"
+                )
+            for node in ready:
+                visited.add(node.name)
+            ordered += ready
+
+        return ordered
+
+    @property
+    def finished(self) -> bool:
+        """All nodes are ended."""
+        return all(node.ended for node in self.nodes)
+
+    @property
+    def succeeded(self) -> bool:
+        """All nodes are succeeded."""
+        return all(node.state == SUCCESS for node in self.nodes)
+
+    def load_state(self) -> bool:
+        """Load the saved states from `state_path`. Succeeded nodes and the
+        batches still being watched are restored; failed nodes are reset to
+        pending, thus they would be submitted again. Returns ``False`` if
+        there is no saved state."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return False
+
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as fp:
+                saved = json.load(fp)["nodes"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise livy.exception.OperationError(
+                f"Failed to load state from {self.state_path}: {e}"
+            )
+
+        for node in self.nodes:
+            state = saved.get(node.name) or {}
+            if state.get("state") == SUCCESS:
+                node.state = SUCCESS
+                node.batch_id = state.get("batch_id")
+                node.attempts = state.get("attempts", 0)
+            elif state.get("state") == SUBMITTED and state.get("batch_id") is not None:
+                node.state = SUBMITTED
+                node.batch_id = state["batch_id"]
+                node.attempts = state.get("attempts", 1)
+
+        return True
+
+    def save_state(self) -> None:
+        """Save the states to `state_path`. The file is replaced atomically."""
+        if not self.state_path:
+            return
+
+        data = {
+            "nodes": {
+                node.name: {
+                    "state": node.state,
+                    "batch_id": node.batch_id,
+                    "attempts": node.attempts,
+                    "error": node.error,
+                }
+                for node in self.nodes
+            }
+        }
+
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def run(self, interval: float = 10.0) -> bool:
+        """Run the polling loop until all nodes are ended. Request errors
+        during polling are logged and retried in next cycle.
+
+        Return
+        ------
+        succeeded : bool
+            All nodes are succeeded
+        """
+        while True:
+            try:
+                self.step()
+            except livy.exception.RequestError as e:
+                logger.warning("Failed to update states: %s", e)
+
+            if self.finished:
+                return self.succeeded
+
+            time.sleep(interval)
+
+    def step(self) -> None:
+        """One cycle of the polling loop: update the states of submitted
+        batches, then submit the nodes that are ready."""
+        self.poll()
+        self._propagate_failure()
+        self.launch()
+        self._propagate_failure()
+        self.save_state()
+
+    def poll(self) -> None:
+        """Update the states of submitted nodes. All the states are read by
+        listing requests, batches that are not in the list are queried
+        one by one."""
+        watching = {n.batch_id: n for n in self.nodes if n.state == SUBMITTED}
+        if not watching:
+            return
+
+        states = {}
+        for batch in self.client.iter_batches(self.page_size):
+            if batch["id"] in watching:
+                states[batch["id"]] = batch.get("state")
+                if len(states) == len(watching):
+                    break
+
+        for batch_id, node in watching.items():
+            if batch_id not in states:
+                # livy drops ended batches after a while
+                try:
+                    states[batch_id] = self.client.get_batch_state(batch_id)
+                except livy.exception.RequestError as e:
+                    if e.code != 404:
+                        raise
+                    self._attempt_failed(node, f"batch {batch_id} is not found")
+                    continue
+
+            state = states[batch_id]
+            if state == "success":
+                logger.info("Node %s (batch %d) succeeded", node.name, batch_id)
+                node.state = SUCCESS
+                node.error = None
+            elif state in _BATCH_FAILED_STATES:
+                self._attempt_failed(node, f"batch {batch_id} ended with {state}")
+
+    def _attempt_failed(self, node: LivyDagNode, reason: str) -> None:
+        node.error = reason
+        if node.attempts <= node.retries:
+            logger.warning(
+                "Node %s failed: %s. Retry (%d/%d)",
+                node.name,
+                reason,
+                node.attempts,
+                node.retries,
+            )
+            node.state = PENDING
+        else:
+            logger.error("Node %s failed: %s", node.name, reason)
+            node.state = FAILED
+
+    def _propagate_failure(self) -> None:
+        by_name = {node.name: node for node in self.nodes}
+        for node in self.nodes:  # in topological order
+            if node.state != PENDING:
+                continue
+            for dep in node.depends_on:
+                if by_name[dep].state in (FAILED, UPSTREAM_FAILED):
+                    logger.warning("Node %s skipped: %s failed", node.name, dep)
+                    node.state = UPSTREAM_FAILED
+                    node.error = f"dependency {dep} failed"
+                    break
+
+    def ready_nodes(self) -> typing.List[LivyDagNode]:
+        """Pending nodes that all dependencies are succeeded, within the limits
+        of running batches."""
+        by_name = {node.name: node for node in self.nodes}
+
+        running = [node for node in self.nodes if node.state == SUBMITTED]
+        num_running = len(running)
+        queue_running = {}
+        for node in running:
+            queue_running[node.queue] = queue_running.get(node.queue, 0) + 1
+
+        ready = []
+        for node in self.nodes:
+            if node.state != PENDING:
+                continue
+            if not all(by_name[dep].state == SUCCESS for dep in node.depends_on):
+                continue
+
+            if self.max_running is not None and num_running >= self.max_running:
+                break
+
+            limit = self.queue_limits.get(node.queue)
+            if limit is not None and queue_running.get(node.queue, 0) >= limit:
+                continue
+
+            ready.append(node)
+            num_running += 1
+            queue_running[node.queue] = queue_running.get(node.queue, 0) + 1
+
+        return ready
+
+    def launch(self) -> None:
+        """Submit the ready nodes."""
+        ready = self.ready_nodes()
+        if not ready:
+            return
+
+        def prepare(node: LivyDagNode) -> typing.Dict[str, typing.Any]:
+            return self.prepare(node.job) if self.prepare else node.job
+
+        for result in livy.bulk.submit_many(
+            self.client, ready, self.max_workers, prepare=prepare
+        ):
+            node: LivyDagNode = result.job
+            node.attempts += 1
+            if result.error:
+                self._attempt_failed(node, f"failed to submit: {result.error}")
+                continue
+
+            logger.info("Node %s submitted as batch %d", node.name, result.batch_id)
+            node.state = SUBMITTED
+            node.batch_id = result.batch_id
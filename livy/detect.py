@@ -0,0 +1,384 @@
+"""Early warning of the failures that usually slow down a Spark batch: lost
+executors, shuffle fetch failures, containers killed by YARN for exceeding
+memory limits, and GC overhead. The signatures are recognized in the log
+messages by the builtin parsers, and counted in a rolling time window;
+a warning is raised as soon as a count reaches its threshold, while the batch
+is still running.
+
+:py:class:`LivyFailureDetector` is a sink that could be attached to
+:py:meth:`livy.logreader.LivyBatchLogReader.add_sink`.
+"""
+import collections
+import datetime
+import logging
+import re
+import threading
+import time
+import typing
+
+import livy.exception
+import livy.export
+
+__all__ = [
+    "LivyFailureDetector",
+    "LivyFailureEvent",
+    "LivyFailureAlert",
+    "THRESHOLDS",
+    "parse_thresholds",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LivyFailureEvent(typing.NamedTuple):
+    """A failure recognized in logs."""
+
+    signature: str
+    """Name of the signature, e.g. ``executor-lost``.
+    """
+
+    created: datetime.datetime
+    """Time of the log. ``None`` if it is unknown.
+    """
+
+    executor: str
+    """Executor ID. ``None`` if it is unknown.
+    """
+
+    host: str
+    """Host name. ``None`` if it is unknown.
+    """
+
+    message: str
+    """First line of the log message.
+    """
+
+
+class LivyFailureAlert(typing.NamedTuple):
+    """Raised when the count of a signature in window reaches its threshold."""
+
+    signature: str
+    """Name of the signature.
+    """
+
+    count: int
+    """Number of the events in window.
+    """
+
+    window: float
+    """Window size in seconds.
+    """
+
+    event: LivyFailureEvent
+    """The event that triggers this alert.
+    """
+
+
+FailureParser = typing.Callable[
+    [typing.Match], typing.Tuple[typing.Optional[str], typing.Optional[str]]
+]
+
+_TASK_LOCATION = re.compile(r"\(TID \d+(?:, |\) \()([^\s,()]+),? executor (\w+)\)")
+_EXECUTOR_ON_HOST = re.compile(r"[Ee]xecutor (\w+) on ([^\s:]+)")
+_ON_HOST = re.compile(r"on host: ([^\s,]+?)\.?(?:\s|$)")
+
+
+def _locate(match: typing.Match) -> typing.Tuple[str, str]:
+    """Find executor and host from the rest of the message."""
+    message = match.string
+    m = _TASK_LOCATION.search(message)
+    if m:
+        return m.group(2), m.group(1)
+    m = _EXECUTOR_ON_HOST.search(message)
+    if m:
+        return m.group(1), m.group(2)
+    m = _ON_HOST.search(message)
+    return None, m and m.group(1)
+
+
+def executor_lost_parser(match: typing.Match) -> typing.Tuple[str, str]:
+    """``ExecutorLostFailure (executor 3 exited ...)`` from task failures, and
+    ``Lost executor 3 on host1: ...`` from the scheduler."""
+    executor, host = match.group(1), match.group(2)
+    if executor is None:
+        executor = match.group(3)
+        host = _locate(match)[1]
+    return executor, host
+
+
+def fetch_failed_parser(match: typing.Match) -> typing.Tuple[str, str]:
+    """``FetchFailed(BlockManagerId(3, host1, 7337, None), ...)`` and
+    ``FetchFailedException``. The executor and host are the ones serving the
+    shuffle blocks if they are known."""
+    if match.group(1) is not None:
+        return match.group(1), match.group(2)
+    return None, None
+
+
+def yarn_memory_parser(match: typing.Match) -> typing.Tuple[str, str]:
+    """``Container killed by YARN for exceeding memory limits`` from Spark, and
+    ``Container ... is running beyond physical memory limits`` from YARN."""
+    executor, host = _locate(match)
+    if executor is None:
+        m = re.search(r"[Ee]xecutor (\w+)", match.string)
+        executor = m and m.group(1)
+    return executor, host
+
+
+def gc_overhead_parser(match: typing.Match) -> typing.Tuple[str, str]:
+    """``java.lang.OutOfMemoryError: GC overhead limit exceeded``."""
+    return _locate(match)
+
+
+_BUILTIN_SIGNATURES: typing.Dict[
+    str, typing.Tuple[str, typing.Pattern, FailureParser, bool]
+] = {
+    # name: (keyword for fast check, pattern, parser, unique per executor)
+    "executor-lost": (
+        "Lost",
+        re.compile(
+            r"^Lost executor (\w+) on ([^\s:]+)"
+            r"|ExecutorLostFailure \(executor (\w+) exited"
+        ),
+        executor_lost_parser,
+        True,
+    ),
+    "fetch-failed": (
+        "FetchFailed",
+        re.compile(r"FetchFailed(?:\(BlockManagerId\((\w+), ([^,\s]+),|Exception)"),
+        fetch_failed_parser,
+        False,
+    ),
+    "yarn-memory-kill": (
+        "memory limit",
+        re.compile(
+            r"Container killed by YARN for exceeding (?:\w+ )?memory limits"
+            r"|is running (?:\d+\w?B )?beyond (?:the '\w+' memory limit"
+            r"|(?:physical|virtual) memory limits)"
+        ),
+        yarn_memory_parser,
+        True,
+    ),
+    "gc-overhead": (
+        "GC overhead",
+        re.compile(r"OutOfMemoryError: GC overhead limit exceeded"),
+        gc_overhead_parser,
+        False,
+    ),
+}
+
+THRESHOLDS = {
+    "executor-lost": 3,
+    "fetch-failed": 10,
+    "yarn-memory-kill": 1,
+    "gc-overhead": 1,
+}
+"""Default number of events in window to raise an alert, for each builtin
+signature."""
+
+
+def parse_thresholds(values: typing.Iterable[str]) -> typing.Dict[str, int]:
+    """Parse thresholds in ``NAME=COUNT`` format.
+
+    Raises
+    ------
+    TypeError
+        On a value is not in the format
+    """
+    thresholds = {}
+    for value in values:
+        name, _, count = value.rpartition("=")
+        try:
+            thresholds[name] = int(count)
+        except ValueError:
+            raise livy.exception.TypeError("threshold", "NAME=COUNT", value)
+        if not name:
+            raise livy.exception.TypeError("threshold", "NAME=COUNT", value)
+    return thresholds
+
+
+class LivyFailureDetector:
+    """Sink that recognizes the failure signatures and keeps rolling counts.
+
+    Each time the count of a signature in window reaches its threshold, an
+    alert is logged as a warning and passed to the callback. It is not raised
+    again until the count falls below the threshold. A lost executor is
+    usually reported by several logs, so the executor related signatures are
+    counted once for each executor.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        thresholds: typing.Dict[str, int] = None,
+        callback: typing.Callable[[LivyFailureAlert], None] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            window : float
+                Size of the rolling window in seconds
+            thresholds : typing.Dict[str, int]
+                Number of events in window to raise an alert, keyed by signature
+                name. Overrides the values in :py:data:`THRESHOLDS`.
+            callback : typing.Callable[[LivyFailureAlert], None]
+                Function to be called on each alert
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        """
+        if not isinstance(window, (int, float)) or window <= 0:
+            raise livy.exception.TypeError("window", "positive number", window)
+        if callback is not None and not callable(callback):
+            raise livy.exception.TypeError("callback", "callable", callback)
+
+        self.window = window
+        self.callback = callback
+        self.thresholds = dict(THRESHOLDS)
+        for name, threshold in (thresholds or {}).items():
+            if name not in _BUILTIN_SIGNATURES:
+                raise livy.exception.TypeError(
+                    "thresholds", "one of " + ", ".join(_BUILTIN_SIGNATURES), name
+                )
+            if not isinstance(threshold, int) or threshold < 1:
+                raise livy.exception.TypeError(
+                    f"thresholds[{name}]", "positive int", threshold
+                )
+            self.thresholds[name] = threshold
+
+        self.alerts: typing.List[LivyFailureAlert] = []
+        self._signatures = dict(_BUILTIN_SIGNATURES)
+        self._totals: typing.Dict[str, int] = collections.Counter()
+        self._windows: typing.Dict[str, typing.Deque[float]] = {
+            name: collections.deque() for name in self._signatures
+        }
+        self._alerted: typing.Set[str] = set()
+        self._seen_executors: typing.Set[typing.Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def add_signature(
+        self,
+        name: str,
+        pattern: typing.Pattern,
+        parser: FailureParser = None,
+        threshold: int = 1,
+    ) -> None:
+        """Add a signature to detect.
+
+        Parameters
+        ----------
+            name : str
+                Name of the signature
+            pattern : re.Pattern
+                Regex pattern to be searched in log messages
+            parser : callable
+                Function that takes :py:class:`re.Match` and returns the
+                executor ID and host, or ``None`` for the unknown ones
+            threshold : int
+                Number of events in window to raise an alert
+        """
+        if not isinstance(pattern, typing.Pattern):
+            raise livy.exception.TypeError("pattern", "regex pattern", pattern)
+        if parser is not None and not callable(parser):
+            raise livy.exception.TypeError("parser", "callable", parser)
+        if not isinstance(threshold, int) or threshold < 1:
+            raise livy.exception.TypeError("threshold", "positive int", threshold)
+
+        with self._lock:
+            self._signatures[name] = ("", pattern, parser or _locate, False)
+            self._windows[name] = collections.deque()
+            self.thresholds[name] = threshold
+
+    @property
+    def counts(self) -> typing.Dict[str, int]:
+        """Total number of events of each signature seen."""
+        with self._lock:
+            return {k: v for k, v in self._totals.items() if v}
+
+    def count(self, signature: str, now: float = None) -> int:
+        """Number of events of the signature in window. The window ends at the
+        latest event if ``now`` is not given."""
+        with self._lock:
+            timestamps = self._windows.get(signature)
+            if not timestamps:
+                return 0
+            if now is None:
+                now = timestamps[-1]
+            return sum(1 for t in timestamps if now - self.window < t <= now)
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Check a record."""
+        message = record.message
+        for name, (keyword, pattern, parser, unique) in self._signatures.items():
+            if keyword not in message:
+                continue
+            match = pattern.search(message)
+            if not match:
+                continue
+
+            executor, host = parser(match)
+            if unique and executor is not None:
+                with self._lock:
+                    if (name, executor) in self._seen_executors:
+                        continue
+                    self._seen_executors.add((name, executor))
+
+            event = LivyFailureEvent(
+                signature=name,
+                created=record.created,
+                executor=executor,
+                host=host,
+                message=message.split("\n", 1)[0],
+            )
+            self._add(event)
+
+    def flush(self) -> None:
+        """Nothing to flush. For the sink protocol."""
+
+    def _add(self, event: LivyFailureEvent) -> None:
+        now = event.created.timestamp() if event.created else time.time()
+        threshold = self.thresholds[event.signature]
+
+        with self._lock:
+            self._totals[event.signature] += 1
+
+            timestamps = self._windows[event.signature]
+            timestamps.append(now)
+            while timestamps and timestamps[0] <= now - self.window:
+                timestamps.popleft()
+
+            if len(timestamps) < threshold:
+                self._alerted.discard(event.signature)
+                return
+            if event.signature in self._alerted:
+                return
+
+            self._alerted.add(event.signature)
+            alert = LivyFailureAlert(
+                signature=event.signature,
+                count=len(timestamps),
+                window=self.window,
+                event=event,
+            )
+            self.alerts.append(alert)
+
+        location = ", ".join(
+            s
+            for s in (
+                event.host and f"host {event.host}",
+                event.executor and f"executor {event.executor}",
+            )
+            if s
+        )
+        logger.warning(
+            "Detected %s %d times in %d seconds%s: %s",
+            event.signature,
+            alert.count,
+            self.window,
+            f" (latest on {location})" if location else "",
+            event.message,
+        )
+        if self.callback:
+            self.callback(alert)
@@ -0,0 +1,158 @@
+"""Writers for exporting parsed batch logs into structured formats. The writers
+stream the records into file and flush by batch, so the output is never built
+in memory.
+"""
+import abc
+import csv
+import datetime
+import json
+import logging
+import typing
+
+import livy.exception
+
+__all__ = [
+    "LivyLogExportRecord",
+    "LogExportWriter",
+    "JsonLinesWriter",
+    "CsvWriter",
+    "get_export_writer",
+]
+
+
+class LivyLogExportRecord(typing.NamedTuple):
+    """Exported log record."""
+
+    created: datetime.datetime
+    """Timestamp that this log is created. Filled with the time which last log
+    is created if it could not be determined, or ``None`` if no log before
+    contains the time.
+    """
+
+    level: int
+    """Log level.
+    """
+
+    name: str
+    """Logger name.
+    """
+
+    message: str
+    """Log message.
+    """
+
+    section: str
+    """Section in livy's log: ``stdout``, ``stderr`` or ``YARN Diagnostics``.
+    """
+
+    batch_id: int
+    """Batch ID.
+    """
+
+    line: int
+    """Zero-based line number in the fetched log where this record starts.
+    """
+
+
+class LogExportWriter(abc.ABC):
+    """Base class for export writers."""
+
+    fields = LivyLogExportRecord._fields
+
+    def __init__(self, fp: typing.TextIO, flush_every: int = 1000) -> None:
+        """
+        Parameters
+        ----------
+            fp : typing.TextIO
+                Output file object
+            flush_every : int
+                Number of records to be buffered before written to file
+        """
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise livy.exception.TypeError("flush_every", "positive int", flush_every)
+        self.fp = fp
+        self.flush_every = flush_every
+        self._buffer: typing.List[LivyLogExportRecord] = []
+
+    def __enter__(self) -> "LogExportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+    def write(self, record: LivyLogExportRecord) -> None:
+        """Write a record. It would be buffered and written to file by batch."""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records to file."""
+        if self._buffer:
+            self._write_records(self._buffer)
+            self._buffer = []
+        self.fp.flush()
+
+    @abc.abstractmethod
+    def _write_records(self, records: typing.List[LivyLogExportRecord]) -> None:
+        ...
+
+    @staticmethod
+    def _serialize(record: LivyLogExportRecord) -> typing.Dict[str, typing.Any]:
+        data = record._asdict()
+        data["created"] = record.created.isoformat() if record.created else None
+        data["level"] = logging.getLevelName(record.level)
+        return data
+
+
+class JsonLinesWriter(LogExportWriter):
+    """Write records in `JSON Lines <https://jsonlines.org/>`_ format."""
+
+    def _write_records(self, records: typing.List[LivyLogExportRecord]) -> None:
+        self.fp.writelines(
+            json.dumps(self._serialize(r), ensure_ascii=False) + "\n" for r in records
+        )
+
+
+class CsvWriter(LogExportWriter):
+    """Write records in CSV format. Header row is written on created."""
+
+    def __init__(self, fp: typing.TextIO, flush_every: int = 1000) -> None:
+        super().__init__(fp, flush_every)
+        self._writer = csv.DictWriter(fp, fieldnames=self.fields)
+        self._writer.writeheader()
+
+    def _write_records(self, records: typing.List[LivyLogExportRecord]) -> None:
+        self._writer.writerows(self._serialize(r) for r in records)
+
+
+_WRITERS = {
+    "jsonl": JsonLinesWriter,
+    "csv": CsvWriter,
+}
+
+
+def get_export_writer(
+    format: str, fp: typing.TextIO, flush_every: int = 1000
+) -> LogExportWriter:
+    """Create the writer for the given format.
+
+    Parameters
+    ----------
+        format : str
+            Output format; ``jsonl`` or ``csv``.
+        fp : typing.TextIO
+            Output file object
+        flush_every : int
+            Number of records to be buffered before written to file
+
+    Raises
+    ------
+    OperationError
+        On the format is not supported
+    """
+    try:
+        writer_class = _WRITERS[format.lower()]
+    except KeyError:
+        raise livy.exception.OperationError(f"Unsupported export format: {format}")
+    return writer_class(fp, flush_every)
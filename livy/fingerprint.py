@@ -0,0 +1,196 @@
+"""Idempotent submission helpers. A submission is identified by the fingerprint
+of its parameters; before creating a batch, the live batches on server are
+checked, so the same job would not be submitted twice while it is running.
+
+The fingerprint is carried in the batch name when the name is not given, thus
+a live batch could be found from any machine. Otherwise the batch id and name
+are looked up from a local cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import typing
+
+import livy.client
+import livy.exception
+
+__all__ = [
+    "fingerprint",
+    "batch_name",
+    "find_live_batches",
+    "LivyFingerprintCache",
+]
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("not_started", "starting", "running", "recovering")
+
+
+def fingerprint(params: typing.Dict[str, typing.Any], url: str = None) -> str:
+    """Get the fingerprint of a submission.
+
+    Parameters
+    ----------
+        params : typing.Dict[str, typing.Any]
+            Keyword arguments to :py:meth:`~livy.client.LivyClient.create_batch`
+        url : str
+            URL to livy server. Same parameters to different servers get
+            different fingerprints.
+
+    Return
+    ------
+    fingerprint : str
+        Hex digest
+    """
+    content = json.dumps(
+        {"url": url, "params": params}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def batch_name(fp: str) -> str:
+    """Batch name that carries the fingerprint."""
+    return f"livy-{fp[:16]}"
+
+
+def find_live_batches(
+    client: livy.client.LivyClient,
+    expected: typing.Dict[str, typing.Tuple[str, typing.Optional[int]]],
+    page_size: int = 1000,
+) -> typing.Dict[str, livy.client.Batch]:
+    """Find the live batches for the submissions, in one pass over the batch
+    listing.
+
+    Parameters
+    ----------
+        client : livy.client.LivyClient
+            Livy client
+        expected : typing.Dict[str, typing.Tuple[str, typing.Optional[int]]]
+            Mapping of fingerprint to the batch name and batch id. A batch
+            matches if it is active and has the same name; the id must also be
+            matched if it is not ``None``.
+        page_size : int
+            Number of batches in each listing request
+
+    Return
+    ------
+    batches : typing.Dict[str, livy.client.Batch]
+        Mapping of fingerprint to the matched batch
+
+    Raises
+    ------
+    RequestError
+        On connection error
+    """
+    by_name = {}
+    for fp, (name, batch_id) in expected.items():
+        by_name.setdefault(name, []).append((fp, batch_id))
+
+    found = {}
+    for batch in client.iter_batches(page_size):
+        if batch.get("state") not in ACTIVE_STATES:
+            continue
+        for fp, batch_id in by_name.get(batch.get("name"), ()):
+            if fp in found:
+                continue
+            if batch_id is None or batch_id == batch["id"]:
+                found[fp] = batch
+
+    return found
+
+
+class LivyFingerprintCache:
+    """Local record of the submitted batches, keyed by fingerprint. It is
+    stored in a JSON file and entries older than `max_age` are dropped."""
+
+    def __init__(self, path: str, max_age: float = 7 * 86400) -> None:
+        """
+        Parameters
+        ----------
+            path : str
+                Path to the cache file. It would be created on save.
+            max_age : float
+                Seconds to keep an entry
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        """
+        if not isinstance(path, (str, os.PathLike)):
+            raise livy.exception.TypeError("path", str, path)
+
+        self.path = os.path.expanduser(os.fspath(path))
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: typing.Dict[str, dict] = {}
+        self.load()
+
+    def __repr__(self) -> str:
+        return f"<LivyFingerprintCache '{self.path}'>"
+
+    def load(self, overwrite: bool = True) -> None:
+        """Load entries from file. A broken cache file is ignored.
+
+        Parameters
+        ----------
+            overwrite : bool
+                Replace the entries in memory with the ones in file
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                entries = json.load(fp)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to read fingerprint cache %s: %s", self.path, e)
+            return
+
+        if not isinstance(entries, dict):
+            return
+        with self._lock:
+            if overwrite:
+                self._entries.update(entries)
+            else:
+                self._entries = dict(entries, **self._entries)
+
+    def save(self) -> None:
+        """Write entries to file. Entries written by other processes since
+        loaded are kept. The file is replaced atomically."""
+        self.load(overwrite=False)
+
+        now = time.time()
+        with self._lock:
+            self._entries = {
+                fp: entry
+                for fp, entry in self._entries.items()
+                if now - entry.get("time", 0) < self.max_age
+            }
+            content = json.dumps(self._entries, indent=1)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(content)
+        os.replace(tmp_path, self.path)
+
+    def get(self, fp: str) -> typing.Optional[typing.Tuple[int, str]]:
+        """Get the batch id and name of the fingerprint. ``None`` if not
+        found."""
+        with self._lock:
+            entry = self._entries.get(fp)
+        if not entry:
+            return None
+        return entry["batch_id"], entry["name"]
+
+    def put(self, fp: str, batch_id: int, name: str) -> None:
+        """Record a submission."""
+        with self._lock:
+            self._entries[fp] = {
+                "batch_id": batch_id,
+                "name": name,
+                "time": time.time(),
+            }
@@ -0,0 +1,420 @@
+"""Local history of batch runs. Each run is stored with its parameters and the
+durations, in a `SQLite <https://sqlite.org/>`_ database; the past runs of the
+same job give an estimation to the running one, and a reference for finding the
+slow runs.
+
+Durations of stages are derived from the task set logs of Spark scheduler, by
+:py:class:`LivyStageTimer`. It is a sink that could be attached to
+:py:meth:`livy.logreader.LivyBatchLogReader.add_sink`.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import statistics
+import threading
+import time
+import typing
+
+import livy.exception
+import livy.export
+
+__all__ = [
+    "job_key",
+    "LivyRunHistory",
+    "LivyRunRecord",
+    "LivyRunEstimate",
+    "LivyStageTimer",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LivyRunRecord(typing.NamedTuple):
+    """A run in history."""
+
+    id: int
+    """Row ID in history.
+    """
+
+    key: str
+    """Job key, see :py:func:`job_key`. Runs with the same key are compared.
+    """
+
+    script: str
+    """Path to the script, as it is given before any pre-submit action.
+    """
+
+    session_name: str
+    """Session name. ``None`` if not set.
+    """
+
+    batch_id: int
+    """Batch ID.
+    """
+
+    state: str
+    """Batch state when it is ended.
+    """
+
+    submitted: datetime.datetime
+    """Time the batch is submitted, in UTC.
+    """
+
+    duration: float
+    """Seconds from submitted to ended.
+    """
+
+    queue_wait: float
+    """Seconds from submitted to running. ``None`` if it is unknown.
+    """
+
+    conf: typing.Dict[str, str]
+    """Spark configuration properties given on submission.
+    """
+
+    resources: typing.Dict[str, typing.Any]
+    """Resources requested, e.g. ``driver_memory`` and ``num_executors``.
+    """
+
+    stages: typing.Dict[str, float]
+    """Seconds taken by each stage, keyed by stage ID.
+    """
+
+    metrics: typing.Dict[str, typing.Any]
+    """Other measurements of the run.
+    """
+
+
+class LivyRunEstimate(typing.NamedTuple):
+    """Expected durations of a job, from the median of its successful runs."""
+
+    runs: int
+    """Number of runs the estimation based on.
+    """
+
+    duration: float
+    """Median seconds from submitted to ended.
+    """
+
+    stages: typing.Dict[str, float]
+    """Median seconds of each stage.
+    """
+
+
+def job_key(script: str, class_name: str = None) -> str:
+    """Get the key of a job for comparing runs. Local paths are made absolute,
+    so the same script submitted from different directories is the same job.
+
+    Parameters
+    ----------
+        script : str
+            Path or URL to the script, before any pre-submit action
+        class_name : str
+            Application main class for Java/Scala applications
+    """
+    if script and "://" not in script:
+        script = os.path.abspath(os.path.expanduser(script))
+    if class_name:
+        return f"{script}#{class_name}"
+    return script
+
+
+class LivyStageTimer:
+    """Sink that measures the duration of each stage from the scheduler logs.
+
+    A stage starts when its task set is added (``Adding task set 3.0 with 200
+    tasks``) and ends when the task set is removed. Times are taken from the log
+    timestamps; the receiving time is used for the logs without timestamp. The
+    attempts of the same stage are summed.
+    """
+
+    _PATTERN_ADD_TASKSET = re.compile(r"Adding task set (\d+)\.(\d+) with \d+ tasks")
+    _PATTERN_REMOVE_TASKSET = re.compile(r"Removed TaskSet (\d+)\.(\d+),")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started: typing.Dict[typing.Tuple[str, str], float] = {}
+        self._stages: typing.Dict[str, float] = {}
+
+    @property
+    def stages(self) -> typing.Dict[str, float]:
+        """Seconds taken by each finished stage, keyed by stage ID."""
+        with self._lock:
+            return dict(self._stages)
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Check a record."""
+        name = record.name.rsplit(".", 1)[-1]
+        if not name.endswith("Scheduler") and name != "TaskSchedulerImpl":
+            return
+
+        m = self._PATTERN_ADD_TASKSET.match(record.message)
+        if m:
+            with self._lock:
+                self._started[m.groups()] = self._get_time(record)
+            return
+
+        m = self._PATTERN_REMOVE_TASKSET.match(record.message)
+        if m:
+            with self._lock:
+                started = self._started.pop(m.groups(), None)
+                if started is None:
+                    return
+                elapsed = max(0.0, self._get_time(record) - started)
+                stage = m.group(1)
+                self._stages[stage] = self._stages.get(stage, 0.0) + elapsed
+
+    def flush(self) -> None:
+        """Nothing to flush. For the sink protocol."""
+
+    @staticmethod
+    def _get_time(record: livy.export.LivyLogExportRecord) -> float:
+        if record.created:
+            return record.created.timestamp()
+        return time.time()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    script TEXT NOT NULL,
+    session_name TEXT,
+    batch_id INTEGER,
+    state TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    duration REAL NOT NULL,
+    queue_wait REAL,
+    conf TEXT NOT NULL,
+    resources TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    metrics TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (key, submitted);
+CREATE INDEX IF NOT EXISTS runs_submitted ON runs (submitted);
+"""
+
+_COLUMNS = (
+    "id, key, script, session_name, batch_id, state, submitted, duration, "
+    "queue_wait, conf, resources, stages, metrics"
+)
+
+
+class LivyRunHistory:
+    """On-disk history of batch runs."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+            path : str
+                Path to the database file. It would be created if not exists.
+                Use ``:memory:`` for a temporary history.
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        OperationError
+            On failed to open the database
+        """
+        if not isinstance(path, (str, os.PathLike)):
+            raise livy.exception.TypeError("path", str, path)
+
+        path = os.fspath(path)
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            raise livy.exception.OperationError(f"Failed to open history {path}: {e}")
+
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<LivyRunHistory '{self.path}'>"
+
+    def __enter__(self) -> "LivyRunHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def add(
+        self,
+        key: str,
+        script: str,
+        batch_id: int,
+        state: str,
+        submitted: datetime.datetime,
+        duration: float,
+        session_name: str = None,
+        queue_wait: float = None,
+        conf: typing.Dict[str, str] = None,
+        resources: typing.Dict[str, typing.Any] = None,
+        stages: typing.Dict[str, float] = None,
+        metrics: typing.Dict[str, typing.Any] = None,
+    ) -> int:
+        """Record a run. See :py:class:`LivyRunRecord` for the parameters.
+        Returns the row ID."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (key, script, session_name, batch_id, state, "
+                "submitted, duration, queue_wait, conf, resources, stages, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    script,
+                    session_name,
+                    batch_id,
+                    state,
+                    submitted.timestamp(),
+                    duration,
+                    queue_wait,
+                    json.dumps(conf or {}),
+                    json.dumps(resources or {}),
+                    json.dumps(stages or {}),
+                    json.dumps(metrics or {}),
+                ),
+            )
+            return cursor.lastrowid
+
+    def runs(
+        self,
+        key: str = None,
+        state: str = None,
+        since: datetime.datetime = None,
+        limit: int = 100,
+    ) -> typing.List[LivyRunRecord]:
+        """Get the runs, the latest first.
+
+        Parameters
+        ----------
+            key : str
+                Only get the runs of this job.
+            state : str
+                Only get the runs ended in this state.
+            since : datetime.datetime
+                Only get the runs submitted at or after this time.
+            limit : int
+                Maximum number of runs; ``None`` for no limit.
+        """
+        conditions = []
+        params = []
+        if key is not None:
+            conditions.append("key = ?")
+            params.append(key)
+        if state is not None:
+            conditions.append("state = ?")
+            params.append(state)
+        if since is not None:
+            conditions.append("submitted >= ?")
+            params.append(since.timestamp())
+
+        sql = f"SELECT {_COLUMNS} FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY submitted DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [_to_record(row) for row in rows]
+
+    def get(self, id_: int) -> typing.Optional[LivyRunRecord]:
+        """Get a run by its row ID. ``None`` if not found."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM runs WHERE id = ?", (id_,)
+            ).fetchone()
+        return row and _to_record(row)
+
+    def estimate(
+        self, key: str, window: int = 20, min_runs: int = 1
+    ) -> typing.Optional[LivyRunEstimate]:
+        """Estimate the durations of a job by its recent successful runs.
+
+        Parameters
+        ----------
+            key : str
+                Job key
+            window : int
+                Number of the latest successful runs to be used
+            min_runs : int
+                Returns ``None`` when there are fewer runs than this
+
+        Return
+        ------
+        estimate : LivyRunEstimate
+            Estimation, or ``None`` if there are not enough runs
+        """
+        runs = self.runs(key=key, state="success", limit=window)
+        if not runs or len(runs) < min_runs:
+            return None
+
+        samples: typing.Dict[str, typing.List[float]] = {}
+        for run in runs:
+            for stage, seconds in run.stages.items():
+                samples.setdefault(stage, []).append(seconds)
+
+        return LivyRunEstimate(
+            runs=len(runs),
+            duration=statistics.median(run.duration for run in runs),
+            stages={
+                stage: statistics.median(values)
+                for stage, values in sorted(samples.items(), key=_stage_order)
+            },
+        )
+
+
+def _to_record(row: tuple) -> LivyRunRecord:
+    (
+        id_,
+        key,
+        script,
+        session_name,
+        batch_id,
+        state,
+        submitted,
+        duration,
+        queue_wait,
+        conf,
+        resources,
+        stages,
+        metrics,
+    ) = row
+    return LivyRunRecord(
+        id=id_,
+        key=key,
+        script=script,
+        session_name=session_name,
+        batch_id=batch_id,
+        state=state,
+        submitted=datetime.datetime.fromtimestamp(submitted, datetime.timezone.utc),
+        duration=duration,
+        queue_wait=queue_wait,
+        conf=json.loads(conf),
+        resources=json.loads(resources),
+        stages=json.loads(stages),
+        metrics=json.loads(metrics),
+    )
+
+
+def _stage_order(item: typing.Tuple[str, typing.Any]) -> typing.Tuple[int, str]:
+    stage = item[0]
+    return (int(stage), "") if stage.isdigit() else (-1, stage)
@@ -0,0 +1,317 @@
+"""Local searchable index for parsed batch logs. Records are stored in a
+`SQLite <https://sqlite.org/>`_ database and indexed by batch id, time, level
+and logger name, so past logs could be searched without fetching them from the
+server again.
+
+The index implements the same ``write`` / ``flush`` protocol as the writers in
+:py:mod:`livy.export`, thus it could be attached to a reader by
+:py:meth:`livy.logreader.LivyBatchLogReader.add_sink` and ingest logs
+incrementally while the batch is watched.
+"""
+import datetime
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import typing
+
+import livy.exception
+import livy.export
+
+__all__ = ["LivyLogIndex", "LivyLogSearchResult"]
+
+logger = logging.getLogger(__name__)
+
+
+class LivyLogSearchResult(typing.NamedTuple):
+    """Log record retrieved from index."""
+
+    batch_id: int
+    """Batch ID.
+    """
+
+    line: int
+    """Zero-based line number in the fetched log where this record starts.
+    ``None`` if it is unknown.
+    """
+
+    created: datetime.datetime
+    """Timestamp that this log is created, in UTC. ``None`` if it is unknown.
+    """
+
+    level: int
+    """Log level.
+    """
+
+    name: str
+    """Logger name.
+    """
+
+    section: str
+    """Section in livy's log: ``stdout``, ``stderr`` or ``YARN Diagnostics``.
+    """
+
+    message: str
+    """Log message.
+    """
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    created REAL,
+    level INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    section TEXT,
+    message TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    UNIQUE (batch_id, line, digest)
+);
+CREATE INDEX IF NOT EXISTS logs_created ON logs (created);
+CREATE INDEX IF NOT EXISTS logs_level ON logs (level, created);
+CREATE INDEX IF NOT EXISTS logs_name ON logs (name, created);
+CREATE INDEX IF NOT EXISTS logs_batch ON logs (batch_id, line);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts
+    USING fts5(message, content='logs', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+    INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+    INSERT INTO logs_fts (logs_fts, rowid, message)
+        VALUES ('delete', old.id, old.message);
+END;
+"""
+
+
+class LivyLogIndex:
+    """Searchable on-disk index of parsed batch logs.
+
+    The full text search is backed by SQLite's
+    `FTS5 <https://sqlite.org/fts5.html>`_ extension, the search text is
+    matched as a phrase of tokens. It falls back to substring matching when
+    FTS5 is not available in current SQLite build.
+    """
+
+    def __init__(self, path: str, flush_every: int = 1000) -> None:
+        """
+        Parameters
+        ----------
+            path : str
+                Path to the database file. It would be created if not exists.
+                Use ``:memory:`` for a temporary index.
+            flush_every : int
+                Number of records to be buffered before written to database
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        OperationError
+            On failed to open the database
+        """
+        if not isinstance(path, (str, os.PathLike)):
+            raise livy.exception.TypeError("path", str, path)
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise livy.exception.TypeError("flush_every", "positive int", flush_every)
+
+        path = os.fspath(path)
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            raise livy.exception.OperationError(f"Failed to open index {path}: {e}")
+
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.full_text_search = True
+        except sqlite3.OperationalError:
+            logger.debug("FTS5 is not available. Fallback to substring matching.")
+            self.full_text_search = False
+
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._buffer: typing.List[tuple] = []
+
+    def __repr__(self) -> str:
+        return f"<LivyLogIndex '{self.path}'>"
+
+    def __enter__(self) -> "LivyLogIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Add a record to index. It would be buffered and written to database
+        by batch. Duplicated records are ignored."""
+        created = record.created
+        if created:
+            if not created.tzinfo:
+                created = created.replace(tzinfo=datetime.timezone.utc)
+            created = created.timestamp()
+
+        digest = hashlib.md5(
+            b"%d--%d--%s--%s"
+            % (
+                record.level,
+                created or 0,
+                record.name.encode(),
+                record.message.encode(),
+            )
+        ).digest()
+
+        with self._lock:
+            self._buffer.append(
+                (
+                    record.batch_id,
+                    -1 if record.line is None else record.line,
+                    created,
+                    record.level,
+                    record.name,
+                    record.section,
+                    record.message,
+                    digest,
+                )
+            )
+            if len(self._buffer) < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records to database."""
+        with self._lock:
+            if not self._buffer:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO logs (batch_id, line, created, level, "
+                    "name, section, message, digest) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._buffer,
+                )
+            self._buffer = []
+
+    def close(self) -> None:
+        """Flush buffered records and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def search(
+        self,
+        text: str = None,
+        batch_ids: typing.Iterable[int] = None,
+        since: datetime.datetime = None,
+        until: datetime.datetime = None,
+        level: int = None,
+        name: str = None,
+        limit: int = 100,
+    ) -> typing.List[LivyLogSearchResult]:
+        """Search logs in index. All the conditions are combined with AND.
+
+        Parameters
+        ----------
+            text : str
+                Text to be found in log message.
+            batch_ids : typing.Iterable[int]
+                Only search logs from these batches.
+            since : datetime.datetime
+                Only search logs that are created at or after this time. Naive
+                datetime is treated as local time.
+            until : datetime.datetime
+                Only search logs that are created before this time.
+            level : int
+                Minimal log level.
+            name : str
+                Logger name. It matches the full name (``org.apache.spark``),
+                its child loggers (``org.apache.spark.scheduler``) or the last
+                component of the name (``TaskSetManager``).
+            limit : int
+                Maximum number of results; ``None`` for no limit.
+
+        Return
+        ------
+        results : typing.List[LivyLogSearchResult]
+            Matched logs, ordered by created time, batch id and line number.
+        """
+        conditions = []
+        params = []
+
+        if text:
+            if self.full_text_search:
+                conditions.append(
+                    "id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)"
+                )
+                params.append('"%s"' % text.replace('"', '""'))
+            else:
+                conditions.append("message LIKE ? ESCAPE '\\'")
+                params.append("%" + _escape_like(text) + "%")
+
+        if batch_ids is not None:
+            batch_ids = list(batch_ids)
+            for id_ in batch_ids:
+                if not isinstance(id_, int):
+                    raise livy.exception.TypeError("batch_ids", int, id_)
+            conditions.append("batch_id IN (%s)" % ", ".join("?" * len(batch_ids)))
+            params += batch_ids
+
+        if since:
+            conditions.append("created >= ?")
+            params.append(since.timestamp())
+        if until:
+            conditions.append("created < ?")
+            params.append(until.timestamp())
+
+        if level is not None:
+            conditions.append("level >= ?")
+            params.append(level)
+
+        if name:
+            conditions.append(
+                "(name = ? OR name LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')"
+            )
+            escaped = _escape_like(name)
+            params += [name, escaped + ".%", "%." + escaped]
+
+        sql = "SELECT batch_id, line, created, level, name, section, message FROM logs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created, batch_id, line"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            LivyLogSearchResult(
+                batch_id=batch_id,
+                line=None if line < 0 else line,
+                created=(
+                    datetime.datetime.fromtimestamp(created, datetime.timezone.utc)
+                    if created is not None
+                    else None
+                ),
+                level=level,
+                name=name,
+                section=section,
+                message=message,
+            )
+            for batch_id, line, created, level, name, section, message in rows
+        ]
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
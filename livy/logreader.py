@@ -1,6 +1,11 @@
+import bisect
+import concurrent.futures
 import datetime
 import hashlib
+import itertools
 import logging
+import pickle
+import queue
 import re
 import threading
 import time
@@ -8,6 +13,7 @@ import typing
 
 import livy.client
 import livy.exception
+import livy.export
 
 __all__ = ["LivyBatchLogReader"]
 
@@ -38,6 +44,91 @@ class LivyLogParseResult(typing.NamedTuple):
     """
 
 
+_MONTH_ABBR = {
+    "Jan": 1,
+    "Feb": 2,
+    "Mar": 3,
+    "Apr": 4,
+    "May": 5,
+    "Jun": 6,
+    "Jul": 7,
+    "Aug": 8,
+    "Sep": 9,
+    "Oct": 10,
+    "Nov": 11,
+    "Dec": 12,
+}
+
+_WEEKDAY_ABBR = {"Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"}
+
+_spark_time_cache: typing.Tuple[str, datetime.datetime] = ("", None)
+_yarn_time_cache: typing.Tuple[str, datetime.datetime] = ("", None)
+
+
+def _parse_spark_time(s: str) -> datetime.datetime:
+    """Parse timestamp in Spark's default log format (``%y/%m/%d %H:%M:%S``).
+
+    It is equivalent to :py:meth:`datetime.datetime.strptime` but slices the
+    fixed-width fields directly. Consecutive logs are usually created in the
+    same second, so the last result is cached as well.
+    """
+    global _spark_time_cache
+    last_str, last_time = _spark_time_cache
+    if s == last_str:
+        return last_time
+
+    try:
+        if len(s) != 17:
+            raise ValueError
+        year = int(s[0:2])
+        time = datetime.datetime(
+            year + (2000 if year < 69 else 1900),  # same pivot as strptime
+            int(s[3:5]),
+            int(s[6:8]),
+            int(s[9:11]),
+            int(s[12:14]),
+            int(s[15:17]),
+        )
+    except ValueError:
+        # let strptime raise the error (or handle the weird cases)
+        time = datetime.datetime.strptime(s, "%y/%m/%d %H:%M:%S")
+
+    _spark_time_cache = s, time
+    return time
+
+
+def _parse_yarn_time(s: str) -> datetime.datetime:
+    """Parse timestamp in YARN's diagnostics format (``%a %b %d %H:%M:%S %z %Y``).
+
+    Fast path for :py:meth:`datetime.datetime.strptime`, see
+    :py:func:`_parse_spark_time`.
+    """
+    global _yarn_time_cache
+    last_str, last_time = _yarn_time_cache
+    if s == last_str:
+        return last_time
+
+    try:
+        if len(s) != 30 or s[0:3] not in _WEEKDAY_ABBR:
+            raise ValueError
+        tz_sign = -1 if s[20] == "-" else 1
+        tz_offset = datetime.timedelta(hours=int(s[21:23]), minutes=int(s[23:25]))
+        time = datetime.datetime(
+            int(s[26:30]),
+            _MONTH_ABBR[s[4:7]],
+            int(s[8:10]),
+            int(s[11:13]),
+            int(s[14:16]),
+            int(s[17:19]),
+            tzinfo=datetime.timezone(tz_sign * tz_offset),
+        )
+    except (ValueError, KeyError):
+        time = datetime.datetime.strptime(s, "%a %b %d %H:%M:%S %z %Y")
+
+    _yarn_time_cache = s, time
+    return time
+
+
 def default_parser(match: typing.Match) -> LivyLogParseResult:
     """Parser for default PySpark log format."""
     LEVEL_MAPPING = {
@@ -50,7 +141,7 @@ def default_parser(match: typing.Match) -> LivyLogParseResult:
         "CRITICAL": logging.CRITICAL,
     }
 
-    time = datetime.datetime.strptime(match.group(1), "%y/%m/%d %H:%M:%S")
+    time = _parse_spark_time(match.group(1))
     level = LEVEL_MAPPING.get(match.group(2), logging.CRITICAL)
 
     return LivyLogParseResult(
@@ -63,7 +154,7 @@ def default_parser(match: typing.Match) -> LivyLogParseResult:
 
 def yarn_warning_parser(match: typing.Match) -> LivyLogParseResult:
     """Warning message from YARN."""
-    time = datetime.datetime.strptime(match.group(1), "%a %b %d %H:%M:%S %z %Y")
+    time = _parse_yarn_time(match.group(1))
     return LivyLogParseResult(
         created=time,
         level=logging.WARNING,
@@ -104,8 +195,245 @@ def python_argerror_parser(match: typing.Match) -> LivyLogParseResult:
     )
 
 
+class _ScanMatch:
+    """Minimal :py:class:`re.Match` replacement, returned by the scanners below.
+    Only the methods used by the reader and the builtin parsers are provided.
+    """
+
+    __slots__ = ("string", "_spans")
+
+    def __init__(
+        self, string: str, spans: typing.Sequence[typing.Tuple[int, int]]
+    ) -> None:
+        self.string = string
+        self._spans = spans
+
+    def __repr__(self) -> str:
+        return f"<_ScanMatch span={self.span()}, match={self.group()!r}>"
+
+    def __getitem__(self, group: int) -> str:
+        return self.group(group)
+
+    def span(self, group: int = 0) -> typing.Tuple[int, int]:
+        return self._spans[group]
+
+    def start(self, group: int = 0) -> int:
+        return self._spans[group][0]
+
+    def end(self, group: int = 0) -> int:
+        return self._spans[group][1]
+
+    def group(self, *groups: int) -> typing.Union[str, typing.Tuple[str, ...]]:
+        if not groups:
+            groups = (0,)
+        values = tuple(self.string[s:e] for s, e in (self._spans[g] for g in groups))
+        return values[0] if len(values) == 1 else values
+
+    def groups(self) -> typing.Tuple[str, ...]:
+        return tuple(self.string[s:e] for s, e in self._spans[1:])
+
+
+class _Scanner:
+    """Base class for hand-written scanners that replace the regex patterns
+    which could backtrack heavily. Scanners expose the :py:meth:`search` and
+    :py:meth:`match` methods as :py:class:`re.Pattern` does, and guarantees to
+    return the same spans as the regex in :py:attr:`pattern` in linear time.
+    """
+
+    pattern: str
+    """The equivalent regex, for reference only."""
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.pattern!r}>"
+
+    def search(self, string: str, pos: int = 0) -> typing.Optional[_ScanMatch]:
+        raise NotImplementedError
+
+    def match(self, string: str, pos: int = 0) -> typing.Optional[_ScanMatch]:
+        m = self.search(string, pos)
+        if m and m.start() == pos:
+            return m
+        return None
+
+
+def _line_end(string: str, pos: int) -> int:
+    """Return the index of the newline char at or after `pos`, or the string
+    length if this is the last line."""
+    end = string.find("\n", pos)
+    return len(string) if end == -1 else end
+
+
+def _is_line_start(string: str, pos: int) -> bool:
+    return pos == 0 or string[pos - 1] == "\n"
+
+
+class _PythonTracebackScanner(_Scanner):
+    """Scanner for Python traceback. The traceback is ended at the first line
+    that starts with an alphabet (which is the exception line)."""
+
+    pattern = r"^Traceback \(most recent call last\):(\n[\s\S]+?^[a-zA-Z].+)"
+
+    _HEADER = "Traceback (most recent call last):\n"
+    _TERMINATOR = re.compile(r"\n[a-zA-Z][^\n]")
+
+    def search(self, string: str, pos: int = 0) -> typing.Optional[_ScanMatch]:
+        start = string.find(self._HEADER, pos)
+        while start > 0 and string[start - 1] != "\n":
+            start = string.find(self._HEADER, start + 1)
+        if start == -1:
+            return None
+
+        # the group takes at least one char after the newline, so the exception
+        # line must not be the line right after the header.
+        # when it could not be found, any later header could not be closed too.
+        group_start = start + len(self._HEADER) - 1
+        terminator = self._TERMINATOR.search(string, group_start + 1)
+        if not terminator:
+            return None
+
+        end = _line_end(string, terminator.end())
+        return _ScanMatch(string, ((start, end), (group_start, end)))
+
+
+class _PythonWarningScanner(_Scanner):
+    """Scanner for the output of :py:func:`warnings.warn`. The message is ended
+    at the first indented line (which is the source code)."""
+
+    pattern = r"^((?:[A-Z]:\\|\.|\/).+\.py):(\d+): (\w+): ([\s\S]+?)\n  .+"
+
+    _LINE_START = re.compile(r"\n(?=[A-Z]:\\|\.|\/)")
+    _HEADER = re.compile(r"((?:[A-Z]:\\|\.|\/).+\.py):(\d+): (\w+): ")
+    _HEADER_WITH_MESSAGE = re.compile(r"((?:[A-Z]:\\|\.|\/).+\.py):(\d+): (\w+): (?=.)")
+    _TERMINATOR = re.compile(r"\n  [^\n]")
+
+    def _search_header(self, string: str, pos: int) -> typing.Optional[typing.Match]:
+        start = pos if _is_line_start(string, pos) else None
+        while True:
+            if start is None:
+                line = self._LINE_START.search(string, pos)
+                if not line:
+                    return None
+                start = line.end()
+
+            header = self._HEADER.match(string, start)
+            if header:
+                return header
+
+            pos, start = start, None
+
+    def search(self, string: str, pos: int = 0) -> typing.Optional[_ScanMatch]:
+        header = self._search_header(string, pos)
+        if not header:
+            return None
+
+        # message takes at least one char. When the header ends at the end of
+        # line, the regex would backtrack to an earlier split of the same line
+        # only if no other source line could be found.
+        # any later header could not be closed when no source line is found.
+        terminator = self._TERMINATOR.search(string, header.end() + 1)
+        if not terminator:
+            terminator = self._TERMINATOR.match(string, header.end())
+            header = self._HEADER_WITH_MESSAGE.match(string, header.start())
+            if not terminator or not header:
+                return None
+
+        end = _line_end(string, terminator.end())
+        return _ScanMatch(
+            string,
+            (
+                (header.start(), end),
+                header.span(1),
+                header.span(2),
+                header.span(3),
+                (header.end(), terminator.start()),
+            ),
+        )
+
+
+class _PythonArgErrorScanner(_Scanner):
+    """Scanner for argument error from :py:mod:`argparse`. The usage text could
+    be followed by any number of indented lines, and then the error line."""
+
+    pattern = r"(usage: .+ \[-h\].+(?:\n .+)*)\n.+: error: (.+)"
+
+    _USAGE = re.compile(r"usage: .+ \[-h\].+(?:\n .+)*")
+    _ERROR = re.compile(r".+: error: (.+)")
+    _ERROR_MARK = ": error: "
+
+    def search(self, string: str, pos: int = 0) -> typing.Optional[_ScanMatch]:
+        while True:
+            usage = self._USAGE.search(string, pos)
+            if not usage:
+                return None
+
+            # the regex is greedy; try the line right after all indented lines
+            # first, then fallback to use the indented lines as the error line
+            usage_end = usage.end()
+            error = None
+            if usage_end < len(string):
+                error = self._ERROR.match(string, usage_end + 1)
+
+            if error:
+                return _ScanMatch(
+                    string,
+                    (
+                        (usage.start(), error.end()),
+                        (usage.start(), usage_end),
+                        error.span(1),
+                    ),
+                )
+
+            error_span = self._search_error_backward(
+                string, _line_end(string, usage.start()) + 1, usage_end
+            )
+            if error_span:
+                error_start, error_end = error_span
+                return _ScanMatch(
+                    string,
+                    (
+                        (usage.start(), error_end),
+                        (usage.start(), string.rfind("\n", 0, error_start)),
+                        error_span,
+                    ),
+                )
+
+            # any usage text inside this block shares the same error line
+            # candidates, so all of them would fail
+            if usage_end >= len(string):
+                return None
+            pos = usage_end + 1
+
+    def _search_error_backward(
+        self, string: str, start: int, end: int
+    ) -> typing.Optional[typing.Tuple[int, int]]:
+        """Find the last indented line in range that is also an error line.
+        Returns span of the error message."""
+        mark = self._ERROR_MARK
+        while True:
+            idx = string.rfind(mark, start, end)
+            if idx == -1:
+                return None
+
+            # indented lines always have char before the mark; the regex takes
+            # the last mark that followed by any char
+            line_end = _line_end(string, idx)
+            if idx + len(mark) < line_end:
+                return idx + len(mark), line_end
+
+            line_start = string.rfind("\n", start, idx) + 1 or start
+            idx = string.rfind(mark, line_start, idx + len(mark) - 1)
+            if idx != -1:
+                return idx + len(mark), line_end
+
+            end = line_start
+
+
+_NON_SPACE = re.compile(r"\S")
+
 _SECTION_CHANGE = object()  # marker
-_BUILTIN_PARSERS: typing.Dict[str, typing.Tuple[typing.Pattern, typing.Callable]] = {
+_BUILTIN_PARSERS: typing.Dict[
+    str, typing.Tuple[typing.Union[typing.Pattern, _Scanner], typing.Callable]
+] = {
     "Indicats that section is changed": (
         re.compile(
             r"^(stdout|stderr|YARN Diagnostics): ",
@@ -130,24 +458,15 @@ _BUILTIN_PARSERS: typing.Dict[str, typing.Tuple[typing.Pattern, typing.Callable]
         yarn_warning_parser,
     ),
     "Python traceback": (
-        re.compile(
-            r"^Traceback \(most recent call last\):(\n[\s\S]+?^[a-zA-Z].+)",
-            re.RegexFlag.MULTILINE,
-        ),
+        _PythonTracebackScanner(),
         python_traceback_parser,
     ),
     "Python warning": (
-        re.compile(
-            r"^((?:[A-Z]:\\|\.|\/).+\.py):(\d+): (\w+): ([\s\S]+?)\n  .+",
-            re.RegexFlag.MULTILINE,
-        ),
+        _PythonWarningScanner(),
         python_warning_parser,
     ),
     "Python argerror": (
-        re.compile(
-            r"(usage: .+ \[-h\].+(?:\n .+)*)\n.+: error: (.+)",
-            re.RegexFlag.MULTILINE,
-        ),
+        _PythonArgErrorScanner(),
         python_argerror_parser,
     ),
 }
@@ -161,6 +480,7 @@ class LivyBatchLogReader:
 
     _parsers: typing.Dict[typing.Pattern, LivyLogParser]
     thread: threading.Thread
+    pipeline_stats: typing.Dict[str, "PipelineStageStats"]
 
     def __init__(
         self,
@@ -208,6 +528,10 @@ class LivyBatchLogReader:
 
         self.thread = None
         self._stop_event = None
+        self.pipeline_stats = {}
+
+        self._sinks = []
+        self._state_listeners = []
 
         self._lock = threading.Lock()
         self._emitted_logs = set()
@@ -255,6 +579,53 @@ class LivyBatchLogReader:
             raise livy.exception.TypeError("parser", "callable", parser)
         self._parsers[pattern] = parser
 
+    def add_sink(self, sink: "livy.export.LogExportWriter") -> None:
+        """Add a sink that receives every log emitted by this reader.
+
+        Parameters
+        ----------
+            sink : livy.export.LogExportWriter
+                Any object has ``write`` method that takes
+                :py:class:`livy.export.LivyLogExportRecord`, and ``flush``
+                method. It is flushed after each time the logs are read.
+
+        Return
+        ------
+        No return. It raises exception on any error.
+        """
+        if not callable(getattr(sink, "write", None)) or not callable(
+            getattr(sink, "flush", None)
+        ):
+            raise livy.exception.TypeError("sink", "writer", sink)
+        self._sinks.append(sink)
+
+    def add_state_listener(self, callback: typing.Callable[[str], None]) -> None:
+        """Add a callback that receives the batch state each time it is queried
+        by :py:meth:`read_until_finish`.
+
+        Parameters
+        ----------
+            callback : typing.Callable[[str], None]
+                Function that takes the state string
+
+        Return
+        ------
+        No return. It raises exception on any error.
+        """
+        if not callable(callback):
+            raise livy.exception.TypeError("callback", "callable", callback)
+        self._state_listeners.append(callback)
+
+    def _is_batch_ended(self) -> bool:
+        """Check if the batch is ended and notify the state listeners."""
+        if not self._state_listeners:
+            return self.client.is_batch_ended(self.batch_id)
+
+        state = self.client.get_batch_state(self.batch_id)
+        for callback in self._state_listeners:
+            callback(state)
+        return state.lower() not in ("starting", "running")
+
     def read(self) -> None:
         """Read log once.
 
@@ -274,11 +645,315 @@ class LivyBatchLogReader:
         Parsers are pluggable. Beyond the builtin parsers, read instruction from
         docstring of :py:meth:`add_parser`.
         """
-        # get log
+        logs = self._fetch_logs()
+        for line, section, result in self._iter_lines(logs, self._iter_parsed(logs)):
+            self._emit(result, section, line)
+        self._flush_sinks()
+
+    def read_parallel(
+        self, processes: int = None, chunk_size: int = 16 * 1024 * 1024
+    ) -> None:
+        """Read log once and parse it with multiple processes. It is designed
+        for huge logs from a finished batch, the output is the same as
+        :py:meth:`read`.
+
+        Parameters
+        ----------
+            processes : int
+                Number of worker processes. Use CPU count if not given.
+            chunk_size : int
+                Approximate size (in chars) of the text for each worker to parse.
+
+        Return
+        ------
+        No data return. All logs would be pipe to Python's :py:mod:`logging`.
+
+        Note
+        ----
+        The log is split only at the line which starts a section or a default
+        Spark log, and is not inside any multi-line record. The chunks are then
+        parsed in a process pool and merged in order.
+
+        Custom parsers must be picklable to be sent to worker processes.
+        Otherwise the log would be parsed in current process.
+        """
+        logs = self._fetch_logs()
+        parsed = self._iter_parsed_parallel(logs, processes, chunk_size)
+        for line, section, result in self._iter_lines(logs, parsed):
+            self._emit(result, section, line)
+        self._flush_sinks()
+
+    def export(
+        self, fp: typing.TextIO, format: str = "jsonl", flush_every: int = 1000
+    ) -> int:
+        """Read log once and write the parsed records to file as structured
+        data. Records are streamed into the file as they are parsed, and they
+        do not go through :py:mod:`logging`.
+
+        Parameters
+        ----------
+            fp : typing.TextIO
+                Output file object
+            format : str
+                Output format; ``jsonl`` or ``csv``.
+            flush_every : int
+                Number of records to be buffered before written to file
+
+        Return
+        ------
+        count : int
+            Number of records written
+
+        Raises
+        ------
+        OperationError
+            On the format is not supported
+        """
+        writer = livy.export.get_export_writer(format, fp, flush_every)
+        logs = self._fetch_logs()
+
+        count = 0
+        last_created = None
+        with writer:
+            for line, section, result in self._iter_lines(
+                logs, self._iter_parsed(logs)
+            ):
+                created = result.created or last_created
+                last_created = created
+                if created and not created.tzinfo:
+                    created = created.replace(tzinfo=self.timezone)
+
+                writer.write(
+                    livy.export.LivyLogExportRecord(
+                        created=created,
+                        level=result.level,
+                        name=self.prefix + result.name,
+                        message=result.message,
+                        section=section,
+                        batch_id=self.batch_id,
+                        line=line,
+                    )
+                )
+                count += 1
+
+        return count
+
+    def export_pages(
+        self, sink: "livy.export.LogExportWriter", page_size: int = 10000
+    ) -> int:
+        """Fetch logs page by page and write the parsed records to the sink.
+        Only one page, and the record that might continue in the next page, is
+        held in memory at a time. Records do not go through :py:mod:`logging`.
+
+        Parameters
+        ----------
+            sink : livy.export.LogExportWriter
+                Any object has ``write`` and ``flush`` method; see
+                :py:meth:`add_sink`. It is flushed after all the pages are read.
+            page_size : int
+                Number of lines in each request
+
+        Return
+        ------
+        count : int
+            Number of records written
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        RequestError
+            On connection error
+        """
+        if not callable(getattr(sink, "write", None)) or not callable(
+            getattr(sink, "flush", None)
+        ):
+            raise livy.exception.TypeError("sink", "writer", sink)
+        if not isinstance(page_size, int) or page_size < 1:
+            raise livy.exception.TypeError("page_size", "positive int", page_size)
+
+        count = 0
+        offset = 0
+        pending: typing.List[str] = []  # text of the last record in previous page
+        section = "stdout"
+        first_line = 0  # line number of the start of pending text
+        last_created = None
+        while True:
+            lines = self.client.get_batch_log(
+                self.batch_id, from_=offset, size=page_size
+            )
+            offset += len(lines)
+            is_last_page = len(lines) < page_size
+
+            logs = "\n".join(pending + lines)
+            parsed = list(self._iter_parsed(logs, section))
+
+            # the last record might be continued in next page, parse it again
+            # with the next page
+            if is_last_page:
+                pending = []
+            elif parsed:
+                cut = max(pos for pos, _, _ in parsed)
+                section = next(s for pos, s, _ in parsed if pos == cut)
+                parsed = [item for item in parsed if item[0] < cut]
+                pending = [logs[cut:]]
+            else:
+                pending = [logs]
+
+            for line, sec, result in self._iter_lines(logs, parsed):
+                created = result.created or last_created
+                last_created = created
+                if created and not created.tzinfo:
+                    created = created.replace(tzinfo=self.timezone)
+
+                sink.write(
+                    livy.export.LivyLogExportRecord(
+                        created=created,
+                        level=result.level,
+                        name=self.prefix + result.name,
+                        message=result.message,
+                        section=sec,
+                        batch_id=self.batch_id,
+                        line=first_line + line,
+                    )
+                )
+                count += 1
+
+            logger.debug("Read %d lines of batch#%d", offset, self.batch_id)
+            if is_last_page:
+                break
+            first_line += logs.count("\n", 0, len(logs) - len(pending[0]))
+
+        sink.flush()
+        return count
+
+    def _iter_parsed_parallel(
+        self, logs: str, processes: int = None, chunk_size: int = 16 * 1024 * 1024
+    ) -> typing.Iterator[typing.Tuple[int, str, LivyLogParseResult]]:
+        """Parallel version of :py:meth:`_iter_parsed`."""
+        chunks = self._split_logs(logs, chunk_size)
+        if len(chunks) < 2:
+            yield from self._iter_parsed(logs)
+            return
+
+        parsers = [
+            (pattern, None if parser is _SECTION_CHANGE else parser)
+            for pattern, parser in self._parsers.items()
+        ]
+        try:
+            pickle.dumps(parsers)
+        except Exception:
+            logger.warning("Parsers are not picklable. Parse logs in single process.")
+            yield from self._iter_parsed(logs)
+            return
+
+        logger.debug("Split logs into %d chunks", len(chunks))
+
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            for (start, _, _), (results, records) in zip(
+                chunks,
+                executor.map(
+                    _parse_chunk,
+                    itertools.repeat(parsers),
+                    (logs[start:end] for start, end, _ in chunks),
+                    (section for _, _, section in chunks),
+                    (i == len(chunks) - 1 for i in range(len(chunks))),
+                ),
+            ):
+                for record in records:
+                    logger.handle(record)
+                for pos, section, result in results:
+                    yield start + pos, section, result
+
+    def _split_logs(
+        self, logs: str, chunk_size: int
+    ) -> typing.List[typing.Tuple[int, int, str]]:
+        """Split logs at safe boundaries. Returns list of start position, end
+        position and section name at the start of each chunk."""
+        section_pattern, _ = _BUILTIN_PARSERS["Indicats that section is changed"]
+        default_pattern, _ = _BUILTIN_PARSERS["Default"]
+        single_line_patterns = {
+            section_pattern,
+            default_pattern,
+            _BUILTIN_PARSERS["YARN warning"][0],
+        }
+
+        # collect spans of records that might across lines
+        spans = []
+        for pattern in self._parsers:
+            if pattern in single_line_patterns:
+                continue
+            pos = 0
+            while True:
+                m = pattern.search(logs, pos)
+                if not m:
+                    break
+                spans.append((m.start(), m.end()))
+                pos = max(m.end(), m.start() + 1)
+
+        spans.sort()
+        span_starts = [start for start, _ in spans]
+        span_ends = list(itertools.accumulate((end for _, end in spans), max))
+
+        def inside_span(pos: int) -> typing.Optional[int]:
+            i = bisect.bisect_left(span_starts, pos) - 1
+            if i >= 0 and span_ends[i] > pos:
+                return span_ends[i]
+            return None
+
+        # find boundaries
+        boundaries = [0]
+        target = chunk_size
+        while target < len(logs):
+            m = _SAFE_LINE_START.search(logs, target)
+            if not m:
+                break
+
+            pos = m.start()
+            span_end = inside_span(pos)
+            if span_end:
+                target = span_end
+            elif section_pattern.match(logs, pos) or default_pattern.match(logs, pos):
+                boundaries.append(pos)
+                target = pos + chunk_size
+            else:
+                target = pos + 1
+
+        boundaries.append(len(logs))
+
+        # section name at start of each chunk
+        chunks = []
+        section = "stdout"
+        for start, end in zip(boundaries, boundaries[1:]):
+            chunks.append((start, end, section))
+
+            last_header_pos = -1
+            for name in ("stdout", "stderr", "YARN Diagnostics"):
+                header = f"{name}: "
+                pos = logs.rfind("\n" + header, max(start - 1, 0), end)
+                if pos != -1:
+                    pos += 1
+                elif start == 0 and logs.startswith(header):
+                    pos = 0
+                else:
+                    continue
+                if pos > last_header_pos:
+                    last_header_pos, section = pos, name
+
+        return chunks
+
+    def _fetch_logs(self) -> str:
+        """Get complete log from server."""
         # use size -1 to get as much log as possible
         logs = self.client.get_batch_log(self.batch_id, size=-1)
-        logs = "\n".join(logs)
-
+        return "\n".join(logs)
+
+    def _iter_parsed(
+        self, logs: str, section: str = "stdout"
+    ) -> typing.Iterator[typing.Tuple[int, str, LivyLogParseResult]]:
+        """Match through the log and yields position of the record in the
+        text, current section name and the parse result. `section` is the
+        section name at the start of the given log."""
         # initial matching
         matches: typing.Dict[typing.Pattern, typing.Match] = {}
         for pattern in self._parsers:
@@ -289,9 +964,10 @@ class LivyBatchLogReader:
 
         # iter through complete log
         pos = 0
-        current_section = "stdout"
+        current_section = section
         while pos < len(logs):
             # match recent text
+            start = pos
             pos, match, parser = self._match_log(matches, logs, pos)
 
             # special case: change section name
@@ -317,6 +993,11 @@ class LivyBatchLogReader:
                     message=match.strip(),
                 )
 
+                # plain text is stripped
+                m = _NON_SPACE.search(logs, start)
+                if m:
+                    start = m.start()
+
             else:
                 # normal case
                 try:
@@ -327,45 +1008,88 @@ class LivyBatchLogReader:
                     )
                     continue
 
-            # cache for preventing emit duplicated logs
-            digest = hashlib.md5(
-                b"%d--%d--%d--%d"
-                % (
-                    result.created.timestamp() if result.created else 0,
-                    result.level,
-                    hash(result.name),
-                    hash(result.message),
-                )
-            ).digest()
+                start = match.start()
 
-            with self._lock:
-                if digest in self._emitted_logs:
-                    continue
-                else:
-                    self._emitted_logs.add(digest)
+            yield start, current_section, result
 
-            # emit
-            created = result.created
-            with self._lock:
-                if not created:
-                    created = self._last_emit_timestamp or datetime.datetime.now()
-                else:
-                    self._last_emit_timestamp = created
-
-            if not created.tzinfo:
-                created = created.replace(tzinfo=self.timezone)
-
-            record = logging.makeLogRecord(
-                {
-                    "name": self.prefix + result.name,
-                    "levelno": result.level,
-                    "levelname": logging.getLevelName(result.level),
-                    "msg": result.message,
-                    "created": int(created.timestamp()),
-                }
+    @staticmethod
+    def _iter_lines(
+        logs: str, parsed: typing.Iterable[typing.Tuple[int, str, LivyLogParseResult]]
+    ) -> typing.Iterator[typing.Tuple[int, str, LivyLogParseResult]]:
+        """Convert the positions from :py:meth:`_iter_parsed` into line numbers."""
+        line = 0
+        last_pos = 0
+        for pos, section, result in parsed:
+            if pos >= last_pos:
+                line += logs.count("\n", last_pos, pos)
+            else:
+                line -= logs.count("\n", pos, last_pos)
+            last_pos = pos
+            yield line, section, result
+
+    def _emit(
+        self, result: LivyLogParseResult, section: str = None, line: int = None
+    ) -> bool:
+        """Publish the parse result to :py:mod:`logging` and the sinks. Returns
+        ``False`` if the log is already emitted before."""
+        # cache for preventing emit duplicated logs
+        digest = hashlib.md5(
+            b"%d--%d--%d--%d"
+            % (
+                result.created.timestamp() if result.created else 0,
+                result.level,
+                hash(result.name),
+                hash(result.message),
+            )
+        ).digest()
+
+        with self._lock:
+            if digest in self._emitted_logs:
+                return False
+            else:
+                self._emitted_logs.add(digest)
+
+        # emit
+        created = result.created
+        with self._lock:
+            if not created:
+                created = self._last_emit_timestamp or datetime.datetime.now()
+            else:
+                self._last_emit_timestamp = created
+
+        if not created.tzinfo:
+            created = created.replace(tzinfo=self.timezone)
+
+        record = logging.makeLogRecord(
+            {
+                "name": self.prefix + result.name,
+                "levelno": result.level,
+                "levelname": logging.getLevelName(result.level),
+                "msg": result.message,
+                "created": int(created.timestamp()),
+            }
+        )
+
+        logging.getLogger(record.name).handle(record)
+
+        if self._sinks:
+            export_record = livy.export.LivyLogExportRecord(
+                created=created,
+                level=result.level,
+                name=record.name,
+                message=result.message,
+                section=section,
+                batch_id=self.batch_id,
+                line=line,
             )
+            for sink in self._sinks:
+                sink.write(export_record)
 
-            logging.getLogger(record.name).handle(record)
+        return True
+
+    def _flush_sinks(self) -> None:
+        for sink in self._sinks:
+            sink.flush()
 
     def _match_log(
         self, matches: typing.Dict[typing.Pattern, typing.Match], logs: str, pos: int
@@ -438,6 +1162,12 @@ class LivyBatchLogReader:
         ------
         No data return. All logs would be pipe to Python's :py:mod:`logging`.
 
+        Note
+        ----
+        Fetching, parsing and emitting logs are run as separated stages in a
+        pipeline, so a slow log handler does not delay the next query. Latency
+        and queue depth of each stage are collected in :py:attr:`pipeline_stats`.
+
         See also
         --------
         :py:meth:`read()`
@@ -446,22 +1176,13 @@ class LivyBatchLogReader:
             raise livy.exception.OperationError("Background worker is already created.")
 
         stop_event = threading.Event()
-
-        def watch():
-            while not self.client.is_batch_ended(self.batch_id):
-                tick = time.time()
-                self.read()
-                elapsed = time.time() - tick
-                sleep_time = max(interval - elapsed, 1e-4)
-                if stop_event.wait(sleep_time):
-                    return
-
-            self.read()  # fetch remaining logs
+        pipeline = _ReadPipeline(self, interval, stop_event)
+        self.pipeline_stats = pipeline.stats
 
         if block:
-            watch()
+            pipeline.run()
         else:
-            self.thread = threading.Thread(target=watch, args=())
+            self.thread = threading.Thread(target=pipeline.run, args=())
             self.thread.daemon = True
             self.thread.start()
             self._stop_event = stop_event
@@ -476,3 +1197,249 @@ class LivyBatchLogReader:
                 "Do you already called `read_until_finish`?"
             )
         self._stop_event.set()
+
+
+class PipelineStageStats:
+    """Statistics of a stage in the log reading pipeline. ``errors`` is the
+    number of log windows that are dropped on errors in this stage."""
+
+    __slots__ = ("name", "count", "errors", "total_time", "max_time", "max_queue_depth")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.max_queue_depth = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<PipelineStageStats {self.name}: count={self.count}, "
+            f"errors={self.errors}, avg={self.avg_time:.3f}s, "
+            f"max={self.max_time:.3f}s, max_queue_depth={self.max_queue_depth}>"
+        )
+
+    @property
+    def avg_time(self) -> float:
+        """Average seconds spent in this stage per log window."""
+        return self.total_time / self.count if self.count else 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+
+class _ReadPipeline:
+    """Pipeline for :py:meth:`LivyBatchLogReader.read_until_finish`. Logs are
+    fetched in the calling thread; parsing and emitting are run in their own
+    threads, connected by bounded queues."""
+
+    _STOP = object()  # marker
+
+    def __init__(
+        self,
+        reader: LivyBatchLogReader,
+        interval: float,
+        stop_event: threading.Event,
+        queue_size: int = 2,
+    ) -> None:
+        self.reader = reader
+        self.interval = interval
+        self.stop_event = stop_event
+
+        self.stats = {
+            name: PipelineStageStats(name) for name in ("fetch", "parse", "emit")
+        }
+
+        self._parse_queue = queue.Queue(queue_size)
+        self._emit_queue = queue.Queue(queue_size)
+        self._abort = threading.Event()
+
+    def run(self) -> None:
+        """Run the pipeline until the batch is ended or stop event is set."""
+        threads = [
+            threading.Thread(
+                target=self._stage,
+                args=("parse", self._parse_queue, self._emit_queue, self._parse),
+            ),
+            threading.Thread(
+                target=self._stage,
+                args=("emit", self._emit_queue, None, self._emit),
+            ),
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            self._watch()
+        except BaseException:
+            self._abort.set()
+            raise
+        finally:
+            self._put(self._parse_queue, self._STOP)
+
+        for thread in threads:
+            thread.join()
+
+        logger.debug(
+            "Log pipeline for batch#%d finished. %s",
+            self.reader.batch_id,
+            "; ".join(repr(s) for s in self.stats.values()),
+        )
+
+        errors = sum(s.errors for s in self.stats.values())
+        if errors:
+            logger.warning(
+                "%d log windows of batch#%d are dropped on errors",
+                errors,
+                self.reader.batch_id,
+            )
+
+    def _watch(self) -> None:
+        """Fetch stage"""
+        while not self.reader._is_batch_ended():
+            tick = time.time()
+            self._fetch()
+            elapsed = time.time() - tick
+            sleep_time = max(self.interval - elapsed, 1e-4)
+            if self.stop_event.wait(sleep_time) or self._abort.is_set():
+                return
+
+        self._fetch()  # fetch remaining logs
+
+    def _fetch(self) -> None:
+        tick = time.time()
+        logs = self.reader._fetch_logs()
+        self.stats["fetch"].record(time.time() - tick)
+        self._put(self._parse_queue, logs)
+
+    def _parse(
+        self, logs: str
+    ) -> typing.List[typing.Tuple[int, str, LivyLogParseResult]]:
+        return list(self.reader._iter_lines(logs, self.reader._iter_parsed(logs)))
+
+    def _emit(self, results: typing.List[typing.Tuple[int, str, LivyLogParseResult]]):
+        for line, section, result in results:
+            self.reader._emit(result, section, line)
+        self.reader._flush_sinks()
+
+    def _put(self, q: queue.Queue, item: typing.Any) -> None:
+        """Put item into queue; it blocks when the next stage is busy."""
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+
+            stats = self.stats["parse" if q is self._parse_queue else "emit"]
+            stats.max_queue_depth = max(stats.max_queue_depth, q.qsize())
+            return
+
+    def _stage(
+        self,
+        name: str,
+        inbox: queue.Queue,
+        outbox: typing.Optional[queue.Queue],
+        func: typing.Callable,
+    ) -> None:
+        """Worker loop for parse and emit stage"""
+        stats = self.stats[name]
+        while not self._abort.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if item is self._STOP:
+                if outbox:
+                    self._put(outbox, self._STOP)
+                return
+
+            tick = time.time()
+            try:
+                result = func(item)
+            except Exception:
+                stats.errors += 1
+                logger.exception("Error during %s logs", name)
+                continue
+            except BaseException:
+                # e.g. KeyboardInterrupt; stop the other stages from waiting
+                self._abort.set()
+                raise
+            finally:
+                stats.record(time.time() - tick)
+
+            if outbox:
+                self._put(outbox, result)
+
+
+_SAFE_LINE_START = re.compile(
+    r"^(?:stdout: |stderr: |YARN Diagnostics: |\d{2}\/\d{2}\/\d{2} \d{2}:\d{2}:\d{2} )",
+    re.RegexFlag.MULTILINE,
+)
+
+
+class _ChunkParser(LivyBatchLogReader):
+    """Parse-only reader, used in worker processes."""
+
+    def __init__(
+        self,
+        parsers: typing.List[typing.Tuple[typing.Pattern, LivyLogParser]],
+        is_last_chunk: bool,
+    ) -> None:
+        self._plain_logs = object()  # marker
+        self._parsers = {
+            pattern: _SECTION_CHANGE if parser is None else parser
+            for pattern, parser in parsers
+        }
+        self._is_last_chunk = is_last_chunk
+
+    def _match_log(self, matches, logs, pos):
+        new_pos, match, parser = super()._match_log(matches, logs, pos)
+        if not self._is_last_chunk and not matches and parser is self._plain_logs:
+            # the remaining text is followed by a match in next chunk. it would
+            # be stripped (and dropped if empty) in the complete log.
+            match = match.strip()
+        return new_pos, match, parser
+
+
+class _RecordCollector(logging.Handler):
+    """Keep log records in a list, for sending back to parent process."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: typing.List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # resolve the fields that might not picklable
+        self.format(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def _parse_chunk(
+    parsers: typing.List[typing.Tuple[typing.Pattern, LivyLogParser]],
+    logs: str,
+    section: str,
+    is_last_chunk: bool,
+) -> typing.Tuple[
+    typing.List[typing.Tuple[int, str, LivyLogParseResult]],
+    typing.List[logging.LogRecord],
+]:
+    """Worker function for :py:meth:`LivyBatchLogReader.read_parallel`. Returns
+    parse results and the logs from parsing."""
+    collector = _RecordCollector()
+    logger.addHandler(collector)
+    propagate, logger.propagate = logger.propagate, False
+    try:
+        parser = _ChunkParser(parsers, is_last_chunk)
+        results = list(parser._iter_parsed(logs, section))
+    finally:
+        logger.removeHandler(collector)
+        logger.propagate = propagate
+    return results, collector.records
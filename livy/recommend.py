@@ -0,0 +1,303 @@
+"""Resource recommendations for the next run of a job, from its past runs in
+:py:mod:`livy.history`. The recommendations cover the resource arguments of
+:py:meth:`livy.client.LivyClient.create_batch`, and they are conservative: a
+setting is changed only when the same evidence is found in most of the recent
+runs with the current settings, by one step at a time.
+
+* Executor memory is raised when the executors are killed by YARN for exceeding
+  memory limits, or run out of memory on GC overhead.
+* Number of executors is lowered when some executors never run a task, and the
+  largest stage still fits in one wave of tasks on the rest.
+* A change is reverted when the runs after it are much slower than before.
+
+Durations, failure counts, task counts and active executors of each run are
+recorded by :ref:`cli-submit` in history.
+"""
+import logging
+import math
+import re
+import statistics
+import typing
+
+import livy.exception
+import livy.history
+
+__all__ = [
+    "recommend",
+    "parse_memory",
+    "format_memory",
+    "LivyResourceAdvice",
+    "RESOURCE_FIELDS",
+]
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_FIELDS = (
+    "driver_memory",
+    "driver_cores",
+    "executor_memory",
+    "executor_cores",
+    "num_executors",
+)
+"""Resource arguments of :py:meth:`livy.client.LivyClient.create_batch`."""
+
+_MEMORY_FAILURES = ("yarn-memory-kill", "gc-overhead")
+
+
+class LivyResourceAdvice(typing.NamedTuple):
+    """A recommended change to a resource setting."""
+
+    field: str
+    """Name of the argument, one of :py:data:`RESOURCE_FIELDS`.
+    """
+
+    current: typing.Any
+    """Current value. ``None`` for the server default.
+    """
+
+    suggested: typing.Any
+    """Recommended value.
+    """
+
+    reason: str
+    """Why it is recommended.
+    """
+
+
+def recommend(
+    runs: typing.Iterable[livy.history.LivyRunRecord],
+    resources: typing.Dict[str, typing.Any],
+    min_runs: int = 3,
+    memory_step: float = 1.25,
+    slowdown: float = 1.2,
+) -> typing.List[LivyResourceAdvice]:
+    """Recommend resource settings for the next run.
+
+    Parameters
+    ----------
+        runs : typing.Iterable[livy.history.LivyRunRecord]
+            Past runs of the job, the latest first; e.g. from
+            :py:meth:`livy.history.LivyRunHistory.runs`
+        resources : typing.Dict[str, typing.Any]
+            Resources to be requested, keyed by :py:data:`RESOURCE_FIELDS`
+        min_runs : int
+            Minimal number of runs with the current settings before any change
+            is recommended
+        memory_step : float
+            Multiplier to the executor memory when it is raised
+        slowdown : float
+            Revert the settings when the runs with current settings take this
+            many times of the median duration with the previous settings
+
+    Return
+    ------
+    advices : typing.List[LivyResourceAdvice]
+        Recommended changes. Empty if the current settings should be kept.
+
+    Raises
+    ------
+    TypeError
+        On a invalid argument is given
+    """
+    if not isinstance(min_runs, int) or min_runs < 1:
+        raise livy.exception.TypeError("min_runs", "positive int", min_runs)
+    if not isinstance(memory_step, (int, float)) or memory_step <= 1:
+        raise livy.exception.TypeError("memory_step", "number > 1", memory_step)
+    if not isinstance(slowdown, (int, float)) or slowdown <= 1:
+        raise livy.exception.TypeError("slowdown", "number > 1", slowdown)
+
+    current = _normalize(resources)
+    runs = list(runs)
+    same = [r for r in runs if _normalize(r.resources) == current]
+    if len(same) < min_runs:
+        logger.debug(
+            "Only %d runs with the current settings, %d required", len(same), min_runs
+        )
+        return []
+
+    # reverting is the only advice when the current settings are worse
+    advices = _check_slowdown(runs, same, current, min_runs, slowdown)
+    if advices:
+        return advices
+
+    advices += _check_memory(same, current, memory_step)
+    advices += _check_executors(same, current, min_runs)
+    return advices
+
+
+def _normalize(resources: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Resources in comparable form. Memory sizes are in megabytes."""
+    normalized = {}
+    for field in RESOURCE_FIELDS:
+        value = (resources or {}).get(field)
+        if value is not None and field.endswith("_memory"):
+            value = parse_memory(value)
+        normalized[field] = value
+    return normalized
+
+
+def parse_memory(value: str) -> int:
+    """Parse memory size in JVM format (e.g. ``512m``, ``4g``, ``4gb``) into
+    megabytes.
+
+    Raises
+    ------
+    TypeError
+        On a invalid value is given
+    """
+    m = re.fullmatch(r"(\d+)([gm])b?", str(value).strip(), re.RegexFlag.IGNORECASE)
+    if not m:
+        raise livy.exception.TypeError("memory", "size like '4g' or '512m'", value)
+    size, unit = int(m.group(1)), m.group(2).lower()
+    return size * 1024 if unit == "g" else size
+
+
+def format_memory(megabytes: int) -> str:
+    """Format megabytes in JVM format."""
+    if megabytes % 1024 == 0:
+        return f"{megabytes // 1024}g"
+    return f"{megabytes}m"
+
+
+def _check_slowdown(
+    runs: typing.List[livy.history.LivyRunRecord],
+    same: typing.List[livy.history.LivyRunRecord],
+    current: typing.Dict[str, typing.Any],
+    min_runs: int,
+    slowdown: float,
+) -> typing.List[LivyResourceAdvice]:
+    """Compare the successful runs with current settings to the ones with the
+    settings used right before."""
+    succeeded = [r.duration for r in same if r.state == "success"]
+    if len(succeeded) < min_runs:
+        return []
+
+    # settings used right before the current ones
+    previous = None
+    for run in runs[runs.index(same[-1]) :]:
+        resources = _normalize(run.resources)
+        if resources != current:
+            previous = resources
+            break
+    if previous is None:
+        return []
+
+    before = [
+        r.duration
+        for r in runs
+        if r.state == "success" and _normalize(r.resources) == previous
+    ]
+    if len(before) < min_runs:
+        return []
+
+    now, then = statistics.median(succeeded), statistics.median(before)
+    if now <= then * slowdown:
+        return []
+
+    changed = ", ".join(
+        f"{field}={_to_argument(field, previous[field])}"
+        for field in RESOURCE_FIELDS
+        if previous[field] != current[field]
+    )
+    reason = (
+        f"runs with the current settings took {now:.0f}s in median, "
+        f"{now / then:.0%} of {then:.0f}s with {changed}"
+    )
+    return [
+        LivyResourceAdvice(
+            field=field,
+            current=_to_argument(field, current[field]),
+            suggested=_to_argument(field, previous[field]),
+            reason=reason,
+        )
+        for field in RESOURCE_FIELDS
+        if previous[field] != current[field]
+    ]
+
+
+def _check_memory(
+    same: typing.List[livy.history.LivyRunRecord],
+    current: typing.Dict[str, typing.Any],
+    memory_step: float,
+) -> typing.List[LivyResourceAdvice]:
+    """Raise executor memory if most of the runs have memory failures."""
+    failed = [
+        r
+        for r in same
+        if any(r.metrics.get("failures", {}).get(k) for k in _MEMORY_FAILURES)
+    ]
+    if not failed or len(failed) * 2 < len(same):
+        return []
+
+    memory = current["executor_memory"]
+    if memory is None:
+        logger.debug("Executor memory is not set, could not recommend a value")
+        return []
+
+    # round up to 512 MB
+    suggested = int(math.ceil(memory * memory_step / 512) * 512)
+    kinds = sorted(
+        {
+            k
+            for r in failed
+            for k in _MEMORY_FAILURES
+            if r.metrics.get("failures", {}).get(k)
+        }
+    )
+    return [
+        LivyResourceAdvice(
+            field="executor_memory",
+            current=format_memory(memory),
+            suggested=format_memory(suggested),
+            reason=f"{' and '.join(kinds)} found in {len(failed)} of the last "
+            f"{len(same)} runs with the current settings",
+        )
+    ]
+
+
+def _check_executors(
+    same: typing.List[livy.history.LivyRunRecord],
+    current: typing.Dict[str, typing.Any],
+    min_runs: int,
+) -> typing.List[LivyResourceAdvice]:
+    """Lower number of executors if some of them are always idle."""
+    num_executors = current["num_executors"]
+    if not num_executors or num_executors <= 1:
+        return []
+
+    succeeded = [
+        r
+        for r in same
+        if r.state == "success" and "executors" in r.metrics and r.metrics.get("tasks")
+    ]
+    if len(succeeded) < min_runs:
+        return []
+
+    active = max(r.metrics["executors"] for r in succeeded)
+    if active >= num_executors:
+        return []
+
+    # the largest stage should still be finished in one wave
+    max_tasks = max(max(r.metrics["tasks"].values()) for r in succeeded)
+    cores = current["executor_cores"] or 1
+    suggested = max(active, 1)
+    if math.ceil(max_tasks / cores) > suggested:
+        return []
+
+    return [
+        LivyResourceAdvice(
+            field="num_executors",
+            current=num_executors,
+            suggested=suggested,
+            reason=f"at most {active} of {num_executors} executors ran tasks in "
+            f"the last {len(succeeded)} successful runs, and the largest stage has "
+            f"{max_tasks} tasks",
+        )
+    ]
+
+
+def _to_argument(field: str, value: typing.Any) -> typing.Any:
+    """Convert a normalized value back to argument."""
+    if value is not None and field.endswith("_memory"):
+        return format_memory(value)
+    return value
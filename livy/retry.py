@@ -0,0 +1,133 @@
+"""Retry policy for batches that are ended unsuccessfully. A failed batch is
+resubmitted only when its logs match one of the given signatures, e.g. the
+containers are preempted by YARN, so the errors in application itself would not
+be retried in vain.
+"""
+import logging
+import re
+import threading
+import typing
+
+import livy.exception
+import livy.export
+
+__all__ = ["LivyRetryPolicy", "LogSignatureMatcher", "SIGNATURES"]
+
+logger = logging.getLogger(__name__)
+
+SIGNATURES = {
+    "yarn-preemption": r"(?i)\bpreempt(ed|ion)\b",
+    "executor-lost": r"ExecutorLostFailure",
+    "am-container-failure": r"AM Container for \S+ exited with",
+    "connection-refused": r"java\.net\.ConnectException: Connection refused",
+}
+"""Builtin signatures for transient failures. Keys could be used in place of
+regular expressions in :py:class:`LivyRetryPolicy`."""
+
+
+class LogSignatureMatcher:
+    """Sink that watches the log records for the signatures. It could be
+    attached to :py:meth:`livy.logreader.LivyBatchLogReader.add_sink`."""
+
+    def __init__(self, patterns: typing.Iterable[typing.Pattern]) -> None:
+        self.patterns = list(patterns)
+        self.matched: typing.Set[str] = set()
+        self._lock = threading.Lock()
+
+    def write(self, record: livy.export.LivyLogExportRecord) -> None:
+        """Check a record."""
+        for pattern in self.patterns:
+            if pattern.pattern not in self.matched and pattern.search(record.message):
+                with self._lock:
+                    self.matched.add(pattern.pattern)
+
+    def flush(self) -> None:
+        """Nothing to flush. For the sink protocol."""
+
+
+class LivyRetryPolicy:
+    """When and how long to wait before resubmitting a failed batch."""
+
+    def __init__(
+        self,
+        max_attempts: int = 1,
+        backoff: float = 30.0,
+        backoff_factor: float = 2.0,
+        max_backoff: float = 600.0,
+        signatures: typing.Iterable[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+            max_attempts : int
+                Max number of submissions, including the first one
+            backoff : float
+                Seconds to wait before the second attempt
+            backoff_factor : float
+                Multiplier to the wait time for each following attempt
+            max_backoff : float
+                Max seconds to wait
+            signatures : typing.Iterable[str]
+                Retry only if the logs match one of these regular expressions,
+                or the names in :py:data:`SIGNATURES`. Retry on any failure if
+                not set.
+
+        Raises
+        ------
+        TypeError
+            On a invalid argument is given
+        OperationError
+            On a signature is not a valid regular expression
+        """
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise livy.exception.TypeError("max_attempts", "positive int", max_attempts)
+        if not isinstance(backoff, (int, float)) or backoff < 0:
+            raise livy.exception.TypeError("backoff", "non-negative number", backoff)
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.patterns: typing.List[typing.Pattern] = []
+        for signature in signatures or ():
+            try:
+                self.patterns.append(re.compile(SIGNATURES.get(signature, signature)))
+            except re.error as e:
+                raise livy.exception.OperationError(
+                    f"Invalid signature {signature}: {e}"
+                )
+
+    def matcher(self) -> LogSignatureMatcher:
+        """Create a matcher for watching the logs of one attempt."""
+        return LogSignatureMatcher(self.patterns)
+
+    def should_retry(
+        self, attempt: int, matcher: LogSignatureMatcher = None, state: str = "dead"
+    ) -> bool:
+        """Determine if a failed attempt should be retried. Only the batches
+        ended in ``dead`` are retried; e.g. a ``killed`` one is stopped on
+        purpose.
+
+        Parameters
+        ----------
+            attempt : int
+                One-based number of the failed attempt
+            matcher : LogSignatureMatcher
+                Matcher that has watched the logs of this attempt
+            state : str
+                Final state of the batch
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if state.lower() != "dead":
+            return False
+        if not self.patterns:
+            return True
+        return bool(matcher and matcher.matched)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the failed attempt."""
+        return min(
+            self.max_backoff, self.backoff * self.backoff_factor ** (attempt - 1)
+        )
@@ -1,3 +1,5 @@
 """Extra utilities, designed for making CLI better."""
 from livy.utils.configbase import *
 from livy.utils.logging import *
+from livy.utils.duration import *
+from livy.utils.hashing import *
@@ -0,0 +1,46 @@
+"""Parse human readable time spans, e.g. ``90s``, ``30m`` or ``1d12h``."""
+import datetime
+import re
+
+__all__ = ["parse_duration"]
+
+_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+    "w": 7 * 24 * 60 * 60,
+}
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)([smhdw])")
+
+
+def parse_duration(text: str) -> datetime.timedelta:
+    """Parse duration string into :py:class:`datetime.timedelta`. It accepts
+    one or more ``<number><unit>`` pairs, where unit is one of ``s``, ``m``,
+    ``h``, ``d`` and ``w``. Plain number is treated as seconds.
+
+    Raises
+    ------
+    ValueError
+        On the input is not a valid duration. It is designed to be used as the
+        ``type`` argument in :py:mod:`argparse`.
+    """
+    text = text.strip().lower()
+    try:
+        return datetime.timedelta(seconds=float(text))
+    except ValueError:
+        pass
+
+    seconds = 0.0
+    pos = 0
+    for m in _DURATION.finditer(text):
+        if m.start() != pos:
+            break
+        seconds += float(m.group(1)) * _UNITS[m.group(2)]
+        pos = m.end()
+
+    if not text or pos != len(text):
+        raise ValueError(f"Invalid duration: {text}")
+
+    return datetime.timedelta(seconds=seconds)
@@ -0,0 +1,92 @@
+"""Hash local files, with a cache for not to read the unchanged files again."""
+import hashlib
+import json
+import logging
+import os
+import threading
+import typing
+
+__all__ = ["file_digest", "FileHashCache"]
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str, algorithm: str = "sha256") -> str:
+    """Get hex digest of a file. The file is read in chunks, so the memory usage
+    does not grow with the file size."""
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileHashCache:
+    """Digests of local files, keyed by the absolute path. An entry is reused
+    only if the modification time and the size of the file are not changed. It
+    is stored in a JSON file.
+    """
+
+    def __init__(self, path: str = None, algorithm: str = "sha256") -> None:
+        """
+        Parameters
+        ----------
+            path : str
+                Path to the cache file. Cache is kept in memory only if not set.
+            algorithm : str
+                Hash algorithm name, see :py:func:`hashlib.new`
+        """
+        self.path = path and os.path.expanduser(path)
+        self.algorithm = algorithm
+        self._lock = threading.Lock()
+        self._entries: typing.Dict[str, list] = {}
+        self._changed = False
+
+        if self.path:
+            try:
+                with open(self.path, "r", encoding="utf-8") as fp:
+                    entries = json.load(fp)
+                if isinstance(entries, dict):
+                    self._entries = entries.get(algorithm, {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to read hash cache %s: %s", self.path, e)
+
+    def get(self, filepath: str) -> str:
+        """Get hex digest of the file. It is thread-safe."""
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        with self._lock:
+            entry = self._entries.get(filepath)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        digest = file_digest(filepath, self.algorithm)
+        with self._lock:
+            self._entries[filepath] = [stat.st_mtime_ns, stat.st_size, digest]
+            self._changed = True
+        return digest
+
+    def save(self) -> None:
+        """Write the cache file if there is any change. Entries of the files
+        that are no longer exists are dropped."""
+        if not self.path or not self._changed:
+            return
+
+        with self._lock:
+            self._entries = {
+                path: entry
+                for path, entry in self._entries.items()
+                if os.path.exists(path)
+            }
+            content = json.dumps({self.algorithm: self._entries})
+            self._changed = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(content)
+        os.replace(tmp_path, self.path)
@@ -1,3 +1,4 @@
+import datetime
 import decimal
 import importlib.util
 import logging
@@ -54,6 +55,8 @@ class EnhancedConsoleHandler(logging.StreamHandler):
 
         self._current_progressbar: tqdm.tqdm = None
         self._latest_taskset: decimal.Decimal = decimal.Decimal(-1)
+        self._eta: datetime.datetime = None
+        self._stage_estimate: typing.Dict[str, float] = {}
 
         # tqdm is only avaliable in this scope
         self._tqdm_create = tqdm.tqdm
@@ -115,6 +118,32 @@ class EnhancedConsoleHandler(logging.StreamHandler):
         # background thread to trigger flushing.
         self._log_queue.put(record)
 
+    def set_estimate(
+        self, eta: datetime.datetime = None, stages: typing.Dict[str, float] = None
+    ) -> None:
+        """Show the expected end time of the job, and the usual duration of
+        each stage, on the progress bars created afterward.
+
+        Parameters
+        ----------
+            eta : datetime.datetime
+                Expected time the job is ended
+            stages : typing.Dict[str, float]
+                Usual seconds taken by each stage, keyed by stage ID
+        """
+        self._eta = eta
+        self._stage_estimate = dict(stages or {})
+
+    def _get_postfix(self, task_set: decimal.Decimal) -> typing.Optional[str]:
+        """Estimation to be shown after the progress bar"""
+        terms = []
+        seconds = self._stage_estimate.get(str(int(task_set)))
+        if seconds is not None:
+            terms.append(f"usual {seconds:.0f}s")
+        if self._eta:
+            terms.append(f"ETA {self._eta.astimezone():%H:%M:%S}")
+        return ", ".join(terms) or None
+
     def _set_progressbar(self, task_set: str, progress: int, total: int) -> None:
         """Update progress bar status"""
         task_set = decimal.Decimal(task_set)
@@ -140,6 +169,7 @@ class EnhancedConsoleHandler(logging.StreamHandler):
             desc=f"Stage {task_set}",
             total=total,
             leave=True,
+            postfix=self._get_postfix(task_set),
         )
 
         self._current_progressbar.update(progress)
@@ -0,0 +1,66 @@
+import json
+import unittest
+import unittest.mock
+
+import livy
+import livy.cli.analyze as module
+import livy.cli.config
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        config = livy.cli.config.Configuration()
+        config.root.api_url = "http://example.com/"
+        patcher = unittest.mock.patch("livy.cli.config.load", return_value=config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client.get_batch_log.return_value = [
+            "21/05/01 00:00:00 INFO YarnScheduler: Adding task set 0.0 with 4 tasks",
+        ] + [
+            f"21/05/01 00:00:{i:02d} INFO TaskSetManager: Finished task {i}.0 in "
+            f"stage 0.0 (TID {i}) in {ms} ms on host{i % 2} (executor {i}) ({i}/4)"
+            for i, ms in enumerate([1000, 1100, 1200, 30000])
+        ]
+
+    def test_table(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            self.assertEqual(0, module.main(["1234"]))
+
+        output = "\n".join(c[0][0] if c[0] else "" for c in print_.call_args_list)
+        self.assertIn("Stages (1 stages, 4 tasks)", output)
+        self.assertIn("Stage 0.0 is skewed", output)
+        self.assertIn("task 3.0 took 30.0s on host1 (executor 3)", output)
+        self.assertRegex(output, r"0\.0  \|#+\|  3\.0s")
+
+    def test_json(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            self.assertEqual(0, module.main(["1234", "--format", "json"]))
+
+        data = json.loads(print_.call_args[0][0])
+        self.assertEqual(data["skewed_stages"], ["0.0"])
+        self.assertEqual(data["stages"][0]["tasks"], 4)
+        self.assertEqual(data["stages"][0]["slowest"][0]["duration_ms"], 30000)
+        self.assertEqual(len(data["executors"]), 4)
+
+    def test_error(self):
+        self.client.get_batch_log.side_effect = livy.RequestError(0, "Test error")
+        self.assertEqual(1, module.main(["1234"]))
+
+        self.client.get_batch_log.side_effect = None
+        self.client.get_batch_log.return_value = ["no task log"]
+        self.assertEqual(1, module.main(["1234"]))
+
+        self.assertEqual(1, module.main(["1234", "--skew-factor", "1"]))
+
+    def test_format_ms(self):
+        self.assertEqual(module.format_ms(None), "-")
+        self.assertEqual(module.format_ms(12.3), "12ms")
+        self.assertEqual(module.format_ms(1500), "1.5s")
+        self.assertEqual(module.format_ms(125000), "2m05s")
+        self.assertEqual(module.format_ms(7500000), "2h05m")
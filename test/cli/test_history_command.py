@@ -0,0 +1,89 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import livy.cli.config
+import livy.cli.history as module
+import livy.history
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "history.sqlite3")
+
+        submitted = datetime.datetime.now(datetime.timezone.utc)
+        with livy.history.LivyRunHistory(self.path) as history:
+            for i, duration in enumerate([100.0, 110.0, 90.0, 400.0]):
+                history.add(
+                    key="s3://bucket/etl.py",
+                    script="s3://bucket/etl.py",
+                    batch_id=i,
+                    state="success",
+                    submitted=submitted + datetime.timedelta(seconds=i),
+                    duration=duration,
+                    stages={"0": duration / 2},
+                )
+            history.add(
+                key="s3://bucket/other.py",
+                script="s3://bucket/other.py",
+                batch_id=9,
+                state="success",
+                submitted=submitted,
+                duration=1000.0,
+            )
+
+    def test_list(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(["--history-path", self.path])
+        self.assertEqual(0, code)
+
+        lines = [c[0][0] for c in print_.call_args_list]
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[0].split()[:3], ["ID", "BATCH", "STATE"])
+        self.assertIn("SLOW", lines[1])
+        self.assertIn("s3://bucket/etl.py", lines[1])
+        self.assertEqual(sum("SLOW" in line for line in lines), 1)
+
+    def test_slow_only(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(
+                [
+                    "--history-path",
+                    self.path,
+                    "--script",
+                    "s3://bucket/etl.py",
+                    "--slow-only",
+                    "--format",
+                    "jsonl",
+                ]
+            )
+        self.assertEqual(0, code)
+        self.assertEqual(print_.call_count, 1)
+
+        data = json.loads(print_.call_args[0][0])
+        self.assertEqual(data["batch_id"], 3)
+        self.assertEqual(data["median"], 105.0)
+        self.assertTrue(data["slow"])
+
+    def test_show_run(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(["--history-path", self.path, "4"])
+        self.assertEqual(0, code)
+
+        lines = [c[0][0] if c[0] else "" for c in print_.call_args_list]
+        self.assertIn("Median:     1m45s of 4 successful runs", lines)
+        self.assertRegex(lines[-1], r"^\s+0\s+3m20s\s+52.5s\s+3.81  SLOW$")
+
+        with unittest.mock.patch("builtins.print"):
+            self.assertEqual(1, module.main(["--history-path", self.path, "99"]))
+
+    def test_format_duration(self):
+        self.assertEqual(module.format_duration(None), "-")
+        self.assertEqual(module.format_duration(1.25), "1.2s")
+        self.assertEqual(module.format_duration(125), "2m05s")
+        self.assertEqual(module.format_duration(7500), "2h05m")
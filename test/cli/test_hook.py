@@ -0,0 +1,166 @@
+import argparse
+import threading
+import time
+import unittest
+
+import livy.cli.hook as module
+
+
+class RunActionsTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.events = []
+        self.lock = threading.Lock()
+
+    def action(self, name, delay=0.0, declared=True, **kwargs):
+        def func(source, args):
+            with self.lock:
+                self.events.append(("start", name))
+            time.sleep(delay)
+            setattr(args, name, True)
+            with self.lock:
+                self.events.append(("end", name))
+            return args
+
+        if declared:
+            func = module.plugin(**kwargs)(func)
+        return f"test:{name}", func
+
+    def test_concurrent(self):
+        tick = time.monotonic()
+        finished = {}
+        args, durations = module.run_actions(
+            "PRE-SUBMIT",
+            argparse.Namespace(),
+            [self.action("a", 0.2), self.action("b", 0.2), self.action("c", 0.2)],
+            on_finished=finished.__setitem__,
+        )
+        self.assertLess(time.monotonic() - tick, 0.5)
+        self.assertTrue(args.a and args.b and args.c)
+        self.assertEqual({"test:a", "test:b", "test:c"}, set(durations))
+        self.assertEqual(durations, finished)
+        self.assertGreaterEqual(durations["test:a"], 0.2)
+
+    def test_concurrent_in_place(self):
+        seen = {}
+
+        def edit(name, delay):
+            @module.plugin()
+            def func(source, args):
+                time.sleep(delay)
+                seen[name] = list(args.py_files)
+                args.py_files.append(f"{name}.zip")
+                args.spark_conf[name] = "1"
+                return args
+
+            return f"test:{name}", func
+
+        py_files = ["main.zip"]
+        args, _ = module.run_actions(
+            "PRE-SUBMIT",
+            argparse.Namespace(py_files=py_files, spark_conf={}),
+            [edit("a", 0.05), edit("b", 0.0)],
+        )
+        self.assertEqual({"a": ["main.zip"], "b": ["main.zip"]}, seen)
+        self.assertEqual(["main.zip"], py_files)
+        self.assertEqual(["main.zip", "b.zip", "a.zip"], args.py_files)
+        self.assertEqual({"a": "1", "b": "1"}, args.spark_conf)
+
+    def test_dependency(self):
+        args, _ = module.run_actions(
+            "PRE-SUBMIT",
+            argparse.Namespace(),
+            [
+                self.action("upload", 0.01, depends_on=["test:pack"]),
+                self.action("pack", 0.05),
+                self.action("register"),
+            ],
+        )
+        self.assertLess(
+            self.events.index(("end", "pack")), self.events.index(("start", "upload"))
+        )
+        self.assertLess(
+            self.events.index(("start", "register")), self.events.index(("end", "pack"))
+        )
+
+    def test_undeclared(self):
+        module.run_actions(
+            "PRE-SUBMIT",
+            argparse.Namespace(),
+            [
+                self.action("a", 0.05),
+                self.action("b", declared=False),
+                self.action("c"),
+            ],
+        )
+        self.assertEqual(
+            [
+                ("start", "a"),
+                ("end", "a"),
+                ("start", "b"),
+                ("end", "b"),
+                ("start", "c"),
+                ("end", "c"),
+            ],
+            self.events,
+        )
+
+    def test_max_workers(self):
+        tick = time.monotonic()
+        module.run_actions(
+            "PRE-SUBMIT",
+            argparse.Namespace(),
+            [self.action("a", 0.1), self.action("b", 0.1)],
+            max_workers=1,
+        )
+        self.assertGreaterEqual(time.monotonic() - tick, 0.2)
+
+    def test_coroutine(self):
+        @module.plugin()
+        async def func(source, args):
+            args.source = source
+            return args
+
+        args, _ = module.run_actions(
+            "PRE-SUBMIT", argparse.Namespace(), [("test:func", func)]
+        )
+        self.assertEqual("PRE-SUBMIT", args.source)
+
+    def test_timeout(self):
+        with self.assertRaises(module.HookError):
+            module.run_actions(
+                "PRE-SUBMIT",
+                argparse.Namespace(),
+                [self.action("a", 1.0, timeout=0.05), self.action("b")],
+            )
+
+        with self.assertRaises(module.HookError):
+            module.run_actions(
+                "PRE-SUBMIT",
+                argparse.Namespace(),
+                [self.action("a", 1.0)],
+                timeout=0.05,
+            )
+
+    def test_error(self):
+        def fail(source, args):
+            raise ValueError("Test error")
+
+        with self.assertRaises(module.HookError):
+            module.run_actions(
+                "PRE-SUBMIT", argparse.Namespace(), [("test:fail", fail)]
+            )
+
+        with self.assertRaises(module.HookError):
+            module.run_actions(
+                "PRE-SUBMIT", argparse.Namespace(), [("test:none", lambda x, y: None)]
+            )
+
+        with self.assertRaises(module.HookError):
+            module.run_actions(
+                "PRE-SUBMIT",
+                argparse.Namespace(),
+                [
+                    self.action("a", depends_on=["test:b"]),
+                    self.action("b", depends_on=["test:a"]),
+                ],
+            )
@@ -60,6 +60,98 @@ class TestMain(unittest.TestCase):
         self.assertEqual(1, module.main(["--api-url", "http://example.com", "1234"]))
 
 
+class TestBulkKill(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = unittest.mock.patch("livy.cli.kill.check_user_confirm")
+        self.check_user_confirm = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = unittest.mock.patch("time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.batches = [
+            {"id": 1, "state": "running", "name": "etl-daily"},
+            {"id": 2, "state": "starting", "name": "etl-hourly"},
+            {"id": 3, "state": "running", "name": "report"},
+            {"id": 4, "state": "dead", "name": "etl-daily"},
+        ]
+        listings = [
+            self.batches,  # selection
+            [{"id": 1, "state": "running"}, {"id": 3, "state": "dead"}],  # monitor
+            [{"id": 3, "state": "dead"}],
+        ]
+        self.client.iter_batches.side_effect = lambda size: iter(listings.pop(0))
+
+    def main(self, *argv):
+        return module.main(["--api-url", "http://example.com", *argv])
+
+    def test_filter(self):
+        self.assertEqual(0, self.main("--name-regex", "^etl-"))
+        self.check_user_confirm.assert_called_once_with([1, 2])
+        self.assertEqual(
+            sorted(c[0][0] for c in self.client.delete_batch.call_args_list), [1, 2]
+        )
+        self.assertEqual(self.client.iter_batches.call_count, 3)
+        self.client.is_batch_ended.assert_not_called()
+
+    def test_state_and_ids(self):
+        self.assertEqual(0, self.main("--state", "running", "--yes", "1", "2", "3"))
+        self.check_user_confirm.assert_not_called()
+        self.assertEqual(
+            sorted(c[0][0] for c in self.client.delete_batch.call_args_list), [1, 3]
+        )
+
+    def test_ids(self):
+        self.assertEqual(0, self.main("2", "3", "4"))
+        self.check_user_confirm.assert_called_once_with([2, 3])
+        self.client.get_batch_information.assert_not_called()
+
+    def test_older_than(self):
+        self.client.get_batch_log.side_effect = lambda id_, from_, size: (
+            ["21/05/01 15:21:03 INFO Foo: bar"] if id_ == 1 else []
+        )
+        self.assertEqual(0, self.main("--older-than", "2h"))
+        self.check_user_confirm.assert_called_once_with(1)
+
+    def test_errors(self):
+        with self.assertRaises(SystemExit):
+            self.main()
+
+        # no batch selected
+        self.assertEqual(1, self.main("--name-regex", "^nothing$"))
+
+        # partial failed
+        self.client.delete_batch.side_effect = [
+            None,
+            livy.RequestError(500, "test"),
+        ]
+        self.client.iter_batches.side_effect = [
+            iter(self.batches),
+            iter([]),
+        ]
+        self.assertEqual(1, self.main("1", "2"))
+        self.assertEqual(self.client.iter_batches.call_count, 2)
+
+        # 404 is not an error
+        self.client.delete_batch.side_effect = livy.RequestError(404, "test")
+        self.client.iter_batches.side_effect = [iter(self.batches), iter([])]
+        self.assertEqual(0, self.main("1", "2"))
+
+        # listing error
+        self.client.delete_batch.side_effect = None
+        self.client.iter_batches.side_effect = [
+            iter(self.batches),
+            livy.RequestError(500, "test"),
+        ]
+        self.assertEqual(1, self.main("1", "2"))
+
+
 class TestCheckUserConfirm(unittest.TestCase):
     def setUp(self) -> None:
         patcher = unittest.mock.patch("builtins.input")
@@ -73,6 +165,13 @@ class TestCheckUserConfirm(unittest.TestCase):
         self.input.return_value = "no"
         self.assertFalse(module.check_user_confirm(1234))
 
+    def test_multiple_batches(self):
+        self.input.return_value = "yes"
+        with unittest.mock.patch("builtins.print") as print_:
+            self.assertTrue(module.check_user_confirm([1, 2, 3]))
+        self.assertIn("3", print_.call_args[0][0])
+        self.assertIn("batches", print_.call_args[0][0])
+
     def test_no_input(self):
         self.input.return_value = " "
         self.assertFalse(module.check_user_confirm(1234))
@@ -0,0 +1,136 @@
+import datetime
+import json
+import threading
+import time
+import unittest
+import unittest.mock
+
+import livy.cli.ls as module
+import livy
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.logs = {
+            1: [now - datetime.timedelta(hours=5)],
+            2: [now - datetime.timedelta(minutes=5)],
+            3: [],
+        }
+        self.client.get_batch_log.side_effect = lambda id_, from_, size: [
+            "stdout: ",
+            *(
+                t.strftime("%y/%m/%d %H:%M:%S INFO Foo: message")
+                for t in self.logs[id_]
+            ),
+        ]
+        self.client.iter_batches.side_effect = lambda page_size: iter(
+            [
+                {"id": 1, "state": "running", "name": "daily-report", "appId": None},
+                {"id": 2, "state": "running", "name": "hourly-report", "appId": None},
+                {"id": 3, "state": "dead", "name": None, "appId": "application_1"},
+            ]
+        )
+
+    def main(self, *argv):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(["--api-url", "http://example.com", *argv])
+        return code, [c[0][0] for c in print_.call_args_list]
+
+    def test_table(self):
+        code, output = self.main()
+        self.assertEqual(code, 0)
+        self.assertEqual(len(output), 4)
+        self.assertRegex(output[0], r"^\s+ID\s+STATE\s+APP ID\s+NAME$")
+        self.assertRegex(output[3], r"^\s+3\s+dead\s+application_1\s+-$")
+        self.client.iter_batches.assert_called_once_with(100)
+
+        code, output = self.main("--older-than", "1h")
+        self.assertRegex(output[0], r"^\s+ID\s+STATE\s+APP ID\s+STARTED\s+NAME$")
+        self.assertRegex(output[1], r"^\s+1\s+running\s+-\s+\d{4}-\d{2}-\d{2} ")
+
+    def test_jsonl(self):
+        code, output = self.main("--format", "jsonl", "--page-size", "10")
+        self.assertEqual(code, 0)
+        self.assertEqual([json.loads(line)["id"] for line in output], [1, 2, 3])
+        self.client.iter_batches.assert_called_once_with(10)
+
+        code, output = self.main("--format", "jsonl", "--newer-than", "1h")
+        self.assertEqual(len(output), 1)
+        self.assertIn("startTime", json.loads(output[0]))
+
+    def test_filters(self):
+        def ids(*argv):
+            code, output = self.main("--format", "jsonl", *argv)
+            self.assertEqual(code, 0)
+            return [json.loads(line)["id"] for line in output]
+
+        self.assertEqual(ids("--state", "dead"), [3])
+        self.assertEqual(ids("--name", "^daily"), [1])
+        self.assertEqual(ids("--name", "report", "--limit", "1"), [1])
+        self.assertEqual(ids("--older-than", "1h"), [1])
+        self.assertEqual(ids("--newer-than", "1h"), [2])
+        self.assertEqual(ids("--older-than", "1m", "--newer-than", "1d"), [1, 2])
+
+        with self.assertRaises(SystemExit):
+            self.main("--name", "(")
+        with self.assertRaises(SystemExit):
+            self.main("--older-than", "yesterday")
+
+    def test_error(self):
+        self.client.iter_batches.side_effect = livy.RequestError(0, "foo")
+        self.assertEqual(self.main()[0], 1)
+
+        self.client.iter_batches.side_effect = KeyboardInterrupt()
+        self.assertEqual(self.main()[0], 1)
+
+    def test_concurrent_start_time(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        started = now - datetime.timedelta(hours=5)
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def get_batch_log(id_, from_, size):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return [started.strftime("%y/%m/%d %H:%M:%S INFO Foo: message")]
+
+        self.client.get_batch_log.side_effect = get_batch_log
+        self.client.iter_batches.side_effect = lambda page_size: iter(
+            [{"id": i, "state": "running"} for i in range(40)]
+        )
+
+        batches = list(
+            module.iter_filtered_batches(
+                self.client,
+                older_than=datetime.timedelta(hours=1),
+                max_workers=4,
+            )
+        )
+        self.assertEqual([b["id"] for b, _ in batches], list(range(40)))
+        self.assertGreater(running[1], 1)
+        self.assertLessEqual(running[1], 4)
+
+    def test_get_batch_start_time(self):
+        self.client.get_batch_log.side_effect = None
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO SecurityManager: Changing view acls to: livy",
+        ]
+        self.assertEqual(
+            module.get_batch_start_time(self.client, 1),
+            datetime.datetime(2021, 5, 1, 15, 21, 3, tzinfo=datetime.timezone.utc),
+        )
+        self.client.get_batch_log.assert_called_once_with(1, from_=0, size=100)
+
+        self.client.get_batch_log.return_value = ["stdout: "]
+        self.assertIsNone(module.get_batch_start_time(self.client, 1))
@@ -1,11 +1,21 @@
 import argparse
+import hashlib
+import http.server
 import importlib
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
 import unittest
 import unittest.mock
+import urllib.parse
+import zipfile
 
+import livy
 import livy.cli.plugin as module
 
-
 no_boto3 = importlib.util.find_spec("boto3") is None
 
 
@@ -32,6 +42,9 @@ class TestUploadS3(unittest.TestCase):
         patcher = unittest.mock.patch("builtins.open")
         patcher.start()
         self.addCleanup(patcher.stop)
+        patcher = unittest.mock.patch("os.path.getsize", return_value=1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
         # args
         self.args = argparse.Namespace()
@@ -81,3 +94,419 @@ class TestUploadS3(unittest.TestCase):
         )
 
         module.upload_s3("PRE-SUBMIT", self.args)
+
+
+class FakeS3Client:
+    """In-memory S3 client that implements the methods used by the uploader."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.objects = {}
+        self.multipart = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _record(self, name, **kwargs):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls.append((name, kwargs))
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._record("put_object", Key=Key, **kwargs)
+        self.objects[Bucket, Key] = Body.read()
+        return {"ETag": "etag"}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._record("create_multipart_upload", Key=Key, **kwargs)
+        upload_id = f"upload-{len(self.multipart)}"
+        self.multipart[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._record("upload_part", Key=Key, PartNumber=PartNumber)
+        self.multipart[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._record("complete_multipart_upload", Key=Key)
+        parts = self.multipart.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts), "parts are not in order"
+        self.objects[Bucket, Key] = b"".join(parts[n] for n in numbers)
+
+    def head_object(self, Bucket, Key):
+        self._record("head_object", Key=Key)
+        if (Bucket, Key) not in self.objects:
+            error = Exception("Not Found")
+            error.response = {"Error": {"Code": "404"}}
+            raise error
+        return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._record("abort_multipart_upload", Key=Key)
+        self.multipart.pop(UploadId, None)
+
+
+class TestS3Uploader(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def create_file(self, name, size):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "wb") as fp:
+            fp.write(os.urandom(size))
+        return path
+
+    def test_upload(self):
+        client = FakeS3Client()
+        uploader = module._S3Uploader(
+            client,
+            "bucket",
+            {"Expires": "tomorrow"},
+            multipart_threshold=6 * module.MB,
+            part_size=5 * module.MB,
+        )
+        small = self.create_file("small.py", 1024)
+        large = self.create_file("large.jar", 12 * module.MB)
+
+        urls = uploader.upload_all([(small, "run/small.py"), (large, "run/large.jar")])
+        self.assertEqual(
+            ["s3://bucket/run/small.py", "s3://bucket/run/large.jar"], urls
+        )
+
+        for path, key in [(small, "run/small.py"), (large, "run/large.jar")]:
+            with open(path, "rb") as fp:
+                self.assertEqual(fp.read(), client.objects["bucket", key])
+
+        names = [name for name, _ in client.calls]
+        self.assertEqual(3, names.count("upload_part"))
+        self.assertIn(
+            ("put_object", {"Key": "run/small.py", "Expires": "tomorrow"}), client.calls
+        )
+        self.assertIn(
+            (
+                "create_multipart_upload",
+                {"Key": "run/large.jar", "Expires": "tomorrow"},
+            ),
+            client.calls,
+        )
+
+    def test_abort(self):
+        client = FakeS3Client()
+        client.upload_part = unittest.mock.Mock(side_effect=RuntimeError("Test error"))
+        uploader = module._S3Uploader(
+            client, "bucket", multipart_threshold=0, part_size=5 * module.MB
+        )
+        path = self.create_file("large.jar", 1024)
+
+        with self.assertRaises(RuntimeError):
+            uploader.upload_all([(path, "large.jar")])
+        self.assertEqual("abort_multipart_upload", client.calls[-1][0])
+        self.assertFalse(client.multipart)
+
+    def test_concurrency(self):
+        client = FakeS3Client(latency=0.05)
+        paths = [(self.create_file(f"{i}.jar", 16), f"{i}.jar") for i in range(8)]
+
+        tick = time.monotonic()
+        module._S3Uploader(client, "bucket", max_concurrency=1).upload_all(paths)
+        sequential = time.monotonic() - tick
+
+        tick = time.monotonic()
+        module._S3Uploader(client, "bucket", max_concurrency=8).upload_all(paths)
+        parallel = time.monotonic() - tick
+
+        self.assertLess(parallel * 3, sequential)
+
+    def test_plugin(self):
+        client = FakeS3Client()
+        script = self.create_file("main.py", 16)
+        jar = self.create_file("lib.jar", 16)
+        jars = [jar, "s3://another-bucket/dep.jar"]
+
+        args = argparse.Namespace(
+            script=script, jars=jars, py_files=None, files=[], archives=None
+        )
+        config = module._ConfigUploadS3(bucket="bucket", folder_format="{uuid}")
+        with unittest.mock.patch(
+            "livy.cli.plugin._ConfigUploadS3.load", return_value=config
+        ), unittest.mock.patch(
+            "livy.cli.plugin._create_s3_client", return_value=client
+        ), unittest.mock.patch(
+            "uuid.uuid4", return_value="mock-uuid"
+        ):
+            args = module.upload_s3("PRE-SUBMIT", args)
+
+        self.assertEqual("s3://bucket/mock-uuid/main.py", args.script)
+        self.assertEqual(
+            ["s3://bucket/mock-uuid/jars/lib.jar", "s3://another-bucket/dep.jar"],
+            args.jars,
+        )
+        self.assertEqual(jar, jars[0])  # input list is not changed
+        self.assertIsNone(args.py_files)
+        self.assertEqual([], args.files)
+
+    def test_content_addressed(self):
+        client = FakeS3Client()
+        script = self.create_file("main.py", 16)
+        jar = self.create_file("lib.jar", 16)
+        config = module._ConfigUploadS3(
+            bucket="bucket",
+            folder_format="{uuid}",
+            expire_days=1,
+            content_addressed=True,
+            hash_cache=os.path.join(self.tmpdir, "hashes.json"),
+        )
+
+        def run(run_id):
+            args = argparse.Namespace(
+                script=script, jars=[jar], py_files=None, files=None, archives=None
+            )
+            with unittest.mock.patch(
+                "livy.cli.plugin._ConfigUploadS3.load", return_value=config
+            ), unittest.mock.patch(
+                "livy.cli.plugin._create_s3_client", return_value=client
+            ), unittest.mock.patch(
+                "uuid.uuid4", return_value=run_id
+            ):
+                return module.upload_s3("PRE-SUBMIT", args)
+
+        args = run("run-1")
+        self.assertEqual("s3://bucket/run-1/main.py", args.script)
+        with open(jar, "rb") as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        self.assertEqual([f"s3://bucket/artifacts/{digest}/lib.jar"], args.jars)
+        self.assertIn(
+            ("put_object", {"Key": f"artifacts/{digest}/lib.jar"}), client.calls
+        )
+        self.assertTrue(os.path.exists(config.hash_cache))
+
+        # second run: only the script is uploaded
+        client.calls.clear()
+        args = run("run-2")
+        self.assertEqual("s3://bucket/run-2/main.py", args.script)
+        self.assertEqual([f"s3://bucket/artifacts/{digest}/lib.jar"], args.jars)
+        self.assertEqual(
+            [
+                ("head_object", f"artifacts/{digest}/lib.jar"),
+                ("put_object", "run-2/main.py"),
+            ],
+            sorted((name, kwargs["Key"]) for name, kwargs in client.calls),
+        )
+
+
+class TestZipPyFiles(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+        self.config = module._ConfigZipPyFiles(
+            cache_dir=os.path.join(self.tmpdir, "cache")
+        )
+        patcher = unittest.mock.patch(
+            "livy.cli.plugin._ConfigZipPyFiles.load", return_value=self.config
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for pkg in ("pkg_a", "pkg_b"):
+            for relpath in ("__init__.py", "sub/mod.py", "__pycache__/mod.pyc"):
+                path = os.path.join(self.tmpdir, pkg, relpath)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as fp:
+                    fp.write(f"# {pkg} {relpath}")
+
+    def run_plugin(self, *py_files):
+        args = argparse.Namespace(py_files=list(py_files))
+        return module.zip_py_files("PRE-SUBMIT", args).py_files
+
+    def test_success(self):
+        pkg_a = os.path.join(self.tmpdir, "pkg_a")
+        pkg_b = os.path.join(self.tmpdir, "pkg_b")
+        py_files = self.run_plugin(pkg_a, "s3://bucket/lib.zip", pkg_b)
+
+        self.assertEqual("s3://bucket/lib.zip", py_files[1])
+        with zipfile.ZipFile(py_files[0]) as zf:
+            self.assertEqual(["pkg_a/__init__.py", "pkg_a/sub/mod.py"], zf.namelist())
+            self.assertEqual((1980, 1, 1, 0, 0, 0), zf.infolist()[0].date_time)
+        self.assertTrue(os.path.basename(py_files[2]).startswith("pkg_b-"))
+
+    def test_cache(self):
+        pkg_a = os.path.join(self.tmpdir, "pkg_a")
+        (first,) = self.run_plugin(pkg_a)
+        with open(first, "rb") as fp:
+            content = fp.read()
+
+        # cached
+        with unittest.mock.patch(
+            "livy.cli.plugin._build_zip", side_effect=AssertionError
+        ):
+            self.assertEqual([first], self.run_plugin(pkg_a))
+
+        # deterministic
+        os.remove(first)
+        os.utime(os.path.join(pkg_a, "__init__.py"), (0, 0))
+        self.assertEqual([first], self.run_plugin(pkg_a))
+        with open(first, "rb") as fp:
+            self.assertEqual(content, fp.read())
+
+        # changed
+        with open(os.path.join(pkg_a, "sub", "mod.py"), "w") as fp:
+            fp.write("changed")
+        self.assertNotEqual([first], self.run_plugin(pkg_a))
+
+    def test_hook_reject(self):
+        with self.assertRaises(ValueError):
+            module.zip_py_files("TASK-SUCCESS", argparse.Namespace(py_files=[]))
+
+
+class _FakeWebHDFSHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, data=None, headers=()):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parse(self):
+        url = urllib.parse.urlsplit(self.path)
+        assert url.path.startswith("/webhdfs/v1/")
+        path = urllib.parse.unquote(url.path[len("/webhdfs/v1") :])
+        query = dict(urllib.parse.parse_qsl(url.query))
+        with self.server.lock:
+            self.server.requests.append((self.command, query["op"], path))
+        return path, query
+
+    def do_GET(self):
+        path, query = self._parse()
+        files = self.server.files
+        if path not in files:
+            return self._reply(404, {"RemoteException": {"message": "Not found"}})
+        if query["op"] == "GETFILESTATUS":
+            return self._reply(
+                200, {"FileStatus": {"length": len(files[path]), "type": "FILE"}}
+            )
+        if query["op"] == "GETXATTRS":
+            name = query["xattr.name"]
+            value = self.server.xattrs.get((path, name))
+            if value is None:
+                return self._reply(403, {"RemoteException": {"message": "No attr"}})
+            return self._reply(200, {"XAttrs": [{"name": name, "value": f'"{value}"'}]})
+        self._reply(400)
+
+    def do_PUT(self):
+        path, query = self._parse()
+        size = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(size)
+        if query["op"] == "CREATE" and "datanode" not in query:
+            location = f"http://127.0.0.1:{self.server.server_address[1]}{self.path}&datanode=true"
+            return self._reply(307, headers=[("Location", location)])
+        if query["op"] == "CREATE":
+            with self.server.lock:
+                self.server.files[path] = data
+                self.server.xattrs.pop((path, "user.livy.sha256"), None)
+            return self._reply(201)
+        if query["op"] == "SETXATTR":
+            with self.server.lock:
+                self.server.xattrs[path, query["xattr.name"]] = query["xattr.value"]
+            return self._reply(200)
+        self._reply(400)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeWebHDFSServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeWebHDFSHandler)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.xattrs = {}
+        self.requests = []
+
+
+class TestUploadWebHDFS(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = _FakeWebHDFSServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+        self.config = module._ConfigUploadWebHDFS(
+            url="http://127.0.0.1:%d" % self.server.server_address[1],
+            folder_format="/user/test/{script_name}",
+            user="test",
+            hash_cache=os.path.join(self.tmpdir, "hashes.json"),
+        )
+        patcher = unittest.mock.patch(
+            "livy.cli.plugin._ConfigUploadWebHDFS.load", return_value=self.config
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.script = self.create_file("main.py", b"print(1)")
+        self.jars = [self.create_file(f"lib{i}.jar", b"x" * 1024 * i) for i in range(4)]
+
+    def create_file(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "wb") as fp:
+            fp.write(content)
+        return path
+
+    def run_plugin(self):
+        args = argparse.Namespace(
+            script=self.script,
+            jars=self.jars + ["hdfs:///shared/dep.jar"],
+            py_files=None,
+            files=[],
+            archives=None,
+        )
+        return module.upload_webhdfs("PRE-SUBMIT", args)
+
+    def test_success(self):
+        args = self.run_plugin()
+        self.assertEqual("hdfs:///user/test/main/main.py", args.script)
+        self.assertEqual(
+            [f"hdfs:///user/test/main/jars/lib{i}.jar" for i in range(4)]
+            + ["hdfs:///shared/dep.jar"],
+            args.jars,
+        )
+        self.assertEqual(
+            b"x" * 3072, self.server.files["/user/test/main/jars/lib3.jar"]
+        )
+        self.assertEqual(10, sum(1 for r in self.server.requests if r[1] == "CREATE"))
+
+        # unchanged files are skipped
+        with open(self.jars[1], "wb") as fp:
+            fp.write(b"y" * 1024)
+        self.server.requests.clear()
+        self.run_plugin()
+        created = {r[2] for r in self.server.requests if r[1] == "CREATE"}
+        self.assertEqual({"/user/test/main/jars/lib1.jar"}, created)
+        self.assertEqual(
+            b"y" * 1024, self.server.files["/user/test/main/jars/lib1.jar"]
+        )
+
+    def test_error(self):
+        self.config.url = "http://127.0.0.1:1"
+        with self.assertRaises(livy.RequestError):
+            self.run_plugin()
+
+    def test_hook_reject(self):
+        with self.assertRaises(ValueError):
+            module.upload_webhdfs("TASK-SUCCESS", argparse.Namespace())
@@ -1,8 +1,13 @@
+import os
+import sys
+import tempfile
 import unittest
 import unittest.mock
 
 import livy.cli.read_log as module
 import livy
+import livy.detect
+import livy.index
 
 
 class TestMain(unittest.TestCase):
@@ -31,6 +36,111 @@ class TestMain(unittest.TestCase):
     def test_read_once(self):
         module.main(["--api-url", "http://example.com", "--no-keep-watch", "1234"])
 
+    def test_read_parallel(self):
+        module.main(
+            [
+                "--api-url",
+                "http://example.com",
+                "--no-keep-watch",
+                "--parallel",
+                "2",
+                "1234",
+            ]
+        )
+        self.reader.read_parallel.assert_called_once_with(2)
+
+    def test_export(self):
+        self.reader.export.return_value = 0
+
+        # stdout
+        self.assertEqual(
+            0,
+            module.main(["--api-url", "http://example.com", "--export", "csv", "1234"]),
+        )
+        self.reader.export.assert_called_once_with(sys.stdout, "csv")
+
+        # file
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "output.jsonl")
+            argv = ["--api-url", "http://example.com", "--export", "jsonl"]
+            argv += ["--output", path, "1234"]
+            self.assertEqual(0, module.main(argv))
+            self.assertTrue(os.path.exists(path))
+
+            # error
+            self.reader.export.side_effect = livy.RequestError(0, "foo")
+            self.assertEqual(1, module.main(argv))
+
+            self.reader.export.side_effect = KeyboardInterrupt()
+            self.assertEqual(1, module.main(argv))
+
+        argv[-2] = os.path.join(tmpdir, "not-exists", "output.jsonl")
+        self.assertEqual(1, module.main(argv))
+
+    def test_index(self):
+        index = unittest.mock.Mock(spec=livy.index.LivyLogIndex)
+        with unittest.mock.patch(
+            "livy.cli.search.open_index", return_value=index
+        ) as open_index:
+            module.main(
+                [
+                    "--api-url",
+                    "http://example.com",
+                    "--no-keep-watch",
+                    "--no-index",
+                    "--no-detect",
+                    "1234",
+                ]
+            )
+            open_index.assert_not_called()
+
+            module.main(
+                [
+                    "--api-url",
+                    "http://example.com",
+                    "--no-keep-watch",
+                    "--index",
+                    "--no-detect",
+                    "1234",
+                ]
+            )
+            self.reader.add_sink.assert_called_once_with(index)
+            index.close.assert_called_once()
+
+            # failed to open index would not block reading
+            open_index.return_value = None
+            self.assertEqual(
+                0,
+                module.main(
+                    [
+                        "--api-url",
+                        "http://example.com",
+                        "--no-keep-watch",
+                        "--index",
+                        "1234",
+                    ]
+                ),
+            )
+
+    def test_detect(self):
+        module.main(
+            ["--api-url", "http://example.com", "--no-keep-watch", "--detect", "1234"]
+        )
+        (sink,), _ = self.reader.add_sink.call_args
+        self.assertIsInstance(sink, livy.detect.LivyFailureDetector)
+
+        self.reader.add_sink.reset_mock()
+        module.main(
+            [
+                "--api-url",
+                "http://example.com",
+                "--no-keep-watch",
+                "--no-detect",
+                "1234",
+            ]
+        )
+        self.reader.add_sink.assert_not_called()
+
     def test_read_error(self):
         self.reader.read.side_effect = livy.RequestError(0, "foo")
         module.main(["--api-url", "http://example.com", "--no-keep-watch", "1234"])
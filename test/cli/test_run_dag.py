@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import livy
+import livy.cli.config
+import livy.cli.run_dag as module
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        # config getter
+        self.config = livy.cli.config.Configuration()
+        self.config.root.api_url = "http://example.com/"
+        self.config.submit.driver_memory = "1g"
+        patcher = unittest.mock.patch("livy.cli.config.load", return_value=self.config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # livy client
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.client.create_batch.side_effect = lambda file, **_: {"id": int(file[4:-3])}
+        self.client.iter_batches.side_effect = lambda _: [
+            {"id": i, "state": "success"} for i in range(10)
+        ]
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = unittest.mock.patch("time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "dag.json")
+
+    def write_dag(self, dag):
+        with open(self.path, "w") as fp:
+            json.dump(dag, fp)
+
+    def test_success(self):
+        self.write_dag(
+            {
+                "defaults": {"queue_name": "etl", "spark_conf": {"a": "1"}},
+                "nodes": [
+                    {"name": "first", "script": "job-1.py"},
+                    {
+                        "name": "second",
+                        "script": "job-2.py",
+                        "depends_on": ["first"],
+                        "spark_conf": {"b": "2"},
+                    },
+                ],
+            }
+        )
+
+        self.assertEqual(0, module.main([self.path, "--queue-limit", "etl=1"]))
+        self.assertEqual(
+            [
+                unittest.mock.call(
+                    file="job-1.py", driver_memory="1g", queue="etl", conf={"a": "1"}
+                ),
+                unittest.mock.call(
+                    file="job-2.py",
+                    driver_memory="1g",
+                    queue="etl",
+                    conf={"a": "1", "b": "2"},
+                ),
+            ],
+            self.client.create_batch.call_args_list,
+        )
+        self.assertTrue(os.path.exists(self.path + ".state.json"))
+
+        # resume: nothing to be submitted
+        self.client.create_batch.reset_mock()
+        self.assertEqual(0, module.main([self.path]))
+        self.client.create_batch.assert_not_called()
+
+        # restart
+        self.assertEqual(0, module.main([self.path, "--restart"]))
+        self.assertEqual(2, self.client.create_batch.call_count)
+
+    def test_failed(self):
+        self.write_dag({"nodes": [{"name": "a", "script": "job-1.py"}]})
+        self.client.iter_batches.side_effect = lambda _: [{"id": 1, "state": "dead"}]
+        self.assertEqual(1, module.main([self.path, "--retries", "1"]))
+        self.assertEqual(2, self.client.create_batch.call_count)
+
+    def test_invalid_dag(self):
+        self.write_dag({"nodes": [{"name": "a", "script": "job-1.py", "foo": 1}]})
+        self.assertEqual(1, module.main([self.path]))
+
+        self.write_dag(
+            {"nodes": [{"name": "a", "script": "a.py", "depends_on": ["b"]}]}
+        )
+        self.assertEqual(1, module.main([self.path]))
+
+        self.client.create_batch.assert_not_called()
+
+    def test_interrupt(self):
+        self.write_dag({"nodes": [{"name": "a", "script": "job-1.py"}]})
+        self.client.iter_batches.side_effect = KeyboardInterrupt()
+        self.assertEqual(1, module.main([self.path]))
+
+
+class TestLoadDag(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "dag.json")
+
+        self.defaults = module.default_arguments(
+            livy.cli.config.Configuration(), "http://example.com"
+        )
+
+    def load(self, content):
+        with open(self.path, "w") as fp:
+            fp.write(content if isinstance(content, str) else json.dumps(content))
+        return module.load_dag(self.path, self.defaults, retries=2)
+
+    def test_success(self):
+        nodes = self.load(
+            {
+                "nodes": [
+                    {"name": "a", "script": "a.py", "queue_name": "q", "retries": 0},
+                    {"name": "b", "script": "b.py", "depends_on": ["a"]},
+                ]
+            }
+        )
+        self.assertEqual("q", nodes[0].queue)
+        self.assertEqual(0, nodes[0].retries)
+        self.assertEqual(("a",), nodes[1].depends_on)
+        self.assertEqual(2, nodes[1].retries)
+        self.assertEqual("b.py", nodes[1].job.script)
+
+    def test_error(self):
+        for content in [
+            "{",
+            [],
+            {"nodes": [1]},
+            {"nodes": [{"script": "a.py"}]},
+            {"nodes": [{"name": "a"}]},
+            {"nodes": [{"name": "a", "script": "a.py", "retries": -1}]},
+            {"nodes": [{"name": "a", "script": "a.py", "depends_on": "b"}]},
+            {"nodes": [], "defaults": [1]},
+        ]:
+            with self.assertRaises(ValueError):
+                self.load(content)
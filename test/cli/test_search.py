@@ -0,0 +1,206 @@
+import datetime
+import logging
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import livy
+import livy.cli.search as module
+import livy.export
+import livy.index
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "index.sqlite3")
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with livy.index.LivyLogIndex(self.path) as index:
+            for i, (hours, level, name, message) in enumerate(
+                [
+                    (48, logging.ERROR, "TaskSetManager", "Lost task 1.0"),
+                    (2, logging.ERROR, "TaskSetManager", "Lost task 2.0"),
+                    (1, logging.INFO, "TaskSetManager", "Finished task 3.0"),
+                ]
+            ):
+                index.write(
+                    livy.export.LivyLogExportRecord(
+                        created=now - datetime.timedelta(hours=hours),
+                        level=level,
+                        name=name,
+                        message=message,
+                        section="stdout",
+                        batch_id=1234,
+                        line=i,
+                    )
+                )
+
+    def test_success(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(
+                [
+                    "--index-path",
+                    self.path,
+                    "--level",
+                    "error",
+                    "--logger",
+                    "TaskSetManager",
+                    "--since",
+                    "24h",
+                ]
+            )
+        self.assertEqual(0, code)
+        self.assertEqual(print_.call_count, 1)
+        self.assertRegex(
+            print_.call_args[0][0],
+            r"^\d{4}-\d{2}-\d{2} .+ \[ERROR\] #1234 TaskSetManager: Lost task 2.0$",
+        )
+
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(["--index-path", self.path, "task", "--batch", "1234"])
+        self.assertEqual(print_.call_count, 3)
+
+    def test_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertEqual(1, module.main(["--index-path", tmpdir]))
+
+    def test_parse_time(self):
+        now = datetime.datetime.now().astimezone()
+        self.assertAlmostEqual(
+            (now - module.parse_time("1h")).total_seconds(), 3600, delta=5
+        )
+        self.assertEqual(
+            module.parse_time("2021-05-01T12:00:00+00:00"),
+            datetime.datetime(2021, 5, 1, 12, tzinfo=datetime.timezone.utc),
+        )
+        self.assertIsNotNone(module.parse_time("2021-05-01").tzinfo)
+        with self.assertRaises(ValueError):
+            module.parse_time("yesterday")
+
+    def test_open_index(self):
+        console = logging.getLogger("test")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = module.open_index(console, os.path.join(tmpdir, "index.sqlite3"))
+            self.assertIsInstance(index, livy.index.LivyLogIndex)
+            index.close()
+
+            with self.assertLogs("test", "WARNING"):
+                self.assertIsNone(module.open_index(console, tmpdir))
+
+
+class TestLiveSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.logs = {
+            1: ["stdout: ", "java.lang.OutOfMemoryError: Java heap space"],
+            2: ["stdout: ", "nothing here"],
+            3: ["outofmemoryerror"] * 2500,
+        }
+
+        def get_batch_log(batch_id, from_=None, size=None):
+            logs = self.logs[batch_id]
+            if from_ is None:
+                return logs[-size:]
+            return logs[from_ : from_ + size]
+
+        self.client.get_batch_log.side_effect = get_batch_log
+        self.client.iter_batches.side_effect = lambda: iter(
+            [
+                {"id": 1, "state": "running"},
+                {"id": 2, "state": "running"},
+                {"id": 3, "state": "dead"},
+            ]
+        )
+
+    def main(self, *argv):
+        with unittest.mock.patch("builtins.print") as print_:
+            code = module.main(["--api-url", "http://example.com", "--live", *argv])
+        return code, [c[0][0] for c in print_.call_args_list]
+
+    def test_success(self):
+        code, output = self.main("OutOfMemoryError", "--state", "running")
+        self.assertEqual(code, 0)
+        self.assertEqual(output, ["#1:1: java.lang.OutOfMemoryError: Java heap space"])
+        self.client.close.assert_called_once()
+
+        # batch range; case insensitive; line windows
+        code, output = self.main(
+            "OutOfMemoryError", "-i", "--batch-range", "2", "3", "--from-line", "10"
+        )
+        self.assertEqual(len(output), 2490)
+        self.assertEqual(output[0], "#3:10: outofmemoryerror")
+
+        code, output = self.main(
+            "OutOfMemoryError", "-i", "--batch", "3", "--tail", "5"
+        )
+        self.assertEqual(output, ["#3: outofmemoryerror"] * 5)
+
+        code, output = self.main(
+            "outofmemoryerror", "-F", "--batch", "3", "--max-lines", "1500"
+        )
+        self.assertEqual(len(output), 1500)
+
+    def test_error(self):
+        # argument error
+        for argv in (
+            ["--batch", "1"],
+            ["foo"],
+            ["foo", "--batch", "1", "--level", "ERROR"],
+            ["foo", "--batch", "1", "--tail", "1", "--max-lines", "1"],
+        ):
+            with self.assertRaises(SystemExit):
+                self.main(*argv)
+        with self.assertRaises(SystemExit):
+            module.main(["--state", "running"])
+
+        # invalid pattern
+        self.assertEqual(self.main("(", "--batch", "1")[0], 1)
+
+        # list batches
+        self.client.iter_batches.side_effect = livy.RequestError(0, "foo")
+        self.assertEqual(self.main("foo", "--state", "running")[0], 1)
+
+        # read log; other batches are not affected
+        self.logs.pop(2)
+        code, output = self.main("Error", "--batch", "1", "2")
+        self.assertEqual(code, 1)
+        self.assertEqual(len(output), 1)
+
+    def test_select_batches(self):
+        self.assertEqual(module.select_batches(self.client, [3, 1, 3], None), [1, 3])
+        self.client.iter_batches.assert_not_called()
+
+        self.assertEqual(module.select_batches(self.client, [], ["running"]), [1, 2])
+        self.assertEqual(
+            module.select_batches(self.client, [2, 3], ["running", "dead"]), [2, 3]
+        )
+
+    def test_grep_batches_concurrent(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def get_batch_log(batch_id, from_=None, size=None):
+            if from_ == 0:
+                barrier.wait()  # all batches are fetched at the same time
+                return ["foo"]
+            return []
+
+        self.client.get_batch_log.side_effect = get_batch_log
+
+        hits = []
+        errors = module.grep_batches(
+            self.client,
+            [1, 2, 3],
+            module.build_matcher("foo"),
+            lambda *args: hits.append(args),
+            max_workers=3,
+        )
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(hits), [(1, 0, "foo"), (2, 0, "foo"), (3, 0, "foo")])
@@ -1,12 +1,20 @@
 import argparse
 import datetime
+import json
 import logging
+import os
+import tempfile
 import unittest
 import unittest.mock
 
 import livy.cli.submit as module
 import livy.cli.config
 import livy
+import livy.export
+import livy.fingerprint
+import livy.detect
+import livy.history
+import livy.index
 
 
 class TestMain(unittest.TestCase):
@@ -14,6 +22,7 @@ class TestMain(unittest.TestCase):
         # config getter
         self.config = livy.cli.config.Configuration()
         self.config.root.api_url = "http://example.com/"
+        self.config.history.path = ":memory:"
         patcher = unittest.mock.patch("livy.cli.config.load", return_value=self.config)
         patcher.start()
         self.addCleanup(patcher.stop)
@@ -70,6 +79,208 @@ class TestMain(unittest.TestCase):
             ),
         )
 
+    def test_timeline(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, "timeline.json")
+
+        self.client.get_batch_state.return_value = "success"
+        argv = ["test.py", "--timeline", path, "--on-pre-submit", "test:hook"]
+        self.assertEqual(0, module.main(argv))
+
+        with open(path) as fp:
+            data = json.load(fp)
+        self.assertEqual(
+            [p["phase"] for p in data["phases"]],
+            [
+                "config",
+                "pre_submit_hooks:test:hook",
+                "pre_submit_hooks",
+                "server_check",
+                "submit",
+                "queue_wait",
+                "running",
+                "log_drain",
+                "post_hooks",
+            ],
+        )
+
+    def test_history(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.history.path = os.path.join(tmpdir.name, "history.sqlite3")
+
+        def read_until_finish():
+            for sink in sinks:
+                for second, message in [
+                    (0, "Adding task set 0.0 with 2 tasks"),
+                    (8, "Removed TaskSet 0.0, whose tasks have all completed"),
+                ]:
+                    sink.write(
+                        livy.export.LivyLogExportRecord(
+                            created=datetime.datetime(
+                                2021, 5, 1, 0, 0, second, tzinfo=datetime.timezone.utc
+                            ),
+                            level=logging.INFO,
+                            name="YarnScheduler",
+                            message=message,
+                            section="stdout",
+                            batch_id=1234,
+                            line=None,
+                        )
+                    )
+
+        sinks = []
+        self.reader.add_sink.side_effect = sinks.append
+        self.reader.read_until_finish.side_effect = read_until_finish
+        self.client.get_batch_state.return_value = "success"
+
+        with unittest.mock.patch("livy.cli.logging.set_estimate") as set_estimate:
+            self.assertEqual(0, module.main(["test.py", "--num-executors", "4"]))
+            set_estimate.assert_not_called()
+
+            sinks.clear()
+            with self.assertLogs("livy-read-log.main") as logs:
+                self.assertEqual(0, module.main(["test.py"]))
+            set_estimate.assert_called_once_with(unittest.mock.ANY, {"0": 8.0})
+
+        self.assertTrue(any("by the median of past 1 runs" in m for m in logs.output))
+
+        with livy.history.LivyRunHistory(self.config.history.path) as history:
+            runs = history.runs()
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[1].key, os.path.abspath("test.py"))
+        self.assertEqual(runs[1].batch_id, 1234)
+        self.assertEqual(runs[1].state, "success")
+        self.assertEqual(runs[1].resources["num_executors"], 4)
+        self.assertEqual(runs[1].stages, {"0": 8.0})
+
+        # not recorded
+        self.assertEqual(0, module.main(["test.py", "--no-history"]))
+        self.assertEqual(0, module.main(["test.py", "--no-watch-log"]))
+        with livy.history.LivyRunHistory(self.config.history.path) as history:
+            self.assertEqual(len(history.runs()), 2)
+
+    def test_detect(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.history.path = os.path.join(tmpdir.name, "history.sqlite3")
+
+        def read_until_finish():
+            for sink in sinks:
+                for executor in ("1", "2"):
+                    sink.write(
+                        livy.export.LivyLogExportRecord(
+                            created=None,
+                            level=logging.ERROR,
+                            name="YarnScheduler",
+                            message=f"Lost executor {executor} on host1: Container "
+                            "killed by YARN for exceeding memory limits.",
+                            section="stderr",
+                            batch_id=1234,
+                            line=None,
+                        )
+                    )
+
+        sinks = []
+        self.reader.add_sink.side_effect = sinks.append
+        self.reader.read_until_finish.side_effect = read_until_finish
+        self.client.get_batch_state.return_value = "dead"
+
+        with self.assertLogs("livy.detect", "WARNING") as logs:
+            self.assertEqual(
+                1, module.main(["test.py", "--detect-thresholds", "executor-lost=2"])
+            )
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("Detected yarn-memory-kill 1 times", logs.output[0])
+        self.assertIn("Detected executor-lost 2 times", logs.output[1])
+
+        with livy.history.LivyRunHistory(self.config.history.path) as history:
+            (run,) = history.runs()
+        self.assertEqual(
+            run.metrics, {"failures": {"executor-lost": 2, "yarn-memory-kill": 2}}
+        )
+
+        # not detected
+        sinks.clear()
+        self.assertEqual(1, module.main(["test.py", "--no-detect"]))
+        self.assertFalse(
+            any(isinstance(s, livy.detect.LivyFailureDetector) for s in sinks)
+        )
+
+        # invalid
+        self.assertEqual(1, module.main(["test.py", "--detect-thresholds", "foo=1"]))
+        self.assertEqual(1, module.main(["test.py", "--detect-thresholds", "gc"]))
+
+    def test_recommend(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.history.path = os.path.join(tmpdir.name, "history.sqlite3")
+
+        def read_until_finish():
+            for sink in sinks:
+                sink.write(
+                    livy.export.LivyLogExportRecord(
+                        created=None,
+                        level=logging.INFO,
+                        name="TaskSetManager",
+                        message="Finished task 0.0 in stage 3.0 (TID 1) in 20 ms on "
+                        "host1 (executor 2) (1/1)",
+                        section="stderr",
+                        batch_id=1234,
+                        line=None,
+                    )
+                )
+
+        sinks = []
+        self.reader.add_sink.side_effect = sinks.append
+        self.reader.read_until_finish.side_effect = read_until_finish
+        self.client.get_batch_state.return_value = "success"
+
+        # task metrics are recorded
+        argv = ["test.py", "--executor-memory", "4g", "--num-executors", "4"]
+        self.assertEqual(0, module.main(argv))
+        with livy.history.LivyRunHistory(self.config.history.path) as history:
+            (run,) = history.runs()
+            self.assertEqual(run.metrics["tasks"], {"3": 1})
+            self.assertEqual(run.metrics["executors"], 1)
+
+            for _ in range(3):
+                history.add(
+                    key=run.key,
+                    script="test.py",
+                    batch_id=1,
+                    state="dead",
+                    submitted=run.submitted,
+                    duration=10.0,
+                    resources=run.resources,
+                    metrics={"failures": {"yarn-memory-kill": 1}},
+                )
+
+        # suggest
+        self.client.create_batch.reset_mock()
+        with self.assertLogs("livy-read-log.main") as logs:
+            self.assertEqual(0, module.main(argv + ["--recommend"]))
+        self.assertTrue(
+            any("Recommend executor_memory=5g (current: 4g)" in m for m in logs.output)
+        )
+        self.assertEqual(self.client.create_batch.call_args[1]["executor_memory"], "4g")
+
+        # apply
+        self.client.create_batch.reset_mock()
+        self.assertEqual(0, module.main(argv + ["--apply-recommendation"]))
+        self.assertEqual(self.client.create_batch.call_args[1]["executor_memory"], "5g")
+
+        # requires history
+        with self.assertLogs("livy-read-log.main", "WARNING") as logs:
+            self.assertEqual(0, module.main(argv + ["--recommend", "--no-history"]))
+        self.assertIn("requires the run history", logs.output[0])
+
+        # flag before the script
+        self.client.create_batch.reset_mock()
+        self.assertEqual(0, module.main(["--recommend", "test.py"]))
+        self.assertEqual(self.client.create_batch.call_args[1]["file"], "test.py")
+
     def test_server_error(self):
         self.client.check.side_effect = livy.RequestError(0, "Test error")
         self.assertEqual(1, module.main(["test.py"]))
@@ -90,6 +301,264 @@ class TestMain(unittest.TestCase):
         self.reader.read_until_finish.side_effect = KeyboardInterrupt()
         self.assertEqual(1, module.main(["test.py"]))
 
+    def test_index(self):
+        self.client.get_batch_state.return_value = "success"
+        index = unittest.mock.Mock(spec=livy.index.LivyLogIndex)
+        with unittest.mock.patch("livy.cli.search.open_index", return_value=index):
+            self.assertEqual(0, module.main(["test.py", "--index"]))
+        self.reader.add_sink.assert_any_call(index)
+        index.close.assert_called_once()
+
+    def test_admission(self):
+        self.client.iter_batches.return_value = []
+        self.assertEqual(
+            0,
+            module.main(
+                [
+                    "test.py",
+                    "--queue-name",
+                    "etl",
+                    "--queue-limit",
+                    "etl=1",
+                    "--no-watch-log",
+                ]
+            ),
+        )
+        self.client.iter_batches.assert_called_once()
+        self.client.create_batch.assert_called_once_with(file="test.py", queue="etl")
+
+    def test_admission_full_queue(self):
+        # the queue is full of the batches from other process, until one ended
+        self.client.iter_batches.side_effect = [
+            [{"id": 1, "state": "running", "owner": "me"}],
+            [{"id": 1, "state": "success", "owner": "me"}],
+        ]
+        self.client.get_batch_log.return_value = ["stdout: ", "\t queue: root.etl"]
+
+        argv = ["test.py", "--queue-name", "etl", "--queue-limit", "etl=1"]
+        argv += ["--admission-interval", "0.01", "--no-watch-log"]
+        with unittest.mock.patch("getpass.getuser", return_value="me"):
+            self.assertEqual(0, module.main(argv))
+        self.assertEqual(2, self.client.iter_batches.call_count)
+        self.client.create_batch.assert_called_once_with(file="test.py", queue="etl")
+
+        # batches of other users are not counted
+        self.client.iter_batches.side_effect = None
+        self.client.iter_batches.return_value = [
+            {"id": 1, "state": "running", "owner": "me"}
+        ]
+        self.client.create_batch.reset_mock()
+        self.assertEqual(0, module.main(argv + ["--count-user", "someone"]))
+        self.client.create_batch.assert_called_once()
+
+    def test_idempotent(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.submit.fingerprint_cache = os.path.join(tmpdir.name, "fp.json")
+        self.client.iter_batches.return_value = []
+
+        # first run: submit with a name carries fingerprint
+        self.assertEqual(0, module.main(["test.py", "--idempotent", "--no-watch-log"]))
+        name = self.client.create_batch.call_args[1]["name"]
+        self.assertTrue(name.startswith("livy-"))
+
+        # second run: attach to the running one
+        self.client.create_batch.reset_mock()
+        self.get_function.reset_mock()
+        self.client.iter_batches.return_value = [
+            {"id": 1234, "name": name, "state": "running"}
+        ]
+        self.client.get_batch_state.return_value = "success"
+        with unittest.mock.patch("livy.LivyBatchLogReader") as reader:
+            self.assertEqual(
+                0,
+                module.main(["test.py", "--idempotent", "--on-pre-submit", "hook"]),
+            )
+        self.client.create_batch.assert_not_called()
+        self.get_function.assert_not_called()
+        reader.assert_called_once_with(self.client, 1234, prefix=None)
+
+        # given name: matched by cached id
+        self.assertEqual(
+            0,
+            module.main(
+                ["test.py", "--idempotent", "--session-name", "foo", "--no-watch-log"]
+            ),
+        )
+        self.client.create_batch.assert_called_once()
+        self.client.iter_batches.return_value = [
+            {"id": 1234, "name": "foo", "state": "running"}
+        ]
+        self.client.create_batch.reset_mock()
+        self.assertEqual(
+            0,
+            module.main(
+                ["test.py", "--idempotent", "--session-name", "foo", "--no-watch-log"]
+            ),
+        )
+        self.client.create_batch.assert_not_called()
+
+    def test_idempotent_uncached_name(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.submit.fingerprint_cache = os.path.join(tmpdir.name, "fp.json")
+        self.client.iter_batches.return_value = [
+            {"id": 1234, "name": "foo", "state": "running"}
+        ]
+        argv = ["test.py", "--idempotent", "--session-name", "foo", "--no-watch-log"]
+
+        # a different script
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO Client: Uploading resource file:/tmp/other.py",
+        ]
+        self.assertEqual(0, module.main(argv))
+        self.client.create_batch.assert_called_once()
+
+        # same script, submitted from other machine
+        os.remove(self.config.submit.fingerprint_cache)
+        self.client.create_batch.reset_mock()
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO Client: Uploading resource file:/tmp/test.py",
+        ]
+        self.assertEqual(0, module.main(argv))
+        self.client.create_batch.assert_not_called()
+
+        # no log yet
+        os.remove(self.config.submit.fingerprint_cache)
+        self.client.get_batch_log.return_value = []
+        self.assertEqual(0, module.main(argv))
+        self.client.create_batch.assert_not_called()
+
+        # attached batch is cached; no need to read the log again
+        self.client.get_batch_log.reset_mock()
+        self.assertEqual(0, module.main(argv))
+        self.client.create_batch.assert_not_called()
+        self.client.get_batch_log.assert_not_called()
+
+    def test_retry(self):
+        self.client.create_batch.side_effect = [{"id": 1}, {"id": 2}, {"id": 3}]
+        self.client.get_batch_state.side_effect = ["dead", "dead", "success"]
+
+        sinks = []
+        self.reader.add_sink.side_effect = sinks.append
+
+        def read_until_finish():
+            record = unittest.mock.Mock(message="Container preempted by scheduler")
+            record.name = "ApplicationMaster"
+            for sink in sinks:
+                sink.write(record)
+
+        self.reader.read_until_finish.side_effect = read_until_finish
+
+        with unittest.mock.patch(
+            "livy.LivyBatchLogReader"
+        ) as reader, unittest.mock.patch("time.sleep") as sleep:
+            reader.return_value = self.reader
+            self.assertEqual(
+                0,
+                module.main(
+                    [
+                        "test.py",
+                        "--on-pre-submit",
+                        "test_hook",
+                        "--max-attempts",
+                        "3",
+                        "--retry-on",
+                        "yarn-preemption",
+                        "--retry-backoff",
+                        "10",
+                    ]
+                ),
+            )
+
+        self.assertEqual(3, self.client.create_batch.call_count)
+        self.get_function.assert_called_once()  # hooks are not run again
+        reader.assert_called_with(self.client, 3, prefix="attempt-3.")
+        sleep.assert_has_calls([unittest.mock.call(10), unittest.mock.call(20)])
+
+    def test_retry_attached(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.submit.fingerprint_cache = os.path.join(tmpdir.name, "fp.json")
+
+        args = ["test.py", "--idempotent", "--session-name", "foo"]
+        self.assertEqual(0, module.main(args + ["--no-watch-log"]))
+
+        # attach to the running batch, then it is failed and resubmitted
+        self.client.create_batch.reset_mock()
+        self.client.create_batch.return_value = {"id": 5678}
+        self.client.iter_batches.return_value = [
+            {"id": 1234, "name": "foo", "state": "running"}
+        ]
+        self.client.get_batch_state.side_effect = ["dead", "success"]
+
+        def hook(source, args):
+            args.script = "hdfs://uploaded/test.py"
+            return args
+
+        self.get_function.return_value = hook
+        with unittest.mock.patch("time.sleep"):
+            self.assertEqual(
+                0,
+                module.main(
+                    args + ["--on-pre-submit", "upload", "--max-attempts", "2"]
+                ),
+            )
+
+        self.get_function.assert_called_once_with("upload")
+        self.client.create_batch.assert_called_once()
+        self.assertEqual(
+            "hdfs://uploaded/test.py", self.client.create_batch.call_args[1]["file"]
+        )
+
+    def test_history_attached(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.config.history.path = os.path.join(tmpdir.name, "history.sqlite3")
+        self.config.submit.fingerprint_cache = os.path.join(tmpdir.name, "fp.json")
+        self.client.get_batch_state.return_value = "success"
+
+        args = ["test.py", "--idempotent", "--session-name", "foo"]
+        self.assertEqual(0, module.main(args))
+
+        # attached batch is neither recorded nor timed
+        self.client.iter_batches.return_value = [
+            {"id": 1234, "name": "foo", "state": "running"}
+        ]
+        with unittest.mock.patch("livy.cli.logging.set_estimate") as set_estimate:
+            self.assertEqual(0, module.main(args))
+        set_estimate.assert_not_called()
+        self.client.create_batch.assert_called_once()
+
+        with livy.history.LivyRunHistory(self.config.history.path) as history:
+            self.assertEqual(len(history.runs()), 1)
+
+    def test_retry_killed(self):
+        self.client.get_batch_state.return_value = "killed"
+        with unittest.mock.patch("time.sleep") as sleep:
+            self.assertEqual(1, module.main(["test.py", "--max-attempts", "3"]))
+        self.client.create_batch.assert_called_once()
+        sleep.assert_not_called()
+
+    def test_retry_not_matched(self):
+        self.client.get_batch_state.return_value = "dead"
+        with unittest.mock.patch("time.sleep") as sleep:
+            self.assertEqual(
+                1,
+                module.main(
+                    ["test.py", "--max-attempts", "3", "--retry-on", "preempted"]
+                ),
+            )
+        self.client.create_batch.assert_called_once()
+        sleep.assert_not_called()
+
+        # invalid signature
+        self.assertEqual(
+            1, module.main(["test.py", "--max-attempts", "3", "--retry-on", "("])
+        )
+
     def test_ending_get_batch_state(self):
         self.client.get_batch_state.side_effect = livy.RequestError(0, "Test error")
         self.assertEqual(1, module.main(["test.py"]))
@@ -99,6 +568,198 @@ class TestMain(unittest.TestCase):
         self.assertEqual(1, module.main(["test.py", "--on-task-failed", "test_hook"]))
 
 
+class TestManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        # config getter
+        self.config = livy.cli.config.Configuration()
+        self.config.root.api_url = "http://example.com/"
+        self.config.history.path = ":memory:"
+        patcher = unittest.mock.patch("livy.cli.config.load", return_value=self.config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # livy client
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.client.create_batch.side_effect = lambda file, **_: {"id": int(file[4:-3])}
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.manifest = os.path.join(tmpdir.name, "jobs.jsonl")
+        self.results = os.path.join(tmpdir.name, "results.jsonl")
+
+    def write_manifest(self, *entries):
+        with open(self.manifest, "w") as fp:
+            for entry in entries:
+                fp.write(entry if isinstance(entry, str) else json.dumps(entry))
+                fp.write("\n")
+
+    def read_results(self):
+        with open(self.results) as fp:
+            return sorted((json.loads(line) for line in fp), key=lambda r: r["line"])
+
+    def test_success(self):
+        self.write_manifest(
+            {"script": "job-1.py", "spark_conf": {"foo": "bar"}},
+            "",
+            {"script": "job-2.py", "args": ["a"], "queue_name": "q"},
+        )
+
+        self.assertEqual(
+            0,
+            module.main(
+                [
+                    "--manifest",
+                    self.manifest,
+                    "--results",
+                    self.results,
+                    "--spark-conf",
+                    "default=1",
+                    "--driver-memory",
+                    "1g",
+                ]
+            ),
+        )
+
+        self.client.create_batch.assert_any_call(
+            file="job-1.py", driver_memory="1g", conf={"default": "1", "foo": "bar"}
+        )
+        self.client.create_batch.assert_any_call(
+            file="job-2.py",
+            args=["a"],
+            driver_memory="1g",
+            queue="q",
+            conf={"default": "1"},
+        )
+
+        results = self.read_results()
+        self.assertEqual([1, 3], [r["line"] for r in results])
+        self.assertEqual([1, 2], [r["batch_id"] for r in results])
+        self.assertEqual(
+            {"script": "job-1.py", "spark_conf": {"foo": "bar"}}, results[0]["entry"]
+        )
+
+    def test_hook(self):
+        self.write_manifest(
+            {"script": "job-1.py", "on_pre_submit": ["good"]},
+            {"script": "job-2.py", "on_pre_submit": ["bad"]},
+        )
+
+        def get_function(name):
+            if name == "bad":
+                return None
+
+            def hook(_, args):
+                args.session_name = "hooked"
+                return args
+
+            return hook
+
+        with unittest.mock.patch("livy.cli.submit.get_function", get_function):
+            self.assertEqual(
+                1, module.main(["--manifest", self.manifest, "--results", self.results])
+            )
+
+        self.client.create_batch.assert_called_once_with(file="job-1.py", name="hooked")
+
+        results = self.read_results()
+        self.assertEqual(1, results[0]["batch_id"])
+        self.assertIsNone(results[1]["batch_id"])
+        self.assertIn("Pre-submit action failed", results[1]["error"])
+
+    def test_admission(self):
+        self.client.iter_batches.return_value = []
+        self.write_manifest(
+            {"script": "job-1.py"},
+            {"script": "job-2.py", "priority": 1},
+            {"script": "job-3.py", "priority": -1},
+        )
+        self.assertEqual(
+            0,
+            module.main(
+                [
+                    "--manifest",
+                    self.manifest,
+                    "--results",
+                    self.results,
+                    "--default-queue-limit",
+                    "1",
+                    "--admission-interval",
+                    "0.01",
+                    "--max-workers",
+                    "1",
+                ]
+            ),
+        )
+        self.assertEqual(
+            ["job-2.py", "job-1.py", "job-3.py"],
+            [c[1]["file"] for c in self.client.create_batch.call_args_list],
+        )
+
+    def test_idempotent(self):
+        self.config.submit.fingerprint_cache = os.path.join(
+            os.path.dirname(self.manifest), "fp.json"
+        )
+        self.write_manifest({"script": "job-1.py"}, {"script": "job-2.py"})
+
+        fp = livy.fingerprint.fingerprint({"file": "job-1.py"}, "http://example.com/")
+        self.client.iter_batches.return_value = [
+            {"id": 99, "name": livy.fingerprint.batch_name(fp), "state": "running"}
+        ]
+
+        self.assertEqual(
+            0,
+            module.main(
+                ["--manifest", self.manifest, "--results", self.results, "--idempotent"]
+            ),
+        )
+        self.client.create_batch.assert_called_once()
+        self.assertEqual("job-2.py", self.client.create_batch.call_args[1]["file"])
+
+        results = self.read_results()
+        self.assertEqual([99, 2], [r["batch_id"] for r in results])
+        self.assertEqual([True, False], [r["attached"] for r in results])
+
+        cache = livy.fingerprint.LivyFingerprintCache(
+            self.config.submit.fingerprint_cache
+        )
+        self.assertEqual(
+            2,
+            cache.get(
+                livy.fingerprint.fingerprint(
+                    {"file": "job-2.py"}, "http://example.com/"
+                )
+            )[0],
+        )
+
+    def test_print_results(self):
+        self.write_manifest({"script": "job-5.py"})
+        with unittest.mock.patch("builtins.print") as print_:
+            self.assertEqual(0, module.main(["--manifest", self.manifest]))
+        self.assertEqual(5, json.loads(print_.call_args[0][0])["batch_id"])
+
+    def test_invalid_manifest(self):
+        self.write_manifest({"script": "job-1.py"}, {"no_such_key": 1})
+        self.assertEqual(1, module.main(["--manifest", self.manifest]))
+
+        self.write_manifest({"args": ["a"]})
+        self.assertEqual(1, module.main(["--manifest", self.manifest]))
+
+        self.write_manifest("{")
+        self.assertEqual(1, module.main(["--manifest", self.manifest]))
+
+        self.client.create_batch.assert_not_called()
+
+    def test_argument(self):
+        self.write_manifest({"script": "job-1.py"})
+        with self.assertRaises(SystemExit):
+            module.main(["test.py", "--manifest", self.manifest])
+        with self.assertRaises(SystemExit):
+            module.main([])
+
+
 class TestHelperFunc(unittest.TestCase):
     def test_argument(self):
         # memory size
@@ -111,6 +772,12 @@ class TestHelperFunc(unittest.TestCase):
         with self.assertRaises(ValueError):
             module.argkvpair("1234")
 
+    def test_argqueuelimit(self):
+        self.assertEqual(("a=b", 3), module.argqueuelimit("a=b=3"))
+        for text in ["foo", "=3", "q=0", "q=x"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                module.argqueuelimit(text)
+
     def test_get_function(self):
         # success
         func = module.get_function("livy.cli.submit:get_function")
@@ -152,6 +819,15 @@ class TestHelperFunc(unittest.TestCase):
             patch.return_value = lambda x, y: None
             module.run_hook(logger, "TEST", args, ["foo"])
 
+    def test_run_hook_durations(self):
+        logger = logging.getLogger(__name__)
+        with unittest.mock.patch(
+            "livy.cli.submit.get_function", return_value=lambda x, y: y
+        ):
+            args = module.run_hook(logger, "PRE-SUBMIT", argparse.Namespace(), ["a:b"])
+            args = module.run_hook(logger, "TASK", args, ["c:d"])
+        self.assertEqual({"pre-submit:a:b", "task:c:d"}, set(args.hook_durations))
+
     def test_human_readable_timeperiod(self):
         self.assertEqual(
             "1h 5s",
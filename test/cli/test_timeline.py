@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import livy.cli.timeline as module
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class TestSubmitTimeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.timeline = module.SubmitTimeline(self.clock)
+
+    def test_phase(self):
+        self.clock.time += 1.0
+        with self.timeline.phase("submit", 1):
+            self.clock.time += 2.5
+
+        with self.assertRaises(ValueError), self.timeline.phase("post_hooks"):
+            self.clock.time += 0.5
+            raise ValueError()
+
+        self.assertEqual(
+            self.timeline.phases,
+            [
+                {
+                    "phase": "submit",
+                    "attempt": 1,
+                    "start": 1.0,
+                    "end": 3.5,
+                    "duration": 2.5,
+                },
+                {
+                    "phase": "post_hooks",
+                    "attempt": None,
+                    "start": 3.5,
+                    "end": 4.0,
+                    "duration": 0.5,
+                },
+            ],
+        )
+
+        lines = self.timeline.summary()
+        self.assertEqual(lines[0].split(), ["Phase", "Attempt", "Start", "Duration"])
+        self.assertEqual(lines[1].split(), ["submit", "1", "1.00s", "2.50s"])
+        self.assertEqual(lines[2].split(), ["post_hooks", "-", "3.50s", "0.50s"])
+
+    def test_recorder(self):
+        record = self.timeline.recorder("post_hooks", 2)
+        self.clock.time += 3.0
+        record("test:hook", 1.0)
+
+        (phase,) = self.timeline.phases
+        self.assertEqual(phase["phase"], "post_hooks:test:hook")
+        self.assertEqual(phase["attempt"], 2)
+        self.assertEqual((phase["start"], phase["end"]), (2.0, 3.0))
+
+    def test_tracker(self):
+        tracker = self.timeline.tracker(2)
+
+        self.clock.time += 3.0
+        tracker("starting")
+        tracker.write(unittest.mock.Mock())
+        self.clock.time += 4.0
+        tracker("running")
+        tracker.write(unittest.mock.Mock())
+        self.clock.time += 10.0
+        tracker("running")
+        tracker("success")
+        tracker("success")
+        self.clock.time += 1.0
+        tracker.close()
+
+        self.assertEqual(
+            [(p["phase"], p["attempt"], p["duration"]) for p in self.timeline.phases],
+            [
+                ("queue_wait", 2, 7.0),
+                ("first_log", 2, 3.0),
+                ("running", 2, 10.0),
+                ("log_drain", 2, 1.0),
+            ],
+        )
+
+    def test_tracker_not_watched(self):
+        tracker = self.timeline.tracker()
+        self.clock.time += 5.0
+        tracker.close()
+
+        self.assertEqual(
+            [(p["phase"], p["duration"]) for p in self.timeline.phases],
+            [("queue_wait", 5.0), ("running", 0.0), ("log_drain", 0.0)],
+        )
+
+    def test_dump(self):
+        self.timeline.add("config", 0.0, 0.25)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, "timeline.json")
+        self.timeline.dump(path)
+
+        with open(path) as fp:
+            data = json.load(fp)
+        self.assertIn("started", data)
+        self.assertEqual(data["phases"][0]["phase"], "config")
+        self.assertEqual(data["phases"][0]["duration"], 0.25)
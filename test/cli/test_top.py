@@ -0,0 +1,158 @@
+import io
+import os
+import time
+import unittest
+import unittest.mock
+
+import livy
+import livy.cli.top as module
+
+
+class DashboardTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.client.host = "example.com"
+
+        self.batches = [
+            {"id": i, "state": "running", "appId": f"application_{i}", "log": []}
+            for i in range(1500)
+        ]
+        self.batches += [{"id": 1500, "state": "success"}]
+        self.client.iter_batches.side_effect = lambda page_size: iter(self.batches)
+
+        self.client.get_batch_log.side_effect = lambda id_, from_=None, size=None: [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO Client: ",
+            "\t queue: root.default",
+            f"latest log of {id_}",
+        ]
+
+        self.dashboard = module.Dashboard(self.client, budget=5, page_size=2000)
+        self.addCleanup(self.dashboard.close)
+
+    def test_refresh(self):
+        self.dashboard.refresh(20)
+        self.assertEqual(len(self.dashboard.rows), 1500)
+        self.client.iter_batches.assert_called_once_with(2000)
+
+        # budget
+        self.assertEqual(self.client.get_batch_log.call_count, 5)
+        self.assertEqual(self.dashboard.num_requests, 6)
+
+        # newest batches on screen are updated first
+        row = self.dashboard.rows[1499]
+        self.assertTrue(row.head_loaded)
+        self.assertEqual(row.queue, "root.default")
+        self.assertEqual(row.latest_log, "latest log of 1499")
+        self.assertEqual(row.start_time.year, 2021)
+        self.assertFalse(self.dashboard.rows[1494].head_loaded)
+
+        self.dashboard.refresh(20)
+        self.assertTrue(self.dashboard.rows[1494].head_loaded)
+
+        # ended batches are dropped; logs from listing are used
+        self.batches[1499]["state"] = "dead"
+        self.batches[1498]["log"] = ["stdout: ", "from listing", "\nstderr: "]
+        self.dashboard.refresh(20)
+        self.assertNotIn(1499, self.dashboard.rows)
+        self.assertEqual(self.dashboard.rows[1498].latest_log, "from listing")
+
+    def test_refresh_error(self):
+        self.client.get_batch_log.side_effect = livy.RequestError(0, "foo")
+        self.dashboard.refresh(20)
+        self.assertFalse(self.dashboard.rows[1499].head_loaded)
+
+        self.client.iter_batches.side_effect = livy.RequestError(0, "foo")
+        self.dashboard.refresh(20)
+        self.assertIn("Failed to list batches", self.dashboard.error)
+        self.assertIn("Failed to list batches", self.dashboard.render(200, 10)[0])
+
+    def test_render(self):
+        self.dashboard.refresh(3)
+        lines = self.dashboard.render(80, 5)
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(all(len(line) <= 80 for line in lines))
+        self.assertIn("1500 running, 0 starting", lines[0])
+        self.assertRegex(
+            lines[1], r"^\s+ID\s+STATE\s+AGE\s+APP ID\s+QUEUE\s+LATEST LOG"
+        )
+        self.assertRegex(
+            lines[2], r"^\s+1499 running\s+\d+d\d\dh application_1499\s+root.default"
+        )
+
+    def test_render_unlimited(self):
+        self.dashboard.refresh()
+        lines = self.dashboard.render()
+        self.assertEqual(len(lines), 1502)
+        self.assertTrue(lines[-1].lstrip().startswith("0 running"))
+
+    def test_responsive(self):
+        self.client.get_batch_log.side_effect = None
+        self.client.get_batch_log.return_value = []
+        self.batches *= 10  # duplicated batches are merged
+
+        tick = time.monotonic()
+        for _ in range(10):
+            self.dashboard.refresh(50)
+            self.dashboard.render(200, 52)
+        self.assertLess(time.monotonic() - tick, 1.0)
+
+
+class AnsiScreenTester(unittest.TestCase):
+    def test_draw(self):
+        buf = io.StringIO()
+        with module.AnsiScreen(buf) as screen:
+            screen.draw(["foo", "bar", "baz"])
+            start = buf.tell()
+            screen.draw(["foo", "qax"])
+            diff = buf.getvalue()[start:]
+
+        self.assertEqual(diff, "\x1b[2;1Hqax\x1b[K\x1b[3;1H\x1b[K")
+        self.assertTrue(buf.getvalue().endswith("\x1b[?1049l"))
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.client.host = "example.com"
+        self.client.iter_batches.return_value = iter(
+            [{"id": 1, "state": "starting", "appId": None, "log": ["init"]}]
+        )
+        self.client.get_batch_log.return_value = []
+        patcher = unittest.mock.patch("livy.LivyClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_once(self):
+        with unittest.mock.patch("builtins.print") as print_:
+            self.assertEqual(
+                0, module.main(["--api-url", "http://example.com", "--once"])
+            )
+        output = [c[0][0] for c in print_.call_args_list]
+        self.assertEqual(len(output), 3)
+        self.assertRegex(output[2], r"^\s+1 starting\s+- -\s+-\s+init$")
+
+    def test_pipe(self):
+        self.client.iter_batches.return_value = iter(
+            [
+                {"id": i, "state": "running", "appId": None, "log": [f"log {i}"]}
+                for i in range(100)
+            ]
+        )
+        with unittest.mock.patch("builtins.print") as print_, unittest.mock.patch(
+            "sys.stdout"
+        ) as stdout, unittest.mock.patch(
+            "shutil.get_terminal_size", return_value=os.terminal_size((80, 24))
+        ):
+            stdout.isatty.return_value = False
+            self.assertEqual(0, module.main(["--api-url", "http://example.com"]))
+        output = [c[0][0] for c in print_.call_args_list]
+        self.assertEqual(len(output), 102)
+
+    def test_loop(self):
+        with unittest.mock.patch("sys.stdout") as stdout, unittest.mock.patch(
+            "time.sleep", side_effect=KeyboardInterrupt()
+        ):
+            stdout.isatty.return_value = True
+            self.assertEqual(0, module.main(["--api-url", "http://example.com"]))
+        stdout.write.assert_called()
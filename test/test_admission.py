@@ -0,0 +1,192 @@
+import threading
+import time
+import unittest
+import unittest.mock
+
+import livy
+import livy.admission as module
+
+
+class LivyAdmissionControllerTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.lock = threading.Lock()
+        self.listing = []
+        self.created = []
+
+        def create_batch(file, **_):
+            with self.lock:
+                self.created.append(file)
+                return {"id": 100 + len(self.created)}
+
+        def iter_batches(_):
+            with self.lock:
+                return list(self.listing)
+
+        self.client.create_batch.side_effect = create_batch
+        self.client.iter_batches.side_effect = iter_batches
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "\t queue: root.etl",
+        ]
+
+    def run_thread(self, controller, **kwargs):
+        thread = threading.Thread(target=controller.create_batch, kwargs=kwargs)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def test_no_limit(self):
+        controller = module.LivyAdmissionController(self.client, {"etl": 1})
+        controller.create_batch(file="a.py", queue="adhoc")
+        self.client.iter_batches.assert_not_called()
+        self.assertEqual(1, controller.stats().admitted)
+
+    def test_limit(self):
+        controller = module.LivyAdmissionController(
+            self.client, {"etl": 1}, user="me", interval=0.01
+        )
+        self.listing = [
+            {"id": 1, "state": "running", "owner": "me"},
+            {"id": 2, "state": "running", "owner": "someone"},
+            {"id": 3, "state": "success", "owner": "me"},
+        ]
+
+        thread = self.run_thread(controller, file="a.py", queue="etl")
+        time.sleep(0.1)
+        self.assertEqual([], self.created)
+        self.assertEqual(1, controller.stats().waiting)
+        self.assertEqual({"etl": 1}, controller.stats().active)
+        self.client.get_batch_log.assert_called_once_with(1, from_=0, size=200)
+
+        with self.lock:
+            self.listing = [{"id": 1, "state": "dead", "owner": "me"}]
+        thread.join(5)
+        self.assertEqual(["a.py"], self.created)
+
+        stats = controller.stats()
+        self.assertEqual(1, stats.admitted)
+        self.assertEqual(0, stats.waiting)
+        self.assertGreater(stats.max_wait, 0.05)
+        self.assertGreater(stats.wait_by_queue["etl"], 0.05)
+        self.assertAlmostEqual(stats.max_wait, stats.mean_wait)
+
+    def test_count_created(self):
+        controller = module.LivyAdmissionController(
+            self.client, default_limit=2, interval=0.01
+        )
+        controller.create_batch(file="a.py")
+        controller.create_batch(file="b.py")
+        with self.lock:
+            self.listing = [
+                {"id": 101, "state": "running"},
+                {"id": 102, "state": "starting"},
+            ]
+
+        thread = self.run_thread(controller, file="c.py")
+        time.sleep(0.1)
+        self.assertEqual(["a.py", "b.py"], self.created)
+        self.assertEqual({"default": 2}, controller.stats().active)
+
+        # ended batches are dropped from the count
+        with self.lock:
+            self.listing = [{"id": 101, "state": "running"}]
+        thread.join(5)
+        self.assertEqual(["a.py", "b.py", "c.py"], self.created)
+
+    def test_priority(self):
+        controller = module.LivyAdmissionController(
+            self.client, {"etl": 1}, user="me", interval=0.01
+        )
+        self.listing = [{"id": 1, "state": "running", "proxyUser": "me"}]
+
+        self.run_thread(controller, file="low.py", queue="etl", priority=-1)
+        time.sleep(0.05)
+        self.run_thread(controller, file="normal.py", queue="etl")
+        time.sleep(0.05)
+        self.run_thread(controller, file="high.py", queue="etl", priority=1)
+        time.sleep(0.05)
+        self.assertEqual(3, controller.stats().waiting)
+
+        with self.lock:
+            self.listing = []
+        for _ in range(100):
+            if len(self.created) == 3:
+                break
+            time.sleep(0.05)
+        self.assertEqual(["high.py", "normal.py", "low.py"], self.created)
+
+    def test_create_error(self):
+        controller = module.LivyAdmissionController(self.client, default_limit=1)
+        self.client.create_batch.side_effect = livy.RequestError(500, "Test error")
+        with self.assertRaises(livy.RequestError):
+            controller.create_batch(file="a.py")
+
+        # reservation is released
+        self.client.create_batch.side_effect = None
+        self.client.create_batch.return_value = {"id": 1}
+        controller.create_batch(file="a.py")
+
+    def test_count_user(self):
+        self.listing = [
+            {"id": 1, "state": "running", "owner": "me"},
+            {"id": 2, "state": "starting", "proxyUser": "me"},
+            {"id": 3, "state": "running", "owner": "someone"},
+            {"id": 4, "state": "dead", "owner": "me"},
+        ]
+
+        controller = module.LivyAdmissionController(self.client, user="me")
+        controller.refresh()
+        self.assertEqual({"etl": 2}, controller.stats().active)
+
+        # queue names are cached
+        controller.refresh()
+        self.assertEqual(2, self.client.get_batch_log.call_count)
+
+    def test_unknown_queue(self):
+        controller = module.LivyAdmissionController(
+            self.client, {"etl": 2, "adhoc": 1}, user="me", interval=0.01
+        )
+        self.client.get_batch_log.return_value = ["stdout: "]
+        self.listing = [{"id": 1, "state": "starting", "owner": "me"}]
+        controller.refresh()
+        controller.refresh()
+        self.assertEqual({}, controller.stats().active)
+        self.assertEqual(1, controller.stats().unknown)
+        self.assertEqual(2, self.client.get_batch_log.call_count)
+
+        # counted against every queue
+        thread = self.run_thread(controller, file="a.py", queue="adhoc")
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        controller.create_batch(file="b.py", queue="etl")
+        self.assertEqual(["b.py"], self.created)
+
+        with self.lock:
+            self.listing = []
+        thread.join(5)
+        self.assertEqual(["b.py", "a.py"], self.created)
+
+    def test_max_lookups(self):
+        controller = module.LivyAdmissionController(
+            self.client, user="me", max_lookups=2
+        )
+        self.listing = [
+            {"id": i, "state": "running", "owner": "me"} for i in range(1, 6)
+        ]
+        controller.refresh()
+        self.assertEqual({"etl": 2}, controller.stats().active)
+        self.assertEqual(3, controller.stats().unknown)
+
+        controller.refresh()
+        controller.refresh()
+        self.assertEqual({"etl": 5}, controller.stats().active)
+        self.assertEqual(5, self.client.get_batch_log.call_count)
+
+    def test_argument(self):
+        with self.assertRaises(livy.TypeError):
+            module.LivyAdmissionController(object())
+        with self.assertRaises(livy.TypeError):
+            module.LivyAdmissionController(self.client, {"etl": 0})
+        with self.assertRaises(livy.TypeError):
+            module.LivyAdmissionController(self.client, default_limit=0)
@@ -0,0 +1,142 @@
+import datetime
+import logging
+import unittest
+import unittest.mock
+
+import livy.client
+import livy.exception
+import livy.export
+import livy.analyze as module
+
+
+def _lines():
+    lines = [
+        "stdout: ",
+        "21/05/01 00:00:00 INFO YarnScheduler: Adding task set 0.0 with 4 tasks",
+    ]
+    for i, (duration, host, executor) in enumerate(
+        [(1000, "host1", 1), (1100, "host1", 1), (1200, "host2", 2), (9000, "host3", 3)]
+    ):
+        lines.append(
+            f"21/05/01 00:00:{10 + i:02d} INFO TaskSetManager: Finished task {i}.0 "
+            f"in stage 0.0 (TID {i}) in {duration} ms on {host} (executor {executor}) "
+            f"({i + 1}/4)"
+        )
+    lines += [
+        "21/05/01 00:00:20 INFO YarnScheduler: Removed TaskSet 0.0, whose tasks have all completed, from pool",
+        "21/05/01 00:00:30 INFO TaskSetManager: Finished task 0.0 in stage 1.0 (TID 4) in 500 ms on host1 (executor 1) (1/1)",
+        "21/05/01 00:00:30 INFO SparkContext: Not related",
+    ]
+    return lines
+
+
+def _client(lines):
+    client = unittest.mock.MagicMock(spec=livy.client.LivyClient)
+    client.get_batch_log.side_effect = lambda _, from_, size: lines[
+        from_ : from_ + size
+    ]
+    return client
+
+
+class HistogramTester(unittest.TestCase):
+    def test_quantile(self):
+        histogram = module._Histogram()
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        self.assertEqual(histogram.count_above(10), 0)
+
+        for value in range(1, 1001):
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.min, 1)
+        self.assertEqual(histogram.max, 1000)
+        for q in (0.5, 0.9, 0.99):
+            self.assertAlmostEqual(histogram.quantile(q), q * 1000, delta=q * 50)
+        self.assertEqual(histogram.quantile(1.0), 1000)
+        self.assertAlmostEqual(histogram.count_above(500), 500, delta=50)
+        self.assertEqual(histogram.count_above(1000), 0)
+
+        # bounded
+        for value in range(0, 86400 * 1000, 997):
+            histogram.add(value)
+        self.assertLess(len(histogram.buckets), 250)
+
+
+class LivyTaskAnalyzerTester(unittest.TestCase):
+    def test_init(self):
+        with self.assertRaises(livy.exception.TypeError):
+            module.LivyTaskAnalyzer(straggler_factor=0.5)
+        with self.assertRaises(livy.exception.TypeError):
+            module.LivyTaskAnalyzer(top=-1)
+
+    def test_report(self):
+        analyzer = module.LivyTaskAnalyzer(straggler_factor=2.0, skew_factor=4.0, top=2)
+        report = module.analyze_batch(_client(_lines()), 1234, analyzer)
+
+        self.assertEqual(report.tasks, 5)
+        self.assertEqual([s.stage for s in report.stages], ["0.0", "1.0"])
+
+        stage = report.stages[0]
+        self.assertEqual(stage.tasks, 4)
+        self.assertEqual(stage.total_ms, 12300)
+        self.assertEqual(stage.min_ms, 1000)
+        self.assertEqual(stage.max_ms, 9000)
+        self.assertAlmostEqual(stage.p50_ms, 1100, delta=60)
+        self.assertEqual(stage.mean_ms, 3075)
+        self.assertEqual(stage.stragglers, 1)
+        self.assertEqual(stage.duration, 20.0)
+        self.assertEqual(
+            stage.start, datetime.datetime(2021, 5, 1, tzinfo=datetime.timezone.utc)
+        )
+        self.assertEqual(
+            stage.slowest,
+            [
+                module.LivyTaskSample("0.0", "3.0", 9000, "host3", "3"),
+                module.LivyTaskSample("0.0", "2.0", 1200, "host2", "2"),
+            ],
+        )
+        self.assertEqual(report.skewed_stages, ["0.0"])
+
+        # without task set logs, the time is estimated from tasks
+        stage = report.stages[1]
+        self.assertEqual(stage.duration, 0.5)
+
+        self.assertEqual(
+            report.executors[0], module.LivyExecutorStats("3", "host3", 1, 9000)
+        )
+        self.assertEqual(report.hosts[1], module.LivyHostStats("host1", 1, 3, 2600))
+        self.assertEqual(report.slow_hosts, ["host3"])
+
+    def test_write(self):
+        analyzer = module.LivyTaskAnalyzer()
+        analyzer.write(
+            livy.export.LivyLogExportRecord(
+                created=None,
+                level=logging.INFO,
+                name="attempt-2.TaskSetManager",
+                message="Finished task 1.0 in stage 2.0 (TID 3) in 20 ms on localhost "
+                "(executor driver) (1/2)",
+                section="stdout",
+                batch_id=1,
+                line=None,
+            )
+        )
+        analyzer.flush()
+
+        report = analyzer.report()
+        self.assertEqual(report.stages[0].stage, "2.0")
+        self.assertIsNone(report.stages[0].duration)
+        self.assertEqual(report.executors[0].executor, "driver")
+        self.assertEqual(report.skewed_stages, [])
+
+
+class AnalyzeBatchTester(unittest.TestCase):
+    def test_analyze_batch(self):
+        client = _client(_lines())
+        report = module.analyze_batch(client, 1234, page_size=4)
+        self.assertEqual(report.tasks, 5)
+        self.assertEqual(client.get_batch_log.call_count, 3)
+        client.get_batch_log.assert_called_with(1234, from_=8, size=4)
+
+        with self.assertRaises(livy.exception.TypeError):
+            module.analyze_batch(client, 1234, page_size=0)
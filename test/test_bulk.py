@@ -0,0 +1,149 @@
+import http.server
+import json
+import socketserver
+import threading
+import time
+import unittest
+import unittest.mock
+
+import livy
+import livy.bulk as module
+
+
+class SubmitManyTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.client.create_batch.side_effect = lambda file, **_: {"id": int(file[:-3])}
+
+    def test_success(self):
+        jobs = [{"file": f"{i}.py"} for i in range(20)]
+        results = module.submit_many(self.client, jobs, 4)
+
+        self.assertEqual(20, len(results))
+        for i, result in enumerate(results):
+            self.assertEqual(i, result.index)
+            self.assertEqual(i, result.batch_id)
+            self.assertIs(jobs[i], result.job)
+            self.assertIsNone(result.error)
+
+    def test_failure(self):
+        def create_batch(file, **_):
+            if file == "1.py":
+                raise livy.RequestError(500, "Test error")
+            if file == "2.py":
+                return {}
+            return {"id": 0}
+
+        self.client.create_batch.side_effect = create_batch
+
+        results = module.submit_many(
+            self.client, [{"file": f"{i}.py"} for i in range(3)]
+        )
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, livy.RequestError)
+        self.assertIsNone(results[1].batch_id)
+        self.assertIsInstance(results[2].error, livy.OperationError)
+
+    def test_prepare(self):
+        def prepare(job):
+            if job == "bad":
+                raise ValueError("bad job")
+            return {"file": job}
+
+        callback = unittest.mock.Mock()
+        results = module.submit_many(
+            self.client, ["1.py", "bad"], prepare=prepare, callback=callback
+        )
+
+        self.assertEqual(1, results[0].batch_id)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.client.create_batch.assert_called_once_with(file="1.py")
+        self.assertEqual(2, callback.call_count)
+
+    def test_argument(self):
+        with self.assertRaises(livy.TypeError):
+            module.submit_many(object(), [])
+        with self.assertRaises(livy.TypeError):
+            module.submit_many(self.client, [], 0)
+
+
+class _FakeLivyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.02
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.latency)
+
+        server = self.server
+        with server.lock:
+            server.num_batches += 1
+            server.peers.add(self.client_address)
+            body = json.dumps({"id": server.num_batches, "state": "starting"})
+
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeLivyServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeLivyHandler)
+        self.lock = threading.Lock()
+        self.num_batches = 0
+        self.peers = set()
+
+
+class SubmitManyBenchmark(unittest.TestCase):
+    """Throughput against a local server that takes 20ms for each submission."""
+
+    num_jobs = 64
+
+    def setUp(self) -> None:
+        self.server = _FakeLivyServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.jobs = [{"file": f"job-{i}.py"} for i in range(self.num_jobs)]
+
+    def run_submit(self, workers: int) -> float:
+        client = livy.LivyClient(self.url, pool_size=workers)
+        self.addCleanup(client.close)
+
+        tick = time.monotonic()
+        results = module.submit_many(client, self.jobs, workers)
+        elapsed = time.monotonic() - tick
+
+        self.assertTrue(all(r.error is None for r in results))
+        return elapsed
+
+    def test_throughput(self):
+        sequential = self.run_submit(1)
+        self.assertEqual(1, len(self.server.peers))
+
+        self.server.peers.clear()
+        concurrent = self.run_submit(8)
+        self.assertLessEqual(len(self.server.peers), 8)
+
+        self.assertEqual(self.num_jobs * 2, self.server.num_batches)
+        self.assertLess(
+            concurrent * 3,
+            sequential,
+            "%.1f jobs/sec with 1 worker; %.1f jobs/sec with 8 workers"
+            % (self.num_jobs / sequential, self.num_jobs / concurrent),
+        )
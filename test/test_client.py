@@ -2,6 +2,8 @@ import http.client
 import io
 import socket
 import ssl
+import threading
+import time
 import unittest
 import unittest.mock
 
@@ -31,6 +33,10 @@ class LivyClientInitTester(unittest.TestCase):
         with self.assertRaises(exception.TypeError):
             module.LivyClient("http://example.com", "/path/to/certificates")
 
+    def test___init___pool_size(self):
+        with self.assertRaises(exception.TypeError):
+            module.LivyClient("http://example.com", pool_size=0)
+
     def test___repr__(self):
         c = module.LivyClient("HTTP://EXAMPLE.COM:8998/FOO")
         self.assertEqual(repr(c), "<LivyClient for 'example.com'>")
@@ -102,6 +108,54 @@ class LivyClientInitTester(unittest.TestCase):
             self.client.delete_batch("app")
         self.request.assert_not_called()
 
+    def test_list_batches(self):
+        # success
+        self.request.return_value = {"from": 0, "total": 1, "sessions": [{"id": 1}]}
+        self.assertEqual(self.client.list_batches(), [{"id": 1}])
+        self.request.assert_called_with("GET", "/batches")
+
+        self.client.list_batches(from_=10, size=20)
+        self.request.assert_called_with("GET", "/batches?from=10&size=20")
+
+        # fail
+        self.request.reset_mock()
+        with self.assertRaises(exception.TypeError):
+            self.client.list_batches("1")
+        with self.assertRaises(exception.TypeError):
+            self.client.list_batches(size="1")
+        self.request.assert_not_called()
+
+    def test_iter_batches(self):
+        pages = {
+            0: [{"id": 1}, {"id": 2}],
+            2: [{"id": 3}, {"id": 4}],
+            4: [{"id": 4}],  # shifted
+        }
+        self.client.list_batches = unittest.mock.Mock(
+            side_effect=lambda from_, size: pages[from_]
+        )
+
+        it = self.client.iter_batches(2)
+        self.assertEqual(next(it), {"id": 1})
+
+        # next page is fetched while current page is consumed
+        for _ in range(100):
+            if self.client.list_batches.call_count == 2:
+                break
+            time.sleep(0.01)
+        self.client.list_batches.assert_called_with(2, 2)
+
+        self.assertEqual([b["id"] for b in it], [2, 3, 4])
+        self.assertEqual(self.client.list_batches.call_count, 3)
+
+        # error
+        self.client.list_batches.side_effect = exception.RequestError(0, "foo")
+        with self.assertRaises(exception.RequestError):
+            list(self.client.iter_batches())
+
+        with self.assertRaises(exception.TypeError):
+            next(self.client.iter_batches(0))
+
     def test_get_batch_information(self):
         # success
         self.client.get_batch_information(1234)
@@ -183,8 +237,10 @@ class LivyClientInitTester(unittest.TestCase):
 class LivyClientRequestTester(unittest.TestCase):
     def setUp(self) -> None:
         self.client = module.LivyClient("http://example.com", True)
-        self.client._client = unittest.mock.MagicMock(spec=http.client.HTTPConnection)
-        self.getresponse = self.client._client.getresponse
+        self.conn = unittest.mock.MagicMock(spec=http.client.HTTPConnection)
+        self.conn.sock = None
+        self.client._pool = module._ConnectionPool(lambda: self.conn, 1)
+        self.getresponse = self.conn.getresponse
 
     def patch(self, *args, **kwargs):
         patcher = unittest.mock.patch("urllib.request.urlopen", *args, **kwargs)
@@ -224,7 +280,7 @@ class LivyClientRequestTester(unittest.TestCase):
             self.client._request("GET", "")
 
         # connect
-        self.client._client.connect.side_effect = socket.timeout()
+        self.conn.connect.side_effect = socket.timeout()
         with self.assertRaises(exception.RequestError):
             self.client._request("GET", "")
 
@@ -234,6 +290,48 @@ class LivyClientRequestTester(unittest.TestCase):
         with self.assertRaises(exception.RequestError):
             self.client._request("GET", "/test")
 
+    def test_read_error(self):
+        resp = self.mock_response(200)
+        resp.__enter__.return_value = unittest.mock.Mock(
+            read=unittest.mock.Mock(side_effect=socket.timeout())
+        )
+        self.getresponse.return_value = resp
+        with self.assertRaises(exception.RequestError):
+            self.client._request("GET", "/test")
+
+        resp.__enter__.return_value = unittest.mock.Mock(
+            read=unittest.mock.Mock(side_effect=http.client.IncompleteRead(b""))
+        )
+        with self.assertRaises(exception.RequestError):
+            self.client._request("GET", "/test")
+
+    def test_reuse_connection(self):
+        def connect():
+            self.conn.sock = unittest.mock.Mock()
+
+        self.conn.connect.side_effect = connect
+        self.getresponse.return_value = self.mock_response(200)
+
+        self.client._request("GET", "/test")
+        self.client._request("GET", "/test")
+        self.conn.connect.assert_called_once()
+
+        # server closed the idle connection
+        self.getresponse.side_effect = [
+            http.client.RemoteDisconnected(),
+            self.mock_response(200),
+        ]
+        self.client._request("GET", "/test")
+        self.conn.close.assert_called_once()
+
+        # not retry POST
+        self.getresponse.side_effect = [
+            http.client.RemoteDisconnected(),
+            self.mock_response(200),
+        ]
+        with self.assertRaises(exception.RequestError):
+            self.client._request("POST", "/test", {"foo": 123})
+
     def test_keyboard_interrupt(self):
         self.getresponse.side_effect = KeyboardInterrupt()
 
@@ -247,6 +345,67 @@ class LivyClientRequestTester(unittest.TestCase):
             self.client._request("GET", "/test")
 
 
+class ConnectionPoolTester(unittest.TestCase):
+    def test_connection(self):
+        def new_connection():
+            conn = unittest.mock.Mock(spec=http.client.HTTPConnection)
+            conn.sock = None
+            return conn
+
+        factory = unittest.mock.Mock(side_effect=new_connection)
+        pool = module._ConnectionPool(factory, 2)
+
+        # created on demand and reused
+        with pool.connection() as (conn_1, _):
+            with pool.connection() as (conn_2, _):
+                self.assertIsNot(conn_1, conn_2)
+        with pool.connection() as (conn_3, _):
+            self.assertIn(conn_3, (conn_1, conn_2))
+        self.assertEqual(factory.call_count, 2)
+
+        pool.close()
+        conn_1.close.assert_called_once()
+        conn_2.close.assert_called_once()
+
+    def test_connection_error(self):
+        conn = unittest.mock.Mock(spec=http.client.HTTPConnection)
+        factory = unittest.mock.Mock(side_effect=[conn, unittest.mock.Mock()])
+        pool = module._ConnectionPool(factory, 1)
+
+        # connection is dropped on error, not reused
+        with self.assertRaises(ValueError):
+            with pool.connection():
+                raise ValueError
+        conn.close.assert_called_once()
+
+        with pool.connection() as (conn_2, reused):
+            self.assertIsNot(conn_2, conn)
+            self.assertFalse(reused)
+
+    def test_bounded(self):
+        pool = module._ConnectionPool(unittest.mock.Mock, 2)
+        lock = threading.Lock()
+        in_use = []
+        max_in_use = []
+
+        def request():
+            with pool.connection():
+                with lock:
+                    in_use.append(1)
+                    max_in_use.append(len(in_use))
+                time.sleep(0.01)
+                with lock:
+                    in_use.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(max(max_in_use), 2)
+
+
 class LivyClientRequestIntegrationTester(unittest.TestCase):
     def setUp(self) -> None:
         self.client = module.LivyClient("https://httpbin.org", timeout=2.0)
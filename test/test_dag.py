@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import livy
+import livy.dag as module
+
+
+class LivyDagRunnerTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        self.batches = {}
+
+        def create_batch(file, **_):
+            batch_id = len(self.batches)
+            self.batches[batch_id] = {"id": batch_id, "name": file, "state": "running"}
+            return {"id": batch_id}
+
+        self.client.create_batch.side_effect = create_batch
+        self.client.iter_batches.side_effect = lambda _: list(self.batches.values())
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.state_path = os.path.join(tmpdir.name, "state.json")
+
+    def set_state(self, name, state):
+        for batch in self.batches.values():
+            if batch["name"] == name and batch["state"] == "running":
+                batch["state"] = state
+
+    def node(self, name, *depends_on, **kwargs):
+        return module.LivyDagNode(name, {"file": name}, depends_on, **kwargs)
+
+    def states(self, runner):
+        return {node.name: node.state for node in runner.nodes}
+
+    def test_dependency(self):
+        runner = module.LivyDagRunner(
+            self.client,
+            [self.node("c", "a", "b"), self.node("a"), self.node("b", "a")],
+            state_path=self.state_path,
+        )
+        self.assertEqual(["a", "b", "c"], [n.name for n in runner.nodes])
+
+        runner.step()
+        self.assertEqual(
+            {"a": "submitted", "b": "pending", "c": "pending"}, self.states(runner)
+        )
+
+        runner.step()
+        self.assertEqual(1, self.client.create_batch.call_count)
+
+        self.set_state("a", "success")
+        runner.step()
+        self.assertEqual(
+            {"a": "success", "b": "submitted", "c": "pending"}, self.states(runner)
+        )
+
+        self.set_state("b", "success")
+        runner.step()
+        self.set_state("c", "success")
+        runner.step()
+        self.assertTrue(runner.finished)
+        self.assertTrue(runner.succeeded)
+
+        with open(self.state_path) as fp:
+            self.assertEqual("success", json.load(fp)["nodes"]["c"]["state"])
+
+    def test_limits(self):
+        runner = module.LivyDagRunner(
+            self.client,
+            [
+                self.node("a", queue="q1"),
+                self.node("b", queue="q1"),
+                self.node("c", queue="q2"),
+                self.node("d"),
+            ],
+            max_running=3,
+            queue_limits={"q1": 1},
+        )
+        runner.step()
+        self.assertEqual(
+            {"a": "submitted", "b": "pending", "c": "submitted", "d": "submitted"},
+            self.states(runner),
+        )
+
+        self.set_state("a", "success")
+        runner.step()
+        self.assertEqual("submitted", self.states(runner)["b"])
+
+    def test_retry(self):
+        runner = module.LivyDagRunner(
+            self.client,
+            [self.node("a", retries=1), self.node("b", "a"), self.node("c", "b")],
+        )
+        runner.step()
+        self.set_state("a", "dead")
+        runner.step()
+        self.assertEqual("submitted", self.states(runner)["a"])
+        self.assertEqual(2, runner.nodes[0].attempts)
+
+        self.set_state("a", "killed")
+        runner.step()
+        self.assertEqual(
+            {"a": "failed", "b": "upstream_failed", "c": "upstream_failed"},
+            self.states(runner),
+        )
+        self.assertTrue(runner.finished)
+        self.assertFalse(runner.succeeded)
+
+    def test_submit_error(self):
+        self.client.create_batch.side_effect = livy.RequestError(500, "Test error")
+        runner = module.LivyDagRunner(self.client, [self.node("a")])
+        runner.step()
+        self.assertEqual("failed", self.states(runner)["a"])
+        self.assertIn("Test error", runner.nodes[0].error)
+
+    def test_batch_not_listed(self):
+        runner = module.LivyDagRunner(self.client, [self.node("a"), self.node("b")])
+        runner.step()
+        self.batches.clear()
+
+        def get_batch_state(batch_id):
+            if batch_id == 0:
+                return "success"
+            raise livy.RequestError(404, "Not found")
+
+        self.client.get_batch_state.side_effect = get_batch_state
+        runner.step()
+        self.assertEqual({"a": "success", "b": "failed"}, self.states(runner))
+
+    def test_resume(self):
+        nodes = [self.node("a"), self.node("b"), self.node("c", "a")]
+        runner = module.LivyDagRunner(self.client, nodes, state_path=self.state_path)
+        self.assertFalse(runner.load_state())
+        runner.step()
+        self.set_state("a", "success")
+        self.set_state("b", "dead")
+        runner.step()
+
+        # new process
+        nodes = [self.node("a"), self.node("b"), self.node("c", "a")]
+        runner = module.LivyDagRunner(self.client, nodes, state_path=self.state_path)
+        self.assertTrue(runner.load_state())
+        self.assertEqual(
+            {"a": "success", "b": "pending", "c": "submitted"}, self.states(runner)
+        )
+        self.assertEqual(2, runner.nodes[2].batch_id)
+
+    def test_run(self):
+        runner = module.LivyDagRunner(self.client, [self.node("a")])
+
+        def iter_batches(_):
+            self.set_state("a", "success")
+            return list(self.batches.values())
+
+        self.client.iter_batches.side_effect = iter_batches
+        with unittest.mock.patch("time.sleep"):
+            self.assertTrue(runner.run(0.1))
+
+    def test_invalid_dag(self):
+        with self.assertRaises(livy.OperationError):
+            module.LivyDagRunner(self.client, [self.node("a", "b")])
+        with self.assertRaises(livy.OperationError):
+            module.LivyDagRunner(self.client, [self.node("a"), self.node("a")])
+        with self.assertRaises(livy.OperationError):
+            module.LivyDagRunner(
+                self.client,
+                [self.node("a", "c"), self.node("b", "a"), self.node("c", "b")],
+            )
+        with self.assertRaises(livy.TypeError):
+            module.LivyDagRunner(self.client, [], max_running=0)
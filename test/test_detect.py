@@ -0,0 +1,141 @@
+import datetime
+import re
+import unittest
+import unittest.mock
+
+import livy
+import livy.detect as module
+
+
+class LivyFailureDetectorTester(unittest.TestCase):
+    def record(self, message, second=0):
+        created = datetime.datetime(2021, 5, 1, tzinfo=datetime.timezone.utc)
+        return unittest.mock.Mock(
+            message=message, created=created + datetime.timedelta(seconds=second)
+        )
+
+    def test_signatures(self):
+        detector = module.LivyFailureDetector()
+        events = []
+        detector._add = events.append
+
+        for message in [
+            "Lost task 0.0 in stage 1.0 (TID 5, host1, executor 3): "
+            "ExecutorLostFailure (executor 3 exited caused by one of the running "
+            "tasks) Reason: Container marked as failed: container_01 on host: "
+            "host1. Exit status: 143.",
+            "Lost executor 4 on host2: Container killed by YARN for exceeding "
+            "physical memory limits. 5.5 GB of 5.5 GB physical memory used.",
+            "Lost task 1.0 in stage 2.0 (TID 7) (host3 executor 5): FetchFailed("
+            "BlockManagerId(2, host4, 7337, None), shuffleId=0, mapIndex=1)\n"
+            "org.apache.spark.shuffle.FetchFailedException: Failed to connect",
+            "Lost task 2.0 in stage 2.0 (TID 8) (host3 executor 5): "
+            "java.lang.OutOfMemoryError: GC overhead limit exceeded",
+            "Container [pid=1,containerID=container_02] is running 12MB beyond "
+            "the 'PHYSICAL' memory limit.",
+            "Finished task 1.0 in stage 2.0 (TID 7) in 20 ms on host1 (executor 1)",
+        ]:
+            detector.write(self.record(message))
+
+        self.assertEqual(
+            [(e.signature, e.executor, e.host) for e in events],
+            [
+                ("executor-lost", "3", "host1"),
+                ("executor-lost", "4", "host2"),
+                ("yarn-memory-kill", "4", "host2"),
+                ("fetch-failed", "2", "host4"),
+                ("gc-overhead", "5", "host3"),
+                ("yarn-memory-kill", None, None),
+            ],
+        )
+        self.assertEqual(
+            events[3].message,
+            "Lost task 1.0 in stage 2.0 (TID 7) (host3 executor 5): FetchFailed("
+            "BlockManagerId(2, host4, 7337, None), shuffleId=0, mapIndex=1)",
+        )
+
+    def test_alert(self):
+        callback = unittest.mock.Mock()
+        detector = module.LivyFailureDetector(
+            window=60, thresholds={"fetch-failed": 3}, callback=callback
+        )
+
+        def fetch_failed(second):
+            detector.write(
+                self.record("org.apache.spark.shuffle.FetchFailedException", second)
+            )
+
+        fetch_failed(0)
+        fetch_failed(20)
+        fetch_failed(65)  # the first one is out of window
+        self.assertEqual(detector.count("fetch-failed"), 2)
+        callback.assert_not_called()
+
+        with self.assertLogs("livy.detect", "WARNING") as logs:
+            fetch_failed(75)
+        self.assertIn("Detected fetch-failed 3 times in 60 seconds", logs.output[0])
+        (alert,), _ = callback.call_args
+        self.assertEqual(alert.signature, "fetch-failed")
+        self.assertEqual(alert.count, 3)
+
+        # not raised again until it falls below the threshold
+        fetch_failed(76)
+        self.assertEqual(callback.call_count, 1)
+
+        fetch_failed(200)
+        fetch_failed(201)
+        fetch_failed(202)
+        self.assertEqual(callback.call_count, 2)
+        self.assertEqual(len(detector.alerts), 2)
+
+        self.assertEqual(detector.counts, {"fetch-failed": 8})
+        self.assertEqual(detector.count("fetch-failed", now=1000), 0)
+        self.assertEqual(detector.count("gc-overhead"), 0)
+
+    def test_executor_counted_once(self):
+        detector = module.LivyFailureDetector()
+        for _ in range(3):
+            detector.write(
+                self.record(
+                    "Lost task 0.0 in stage 1.0 (TID 5, host1, executor 3): "
+                    "ExecutorLostFailure (executor 3 exited caused by one of the "
+                    "running tasks)"
+                )
+            )
+        detector.write(self.record("Lost executor 3 on host1: Slave lost"))
+        detector.flush()
+        self.assertEqual(detector.counts, {"executor-lost": 1})
+
+    def test_add_signature(self):
+        detector = module.LivyFailureDetector()
+        detector.add_signature("disk-full", re.compile(r"No space left on device"))
+        with self.assertLogs("livy.detect", "WARNING"):
+            detector.write(self.record("java.io.IOException: No space left on device"))
+        self.assertEqual(detector.counts, {"disk-full": 1})
+
+        with self.assertRaises(livy.TypeError):
+            detector.add_signature("foo", "bar")
+        with self.assertRaises(livy.TypeError):
+            detector.add_signature("foo", re.compile("bar"), threshold=0)
+
+    def test_init(self):
+        with self.assertRaises(livy.TypeError):
+            module.LivyFailureDetector(window=0)
+        with self.assertRaises(livy.TypeError):
+            module.LivyFailureDetector(thresholds={"foo": 1})
+        with self.assertRaises(livy.TypeError):
+            module.LivyFailureDetector(thresholds={"gc-overhead": 0})
+        with self.assertRaises(livy.TypeError):
+            module.LivyFailureDetector(callback="foo")
+
+
+class ParseThresholdsTester(unittest.TestCase):
+    def test_parse_thresholds(self):
+        self.assertEqual(
+            module.parse_thresholds(["executor-lost=5", "gc-overhead=2"]),
+            {"executor-lost": 5, "gc-overhead": 2},
+        )
+        with self.assertRaises(livy.TypeError):
+            module.parse_thresholds(["executor-lost"])
+        with self.assertRaises(livy.TypeError):
+            module.parse_thresholds(["=1"])
@@ -0,0 +1,61 @@
+import csv
+import datetime
+import io
+import json
+import logging
+import unittest
+
+import livy.exception
+import livy.export as module
+
+
+class WriterTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.record = module.LivyLogExportRecord(
+            created=datetime.datetime(
+                2021, 5, 1, 12, 34, 56, tzinfo=datetime.timezone.utc
+            ),
+            level=logging.INFO,
+            name="Foo",
+            message="test, message\nline 2",
+            section="stdout",
+            batch_id=1234,
+            line=5,
+        )
+
+    def test_jsonl(self):
+        buf = io.StringIO()
+        with module.get_export_writer("jsonl", buf, flush_every=2) as writer:
+            writer.write(self.record)
+            self.assertEqual(buf.getvalue(), "")  # buffered
+            writer.write(self.record._replace(created=None))
+            self.assertEqual(buf.getvalue().count("\n"), 2)  # flushed by batch
+            writer.write(self.record)
+
+        lines = buf.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+
+        data = json.loads(lines[0])
+        self.assertEqual(data["created"], "2021-05-01T12:34:56+00:00")
+        self.assertEqual(data["level"], "INFO")
+        self.assertEqual(data["message"], "test, message\nline 2")
+        self.assertEqual(data["batch_id"], 1234)
+        self.assertEqual(data["line"], 5)
+        self.assertIsNone(json.loads(lines[1])["created"])
+
+    def test_csv(self):
+        buf = io.StringIO()
+        with module.get_export_writer("CSV", buf) as writer:
+            writer.write(self.record)
+
+        rows = list(csv.DictReader(io.StringIO(buf.getvalue())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "Foo")
+        self.assertEqual(rows[0]["message"], "test, message\nline 2")
+        self.assertEqual(rows[0]["section"], "stdout")
+
+    def test_error(self):
+        with self.assertRaises(livy.exception.OperationError):
+            module.get_export_writer("xml", io.StringIO())
+        with self.assertRaises(livy.exception.TypeError):
+            module.get_export_writer("csv", io.StringIO(), flush_every=0)
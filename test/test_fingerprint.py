@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import livy
+import livy.fingerprint as module
+
+
+class FingerprintTester(unittest.TestCase):
+    def test_fingerprint(self):
+        fp = module.fingerprint({"file": "a.py", "args": ["1"]}, "http://example.com")
+        self.assertEqual(64, len(fp))
+        self.assertEqual(
+            fp,
+            module.fingerprint({"args": ["1"], "file": "a.py"}, "http://example.com"),
+        )
+        self.assertNotEqual(
+            fp,
+            module.fingerprint({"file": "a.py", "args": ["2"]}, "http://example.com"),
+        )
+        self.assertNotEqual(
+            fp, module.fingerprint({"file": "a.py", "args": ["1"]}, "http://foo.com")
+        )
+
+    def test_batch_name(self):
+        self.assertEqual(
+            "livy-0123456789abcdef", module.batch_name("0123456789abcdef0")
+        )
+
+    def test_find_live_batches(self):
+        client = unittest.mock.MagicMock(spec=livy.LivyClient)
+        client.iter_batches.return_value = [
+            {"id": 1, "name": "foo", "state": "success"},
+            {"id": 2, "name": "foo", "state": "running"},
+            {"id": 3, "name": "bar", "state": "starting"},
+            {"id": 4, "name": "baz", "state": "running"},
+        ]
+        self.assertEqual(
+            {"fp1": 2, "fp3": 4},
+            {
+                fp: batch["id"]
+                for fp, batch in module.find_live_batches(
+                    client,
+                    {
+                        "fp1": ("foo", None),
+                        "fp2": ("bar", 5),
+                        "fp3": ("baz", 4),
+                        "fp4": ("qux", None),
+                    },
+                ).items()
+            },
+        )
+
+
+class LivyFingerprintCacheTester(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "cache", "fingerprints.json")
+
+    def test_success(self):
+        cache = module.LivyFingerprintCache(self.path)
+        self.assertIsNone(cache.get("fp"))
+        cache.put("fp", 1234, "foo")
+        self.assertEqual((1234, "foo"), cache.get("fp"))
+        cache.save()
+
+        cache = module.LivyFingerprintCache(self.path)
+        self.assertEqual((1234, "foo"), cache.get("fp"))
+
+    def test_merge(self):
+        cache_1 = module.LivyFingerprintCache(self.path)
+        cache_2 = module.LivyFingerprintCache(self.path)
+        cache_1.put("fp1", 1, "foo")
+        cache_1.save()
+        cache_2.put("fp2", 2, "bar")
+        cache_2.save()
+
+        cache = module.LivyFingerprintCache(self.path)
+        self.assertEqual((1, "foo"), cache.get("fp1"))
+        self.assertEqual((2, "bar"), cache.get("fp2"))
+
+    def test_expire(self):
+        cache = module.LivyFingerprintCache(self.path, max_age=60)
+        cache.put("fp", 1, "foo")
+        with unittest.mock.patch("time.time", return_value=time.time() + 61):
+            cache.save()
+        self.assertIsNone(module.LivyFingerprintCache(self.path).get("fp"))
+
+    def test_broken_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as fp:
+            fp.write("{")
+        with self.assertLogs("livy.fingerprint", "WARNING"):
+            cache = module.LivyFingerprintCache(self.path)
+        cache.put("fp", 1, "foo")
+        cache.save()
+        with open(self.path) as fp:
+            self.assertIn("fp", json.load(fp))
+
+    def test_argument(self):
+        with self.assertRaises(livy.TypeError):
+            module.LivyFingerprintCache(1234)
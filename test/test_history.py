@@ -0,0 +1,137 @@
+import datetime
+import logging
+import os
+import tempfile
+import unittest
+
+import livy.exception
+import livy.export
+import livy.history as module
+
+
+def _record(name, message, second=0):
+    return livy.export.LivyLogExportRecord(
+        created=datetime.datetime(
+            2021, 5, 1, 0, 0, second, tzinfo=datetime.timezone.utc
+        ),
+        level=logging.INFO,
+        name=name,
+        message=message,
+        section="stdout",
+        batch_id=1,
+        line=None,
+    )
+
+
+class JobKeyTester(unittest.TestCase):
+    def test_job_key(self):
+        self.assertEqual(module.job_key("s3://bucket/etl.py"), "s3://bucket/etl.py")
+        self.assertEqual(
+            module.job_key("s3://bucket/app.jar", "com.example.Main"),
+            "s3://bucket/app.jar#com.example.Main",
+        )
+        self.assertEqual(module.job_key("etl.py"), os.path.abspath("etl.py"))
+
+
+class LivyStageTimerTester(unittest.TestCase):
+    def test_write(self):
+        timer = module.LivyStageTimer()
+        for record in [
+            _record("YarnScheduler", "Adding task set 0.0 with 10 tasks", 0),
+            _record("YarnScheduler", "Adding task set 1.0 with 10 tasks", 2),
+            _record("TaskSetManager", "Adding task set 2.0 with 10 tasks", 2),
+            _record(
+                "YarnScheduler",
+                "Removed TaskSet 0.0, whose tasks have all completed, from pool",
+                5,
+            ),
+            _record(
+                "attempt-2.YarnClusterScheduler",
+                "Removed TaskSet 1.0, whose tasks have all completed, from pool",
+                10,
+            ),
+            _record("YarnScheduler", "Adding task set 1.1 with 3 tasks", 20),
+            _record("YarnScheduler", "Removed TaskSet 1.1, from pool", 24),
+            _record("YarnScheduler", "Removed TaskSet 9.0, from pool", 30),
+        ]:
+            timer.write(record)
+        timer.flush()
+
+        self.assertEqual(timer.stages, {"0": 5.0, "1": 12.0})
+
+
+class LivyRunHistoryTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = module.LivyRunHistory(":memory:")
+        self.addCleanup(self.history.close)
+
+        submitted = datetime.datetime(2021, 5, 1, tzinfo=datetime.timezone.utc)
+        for day, (state, duration, stages) in enumerate(
+            [
+                ("success", 100.0, {"0": 10.0, "1": 80.0}),
+                ("success", 120.0, {"0": 12.0, "1": 100.0}),
+                ("dead", 30.0, {"0": 10.0}),
+                ("success", 300.0, {"0": 10.0, "1": 280.0}),
+            ]
+        ):
+            self.history.add(
+                key="etl",
+                script="etl.py",
+                batch_id=day,
+                state=state,
+                submitted=submitted + datetime.timedelta(days=day),
+                duration=duration,
+                conf={"spark.foo": "bar"},
+                resources={"num_executors": 4},
+                stages=stages,
+            )
+
+    def test_init(self):
+        with self.assertRaises(livy.exception.TypeError):
+            module.LivyRunHistory(1234)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, "sub", "history.sqlite3")
+        with module.LivyRunHistory(path) as history:
+            self.assertIn(path, repr(history))
+        self.assertTrue(os.path.isfile(path))
+
+    def test_runs(self):
+        runs = self.history.runs()
+        self.assertEqual([r.batch_id for r in runs], [3, 2, 1, 0])
+        self.assertEqual(runs[0].conf, {"spark.foo": "bar"})
+        self.assertEqual(runs[0].resources, {"num_executors": 4})
+        self.assertEqual(runs[0].stages, {"0": 10.0, "1": 280.0})
+        self.assertEqual(
+            runs[0].submitted,
+            datetime.datetime(2021, 5, 4, tzinfo=datetime.timezone.utc),
+        )
+
+        self.assertEqual(len(self.history.runs(state="dead")), 1)
+        self.assertEqual(len(self.history.runs(key="other")), 0)
+        self.assertEqual(len(self.history.runs(limit=2)), 2)
+        self.assertEqual(
+            len(
+                self.history.runs(
+                    since=datetime.datetime(2021, 5, 3, tzinfo=datetime.timezone.utc)
+                )
+            ),
+            2,
+        )
+
+        run = self.history.get(runs[0].id)
+        self.assertEqual(run, runs[0])
+        self.assertIsNone(self.history.get(9999))
+
+    def test_estimate(self):
+        estimate = self.history.estimate("etl")
+        self.assertEqual(estimate.runs, 3)
+        self.assertEqual(estimate.duration, 120.0)
+        self.assertEqual(estimate.stages, {"0": 10.0, "1": 100.0})
+
+        estimate = self.history.estimate("etl", window=2)
+        self.assertEqual(estimate.duration, 210.0)
+
+        self.assertIsNone(self.history.estimate("etl", min_runs=4))
+        self.assertIsNone(self.history.estimate("other"))
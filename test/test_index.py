@@ -0,0 +1,138 @@
+import datetime
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+import livy.exception
+import livy.export
+import livy.index as module
+
+
+def _record(line, message, level=logging.INFO, name="Foo", batch_id=1, hour=0):
+    return livy.export.LivyLogExportRecord(
+        created=datetime.datetime(2021, 5, 1, hour, tzinfo=datetime.timezone.utc),
+        level=level,
+        name=name,
+        message=message,
+        section="stdout",
+        batch_id=batch_id,
+        line=line,
+    )
+
+
+class LivyLogIndexTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = module.LivyLogIndex(":memory:", flush_every=2)
+        self.addCleanup(self.index.close)
+
+        for record in [
+            _record(0, "Starting job", hour=1),
+            _record(
+                1,
+                "Lost task 0.0 in stage 1.0",
+                logging.WARNING,
+                "org.apache.spark.scheduler.TaskSetManager",
+                hour=2,
+            ),
+            _record(2, "Task failed 100%_done", logging.ERROR, "TaskSetManager", 2, 3),
+            _record(3, "Job finished", name="org.apache.spark", batch_id=2, hour=4),
+            _record(3, "Job finished", name="org.apache.spark", batch_id=2, hour=4),
+        ]:
+            self.index.write(record)
+
+    def test___init__(self):
+        with self.assertRaises(livy.exception.TypeError):
+            module.LivyLogIndex(1234)
+        with self.assertRaises(livy.exception.TypeError):
+            module.LivyLogIndex(":memory:", flush_every=0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "subdir", "index.sqlite3")
+            with module.LivyLogIndex(path) as index:
+                index.write(_record(0, "test"))
+            with module.LivyLogIndex(path) as index:
+                self.assertEqual(len(index.search()), 1)
+
+            with self.assertRaises(livy.exception.OperationError):
+                module.LivyLogIndex(tmpdir)
+
+    def test_search(self):
+        results = self.index.search()
+        self.assertEqual([r.line for r in results], [0, 1, 2, 3])
+        self.assertEqual(
+            results[0],
+            module.LivyLogSearchResult(
+                batch_id=1,
+                line=0,
+                created=datetime.datetime(2021, 5, 1, 1, tzinfo=datetime.timezone.utc),
+                level=logging.INFO,
+                name="Foo",
+                section="stdout",
+                message="Starting job",
+            ),
+        )
+
+        # text
+        self.assertEqual([r.line for r in self.index.search("task")], [1, 2])
+        self.assertEqual([r.line for r in self.index.search("stage 1.0")], [1])
+        self.assertEqual([r.line for r in self.index.search('"job')], [0, 3])
+
+        # batch
+        self.assertEqual([r.line for r in self.index.search(batch_ids=[2])], [2, 3])
+        with self.assertRaises(livy.exception.TypeError):
+            self.index.search(batch_ids=["1"])
+
+        # time
+        since = datetime.datetime(2021, 5, 1, 2, tzinfo=datetime.timezone.utc)
+        until = datetime.datetime(2021, 5, 1, 4, tzinfo=datetime.timezone.utc)
+        self.assertEqual(
+            [r.line for r in self.index.search(since=since, until=until)], [1, 2]
+        )
+
+        # level
+        self.assertEqual(
+            [r.line for r in self.index.search(level=logging.WARNING)], [1, 2]
+        )
+
+        # logger name
+        self.assertEqual(
+            [r.line for r in self.index.search(name="TaskSetManager")], [1, 2]
+        )
+        self.assertEqual(
+            [r.line for r in self.index.search(name="org.apache.spark")], [1, 3]
+        )
+        self.assertEqual([r.line for r in self.index.search(name="Manager")], [])
+
+        # combined
+        self.assertEqual(
+            [
+                r.line
+                for r in self.index.search(
+                    "task", level=logging.ERROR, name="TaskSetManager", since=since
+                )
+            ],
+            [2],
+        )
+
+        # limit
+        self.assertEqual(len(self.index.search(limit=1)), 1)
+
+    def test_search_substring(self):
+        self.index.full_text_search = False
+        self.assertEqual([r.line for r in self.index.search("100%_")], [2])
+        self.assertEqual([r.line for r in self.index.search("ask")], [1, 2])
+
+    def test_concurrent_write(self):
+        def write(batch_id):
+            for i in range(100):
+                self.index.write(_record(i, "message %d" % i, batch_id=batch_id))
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(10, 14)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(self.index.search(limit=None)), 404)
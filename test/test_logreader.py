@@ -1,4 +1,6 @@
 import datetime
+import io
+import json
 import logging
 import re
 import time
@@ -6,6 +8,7 @@ import unittest
 import unittest.mock
 
 import livy.client
+import livy.exception
 import livy.logreader as module
 
 
@@ -72,6 +75,116 @@ class LivyBatchLogReaderTester(unittest.TestCase):
 
         self.assertEqual(len(logS.output), 2)
 
+    def test_export(self):
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "test stdout extraction",
+            "21/05/01 15:21:03 INFO SecurityManager: Changing view acls to: livy",
+            "21/05/01 15:21:23 INFO Client: ",
+            "\t client token: N/A",
+            "  ",
+            "extra stdout here",
+            "\nstderr: ",
+            "stderr log here",
+        ]
+
+        buf = io.StringIO()
+        with unittest.mock.patch.object(self.reader, "_emit") as emit:
+            self.assertEqual(self.reader.export(buf, "jsonl"), 5)
+        emit.assert_not_called()
+
+        records = [json.loads(line) for line in buf.getvalue().splitlines()]
+        self.assertEqual(
+            [(r["name"], r["section"], r["line"]) for r in records],
+            [
+                ("stdout", "stdout", 1),
+                ("SecurityManager", "stdout", 2),
+                ("Client", "stdout", 3),
+                ("stdout", "stdout", 6),
+                ("stderr", "stderr", 9),
+            ],
+        )
+        self.assertIsNone(records[0]["created"])
+        self.assertEqual(records[1]["created"], "2021-05-01T15:21:03+00:00")
+        self.assertEqual(records[3]["created"], "2021-05-01T15:21:23+00:00")
+        self.assertEqual(records[4]["batch_id"], 1234)
+
+    def test_export_pages(self):
+        lines = [
+            "stdout: ",
+            "test stdout extraction",
+            "21/05/01 15:21:03 INFO SecurityManager: Changing view acls to: livy",
+            "21/05/01 15:21:23 INFO Client: ",
+            "\t client token: N/A",
+            "  ",
+            "extra stdout here",
+            "\nstderr: ",
+            "stderr log here",
+        ]
+        self.client.get_batch_log.side_effect = lambda _, from_, size: lines[
+            from_ : from_ + size
+        ]
+
+        # records across pages are the same as reading all at once
+        expected = None
+        for page_size in (len(lines) + 1, 4, 3, 1):
+            sink = unittest.mock.MagicMock()
+            with unittest.mock.patch.object(self.reader, "_emit") as emit:
+                self.assertEqual(self.reader.export_pages(sink, page_size), 5)
+            emit.assert_not_called()
+            sink.flush.assert_called_once()
+
+            records = [c[0][0] for c in sink.write.call_args_list]
+            expected = expected or records
+            self.assertEqual(records, expected, f"page_size={page_size}")
+
+        self.assertEqual(
+            [(r.name, r.section, r.line, r.message) for r in expected],
+            [
+                ("stdout", "stdout", 1, "test stdout extraction"),
+                ("SecurityManager", "stdout", 2, "Changing view acls to: livy"),
+                ("Client", "stdout", 3, "client token: N/A"),
+                ("stdout", "stdout", 6, "extra stdout here"),
+                ("stderr", "stderr", 9, "stderr log here"),
+            ],
+        )
+        self.assertEqual(
+            expected[3].created,
+            datetime.datetime(2021, 5, 1, 15, 21, 23, tzinfo=datetime.timezone.utc),
+        )
+
+        with self.assertRaises(livy.exception.TypeError):
+            self.reader.export_pages(sink, 0)
+        with self.assertRaises(livy.exception.TypeError):
+            self.reader.export_pages(object())
+
+    def test_add_sink(self):
+        with self.assertRaises(livy.exception.TypeError):
+            self.reader.add_sink(object())
+
+        sink = unittest.mock.MagicMock()
+        self.reader.add_sink(sink)
+
+        self.client.get_batch_log.return_value = [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO SecurityManager: Changing view acls to: livy",
+            "\nstderr: ",
+            "stderr log here",
+        ]
+        with self.assertLogs("SecurityManager"):
+            self.reader.read()
+            self.reader.read()  # duplicated logs are not written again
+
+        records = [c[0][0] for c in sink.write.call_args_list]
+        self.assertEqual(
+            [(r.name, r.section, r.line, r.batch_id) for r in records],
+            [
+                ("SecurityManager", "stdout", 1, 1234),
+                ("stderr", "stderr", 4, 1234),
+            ],
+        )
+        self.assertEqual(sink.flush.call_count, 2)
+
     def test_read_fail(self):
         pattern = re.compile("^ERROR:", re.MULTILINE)
         self.reader._parsers[pattern] = lambda: None  # signature not match
@@ -88,6 +201,26 @@ class LivyBatchLogReaderTester(unittest.TestCase):
         self.client.get_batch_log.return_value = []
         self.reader.read_until_finish(block=True, interval=0.01)
 
+    def test_add_state_listener(self):
+        with self.assertRaises(livy.exception.TypeError):
+            self.reader.add_state_listener(object())
+
+        listener = unittest.mock.Mock()
+        self.reader.add_state_listener(listener)
+
+        self.client.get_batch_state.side_effect = ["starting", "running", "success"]
+        self.client.get_batch_log.return_value = []
+        self.reader.read_until_finish(block=True, interval=0.01)
+
+        listener.assert_has_calls(
+            [
+                unittest.mock.call("starting"),
+                unittest.mock.call("running"),
+                unittest.mock.call("success"),
+            ]
+        )
+        self.client.is_batch_ended.assert_not_called()
+
     def test_read_until_finish_unblock(self):
         self.client.is_batch_ended.side_effect = [False, True]
         self.client.get_batch_log.return_value = []
@@ -120,6 +253,56 @@ class LivyBatchLogReaderTester(unittest.TestCase):
         with self.assertRaises(Exception):
             self.reader.stop_read()
 
+    def test_read_until_finish_pipeline(self):
+        # emitting is slow, but it should not block fetching
+        fetch_times = []
+        emit_times = []
+
+        def get_batch_log(*args, **kwargs):
+            fetch_times.append(time.time())
+            return ["21/05/01 15:21:03 INFO Foo: test message"]
+
+        def emit(*_):
+            time.sleep(0.2)
+            emit_times.append(time.time())
+
+        self.client.is_batch_ended.side_effect = [False] * 5 + [True]
+        self.client.get_batch_log.side_effect = get_batch_log
+
+        with unittest.mock.patch.object(self.reader, "_emit", side_effect=emit):
+            self.reader.read_until_finish(block=True, interval=0.01)
+
+        self.assertEqual(len(fetch_times), 6)
+        self.assertEqual(len(emit_times), 6)
+        self.assertLess(fetch_times[2], emit_times[0])
+
+        stats = self.reader.pipeline_stats
+        self.assertEqual(stats["fetch"].count, 6)
+        self.assertEqual(stats["parse"].count, 6)
+        self.assertEqual(stats["emit"].count, 6)
+        self.assertGreaterEqual(stats["emit"].max_time, 0.2)
+        self.assertGreaterEqual(stats["emit"].max_queue_depth, 1)
+        self.assertIn("emit", repr(stats["emit"]))
+
+    def test_read_until_finish_error(self):
+        self.client.is_batch_ended.return_value = False
+        self.client.get_batch_log.side_effect = livy.exception.RequestError(0, "Test")
+
+        with self.assertRaises(livy.exception.RequestError):
+            self.reader.read_until_finish(block=True, interval=0.01)
+
+    def test_read_until_finish_stage_error(self):
+        self.client.is_batch_ended.side_effect = [False, True]
+        self.client.get_batch_log.return_value = ["foo"]
+
+        with unittest.mock.patch.object(
+            self.reader, "_emit", side_effect=ValueError()
+        ), self.assertLogs("livy.logreader", "WARNING") as logs:
+            self.reader.read_until_finish(block=True, interval=0.01)
+
+        self.assertEqual(self.reader.pipeline_stats["emit"].errors, 2)
+        self.assertIn("2 log windows of batch#1234 are dropped", logs.output[-1])
+
 
 class ParserTester(unittest.TestCase):
     def test_default_parser(self):
@@ -183,3 +366,216 @@ class ParserTester(unittest.TestCase):
         assert p.created == None
         assert p.level == logging.ERROR
         assert p.message.startswith("test error")
+
+
+class TimestampParserTester(unittest.TestCase):
+    def setUp(self) -> None:
+        # generated range covers leap years, century pivot of `%y` and month ends
+        self.samples = []
+        t = datetime.datetime(1969, 1, 1, 0, 0, 0)
+        while t < datetime.datetime(2069, 1, 1):
+            self.samples.append(t)
+            t += datetime.timedelta(days=3, hours=7, minutes=13, seconds=17)
+
+    def test_spark_time(self):
+        for t in self.samples:
+            s = t.strftime("%y/%m/%d %H:%M:%S")
+            expected = datetime.datetime.strptime(s, "%y/%m/%d %H:%M:%S")
+            self.assertEqual(module._parse_spark_time(s), expected)
+            self.assertEqual(module._parse_spark_time(s), expected)  # cached
+
+        with self.assertRaises(ValueError):
+            module._parse_spark_time("21/13/01 12:34:56")
+
+    def test_yarn_time(self):
+        for t in self.samples:
+            for tz in ("+0800", "-0530", "+0000"):
+                s = t.strftime(f"%a %b %d %H:%M:%S {tz} %Y")
+                expected = datetime.datetime.strptime(s, "%a %b %d %H:%M:%S %z %Y")
+                self.assertEqual(module._parse_yarn_time(s), expected)
+                self.assertEqual(
+                    module._parse_yarn_time(s).utcoffset(), expected.utcoffset()
+                )
+
+        with self.assertRaises(ValueError):
+            module._parse_yarn_time("Thr May 27 08:40:24 +0800 2021")
+
+    def test_benchmark(self):
+        import timeit
+
+        lines = [
+            t.strftime("%y/%m/%d %H:%M:%S")
+            for t in self.samples[:100]
+            for _ in range(20)
+        ]
+
+        def run_strptime():
+            for s in lines:
+                datetime.datetime.strptime(s, "%y/%m/%d %H:%M:%S")
+
+        def run_fast():
+            for s in lines:
+                module._parse_spark_time(s)
+
+        time_strptime = min(timeit.repeat(run_strptime, number=3, repeat=3))
+        time_fast = min(timeit.repeat(run_fast, number=3, repeat=3))
+        self.assertLess(time_fast, time_strptime)
+
+
+class ScannerTester(unittest.TestCase):
+    def test_equivalent_to_regex(self):
+        import random
+
+        fragments = [
+            "",
+            "a",
+            " b",
+            "  c",
+            "stderr: ",
+            "Traceback (most recent call last):",
+            '  File "<string>", line 1, in <module>',
+            "ValueError: test",
+            "/a.py:1: UserWarning: msg",
+            "/a.py:1: UserWarning: ",
+            "./b.py:2: W: foo /c.py:3: X: bar",
+            "C:\\d.py:4: Y: baz",
+            "usage: prog [-h] foo",
+            "usage: prog [-h] usage: prog [-h] bar",
+            " baz",
+            " prog: error: error: qux",
+            "prog: error: test",
+            "prog: error: ",
+        ]
+
+        rand = random.Random(0)
+        for name in ("Python traceback", "Python warning", "Python argerror"):
+            scanner, _ = module._BUILTIN_PARSERS[name]
+            pattern = re.compile(scanner.pattern, re.RegexFlag.MULTILINE)
+
+            for _ in range(3000):
+                text = "\n".join(rand.choices(fragments, k=rand.randint(0, 12)))
+                pos = rand.randint(0, len(text))
+                m1 = pattern.search(text, pos)
+                m2 = scanner.search(text, pos)
+                if m1 is None:
+                    self.assertIsNone(m2, text)
+                    continue
+                self.assertIsNotNone(m2, text)
+                self.assertEqual(m1.span(), m2.span(), text)
+                self.assertEqual(m1.groups(), m2.groups(), text)
+
+    def test_match(self):
+        scanner, _ = module._BUILTIN_PARSERS["Python traceback"]
+        text = "Traceback (most recent call last):\n  foo\nValueError"
+        self.assertIsNotNone(scanner.match(text))
+        self.assertIsNone(scanner.match("\n" + text))
+
+        m = scanner.match(text)
+        self.assertEqual(m[0], m.group())
+        self.assertEqual(m.span(1), (m.start(1), m.end(1)))
+        self.assertIn("ValueError", repr(m))
+
+
+class PathologicalInputTester(unittest.TestCase):
+    SIZE = 100 * 1024 * 1024
+    TIME_LIMIT = 2.0
+
+    def assertFast(self, text: str):
+        for name in ("Python traceback", "Python warning", "Python argerror"):
+            scanner, _ = module._BUILTIN_PARSERS[name]
+            tic = time.perf_counter()
+            scanner.search(text)
+            elapsed = time.perf_counter() - tic
+            self.assertLess(elapsed, self.TIME_LIMIT, f"{name} is too slow")
+
+    def repeat(self, line: str, header: str = "") -> str:
+        return header + line * (self.SIZE // len(line))
+
+    def test_indented_lines(self):
+        self.assertFast(
+            self.repeat(
+                "  indented line without terminator\n",
+                "Traceback (most recent call last):\n",
+            )
+        )
+
+    def test_unclosed_warnings(self):
+        self.assertFast(self.repeat("/path/to/script.py:1: UserWarning: message\n"))
+
+    def test_unclosed_usage(self):
+        self.assertFast(self.repeat(" usage: prog [-h] foo\n", "usage: prog [-h]\n"))
+
+
+class ParallelParseTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = unittest.mock.MagicMock(spec=livy.client.LivyClient)
+        self.reader = module.LivyBatchLogReader(self.client, 1234)
+
+        lines = [
+            "stdout: ",
+            "21/05/01 15:21:03 INFO SecurityManager: Changing view acls to: livy",
+            "21/05/01 15:21:23 INFO Client: ",
+            "\t client token: N/A",
+            "\t queue: default",
+            "plain text",
+            "Traceback (most recent call last):",
+            '  File "<string>", line 1, in <module>',
+            "21/05/01 15:21:24 INFO Foo: inside traceback",
+            "ValueError: test",
+            "/livy/logreader.py:115: UserWarning: Test",
+            '  warnings.warn("Test")',
+            "usage: example [-h] foo",
+            "example: error: test error",
+            "\nstderr: ",
+            "stderr log here",
+            "[Tue May 25 08:40:24 +0800 2021] Application is added to the scheduler",
+            "\nYARN Diagnostics: ",
+            "21/05/01 15:21:25 WARN Bar: test message",
+        ]
+        self.logs = "\n".join(lines * 50)
+
+    def test_iter_parsed_parallel(self):
+        expected = list(self.reader._iter_parsed(self.logs))
+        for chunk_size in (100, 1000, 5000):
+            self.assertGreater(len(self.reader._split_logs(self.logs, chunk_size)), 2)
+            self.assertEqual(
+                expected,
+                list(self.reader._iter_parsed_parallel(self.logs, 2, chunk_size)),
+            )
+
+    def test_split_logs(self):
+        for start, end, section in self.reader._split_logs(self.logs, 500):
+            chunk = self.logs[start:end]
+            self.assertRegex(chunk, r"^(stdout|stderr|YARN|\d{2})")
+            self.assertNotRegex(chunk, r"^21/05/01 15:21:24 INFO Foo")
+            self.assertIn(section, ("stdout", "stderr", "YARN Diagnostics"))
+
+    def test_iter_parsed_parallel_fallback(self):
+        # single chunk
+        expected = list(self.reader._iter_parsed(self.logs))
+        self.assertEqual(
+            expected, list(self.reader._iter_parsed_parallel(self.logs, 2, 2**30))
+        )
+
+        # not picklable
+        self.reader.add_parsers(re.compile(r"^Nothing$"), lambda m: None)
+        with self.assertLogs("livy.logreader", "WARNING"):
+            self.assertEqual(
+                expected, list(self.reader._iter_parsed_parallel(self.logs, 2, 100))
+            )
+
+    def test_parse_error(self):
+        self.reader.add_parsers(re.compile(r"^plain text$", re.M), _failed_parser)
+        with self.assertLogs("livy.logreader", "ERROR") as cm:
+            list(self.reader._iter_parsed_parallel(self.logs, 2, 1000))
+        self.assertIn("Error during parsing log", cm.output[0])
+        self.assertIn("ValueError", cm.output[0])
+
+    def test_read_parallel(self):
+        self.client.get_batch_log.return_value = self.logs.split("\n")
+        with self.assertLogs("Foo", "INFO"), self.assertLogs("stderr", "ERROR"):
+            self.reader.read_parallel(2, 1000)
+
+
+def _failed_parser(match):
+    raise ValueError("test error")
@@ -0,0 +1,148 @@
+import datetime
+import unittest
+
+import livy
+import livy.history
+import livy.recommend as module
+
+
+def run(
+    duration=100.0,
+    state="success",
+    executor_memory="4g",
+    num_executors=8,
+    executor_cores=2,
+    **metrics,
+):
+    return livy.history.LivyRunRecord(
+        id=None,
+        key="test.py",
+        script="test.py",
+        session_name=None,
+        batch_id=1,
+        state=state,
+        submitted=datetime.datetime(2021, 5, 1, tzinfo=datetime.timezone.utc),
+        duration=duration,
+        queue_wait=None,
+        conf={},
+        resources={
+            "executor_memory": executor_memory,
+            "executor_cores": executor_cores,
+            "num_executors": num_executors,
+        },
+        stages={},
+        metrics=metrics,
+    )
+
+
+class RecommendTester(unittest.TestCase):
+    resources = {
+        "driver_memory": None,
+        "driver_cores": None,
+        "executor_memory": "4096m",
+        "executor_cores": 2,
+        "num_executors": 8,
+    }
+
+    def test_not_enough_runs(self):
+        runs = [run(failures={"yarn-memory-kill": 2})] * 2
+        self.assertEqual(module.recommend(runs, self.resources), [])
+        self.assertEqual(len(module.recommend(runs, self.resources, min_runs=2)), 1)
+
+        # runs with other settings are not counted
+        runs.append(run(executor_memory="2g", failures={"yarn-memory-kill": 2}))
+        self.assertEqual(module.recommend(runs, self.resources), [])
+
+    def test_memory(self):
+        runs = [
+            run(state="dead", failures={"yarn-memory-kill": 1}),
+            run(failures={"gc-overhead": 3}),
+            run(failures={"executor-lost": 1}),
+            run(),
+        ]
+        (advice,) = module.recommend(runs, self.resources)
+        self.assertEqual(advice.field, "executor_memory")
+        self.assertEqual(advice.current, "4g")
+        self.assertEqual(advice.suggested, "5g")
+        self.assertEqual(
+            advice.reason,
+            "gc-overhead and yarn-memory-kill found in 2 of the last 4 runs with the "
+            "current settings",
+        )
+
+        # rounded up to 512 MB
+        resources = dict(self.resources, executor_memory="1g")
+        runs = [run(executor_memory="1g", failures={"gc-overhead": 1})] * 3
+        (advice,) = module.recommend(runs, resources)
+        self.assertEqual(advice.suggested, "1536m")
+
+        # not in most of the runs
+        runs = [run(failures={"yarn-memory-kill": 1}), run(), run()]
+        self.assertEqual(module.recommend(runs, self.resources), [])
+
+        # not set
+        resources = dict(self.resources, executor_memory=None)
+        runs = [run(executor_memory=None, failures={"gc-overhead": 1})] * 3
+        self.assertEqual(module.recommend(runs, resources), [])
+
+    def test_executors(self):
+        runs = [
+            run(tasks={"0": 4, "1": 6}, executors=3),
+            run(tasks={"0": 4, "1": 5}, executors=2),
+            run(tasks={"0": 4, "1": 6}, executors=3),
+        ]
+        (advice,) = module.recommend(runs, self.resources)
+        self.assertEqual(advice.field, "num_executors")
+        self.assertEqual(advice.current, 8)
+        self.assertEqual(advice.suggested, 3)
+        self.assertIn("at most 3 of 8 executors ran tasks", advice.reason)
+
+        # the largest stage would take more waves
+        runs.append(run(tasks={"0": 40}, executors=3))
+        self.assertEqual(module.recommend(runs, self.resources), [])
+
+        # all executors are used
+        runs = [run(tasks={"0": 100}, executors=8)] * 3
+        self.assertEqual(module.recommend(runs, self.resources), [])
+
+        # no task logs recorded
+        runs = [run()] * 3
+        self.assertEqual(module.recommend(runs, self.resources), [])
+
+    def test_revert(self):
+        runs = [run(duration=200, num_executors=4)] * 3 + [run(duration=100)] * 3
+        resources = dict(self.resources, num_executors=4)
+        (advice,) = module.recommend(runs, resources)
+        self.assertEqual(advice.field, "num_executors")
+        self.assertEqual(advice.current, 4)
+        self.assertEqual(advice.suggested, 8)
+        self.assertEqual(
+            advice.reason,
+            "runs with the current settings took 200s in median, 200% of 100s with "
+            "num_executors=8",
+        )
+
+        # not much slower
+        runs = [run(duration=110, num_executors=4)] * 3 + [run(duration=100)] * 3
+        self.assertEqual(module.recommend(runs, resources), [])
+
+    def test_invalid(self):
+        with self.assertRaises(livy.TypeError):
+            module.recommend([], self.resources, min_runs=0)
+        with self.assertRaises(livy.TypeError):
+            module.recommend([], self.resources, memory_step=1)
+        with self.assertRaises(livy.TypeError):
+            module.recommend([], self.resources, slowdown=0.5)
+
+
+class MemoryTester(unittest.TestCase):
+    def test_parse_memory(self):
+        self.assertEqual(module.parse_memory("512m"), 512)
+        self.assertEqual(module.parse_memory("4G"), 4096)
+        self.assertEqual(module.parse_memory("2gb"), 2048)
+        with self.assertRaises(livy.TypeError):
+            module.parse_memory("1t")
+
+    def test_format_memory(self):
+        self.assertEqual(module.format_memory(4096), "4g")
+        self.assertEqual(module.format_memory(1536), "1536m")
@@ -0,0 +1,59 @@
+import unittest
+import unittest.mock
+
+import livy
+import livy.retry as module
+
+
+class LivyRetryPolicyTester(unittest.TestCase):
+    def record(self, message):
+        return unittest.mock.Mock(message=message)
+
+    def test_should_retry(self):
+        policy = module.LivyRetryPolicy(max_attempts=3, signatures=["yarn-preemption"])
+
+        matcher = policy.matcher()
+        matcher.write(self.record("java.lang.NullPointerException"))
+        matcher.flush()
+        self.assertFalse(policy.should_retry(1, matcher))
+
+        matcher.write(self.record("Container container_01 was preempted."))
+        self.assertTrue(policy.should_retry(1, matcher))
+        self.assertTrue(policy.should_retry(2, matcher))
+        self.assertFalse(policy.should_retry(3, matcher))
+
+        # new matcher for each attempt
+        self.assertFalse(policy.should_retry(1, policy.matcher()))
+
+    def test_any_failure(self):
+        policy = module.LivyRetryPolicy(max_attempts=2)
+        self.assertTrue(policy.should_retry(1, policy.matcher()))
+        self.assertFalse(policy.should_retry(2, policy.matcher()))
+
+        policy = module.LivyRetryPolicy()
+        self.assertFalse(policy.should_retry(1, policy.matcher()))
+
+    def test_state(self):
+        policy = module.LivyRetryPolicy(max_attempts=2)
+        self.assertTrue(policy.should_retry(1, policy.matcher(), "dead"))
+        self.assertFalse(policy.should_retry(1, policy.matcher(), "killed"))
+
+    def test_custom_signature(self):
+        policy = module.LivyRetryPolicy(max_attempts=2, signatures=[r"Disk quota \w+"])
+        matcher = policy.matcher()
+        matcher.write(self.record("ERROR: Disk quota exceeded"))
+        self.assertEqual({r"Disk quota \w+"}, matcher.matched)
+
+    def test_delay(self):
+        policy = module.LivyRetryPolicy(max_attempts=5, backoff=10, max_backoff=30)
+        self.assertEqual(10, policy.delay(1))
+        self.assertEqual(20, policy.delay(2))
+        self.assertEqual(30, policy.delay(3))
+
+    def test_invalid(self):
+        with self.assertRaises(livy.TypeError):
+            module.LivyRetryPolicy(max_attempts=0)
+        with self.assertRaises(livy.TypeError):
+            module.LivyRetryPolicy(backoff=-1)
+        with self.assertRaises(livy.OperationError):
+            module.LivyRetryPolicy(signatures=["("])
@@ -0,0 +1,20 @@
+import datetime
+import unittest
+
+import livy.utils.duration as module
+
+
+class ParseDurationTester(unittest.TestCase):
+    def test_success(self):
+        self.assertEqual(module.parse_duration("90"), datetime.timedelta(seconds=90))
+        self.assertEqual(module.parse_duration("30m"), datetime.timedelta(minutes=30))
+        self.assertEqual(module.parse_duration("1.5H"), datetime.timedelta(hours=1.5))
+        self.assertEqual(
+            module.parse_duration("1d12h"), datetime.timedelta(days=1, hours=12)
+        )
+        self.assertEqual(module.parse_duration("2w"), datetime.timedelta(weeks=2))
+
+    def test_fail(self):
+        for text in ("", "h", "1x", "1h 2m", "-1h", "1hh"):
+            with self.assertRaises(ValueError, msg=text):
+                module.parse_duration(text)
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import livy.utils.hashing as module
+
+
+class FileHashCacheTester(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+        self.filepath = os.path.join(self.tmpdir, "lib.jar")
+        with open(self.filepath, "wb") as fp:
+            fp.write(b"a" * (module.CHUNK_SIZE + 1))
+
+    def test_file_digest(self):
+        self.assertEqual(
+            hashlib.sha256(b"a" * (module.CHUNK_SIZE + 1)).hexdigest(),
+            module.file_digest(self.filepath),
+        )
+
+    def test_cache(self):
+        cache_path = os.path.join(self.tmpdir, "cache", "hashes.json")
+        cache = module.FileHashCache(cache_path)
+        digest = cache.get(self.filepath)
+        cache.save()
+
+        # reused in new process
+        cache = module.FileHashCache(cache_path)
+        with unittest.mock.patch(
+            "livy.utils.hashing.file_digest", side_effect=AssertionError
+        ):
+            self.assertEqual(digest, cache.get(self.filepath))
+
+        # changed
+        with open(self.filepath, "wb") as fp:
+            fp.write(b"b")
+        self.assertEqual(hashlib.sha256(b"b").hexdigest(), cache.get(self.filepath))
+
+    def test_broken_cache(self):
+        cache_path = os.path.join(self.tmpdir, "hashes.json")
+        with open(cache_path, "w") as fp:
+            fp.write("not a json")
+        cache = module.FileHashCache(cache_path)
+        self.assertEqual(64, len(cache.get(self.filepath)))
+        cache.save()
@@ -1,3 +1,4 @@
+import datetime
 import decimal
 import importlib
 import logging
@@ -110,6 +111,20 @@ class EnhancedConsoleHandlerTester(unittest.TestCase):
 
         assert pb.update.call_count == 3
 
+    def test_set_estimate(self):
+        self.handler._tqdm_create = unittest.mock.Mock()
+
+        self.handler._set_progressbar("1.0", 0, 10)
+        self.assertIsNone(self.handler._tqdm_create.call_args[1]["postfix"])
+
+        eta = datetime.datetime(2021, 5, 1, 12, 34, 56).astimezone()
+        self.handler.set_estimate(eta, {"2": 65.0})
+        self.handler._set_progressbar("2.0", 0, 10)
+        self.assertEqual(
+            self.handler._tqdm_create.call_args[1]["postfix"],
+            "usual 65s, ETA 12:34:56",
+        )
+
     def test_close_progressbar(self):
         # not exists
         self.handler._close_progressbar("1.0")